@@ -21,8 +21,9 @@ import io
 import json
 import argparse
 import contextlib
+from bisect import bisect_left
 from datetime import datetime, date
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 import pandas as pd
 import numpy as np
@@ -42,7 +43,7 @@ from src.config import get_config
 from src.technical_analyzer import (
     calculate_sma, calculate_ema, calculate_rsi, calculate_macd,
     calculate_bollinger_bands, calculate_atr, calculate_stochastic,
-    detect_support_resistance,
+    detect_support_resistance, detect_pivot_indices, build_sr_levels,
 )
 from src.signal_generator import SignalGenerator, calculate_risk_score, parse_support_resistance
 
@@ -507,6 +508,124 @@ def sentiment_at(news_df: pd.DataFrame, ts: pd.Timestamp) -> Dict:
     }
 
 
+_EMPTY_SENTIMENT = {'weighted_avg': 0.0, 'confidence': 0.4, 'count': 0}
+
+# sentiment_at() decay bucket-jei: (felső korhatár órában, súly), fiatalabbtól
+_DECAY_BUCKETS = (
+    (2,  DECAY_WEIGHTS['0-2h']),
+    (6,  DECAY_WEIGHTS['2-6h']),
+    (12, DECAY_WEIGHTS['6-12h']),
+    (24, DECAY_WEIGHTS['12-24h']),
+)
+_HOUR_NS = 3_600_000_000_000
+
+
+class NewsWindow:
+    """
+    Csúszó 24 órás hír-ablak — sentiment_at() inkrementális változata.
+
+    A bar-ok időrendben jönnek, így az ablak határai (és a 2h / 6h / 12h
+    bucket határok) csak előre mozognak: pointerenként minden hír egyszer lép
+    be és egyszer lép ki. Bucket-enként futó összegeket tartunk
+    (score * relevance * duration, illetve relevance * duration), a decay súly
+    csak a végén szorzódik rájuk → bar-onként O(1) a maszkolás + iterrows()
+    helyett.
+
+        window = NewsWindow(news_df)
+        sent = window.at(ts)     # == sentiment_at(news_df, ts)
+    """
+
+    def __init__(self, news_df: pd.DataFrame):
+        if news_df.empty:
+            self._n = 0
+            return
+        df = news_df.sort_values('published_at', kind='stable')
+        self._n   = len(df)
+        self._pub = pd.DatetimeIndex(df['published_at']).as_unit('ns').asi8   # UTC ns
+        # Ugyanazok a default-ok, mint sentiment_at()-ban
+        rel  = [float(v or 0.5) for v in df['av_relevance_score']]
+        dur  = [DURATION_WEIGHT.get(str(v or 'days'), 1.0) for v in df['llm_impact_duration']]
+        self._base  = [r * d for r, d in zip(rel, dur)]
+        self._sbase = [float(s) * b for s, b in zip(df['active_score'], self._base)]
+        self._conf  = [float(v or 0.5) for v in df['sentiment_confidence']]
+        self._reset()
+
+    def _reset(self):
+        self._last_ts = None
+        self._hi = 0                                  # pub <= ts
+        self._edges = [0] * len(_DECAY_BUCKETS)       # pub <= ts - bucket határ
+        self._ws = [0.0] * len(_DECAY_BUCKETS)        # Σ score * rel * dur
+        self._w  = [0.0] * len(_DECAY_BUCKETS)        # Σ rel * dur
+        self._conf_sum = 0.0
+
+    def _advance(self, ts_ns: int):
+        if self._last_ts is not None and ts_ns < self._last_ts:
+            self._reset()                             # visszafelé lépés: újraépítés
+        self._last_ts = ts_ns
+
+        pub, ws, w = self._pub, self._ws, self._w
+
+        # Belépők: a legfiatalabb bucket-be
+        hi = self._hi
+        while hi < self._n and pub[hi] <= ts_ns:
+            ws[0] += self._sbase[hi]
+            w[0]  += self._base[hi]
+            self._conf_sum += self._conf[hi]
+            hi += 1
+        self._hi = hi
+
+        # Öregedés: bucket k → k+1, az utolsóból ki az ablakból
+        last = len(_DECAY_BUCKETS) - 1
+        upper = hi
+        for k, (hours, _) in enumerate(_DECAY_BUCKETS):
+            cutoff = ts_ns - hours * _HOUR_NS
+            p = self._edges[k]
+            while p < upper and pub[p] <= cutoff:
+                ws[k] -= self._sbase[p]
+                w[k]  -= self._base[p]
+                if k < last:
+                    ws[k + 1] += self._sbase[p]
+                    w[k + 1]  += self._base[p]
+                else:
+                    self._conf_sum -= self._conf[p]
+                p += 1
+            self._edges[k] = p
+            if p == upper:                            # üres bucket → nincs drift
+                ws[k] = w[k] = 0.0
+            upper = p
+
+        if self._hi == self._edges[last]:
+            self._conf_sum = 0.0
+
+    def at(self, ts: pd.Timestamp) -> Dict:
+        """Sentiment a ts előtti 24 órában publikált hírekből (sentiment_at() formátum)."""
+        if self._n == 0:
+            return dict(_EMPTY_SENTIMENT)
+
+        ts_utc = ts.tz_localize('UTC') if ts.tzinfo is None else ts.tz_convert('UTC')
+        self._advance(ts_utc.value)
+
+        n = self._hi - self._edges[-1]
+        weights_sum = sum(decay * w for (_, decay), w in zip(_DECAY_BUCKETS, self._w))
+        if n == 0 or weights_sum == 0:
+            return dict(_EMPTY_SENTIMENT)
+
+        weighted_avg = sum(decay * ws for (_, decay), ws in zip(_DECAY_BUCKETS, self._ws)) / weights_sum
+        if   n >= 5: vol = 1.0
+        elif n >= 3: vol = 0.85
+        elif n >= 2: vol = 0.70
+        else:        vol = 0.55
+
+        fb_conf = self._conf_sum / n
+        confidence = min(fb_conf * vol, 0.90)
+
+        return {
+            'weighted_avg': float(np.clip(weighted_avg, -1.0, 1.0)),
+            'confidence':   float(confidence),
+            'count':        n,
+        }
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # SUPPORT / RESISTANCE  (daily, from 1d data, cached per date)
 # ─────────────────────────────────────────────────────────────────────────────
@@ -539,6 +658,64 @@ def sr_for_date(df_1d: pd.DataFrame, target_date: date, config) -> Optional[Dict
         return None
 
 
+class DailySR:
+    """
+    Napi swing S/R — sr_for_date() inkrementális változata.
+
+    sr_for_date(d) csak a d előtti napi bar-ok számától (n) függ: az utolsó
+    lookback_days bar pivotjai + az utolsó close. A pivot státusz (szigorú
+    min / max ±order bar-on belül) csak a szomszédoktól függ, nem az ablaktól,
+    így a teljes sorozat pivotjait egyszer számoljuk (detect_pivot_indices);
+    egy dátumhoz csak az i < n - order pivotok ablakba eső szeletét kell
+    klaszterezni (build_sr_levels) — ezek már nem látnak n utáni bar-t.
+    Az eredmény n szerint cache-elt.
+    """
+
+    def __init__(self, df_1d: pd.DataFrame, config):
+        self.lookback    = getattr(config, 'sr_dbscan_lookback', 180)
+        self.proximity   = getattr(config, 'sr_dbscan_eps', 4.0) / 100.0
+        self.order       = getattr(config, 'sr_dbscan_order', 7)
+        self.min_samples = getattr(config, 'sr_dbscan_min_samples', 3)
+
+        self._dates = list(df_1d.index.date)
+        low   = df_1d['low'].to_numpy(dtype=float)
+        high  = df_1d['high'].to_numpy(dtype=float)
+        self._close = df_1d['close'].to_numpy(dtype=float)
+
+        sup_idx, res_idx = detect_pivot_indices(low, high, self.order)
+        self._sup_idx: List[int] = sup_idx.tolist()
+        self._sup_val: List[float] = low[sup_idx].tolist()
+        self._res_idx: List[int] = res_idx.tolist()
+        self._res_val: List[float] = high[res_idx].tolist()
+        self._cache: Dict[int, Optional[Dict]] = {}
+
+    def _levels(self, n: int) -> Optional[Dict]:
+        if n < 30:
+            return None
+
+        # detect_support_resistance(): tail(lookback), pivot i ∈ [order, len - order)
+        lo = max(0, n - self.lookback) + self.order
+        hi = n - self.order
+        supports = self._sup_val[bisect_left(self._sup_idx, lo):bisect_left(self._sup_idx, hi)]
+        resistances = self._res_val[bisect_left(self._res_idx, lo):bisect_left(self._res_idx, hi)]
+
+        try:
+            with _quiet():
+                return build_sr_levels(
+                    supports, resistances, float(self._close[n - 1]),
+                    self.proximity, self.min_samples,
+                )
+        except Exception:
+            return None
+
+    def for_date(self, target_date: date) -> Optional[Dict]:
+        """== sr_for_date(df_1d, target_date, config)"""
+        n = bisect_left(self._dates, target_date)   # napi bar-ok SZIGORÚAN target_date előtt
+        if n not in self._cache:
+            self._cache[n] = self._levels(n)
+        return self._cache[n]
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # SINGLE-BAR SIGNAL GENERATION
 # ─────────────────────────────────────────────────────────────────────────────
@@ -745,6 +922,18 @@ def generate_bar_signal(
 # PER-TICKER PROCESSING
 # ─────────────────────────────────────────────────────────────────────────────
 
+def _batched(items: Iterable, size: int) -> Iterator[List]:
+    """Legfeljebb size elemű listák egy iterátorból (az utolsó lehet rövidebb)."""
+    batch: List = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
 def process_ticker(
     conn:          sqlite3.Connection,
     ticker_id:     int,
@@ -807,93 +996,80 @@ def process_ticker(
                 hi = mid - 1
         return result
 
-    sr_cache: Dict[date, Optional[Dict]] = {}
-
-    def get_sr(d: date) -> Optional[Dict]:
-        if d not in sr_cache:
-            sr_cache[d] = sr_for_date(df_1d, d, config)
-        return sr_cache[d]
+    # Inkrementális S/R és hír-ablak (bar-onként O(1), nincs újraszeletelés)
+    daily_sr    = DailySR(df_1d, config)
+    news_window = NewsWindow(news_df)
 
-    batch: List[Dict] = []
-    skipped_warmup = 0
+    skipped_warmup = min(MIN_LOOKBACK_BARS, len(df_15m))
     total = len(df_15m)
 
-    print(f"  Generating signals...")
-
-    for i in range(total):
-        ts      = df_15m.index[i]
-        ts_date = ts.date()
-
-        # ── Warmup: skip first MIN_LOOKBACK_BARS bars ──────────────────────
-        if i < MIN_LOOKBACK_BARS:
-            skipped_warmup += 1
-            continue
-
-        # ── from_date filter (still use full history for indicator lookback) ─
-        if from_date and ts_date < from_date:
-            continue
-
-        # ── Skip weekends (belt-and-suspenders) ───────────────────────────
-        if ts.dayofweek >= 5:
-            continue
-
-        stats['market_bars'] += 1
-        ts_str = ts.strftime('%Y-%m-%d %H:%M:%S')
-
-        # ── Skip already generated ─────────────────────────────────────────
-        if ts_str in existing_ts:
-            stats['skipped_existing'] += 1
-            continue
-
-        # ── Indicator values at this bar ───────────────────────────────────
-        ind = indicators_at(ind_series, df_15m, i)
-        if not ind.get('close'):
-            stats['skipped_data'] += 1
-            continue
-
-        # ── Napi ATR (SL/TP kalkuláció és volatilitás-score alapja) ───────
-        # A live signal_generator df_daily ágával azonos: napi True Range ATR14,
-        # szigorúan az előző kereskedési napig (nincs lookahead).
-        daily_atr_val = get_daily_atr_for_date(ts_date)
+    def bar_signals() -> Iterator[Tuple[int, Dict]]:
+        """(bar index, insert sor) — bar-onként, időrendben; a stats-ot útközben frissíti."""
+        for i in range(MIN_LOOKBACK_BARS, total):
+            ts      = df_15m.index[i]
+            ts_date = ts.date()
+
+            # ── from_date filter (still use full history for indicator lookback) ─
+            if from_date and ts_date < from_date:
+                continue
+
+            # ── Skip weekends (belt-and-suspenders) ───────────────────────
+            if ts.dayofweek >= 5:
+                continue
+
+            stats['market_bars'] += 1
+            ts_str = ts.strftime('%Y-%m-%d %H:%M:%S')
+
+            # ── Skip already generated ─────────────────────────────────────
+            if ts_str in existing_ts:
+                stats['skipped_existing'] += 1
+                continue
+
+            # ── Indicator values at this bar ───────────────────────────────
+            ind = indicators_at(ind_series, df_15m, i)
+            if not ind.get('close'):
+                stats['skipped_data'] += 1
+                continue
+
+            # ── Napi ATR (SL/TP kalkuláció és volatilitás-score alapja) ───
+            # A live signal_generator df_daily ágával azonos: napi True Range ATR14,
+            # szigorúan az előző kereskedési napig (nincs lookahead).
+            daily_atr_val = get_daily_atr_for_date(ts_date)
+
+            # ── Daily S/R (inkrementális, napi bar-szám szerint cache-elt) ──
+            sr = daily_sr.for_date(ts_date)
+
+            # ── Sentiment (24h csúszó ablak) ───────────────────────────────
+            sent = news_window.at(ts)
+
+            # ── Generate signal ────────────────────────────────────────────
+            try:
+                row = generate_bar_signal(
+                    ticker_id, ticker_symbol, ticker_name,
+                    ts, ind, sent, sr, config, generator,
+                    daily_atr=daily_atr_val,
+                )
+            except Exception as exc:
+                stats['errors'] += 1
+                if stats['errors'] <= 5:   # only print first 5 errors
+                    print(f"  ERROR at {ts_str}: {exc}")
+                continue
+
+            if row:
+                yield i, row
 
-        # ── Daily S/R (cached) ─────────────────────────────────────────────
-        sr = get_sr(ts_date)
-
-        # ── Sentiment (24h rolling window) ─────────────────────────────────
-        sent = sentiment_at(news_df, ts)
-
-        # ── Generate signal ────────────────────────────────────────────────
-        try:
-            row = generate_bar_signal(
-                ticker_id, ticker_symbol, ticker_name,
-                ts, ind, sent, sr, config, generator,
-                daily_atr=daily_atr_val,
-            )
-        except Exception as exc:
-            stats['errors'] += 1
-            if stats['errors'] <= 5:   # only print first 5 errors
-                print(f"  ERROR at {ts_str}: {exc}")
-            continue
-
-        if row:
-            batch.append(row)
-
-        # ── Batch flush ────────────────────────────────────────────────────
-        if len(batch) >= batch_size:
-            if not dry_run:
-                conn.executemany(INSERT_SQL, batch)
-                conn.commit()
-            stats['inserted'] += len(batch)
-            pct = stats['market_bars'] / max(total - MIN_LOOKBACK_BARS, 1) * 100
-            print(f"  {stats['inserted']:>8,} inserted  ({pct:.1f}%  bar {i+1}/{total})")
-            batch = []
+    print(f"  Generating signals...")
 
-    # Final batch
-    if batch:
+    # ── Streaming írás: batch_size soronként executemany + commit ─────────
+    for chunk in _batched(bar_signals(), batch_size):
         if not dry_run:
-            conn.executemany(INSERT_SQL, batch)
+            conn.executemany(INSERT_SQL, [row for _, row in chunk])
             conn.commit()
-        stats['inserted'] += len(batch)
+        stats['inserted'] += len(chunk)
+        if len(chunk) >= batch_size:
+            i = chunk[-1][0]
+            pct = stats['market_bars'] / max(total - MIN_LOOKBACK_BARS, 1) * 100
+            print(f"  {stats['inserted']:>8,} inserted  ({pct:.1f}%  bar {i+1}/{total})")
 
     print(f"\n  {ticker_symbol} done:")
     print(f"    Warmup skipped  : {skipped_warmup:,}")
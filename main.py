@@ -20,7 +20,7 @@ sys.path.insert(0, str(src_path))
 from config import TrendSignalConfig, get_config
 from news_collector import NewsCollector
 from signal_generator import SignalGenerator, generate_signals_for_tickers, TradingSignal
-from utils import fetch_price_data, fetch_dual_timeframe, display_dataframe_summary, clear_price_cache
+from utils import fetch_price_data, fetch_dual_timeframe, display_dataframe_summary
 
 # Database imports (optional)
 try:
@@ -262,8 +262,8 @@ def run_batch_analysis(
         print("=" * 70)
         print()
         
-        # Clear price cache to ensure fresh data for this run
-        clear_price_cache()
+        # Price cache: entries expire at the next candle close (src.price_cache),
+        # so back-to-back runs reuse unchanged history — no clearing here
         
         # Collect all data first
         collector = NewsCollector(config, db=db)
@@ -285,7 +285,8 @@ def main():
 
     # Unique constraint ellenőrzés / létrehozás
     existing_indexes = [r[1] for r in conn.execute("PRAGMA index_list(price_data)").fetchall()]
-    if "uq_price_data_symbol_ts_interval" not in existing_indexes:
+    # a régi (ticker_symbol, timestamp, interval) nevű index is megfelel, amíg az index migráció le nem váltja
+    if not {"uq_price_data_symbol_interval_ts", "uq_price_data_symbol_ts_interval"} & set(existing_indexes):
         print("Unique constraint létrehozása price_data-n...")
         dup_count = conn.execute("""
             SELECT COUNT(*) FROM (
@@ -303,8 +304,8 @@ def main():
             """)
             conn.commit()
         conn.execute("""
-            CREATE UNIQUE INDEX uq_price_data_symbol_ts_interval
-            ON price_data (ticker_symbol, timestamp, interval)
+            CREATE UNIQUE INDEX uq_price_data_symbol_interval_ts
+            ON price_data (ticker_symbol, interval, timestamp)
         """)
         conn.commit()
         print("OK.")
@@ -88,8 +88,9 @@ def main():
 
     # ── Unique constraint hozzáadása price_data-hoz (ha még nincs) ──────────
     existing_indexes = [r[1] for r in conn.execute("PRAGMA index_list(price_data)").fetchall()]
-    uq_name = "uq_price_data_symbol_ts_interval"
-    if uq_name not in existing_indexes:
+    uq_name = "uq_price_data_symbol_interval_ts"
+    # a régi uq_price_data_symbol_ts_interval is megfelel, amíg az index migráció le nem váltja
+    if not {uq_name, "uq_price_data_symbol_ts_interval"} & set(existing_indexes):
         print(f"\nUnique constraint létrehozása: {uq_name} ...")
         # SQLite-ban CREATE UNIQUE INDEX-szel pótoljuk
         # Előbb ellenőrizzük, hogy a meglévő price_data-ban sincs duplikátum
@@ -115,7 +116,7 @@ def main():
 
         conn.execute(f"""
             CREATE UNIQUE INDEX {uq_name}
-            ON price_data (ticker_symbol, timestamp, interval)
+            ON price_data (ticker_symbol, interval, timestamp)
         """)
         conn.commit()
         print(f"  OK: {uq_name} létrehozva.")
@@ -14,6 +14,8 @@ Key design:
   - trade simulation is in-memory, using pre-loaded price_data candles
   - SignalSimRow replaces the old SignalRow (superset of fields)
   - Old load_signal_rows / load_trade_outcomes are kept for backward compatibility
+  - Batch (NumPy) equivalent of replay_and_simulate(): optimizer/columnar.py —
+    the optimizer fitness path uses that; this module stays the scalar reference
 
 Version: 3.0 – score replay → compute_combined_score_from_indicators (12-component formula)
 Date: 2026-04-06
@@ -26,7 +28,9 @@ from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
-from optimizer.signal_data import SignalSimRow, PriceCandle, load_all_sim_data, _parse_ts
+from optimizer.signal_data import (
+    SignalSimRow, PriceCandle, load_all_sim_data, get_direction_index, _parse_ts,
+)
 from optimizer.trade_simulator import (
     SimConfig, TradeSimResult,
     compute_sl_tp, simulate_trade,
@@ -591,6 +595,7 @@ def replay_and_simulate(
                 future_candles=row.future_candles,
                 score_timeline=ticker_timeline,
                 sim_cfg=sim_cfg,
+                signal_index=get_direction_index(score_timeline, row.ticker, direction),
             )
         except Exception:
             exit_reason, exit_price, pnl = "NO_EXIT", entry_price, 0.0
@@ -22,8 +22,17 @@ Fitness formula (same as genetic.py v2.3.1):
   fitness = min(train_fit, val_fit)
   where train_fit = val_fit = win_rate × profit_factor
 
-Version: 1.0
-Date: 2026-03-07
+Worker pool (v1.1):
+  - A dataset egyszer kerül shared memory-ba (optimizer.shared_dataset), a pool
+    a teljes futás alatt nyitva marad — körönként csak a frozen vektor és az
+    aktív dimenziók utaznak a taskokkal (nincs Pool indítás / adatátvitel körönként)
+
+Fitness cache (v1.2):
+  - optimizer.fitness_cache: a seedelt current_best és az ismétlődő configok
+    körökön át cache-ből jönnek (dekódolt config hash, perzisztens SQLite)
+
+Version: 1.2
+Date: 2026-10-16
 """
 
 import json
@@ -39,12 +48,14 @@ import numpy as np
 from deap import base, creator, tools
 
 from optimizer.atomic_units import ATOMIC_UNITS, sample_active_dims
-from optimizer.fitness import compute_fitness_for_subset, split_rows
+from optimizer.fitness import compute_fitness_for_subset, compute_train_val_fitness, split_rows
+from optimizer.fitness_cache import FitnessCache, dataset_fingerprint
 from optimizer.parameter_space import (
     LOWER_BOUNDS, UPPER_BOUNDS, BASELINE_VECTOR, N_DIMS,
     decode_vector, vector_to_config_diff, get_current_baseline_vector,
 )
 from optimizer.signal_data import load_all_sim_data
+from optimizer.shared_dataset import SharedDataset, load_shared_dataset
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 DATABASE_PATH = BASE_DIR / "trendsignal.db"
@@ -66,52 +77,50 @@ if not hasattr(creator, "IndividualBCD"):
 # Worker process globals (set once per Pool creation via _bcd_worker_init)
 # ---------------------------------------------------------------------------
 
-_bcd_frozen_vector: Optional[List[float]] = None
-_bcd_active_dims: Optional[List[int]] = None
 _bcd_train_rows = None
 _bcd_val_rows = None
 _bcd_score_timeline = None
 
 
-def _bcd_worker_init(frozen_vector, active_dims, train_rows, val_rows, score_timeline):
+def _bcd_worker_init(data_file: str):
     """
     Initialise worker process globals.
-    Called once per Pool creation (Windows spawn-safe pattern).
-
-    frozen_vector : full 52-dim vector, fixed dims come from here.
-    active_dims   : indices of dims the GA is allowed to vary.
+    Called once per worker for the whole BCD run (Windows spawn-safe pattern):
+    the dataset is attached from shared memory, the pool survives all rounds.
     """
-    global _bcd_frozen_vector, _bcd_active_dims
     global _bcd_train_rows, _bcd_val_rows, _bcd_score_timeline
-    _bcd_frozen_vector  = list(frozen_vector)
-    _bcd_active_dims    = list(active_dims)
-    _bcd_train_rows     = train_rows
-    _bcd_val_rows       = val_rows
-    _bcd_score_timeline = score_timeline
+    data = load_shared_dataset(data_file)
+    _bcd_train_rows     = data["train"]
+    _bcd_val_rows       = data["val"]
+    _bcd_score_timeline = data["score_timeline"]
 
 
-def _bcd_worker_evaluate(partial_individual):
+def _bcd_worker_evaluate(task):
     """
     Evaluate a partial individual (active dims only).
 
-    Reconstructs the full 52-dim vector by merging active-dim values
-    from partial_individual with frozen values from _bcd_frozen_vector,
-    then decodes and computes min(train_fit, val_fit).
+    task = (frozen_vector, active_dims, partial_individual) — the round context
+    travels with the task, so one persistent pool serves every BCD round.
+    Reconstructs the full vector by merging active-dim values from
+    partial_individual with frozen values, then decodes and evaluates.
 
-    Returns (fitness,) tuple as required by DEAP.
+    Returns (train_fit, val_fit, stats) — the parent caches it by decoded
+    config (optimizer.fitness_cache) and uses min(train_fit, val_fit).
     """
     from optimizer.parameter_space import decode_vector
-    from optimizer.fitness import compute_fitness_for_subset
+    from optimizer.fitness import compute_train_val_fitness
 
-    # Reconstruct full vector
-    full_vector = list(_bcd_frozen_vector)
-    for i, dim_idx in enumerate(_bcd_active_dims):
-        full_vector[dim_idx] = partial_individual[i]
+    frozen_vector, active_dims, partial_individual = task
+    cfg = decode_vector(_merge_partial(frozen_vector, active_dims, partial_individual))
+    return compute_train_val_fitness(_bcd_train_rows, _bcd_val_rows, _bcd_score_timeline, cfg)
 
-    cfg = decode_vector(full_vector)
-    train_fit, _ = compute_fitness_for_subset(_bcd_train_rows, _bcd_score_timeline, cfg)
-    val_fit,   _ = compute_fitness_for_subset(_bcd_val_rows,   _bcd_score_timeline, cfg)
-    return (min(train_fit, val_fit),)
+
+def _merge_partial(frozen_vector, active_dims, partial_individual) -> List[float]:
+    """Full vector: frozen values + active-dim values from partial_individual."""
+    full_vector = list(frozen_vector)
+    for i, dim_idx in enumerate(active_dims):
+        full_vector[dim_idx] = partial_individual[i]
+    return full_vector
 
 
 # ---------------------------------------------------------------------------
@@ -121,19 +130,22 @@ def _bcd_worker_evaluate(partial_individual):
 def _run_mini_ga(
     frozen_vector: List[float],
     active_dims: List[int],
-    train_rows,
-    val_rows,
-    score_timeline,
+    pool,
+    cache: FitnessCache,
     pop_size: int = 40,
     generations: int = 60,
     crossover_prob: float = 0.70,
     mutation_prob: float = 0.20,
-    n_workers: int = 4,
     stop_flag_path: Optional[Path] = None,
 ) -> Tuple[List[float], float]:
     """
     Run a mini DEAP GA on active_dims only.
 
+    pool  : persistent multiprocessing.Pool initialised with _bcd_worker_init
+            (created once per BCD run by run_bcd_optimizer).
+    cache : FitnessCache of the run — the seeded current-best and repeated
+            configs are not sent to the pool again.
+
     The individual represents ONLY the active_dims values (not the full 52-dim
     vector). decode_vector is called after reconstruction in the worker.
 
@@ -179,51 +191,57 @@ def _run_mini_ga(
 
     hof = tools.HallOfFame(1)
 
-    with multiprocessing.Pool(
-        processes=n_workers,
-        initializer=_bcd_worker_init,
-        initargs=(frozen_vector, active_dims, train_rows, val_rows, score_timeline),
-    ) as pool:
-
-        # Evaluate full initial population
-        fitnesses = pool.map(_bcd_worker_evaluate, pop)
-        for ind, fit in zip(pop, fitnesses):
-            ind.fitness.values = fit
-        hof.update(pop)
-
-        for gen in range(generations):
-            # Check stop flag between generations
-            if stop_flag_path and stop_flag_path.exists():
-                break
-
-            # Elitism: preserve top 2
-            elite = [toolbox.clone(e) for e in tools.selBest(pop, 2)]
+    frozen = list(frozen_vector)
+    active = list(active_dims)
 
-            # Select offspring
-            offspring = [toolbox.clone(o) for o in toolbox.select(pop, len(pop) - 2)]
-
-            # Crossover
-            for c1, c2 in zip(offspring[::2], offspring[1::2]):
-                if random.random() < crossover_prob:
-                    toolbox.mate(c1, c2)
-                    del c1.fitness.values
-                    del c2.fitness.values
+    def _evaluate(individuals):
+        tasks = [(frozen, active, list(ind)) for ind in individuals]
+        results = cache.evaluate(
+            [decode_vector(_merge_partial(*task)) for task in tasks],
+            tasks,
+            lambda pending: pool.map(_bcd_worker_evaluate, pending),
+        )
+        return [(r.fitness,) for r in results]
 
-            # Mutation
-            for mutant in offspring:
-                if random.random() < mutation_prob:
-                    toolbox.mutate(mutant)
-                    del mutant.fitness.values
+    # Evaluate full initial population
+    fitnesses = _evaluate(pop)
+    for ind, fit in zip(pop, fitnesses):
+        ind.fitness.values = fit
+    hof.update(pop)
 
-            # Evaluate changed individuals
-            invalid = [ind for ind in offspring if not ind.fitness.valid]
-            if invalid:
-                fitnesses = pool.map(_bcd_worker_evaluate, invalid)
-                for ind, fit in zip(invalid, fitnesses):
-                    ind.fitness.values = fit
+    for gen in range(generations):
+        # Check stop flag between generations
+        if stop_flag_path and stop_flag_path.exists():
+            break
 
-            pop[:] = elite + offspring
-            hof.update(pop)
+        # Elitism: preserve top 2
+        elite = [toolbox.clone(e) for e in tools.selBest(pop, 2)]
+
+        # Select offspring
+        offspring = [toolbox.clone(o) for o in toolbox.select(pop, len(pop) - 2)]
+
+        # Crossover
+        for c1, c2 in zip(offspring[::2], offspring[1::2]):
+            if random.random() < crossover_prob:
+                toolbox.mate(c1, c2)
+                del c1.fitness.values
+                del c2.fitness.values
+
+        # Mutation
+        for mutant in offspring:
+            if random.random() < mutation_prob:
+                toolbox.mutate(mutant)
+                del mutant.fitness.values
+
+        # Evaluate changed individuals
+        invalid = [ind for ind in offspring if not ind.fitness.valid]
+        if invalid:
+            fitnesses = _evaluate(invalid)
+            for ind, fit in zip(invalid, fitnesses):
+                ind.fitness.values = fit
+
+        pop[:] = elite + offspring
+        hof.update(pop)
 
     best = hof[0]
     return list(best), best.fitness.values[0]
@@ -238,14 +256,20 @@ def _evaluate_full(
     train_rows,
     val_rows,
     score_timeline,
+    cache: Optional[FitnessCache] = None,
 ) -> Tuple[float, float, float]:
     """
     Compute min(train, val) fitness + individual components.
     Returns (combined_fitness, train_fit, val_fit).
     """
     cfg = decode_vector(vector)
-    train_fit, _ = compute_fitness_for_subset(train_rows, score_timeline, cfg)
-    val_fit,   _ = compute_fitness_for_subset(val_rows,   score_timeline, cfg)
+    if cache is None:
+        train_fit, val_fit, _ = compute_train_val_fitness(train_rows, val_rows, score_timeline, cfg)
+    else:
+        res = cache.evaluate_one(
+            cfg, lambda: compute_train_val_fitness(train_rows, val_rows, score_timeline, cfg)
+        )
+        train_fit, val_fit = res.train_fit, res.val_fit
     return min(train_fit, val_fit), train_fit, val_fit
 
 
@@ -324,8 +348,9 @@ def run_bcd_optimizer(
     # ------------------------------------------------------------------
     # Mindig az aktuális config.json-t használjuk kiindulópontként
     current_best = get_current_baseline_vector()
+    cache = FitnessCache(dataset_fingerprint(train, val, score_timeline))
     baseline_fitness, baseline_train, baseline_val = _evaluate_full(
-        current_best, train, val, score_timeline
+        current_best, train, val, score_timeline, cache
     )
     current_best_fitness = baseline_fitness
 
@@ -341,95 +366,109 @@ def run_bcd_optimizer(
     # ------------------------------------------------------------------
     # BCD loop
     # ------------------------------------------------------------------
-    for round_idx in range(1, max_rounds + 1):
-        rounds_run = round_idx
-
-        if stop_flag_path and stop_flag_path.exists():
-            print(f"[BCD] Stop flag detected at round {round_idx}. Stopping.")
-            break
+    # Persistent worker pool: dataset shared once, pool survives all rounds
+    shared = SharedDataset({"train": train, "val": val, "score_timeline": score_timeline})
+    print(f"[BCD] Shared data: candles {shared.candle_bytes // 1024 // 1024} MB in shared memory, "
+          f"metadata {shared.pickle_bytes // 1024 // 1024} MB temp file")
 
-        t_round = time.time()
+    try:
+        with multiprocessing.Pool(
+            processes=n_workers,
+            initializer=_bcd_worker_init,
+            initargs=(shared.path,),
+        ) as pool:
+            for round_idx in range(1, max_rounds + 1):
+                rounds_run = round_idx
+
+                if stop_flag_path and stop_flag_path.exists():
+                    print(f"[BCD] Stop flag detected at round {round_idx}. Stopping.")
+                    break
+
+                t_round = time.time()
+
+                # Sample atomic units for this round
+                active_dims, unit_ids = sample_active_dims(
+                    max_dims=max_dims_per_round, rng=rng
+                )
+                n_active = len(active_dims)
 
-        # Sample atomic units for this round
-        active_dims, unit_ids = sample_active_dims(
-            max_dims=max_dims_per_round, rng=rng
-        )
-        n_active = len(active_dims)
+                print(
+                    f"\n[BCD] Round {round_idx}/{max_rounds}: "
+                    f"units={unit_ids}  dims={active_dims}  ({n_active} active)"
+                )
 
-        print(
-            f"\n[BCD] Round {round_idx}/{max_rounds}: "
-            f"units={unit_ids}  dims={active_dims}  ({n_active} active)"
-        )
+                # Run mini GA on the selected dims
+                best_partial, round_fitness = _run_mini_ga(
+                    frozen_vector=current_best,
+                    active_dims=active_dims,
+                    pool=pool,
+                    cache=cache,
+                    pop_size=mini_pop,
+                    generations=mini_gen,
+                    stop_flag_path=stop_flag_path,
+                )
 
-        # Run mini GA on the selected dims
-        best_partial, round_fitness = _run_mini_ga(
-            frozen_vector=current_best,
-            active_dims=active_dims,
-            train_rows=train,
-            val_rows=val,
-            score_timeline=score_timeline,
-            pop_size=mini_pop,
-            generations=mini_gen,
-            n_workers=n_workers,
-            stop_flag_path=stop_flag_path,
-        )
+                # Reconstruct full candidate vector
+                candidate = list(current_best)
+                for i, dim_idx in enumerate(active_dims):
+                    candidate[dim_idx] = best_partial[i]
 
-        # Reconstruct full candidate vector
-        candidate = list(current_best)
-        for i, dim_idx in enumerate(active_dims):
-            candidate[dim_idx] = best_partial[i]
+                fitness_before = current_best_fitness
+                accepted = round_fitness > current_best_fitness
+                improvement_pct = (
+                    (round_fitness - fitness_before) / fitness_before * 100
+                    if fitness_before > 0 else 0.0
+                )
+                elapsed_round = time.time() - t_round
+
+                if accepted:
+                    current_best = candidate
+                    current_best_fitness = round_fitness
+                    no_improve_count = 0
+                    print(
+                        f"  [ACCEPTED] {fitness_before:.4f} -> {round_fitness:.4f} "
+                        f"(+{improvement_pct:.2f}%)"
+                    )
+                else:
+                    no_improve_count += 1
+                    print(
+                        f"  [REJECTED] {round_fitness:.4f} <= {fitness_before:.4f}  "
+                        f"(no-improve streak: {no_improve_count}/{patience})"
+                    )
+
+                record = {
+                    "round":           round_idx,
+                    "unit_ids":        unit_ids,
+                    "active_dims":     active_dims,
+                    "n_active_dims":   n_active,
+                    "fitness_before":  round(fitness_before, 6),
+                    "fitness_after":   round(round_fitness, 6),
+                    "improvement_pct": round(improvement_pct, 4),
+                    "accepted":        accepted,
+                    "elapsed_seconds": round(elapsed_round, 1),
+                }
+                block_history.append(record)
+                _write_bcd_round(run_id, record, db_path)
+                _update_run_best(run_id, current_best_fitness, round_idx, db_path)
+
+                if no_improve_count >= patience:
+                    print(
+                        f"[BCD] Patience exhausted ({patience} consecutive rounds "
+                        f"with no improvement). Stopping."
+                    )
+                    break
+    finally:
+        shared.close()
 
-        fitness_before = current_best_fitness
-        accepted = round_fitness > current_best_fitness
-        improvement_pct = (
-            (round_fitness - fitness_before) / fitness_before * 100
-            if fitness_before > 0 else 0.0
-        )
-        elapsed_round = time.time() - t_round
-
-        if accepted:
-            current_best = candidate
-            current_best_fitness = round_fitness
-            no_improve_count = 0
-            print(
-                f"  [ACCEPTED] {fitness_before:.4f} -> {round_fitness:.4f} "
-                f"(+{improvement_pct:.2f}%)"
-            )
-        else:
-            no_improve_count += 1
-            print(
-                f"  [REJECTED] {round_fitness:.4f} <= {fitness_before:.4f}  "
-                f"(no-improve streak: {no_improve_count}/{patience})"
-            )
-
-        record = {
-            "round":           round_idx,
-            "unit_ids":        unit_ids,
-            "active_dims":     active_dims,
-            "n_active_dims":   n_active,
-            "fitness_before":  round(fitness_before, 6),
-            "fitness_after":   round(round_fitness, 6),
-            "improvement_pct": round(improvement_pct, 4),
-            "accepted":        accepted,
-            "elapsed_seconds": round(elapsed_round, 1),
-        }
-        block_history.append(record)
-        _write_bcd_round(run_id, record, db_path)
-        _update_run_best(run_id, current_best_fitness, round_idx, db_path)
-
-        if no_improve_count >= patience:
-            print(
-                f"[BCD] Patience exhausted ({patience} consecutive rounds "
-                f"with no improvement). Stopping."
-            )
-            break
+    print(f"[BCD] Fitness cache: {cache.summary()}")
 
     # ------------------------------------------------------------------
     # Final evaluation on all splits
     # ------------------------------------------------------------------
     print(f"\n[BCD] Final evaluation...")
 
-    _, final_train, final_val = _evaluate_full(current_best, train, val, score_timeline)
+    _, final_train, final_val = _evaluate_full(current_best, train, val, score_timeline, cache)
+    cache.close()
 
     cfg_best = decode_vector(current_best)
     test_fit, test_stats = compute_fitness_for_subset(test, score_timeline, cfg_best)
@@ -0,0 +1,895 @@
+"""
+TrendSignal Self-Tuning Engine - Columnar (NumPy) Evaluation Engine
+
+Batch-mode alternative to backtester.replay_and_simulate():
+
+  1. SignalColumns.from_rows() : a SignalSimRow lista mezőit egyszer NumPy tömbökbe
+                                 tölti (None → NaN, a Python `or` fallbackek előre
+                                 feloldva)
+  2. score_columns()           : 12-komponensű combined_score egy configra, tömbműveletekkel
+  3. entry_gate_mask()         : entry gate szűrés (BUY/SELL) egyszerre az összes sorra
+  4. compute_sl_tp_columns()   : compute_sl_tp() tömbösített megfelelője
+  5. replay_and_simulate_columnar() : csak a szűrést túlélő sorokra hívja a
+                                 bar-walk-ot (trade_simulator.simulate_trade)
+
+Key design:
+  - A config-független komponensek (MACD, BB, volatility_risk, sr_proximity,
+    trend_strength, rr_quality, archive sentiment) a betöltéskor egyszer számolódnak
+  - A config-függő komponensek (SMA, RSI, Stochastic, live sentiment decay)
+    minden configra újraszámolódnak, de soronkénti Python hívás nélkül
+  - Az összegzés sorrendje azonos a compute_combined_score_from_indicators()
+    képletével → a combined_score egyezik a skalár úttal (kerekítés: np.round)
+  - A bar-walk (simulate_trade) változatlan — a kanonikus trade_simulator_core fut
+
+Staged memo (v1.1):
+  A replay_and_simulate_columnar() négy memoizált lépcsőből áll, mindegyik kulcsa
+  CSAK az általa olvasott config kulcsokból (+ a felette lévő lépcső kulcsából) áll:
+    1. score   : combined_score              ← SCORE_KEYS
+    2. gate    : decision + HOLD/threshold + entry gate ← + DECISION_KEYS, GATE_KEYS
+    3. sl_tp   : SL/TP + sanity check        ← + SLTP_KEYS
+    4. exit    : bar-walk soronként          ← (sor, irány, entry, SL, TP)
+  Egy csak SL/TP-dimenziókat mutáló BCD kör így nem számolja újra a score-t és a
+  gate-eket, egy csak küszöböt mutáló kör pedig a score-t — és a változatlan
+  (irány, SL, TP) sorok bar-walkját sem.
+
+Version: 1.1
+Date: 2026-10-16
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from optimizer.signal_data import SignalSimRow, get_direction_index, _parse_ts
+from optimizer.trade_simulator import (
+    SimConfig, TradeSimResult, simulate_trade,
+    SL_MAX_PCT, MIN_RISK_REWARD, TAKE_PROFIT_SR_DISCOUNT,
+)
+
+# Fixed (non-tunable) thresholds — mirror backtester._OptimizerConfig
+_ATR_VOL_VERY_LOW = 0.5
+_ATR_VOL_LOW      = 1.5
+_ATR_VOL_MODERATE = 3.0
+_ATR_VOL_HIGH     = 5.0
+
+_ADX_VERY_STRONG = 50
+_ADX_STRONG      = 40
+_ADX_MODERATE    = 25
+_ADX_WEAK        = 20
+_ADX_VERY_WEAK   = 10
+
+# Stage key dims — az egyes lépcsők által olvasott config kulcsok.
+# Ha egy lépcső új kulcsot kezd olvasni, IDE is fel kell venni (különben a
+# memo elavult eredményt adhat).
+SCORE_KEYS = (
+    "TECH_SMA20_BULLISH", "TECH_SMA50_BULLISH", "TECH_GOLDEN_CROSS",
+    "RSI_OVERBOUGHT", "RSI_OVERSOLD", "RSI_NEUTRAL_LOW", "RSI_NEUTRAL_HIGH",
+    "TECH_RSI_NEUTRAL", "TECH_RSI_BULLISH", "TECH_RSI_WEAK_BULLISH",
+    "TECH_RSI_OVERBOUGHT", "TECH_RSI_OVERSOLD",
+    "STOCH_OVERSOLD", "STOCH_OVERBOUGHT",
+    "DECAY_2_6H", "DECAY_6_12H", "DECAY_12_24H",
+    "CW_SMA_TREND", "CW_RSI_MOMENTUM", "CW_MACD_SIGNAL", "CW_BB_POSITION",
+    "CW_STOCH_CROSS", "CW_VOLUME_CONFIRM", "CW_SENTIMENT_SIGNAL",
+    "CW_SENTIMENT_RECENCY", "CW_VOLATILITY_RISK", "CW_SR_PROXIMITY",
+    "CW_TREND_STRENGTH", "CW_RR_QUALITY",
+)
+DECISION_KEYS = ("HOLD_ZONE_THRESHOLD",)
+GATE_KEYS = (
+    "ENTRY_GATE_RSI_BUY_MAX", "ENTRY_GATE_MACD_HIST_BUY_MIN",
+    "ENTRY_GATE_SMA200_BUY_MAX_PCT", "ENTRY_GATE_DIST_RESIST_BUY_MAX_PCT",
+    "ENTRY_GATE_RSI_SELL_MIN", "ENTRY_GATE_MACD_HIST_SELL_MAX",
+    "ENTRY_GATE_SMA200_SELL_MIN_PCT", "ENTRY_GATE_SMA50_SELL_MIN_PCT",
+)
+SLTP_KEYS = (
+    "ATR_STOP_HIGH_CONF", "ATR_STOP_DEFAULT", "ATR_STOP_LOW_CONF",
+    "ATR_TP_LOW_VOL", "ATR_TP_HIGH_VOL",
+    "VOL_LOW_THRESHOLD", "VOL_HIGH_THRESHOLD",
+    "SR_SUPPORT_SOFT_PCT", "SR_SUPPORT_HARD_PCT",
+    "SR_RESISTANCE_SOFT_PCT", "SR_RESISTANCE_HARD_PCT", "SR_BUFFER_ATR_MULT",
+    "SHORT_ATR_STOP_HIGH_CONF", "SHORT_ATR_STOP_DEFAULT", "SHORT_ATR_STOP_LOW_CONF",
+    "SHORT_ATR_TP_LOW_VOL", "SHORT_ATR_TP_HIGH_VOL", "SHORT_SL_MAX_PCT",
+)
+
+# Memo méretek: lépcsőnként ennyi config-eredmény, exit-ből ennyi (sor, SL, TP)
+_STAGE_MEMO_SIZE = 32
+_EXIT_MEMO_SIZE  = 300_000
+
+# SL/TP method kódok (a TradeSimResult string mezőihez)
+_METHODS = ["atr", "sr", "blended", "capped", "atr_fallback", "rr_target"]
+_M_ATR, _M_SR, _M_BLENDED, _M_CAPPED, _M_ATR_FALLBACK, _M_RR_TARGET = range(6)
+
+
+# ---------------------------------------------------------------------------
+# Stage memo
+# ---------------------------------------------------------------------------
+
+class StageMemo:
+    """
+    Egy SignalColumns-hoz tartozó lépcső-cache-ek: lépcsőnként kis LRU
+    (config-kulcs → tömbök), plus soronkénti exit memo
+    ((sor, irány, entry, SL, TP) → (exit_reason, exit_price, pnl)).
+
+    Az exit memo a score_timeline-tól is függ: másik timeline objektummal
+    hívva kiürül (bind_timeline).
+    """
+
+    def __init__(self, stage_size: int = _STAGE_MEMO_SIZE, exit_size: int = _EXIT_MEMO_SIZE):
+        self.stage_size = stage_size
+        self.exit_size = exit_size
+        self._stages: Dict[str, "OrderedDict[tuple, object]"] = {}
+        self._exits: "OrderedDict[tuple, Tuple[str, float, float]]" = OrderedDict()
+        self._timeline_id: Optional[int] = None
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+
+    def stage(self, name: str, key: tuple, compute: Callable[[], object]):
+        cache = self._stages.setdefault(name, OrderedDict())
+        hit = cache.get(key)
+        if hit is not None:
+            cache.move_to_end(key)
+            self.hits[name] = self.hits.get(name, 0) + 1
+            return hit
+        self.misses[name] = self.misses.get(name, 0) + 1
+        value = compute()
+        cache[key] = value
+        if len(cache) > self.stage_size:
+            cache.popitem(last=False)
+        return value
+
+    def bind_timeline(self, score_timeline):
+        if self._timeline_id != id(score_timeline):
+            self._exits.clear()
+            self._timeline_id = id(score_timeline)
+
+    def exit_outcome(self, key: tuple, compute: Callable[[], Tuple[str, float, float]]):
+        hit = self._exits.get(key)
+        if hit is not None:
+            self._exits.move_to_end(key)
+            self.hits["exit"] = self.hits.get("exit", 0) + 1
+            return hit
+        self.misses["exit"] = self.misses.get("exit", 0) + 1
+        value = compute()
+        self._exits[key] = value
+        if len(self._exits) > self.exit_size:
+            self._exits.popitem(last=False)
+        return value
+
+
+def _stage_key(cfg: dict, keys: Tuple[str, ...]) -> tuple:
+    return tuple(cfg.get(k) for k in keys)
+
+
+# ---------------------------------------------------------------------------
+# Column store
+# ---------------------------------------------------------------------------
+
+@dataclass
+class SignalColumns:
+    """
+    Columnar view of a List[SignalSimRow] — build once per split, reuse for
+    every config evaluation.
+
+    Float columns use NaN for missing values. Columns with an `_or` suffix have
+    the scalar path's Python `x or default` fallback already applied.
+    """
+    rows: List[SignalSimRow]
+    entry_ts: List[Optional[datetime]]
+
+    # --- Config-dependent score inputs ---
+    price_or0: np.ndarray           # current_price or 0  (score formula)
+    sma_20: np.ndarray
+    sma_50: np.ndarray
+    rsi: np.ndarray
+    stoch_k: np.ndarray
+    sma_trend_dir: np.ndarray       # +1 / -1 / 0
+
+    # --- Sentiment ---
+    stored_sentiment: np.ndarray
+    has_news: np.ndarray            # bool — live signal with news_items
+    news_ws: np.ndarray             # (n, 4) Σ score×credibility per decay bucket
+    news_w: np.ndarray              # (n, 4) Σ credibility per decay bucket
+    sentiment_conf_or: np.ndarray   # sentiment_confidence or 0.5
+
+    # --- Config-independent component scores (precomputed) ---
+    macd_score: np.ndarray
+    bb_score: np.ndarray
+    volatility_risk_score: np.ndarray
+    sr_proximity_score: np.ndarray
+    trend_strength_score: np.ndarray
+    rr_quality_score: np.ndarray
+
+    # --- Entry gate + SL/TP inputs ---
+    macd_histogram: np.ndarray
+    sma_200: np.ndarray
+    current_price: np.ndarray       # NaN if missing
+    support_or0: np.ndarray         # nearest_support or 0
+    resist_or0: np.ndarray          # nearest_resistance or 0
+    atr_or0: np.ndarray             # atr or 0 (0 → entry × 0.02 fallback)
+    sl_atr_pct_or: np.ndarray       # atr_pct or 2.0   (compute_sl_tp input)
+    confidence_or: np.ndarray       # confidence or 0.60
+
+    # --- Staged evaluation cache (replay_and_simulate_columnar) ---
+    memo: StageMemo = field(default_factory=StageMemo, repr=False, compare=False)
+
+    @property
+    def n(self) -> int:
+        return len(self.rows)
+
+    @classmethod
+    def from_rows(cls, rows: List[SignalSimRow]) -> "SignalColumns":
+        """Preload all SignalSimRow fields the evaluation needs into NumPy arrays."""
+        rows = list(rows)
+        n = len(rows)
+
+        def col(attr):
+            return np.array(
+                [_nan(getattr(r, attr, None)) for r in rows], dtype=np.float64
+            )
+
+        def col_or(values, default):
+            return np.array([v if v else default for v in values], dtype=np.float64)
+
+        price   = col("current_price")
+        sma_20  = col("sma_20")
+        sma_50  = col("sma_50")
+        price_or0 = col_or([r.current_price for r in rows], 0.0)
+
+        both_sma = ~np.isnan(sma_20) & ~np.isnan(sma_50)
+        sma_trend_dir = np.where(both_sma, np.where(sma_20 > sma_50, 1, -1), 0)
+
+        # --- Sentiment decay buckets (live signals) ---
+        has_news = np.array([bool(getattr(r, "news_items", None)) for r in rows])
+        news_ws = np.zeros((n, 4))
+        news_w  = np.zeros((n, 4))
+        for i, r in enumerate(rows):
+            if not has_news[i]:
+                continue
+            for item in r.news_items:
+                score       = float(item.get("sentiment_score", 0.0))
+                credibility = float(item.get("weight", 1.0))
+                bucket = _decay_bucket(float(item.get("time_decay", 1.0)))
+                if bucket < 0:
+                    continue
+                news_ws[i, bucket] += score * credibility
+                news_w[i, bucket]  += credibility
+
+        # --- Config-independent components ---
+        cols_macd = col("macd_histogram")
+        macd_score = np.where(np.isnan(cols_macd), 0.0, np.clip(cols_macd * 20, -100, 100))
+
+        bb_upper = col("bb_upper")
+        bb_lower = col("bb_lower")
+        bb_middle = col("bb_middle")
+        bb_score = _bb_scores(price_or0, bb_upper, bb_middle, bb_lower, sma_trend_dir)
+
+        score_atr_pct = col_or(
+            [getattr(r, "atr_pct", None) or getattr(r, "volatility", None) for r in rows], 2.0
+        )
+        support_or0 = col_or([r.nearest_support for r in rows], 0.0)
+        resist_or0  = col_or([r.nearest_resistance for r in rows], 0.0)
+
+        rr_quality = np.zeros(n)
+        for i, r in enumerate(rows):
+            rr = getattr(r, "risk_reward_ratio", None)
+            decision = r.original_decision or ""
+            if rr is None or decision in ("HOLD", ""):
+                continue
+            direction = 1 if "BUY" in decision.upper() else -1
+            if rr >= 3.0:
+                rr_quality[i] = 100 * direction
+            elif rr >= 2.5:
+                rr_quality[i] = 67 * direction
+            elif rr >= 2.0:
+                rr_quality[i] = 33 * direction
+
+        return cls(
+            rows=rows,
+            entry_ts=[_parse_ts(r.calculated_at) for r in rows],
+            price_or0=price_or0,
+            sma_20=sma_20,
+            sma_50=sma_50,
+            rsi=col("rsi"),
+            stoch_k=col("stoch_k"),
+            sma_trend_dir=sma_trend_dir,
+            stored_sentiment=col("stored_sentiment_score"),
+            has_news=has_news,
+            news_ws=news_ws,
+            news_w=news_w,
+            sentiment_conf_or=col_or(
+                [getattr(r, "sentiment_confidence", 0.50) for r in rows], 0.50
+            ),
+            macd_score=macd_score,
+            bb_score=bb_score,
+            volatility_risk_score=_volatility_risk_scores(score_atr_pct),
+            sr_proximity_score=_sr_proximity_scores(price_or0, support_or0, resist_or0),
+            trend_strength_score=_trend_strength_scores(col("adx")),
+            rr_quality_score=rr_quality,
+            macd_histogram=cols_macd,
+            sma_200=col("sma_200"),
+            current_price=price,
+            support_or0=support_or0,
+            resist_or0=resist_or0,
+            atr_or0=col_or([r.atr for r in rows], 0.0),
+            sl_atr_pct_or=col_or([r.atr_pct for r in rows], 2.0),
+            confidence_or=col_or([r.confidence for r in rows], 0.60),
+        )
+
+
+# ---------------------------------------------------------------------------
+# Stage 1: score replay
+# ---------------------------------------------------------------------------
+
+def score_columns(cols: SignalColumns, cfg: dict) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Batch equivalent of backtester.replay_signal() for all rows.
+
+    Returns
+    -------
+    combined : np.ndarray
+        12-component combined score (rounded to 2 decimals).
+    decision : np.ndarray of int8
+        +1 = BUY, -1 = SELL, 0 = HOLD (HOLD_ZONE_THRESHOLD based).
+    """
+    combined = combined_score_columns(cols, cfg)
+    return combined, decision_columns(combined, cfg)
+
+
+def combined_score_columns(cols: SignalColumns, cfg: dict) -> np.ndarray:
+    """12-component combined score for all rows (reads only SCORE_KEYS)."""
+    price = cols.price_or0
+    has_sma = ~np.isnan(cols.sma_20) & ~np.isnan(cols.sma_50)
+
+    # --- SMA trend ---
+    b20 = cfg.get("TECH_SMA20_BULLISH", 25)
+    b50 = cfg.get("TECH_SMA50_BULLISH", 20)
+    gc  = cfg.get("TECH_GOLDEN_CROSS",  15)
+    sma_raw = (
+        np.where(price > cols.sma_20, b20, -b20)
+        + np.where(price > cols.sma_50, b50, -b50)
+        + np.where(cols.sma_20 > cols.sma_50, gc, -gc)
+    )
+    sma_raw = np.where(has_sma, sma_raw, 0)
+    sma_score = np.clip((sma_raw / 60.0) * 100, -100, 100)
+
+    # --- RSI momentum (same branch order as calculate_rsi_component_score) ---
+    rsi = cols.rsi
+    ob = cfg.get("RSI_OVERBOUGHT",   70)
+    os_ = cfg.get("RSI_OVERSOLD",    30)
+    nl = cfg.get("RSI_NEUTRAL_LOW",  45)
+    nh = cfg.get("RSI_NEUTRAL_HIGH", 55)
+    rsi_raw = np.select(
+        [
+            (nl < rsi) & (rsi < nh),
+            (nh <= rsi) & (rsi < ob),
+            (os_ < rsi) & (rsi <= nl),
+            rsi >= ob,
+            (rsi <= os_) & (cols.sma_trend_dir >= 0),
+        ],
+        [
+            cfg.get("TECH_RSI_NEUTRAL",      20),
+            cfg.get("TECH_RSI_BULLISH",      30),
+            cfg.get("TECH_RSI_WEAK_BULLISH", 10),
+            -cfg.get("TECH_RSI_OVERBOUGHT",  30),
+            cfg.get("TECH_RSI_OVERSOLD",     30),
+        ],
+        default=0,
+    )
+    rsi_score = np.clip((rsi_raw / 30.0) * 100, -100, 100)
+
+    # --- Stochastic ---
+    k = cols.stoch_k
+    stoch_score = np.select(
+        [
+            (k < cfg.get("STOCH_OVERSOLD", 20)) & (cols.sma_trend_dir >= 0),
+            k > cfg.get("STOCH_OVERBOUGHT", 80),
+        ],
+        [100.0, -100.0],
+        default=0.0,
+    )
+
+    # --- Sentiment (decay re-tuning only for live rows with news_items) ---
+    sentiment = replay_sentiment_columns(cols, cfg)
+    sentiment = np.where(np.isnan(sentiment), 0.0, sentiment)
+    sent_dir = np.where(sentiment >= 0, 1, -1)
+    recency_score = np.clip((cols.sentiment_conf_or * 2 - 1) * 100 * sent_dir, -100, 100)
+
+    # --- Weighted sum (same term order as compute_combined_score_from_indicators) ---
+    combined = (
+        sma_score                   * cfg.get("CW_SMA_TREND",         0.15) +
+        rsi_score                   * cfg.get("CW_RSI_MOMENTUM",      0.07) +
+        cols.macd_score             * cfg.get("CW_MACD_SIGNAL",       0.08) +
+        cols.bb_score               * cfg.get("CW_BB_POSITION",       0.04) +
+        stoch_score                 * cfg.get("CW_STOCH_CROSS",       0.02) +
+        0.0                         * cfg.get("CW_VOLUME_CONFIRM",    0.02) +
+        sentiment                   * cfg.get("CW_SENTIMENT_SIGNAL",  0.30) +
+        recency_score               * cfg.get("CW_SENTIMENT_RECENCY", 0.10) +
+        cols.volatility_risk_score  * cfg.get("CW_VOLATILITY_RISK",   0.08) +
+        cols.sr_proximity_score     * cfg.get("CW_SR_PROXIMITY",      0.08) +
+        cols.trend_strength_score   * cfg.get("CW_TREND_STRENGTH",    0.04) +
+        cols.rr_quality_score       * cfg.get("CW_RR_QUALITY",        0.02)
+    )
+    return np.round(combined, 2)
+
+
+def decision_columns(combined: np.ndarray, cfg: dict) -> np.ndarray:
+    """+1 / -1 / 0 decision from combined score (reads only DECISION_KEYS)."""
+    hold_zone = cfg.get("HOLD_ZONE_THRESHOLD", 15.0)
+    return np.where(
+        combined >= hold_zone, 1, np.where(combined <= -hold_zone, -1, 0)
+    ).astype(np.int8)
+
+
+def replay_sentiment_columns(cols: SignalColumns, cfg: dict) -> np.ndarray:
+    """Batch equivalent of backtester._replay_sentiment() (stored score for archive rows)."""
+    decay = np.array([
+        1.0,
+        cfg.get("DECAY_2_6H",   0.50),
+        cfg.get("DECAY_6_12H",  0.50),
+        cfg.get("DECAY_12_24H", 0.37),
+    ])
+    num = cols.news_ws @ decay
+    den = cols.news_w @ decay
+    with np.errstate(divide="ignore", invalid="ignore"):
+        replayed = num / den * 100.0
+    use_replay = cols.has_news & (den > 0.0)
+    return np.where(use_replay, replayed, cols.stored_sentiment)
+
+
+# ---------------------------------------------------------------------------
+# Stage 2: entry gates
+# ---------------------------------------------------------------------------
+
+def entry_gate_mask(cols: SignalColumns, decision: np.ndarray, cfg: dict) -> np.ndarray:
+    """
+    Batch equivalent of the entry gate `if` chain in replay_and_simulate().
+    Returns a bool array — True where the entry is BLOCKED.
+    """
+    price  = cols.current_price
+    rsi    = cols.rsi
+    mhst   = cols.macd_histogram
+    sma200 = cols.sma_200
+    sma50  = cols.sma_50
+    resist = cols.resist_or0
+
+    price_ok = price > 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sma200_pct = (price - sma200) / sma200 * 100
+        sma50_pct  = (price - sma50) / sma50 * 100
+        resist_pct = (resist - price) / price * 100
+    sma200_ok = (sma200 > 0) & price_ok
+    sma50_ok  = (sma50 > 0) & price_ok
+
+    buy_blocked = (
+        (rsi >= cfg.get("ENTRY_GATE_RSI_BUY_MAX", 70.0))
+        | (mhst <= cfg.get("ENTRY_GATE_MACD_HIST_BUY_MIN", 0.0))
+        | (sma200_ok & (sma200_pct > cfg.get("ENTRY_GATE_SMA200_BUY_MAX_PCT", 5.0)))
+        | ((resist != 0) & price_ok
+           & (resist_pct > cfg.get("ENTRY_GATE_DIST_RESIST_BUY_MAX_PCT", 15.0)))
+    )
+    sell_blocked = (
+        (rsi <= cfg.get("ENTRY_GATE_RSI_SELL_MIN", 65.0))
+        | (mhst >= cfg.get("ENTRY_GATE_MACD_HIST_SELL_MAX", 0.0))
+        | (sma200_ok & (sma200_pct < cfg.get("ENTRY_GATE_SMA200_SELL_MIN_PCT", -5.0)))
+        | (sma50_ok & (sma50_pct < cfg.get("ENTRY_GATE_SMA50_SELL_MIN_PCT", 3.0)))
+    )
+    return np.where(decision > 0, buy_blocked, np.where(decision < 0, sell_blocked, False))
+
+
+# ---------------------------------------------------------------------------
+# Stage 3: SL/TP
+# ---------------------------------------------------------------------------
+
+def compute_sl_tp_columns(
+    decision: np.ndarray,
+    entry: np.ndarray,
+    atr: np.ndarray,
+    atr_pct: np.ndarray,
+    confidence: np.ndarray,
+    support: np.ndarray,
+    resist: np.ndarray,
+    sim_cfg: SimConfig,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Batch equivalent of trade_simulator.compute_sl_tp().
+
+    All inputs are aligned 1-D arrays; decision is +1 (BUY) / -1 (SELL),
+    support/resist use 0.0 for "no level" (mirrors the scalar truthiness check).
+
+    Returns (stop_loss, take_profit, sl_method_code, tp_method_code).
+    """
+    is_buy = decision > 0
+    c = sim_cfg
+
+    # --- Confidence-adaptive SL multiplier ---
+    sl_mult = np.where(
+        is_buy,
+        np.select([confidence >= 0.75, confidence < 0.50],
+                  [c.atr_stop_high_conf, c.atr_stop_low_conf], c.atr_stop_default),
+        np.select([confidence >= 0.75, confidence < 0.50],
+                  [c.short_atr_stop_high_conf, c.short_atr_stop_low_conf],
+                  c.short_atr_stop_default),
+    )
+
+    # --- Volatility-adaptive TP multiplier ---
+    t_vol = (atr_pct - c.vol_low_threshold) / (c.vol_high_threshold - c.vol_low_threshold)
+    tp_lo = np.where(is_buy, c.atr_tp_low_vol, c.short_atr_tp_low_vol)
+    tp_hi = np.where(is_buy, c.atr_tp_high_vol, c.short_atr_tp_high_vol)
+    tp_mult = np.select(
+        [atr_pct < c.vol_low_threshold, atr_pct > c.vol_high_threshold],
+        [tp_lo, tp_hi],
+        tp_lo + t_vol * (tp_hi - tp_lo),
+    )
+
+    # --- SL: BUY → support side, SELL → resistance side ---
+    sign = np.where(is_buy, -1.0, 1.0)      # SL direction relative to entry
+    atr_sl = entry + sign * atr * sl_mult
+    sl_level = np.where(is_buy, support, resist)
+    sl_level_ok = np.where(is_buy, (support != 0) & (support < entry),
+                           (resist != 0) & (resist > entry))
+    sl_dist = np.abs(entry - sl_level) / entry * 100.0
+    sr_sl = sl_level + sign * atr * c.sr_buffer_atr_mult
+    sr_sl_ok = sl_level_ok & np.where(is_buy, sr_sl < entry, sr_sl > entry)
+    stop_loss, sl_method = _blend_columns(
+        sr_sl, atr_sl, sl_dist, c.sr_support_soft_pct, c.sr_support_hard_pct, sr_sl_ok,
+    )
+
+    # --- TP: BUY → resistance side, SELL → support side ---
+    atr_tp = entry - sign * atr * tp_mult
+    tp_level = np.where(is_buy, resist, support)
+    tp_level_ok = np.where(is_buy, (resist != 0) & (resist > entry),
+                           (support != 0) & (support < entry))
+    tp_dist = np.abs(tp_level - entry) / entry * 100.0
+    sr_tp = tp_level * np.where(is_buy, 1.0 - TAKE_PROFIT_SR_DISCOUNT, 1.0 + TAKE_PROFIT_SR_DISCOUNT)
+    take_profit, tp_method = _blend_columns(
+        sr_tp, atr_tp, tp_dist, c.sr_resistance_soft_pct, c.sr_resistance_hard_pct, tp_level_ok,
+    )
+
+    # --- Boundary enforcement (mirrors _enforce_sl_tp_bounds) ---
+    sl_max_dist = entry * np.where(is_buy, SL_MAX_PCT, c.short_sl_max_pct)
+    risk = np.abs(entry - stop_loss)
+    capped = risk > sl_max_dist
+    stop_loss = np.where(capped, entry + sign * sl_max_dist, stop_loss)
+    sl_method = np.where(capped, _M_CAPPED, sl_method)
+    risk = np.where(capped, sl_max_dist, risk)
+
+    degenerate = risk <= 0
+    risk = np.where(degenerate, atr * 1.5, risk)
+    stop_loss = np.where(degenerate, entry + sign * risk, stop_loss)
+    sl_method = np.where(degenerate, _M_ATR_FALLBACK, sl_method)
+
+    target = risk * MIN_RISK_REWARD
+    candidate_tp = entry - sign * target
+    push = (np.abs(take_profit - entry) < target) & np.where(
+        is_buy, candidate_tp > take_profit, candidate_tp < take_profit
+    )
+    take_profit = np.where(push, candidate_tp, take_profit)
+    tp_method = np.where(push, _M_RR_TARGET, tp_method)
+
+    return stop_loss, take_profit, sl_method, tp_method
+
+
+def _blend_columns(
+    sr_price: np.ndarray,
+    atr_price: np.ndarray,
+    distance_pct: np.ndarray,
+    soft_limit: float,
+    hard_limit: float,
+    use_sr: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Vectorized trade_simulator._blend(); rows with use_sr=False keep the ATR price."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = (distance_pct - soft_limit) / (hard_limit - soft_limit)
+    blended = sr_price + t * (atr_price - sr_price)
+    soft = distance_pct <= soft_limit
+    hard = distance_pct >= hard_limit
+    price = np.select([~use_sr, soft, hard], [atr_price, sr_price, atr_price], blended)
+    method = np.select([~use_sr, soft, hard], [_M_ATR, _M_SR, _M_ATR], _M_BLENDED)
+    return price, method
+
+
+# ---------------------------------------------------------------------------
+# Full pipeline
+# ---------------------------------------------------------------------------
+
+def replay_and_simulate_columnar(
+    cols: SignalColumns,
+    score_timeline: Dict[str, list],
+    cfg: dict,
+    active_only: bool = False,
+) -> List[TradeSimResult]:
+    """
+    Columnar counterpart of backtester.replay_and_simulate().
+
+    Score replay, HOLD/threshold filter, entry gates and SL/TP run as array
+    operations over all rows; the bar walk (simulate_trade) runs only for rows
+    that survive every filter.
+
+    Parameters
+    ----------
+    cols : SignalColumns
+        Built once per split via SignalColumns.from_rows().
+    score_timeline : Dict[str, list]
+        {ticker: [(ts, score, sl, tp), ...]} — same as replay_and_simulate().
+    cfg : dict
+        Decoded config dict from parameter_space.decode_vector().
+    active_only : bool
+        If True, only trade_active=True results are returned (no per-row
+        TradeSimResult for HOLD/blocked rows). If False, the output is one
+        result per row, identical in shape to replay_and_simulate().
+    """
+    sim_cfg = SimConfig.from_cfg(cfg)
+    memo = cols.memo
+
+    # Stage 1: score replay
+    score_key = _stage_key(cfg, SCORE_KEYS)
+    combined = memo.stage("score", score_key, lambda: combined_score_columns(cols, cfg))
+
+    # Stage 2: decision + HOLD / below threshold / entry gates / invalid entry price
+    gate_key = score_key + _stage_key(cfg, DECISION_KEYS + GATE_KEYS)
+    decision, candidates = memo.stage(
+        "gate", gate_key, lambda: _gate_stage(cols, combined, cfg, sim_cfg)
+    )
+
+    # Stage 3: SL/TP + sanity check → surviving rows
+    sltp_key = gate_key + _stage_key(cfg, SLTP_KEYS)
+    idx, sl, tp, sl_m, tp_m = memo.stage(
+        "sl_tp", sltp_key, lambda: _sl_tp_stage(cols, decision, candidates, sim_cfg)
+    )
+
+    # Stage 4: bar walk — per-row memo on (row, direction, entry, SL, TP)
+    memo.bind_timeline(score_timeline)
+    entry = cols.current_price
+    trades: Dict[int, TradeSimResult] = {}
+    for j, i in enumerate(idx.tolist()):
+        row = cols.rows[i]
+        new_decision = "BUY" if decision[i] > 0 else "SELL"
+        direction = "LONG" if decision[i] > 0 else "SHORT"
+        entry_price = float(entry[i])
+        stop_loss = float(sl[j])
+        take_profit = float(tp[j])
+
+        exit_reason, exit_price, pnl = memo.exit_outcome(
+            (i, direction, entry_price, stop_loss, take_profit),
+            lambda: _simulate_row(
+                cols, i, row, direction, entry_price, stop_loss, take_profit,
+                score_timeline, sim_cfg,
+            ),
+        )
+
+        trades[i] = TradeSimResult(
+            signal_id=row.signal_id,
+            ticker=row.ticker,
+            calculated_at=row.calculated_at,
+            original_decision=row.original_decision,
+            new_decision=new_decision,
+            new_combined_score=float(combined[i]),
+            trade_active=True,
+            direction=direction,
+            entry_price=entry_price,
+            stop_loss=stop_loss,
+            take_profit=take_profit,
+            sl_method=_METHODS[sl_m[j]],
+            tp_method=_METHODS[tp_m[j]],
+            exit_reason=exit_reason,
+            exit_price=exit_price,
+            pnl_percent=pnl,
+        )
+
+    if active_only:
+        return [trades[i] for i in sorted(trades)]
+
+    results = []
+    for i, row in enumerate(cols.rows):
+        if i in trades:
+            results.append(trades[i])
+            continue
+        d = decision[i]
+        results.append(TradeSimResult(
+            signal_id=row.signal_id,
+            ticker=row.ticker,
+            calculated_at=row.calculated_at,
+            original_decision=row.original_decision,
+            new_decision="BUY" if d > 0 else ("SELL" if d < 0 else "HOLD"),
+            new_combined_score=float(combined[i]),
+            trade_active=False,
+        ))
+    return results
+
+
+def _gate_stage(
+    cols: SignalColumns,
+    combined: np.ndarray,
+    cfg: dict,
+    sim_cfg: SimConfig,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """decision + candidate row indices (HOLD / threshold / entry gate / entry > 0)."""
+    decision = decision_columns(combined, cfg)
+    active = (decision != 0) & (np.abs(combined) >= sim_cfg.signal_threshold)
+    active &= ~entry_gate_mask(cols, decision, cfg)
+    active &= cols.current_price > 0
+    return decision, np.flatnonzero(active)
+
+
+def _sl_tp_stage(
+    cols: SignalColumns,
+    decision: np.ndarray,
+    candidates: np.ndarray,
+    sim_cfg: SimConfig,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """(idx, sl, tp, sl_method, tp_method) for rows passing the SL/TP sanity check."""
+    if not len(candidates):
+        empty = np.empty(0)
+        return candidates, empty, empty, empty.astype(np.int8), empty.astype(np.int8)
+
+    idx = candidates
+    e = cols.current_price[idx]
+    atr = cols.atr_or0[idx]
+    atr = np.where(atr != 0, atr, e * 0.02)
+    sl, tp, sl_m, tp_m = compute_sl_tp_columns(
+        decision=decision[idx],
+        entry=e,
+        atr=atr,
+        atr_pct=cols.sl_atr_pct_or[idx],
+        confidence=cols.confidence_or[idx],
+        support=cols.support_or0[idx],
+        resist=cols.resist_or0[idx],
+        sim_cfg=sim_cfg,
+    )
+    # Sanity check: SL/TP must be on the correct side of entry
+    is_buy = decision[idx] > 0
+    sane = np.where(is_buy, (sl < e) & (tp > e), (sl > e) & (tp < e))
+    return idx[sane], sl[sane], tp[sane], sl_m[sane], tp_m[sane]
+
+
+def _simulate_row(
+    cols: SignalColumns,
+    i: int,
+    row: SignalSimRow,
+    direction: str,
+    entry_price: float,
+    stop_loss: float,
+    take_profit: float,
+    score_timeline: Dict[str, list],
+    sim_cfg: SimConfig,
+) -> Tuple[str, float, float]:
+    try:
+        return simulate_trade(
+            direction=direction,
+            entry_price=entry_price,
+            stop_loss=stop_loss,
+            take_profit=take_profit,
+            entry_ts=cols.entry_ts[i],
+            ticker=row.ticker,
+            future_candles=row.future_candles,
+            score_timeline=score_timeline.get(row.ticker, []),
+            sim_cfg=sim_cfg,
+            signal_index=get_direction_index(score_timeline, row.ticker, direction),
+        )
+    except Exception:
+        return "NO_EXIT", entry_price, 0.0
+
+
+# ---------------------------------------------------------------------------
+# Config-independent component scores (mirror compute_combined_score_from_indicators)
+# ---------------------------------------------------------------------------
+
+def _bb_scores(price, bb_upper, bb_middle, bb_lower, sma_trend_dir) -> np.ndarray:
+    has_bb = ~np.isnan(bb_upper) & ~np.isnan(bb_middle) & ~np.isnan(bb_lower)
+    width = bb_upper - bb_lower
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pos = (price - bb_lower) / width
+    score = np.select(
+        [pos > 0.8, (pos < 0.2) & (sma_trend_dir >= 0), (pos >= 0.4) & (pos <= 0.6)],
+        [-70.0, 70.0, 30.0],
+        default=0.0,
+    )
+    return np.where(has_bb & (width > 0), score, 0.0)
+
+
+def _volatility_risk_scores(atr_pct: np.ndarray) -> np.ndarray:
+    vl, lo, mo, hi = _ATR_VOL_VERY_LOW, _ATR_VOL_LOW, _ATR_VOL_MODERATE, _ATR_VOL_HIGH
+    raw = np.select(
+        [atr_pct < vl, atr_pct < lo, atr_pct < mo, atr_pct < hi],
+        [
+            np.full_like(atr_pct, 0.8),
+            0.8 - ((atr_pct - vl) / (lo - vl)) * 0.4,
+            0.4 - ((atr_pct - lo) / (mo - lo)) * 0.4,
+            0.0 - ((atr_pct - mo) / (hi - mo)) * 0.4,
+        ],
+        np.maximum(-0.8, -0.4 - ((atr_pct - hi) / 2.0) * 0.4),
+    )
+    return np.clip(raw / 0.8 * 100, -100, 100)
+
+
+def _sr_proximity_scores(price, support_or0, resist_or0) -> np.ndarray:
+    has_price = price > 0
+    ns = np.where(support_or0 != 0, support_or0, price * 0.97)
+    nr = np.where(resist_or0 != 0, resist_or0, price * 1.03)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        support_dist    = ((price - ns) / price) * 100
+        resistance_dist = ((nr - price) / price) * 100
+    d = np.where(has_price, np.minimum(np.abs(support_dist), np.abs(resistance_dist)), 5.0)
+    raw = np.select(
+        [d < 1.0, d < 2.0, d < 4.0, d < 6.0],
+        [
+            np.full_like(d, -0.8),
+            -0.8 + ((d - 1.0) / 1.0) * 0.4,
+            -0.4 + ((d - 2.0) / 2.0) * 0.4,
+            0.0 + ((d - 4.0) / 2.0) * 0.4,
+        ],
+        np.minimum(0.8, 0.4 + ((d - 6.0) / 4.0) * 0.4),
+    )
+    return np.clip(raw / 0.8 * 100, -100, 100)
+
+
+def _trend_strength_scores(adx: np.ndarray) -> np.ndarray:
+    avs, as_, amo = _ADX_VERY_STRONG, _ADX_STRONG, _ADX_MODERATE
+    aw, avw = _ADX_WEAK, _ADX_VERY_WEAK
+    raw = np.select(
+        [np.isnan(adx), adx > avs, adx > as_, adx > amo, adx > aw, adx > avw],
+        [
+            np.zeros_like(adx),
+            np.full_like(adx, 0.8),
+            0.5 + ((adx - as_) / (avs - as_)) * 0.3,
+            0.3 + ((adx - amo) / (as_ - amo)) * 0.2,
+            0.0 + ((adx - aw) / (amo - aw)) * 0.3,
+            -0.3 + ((adx - avw) / (aw - avw)) * 0.3,
+        ],
+        np.maximum(-0.8, -0.3 - ((avw - adx) / 10) * 0.5),
+    )
+    return np.clip(raw / 0.8 * 100, -100, 100)
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def _nan(v) -> float:
+    return np.nan if v is None else float(v)
+
+
+def _decay_bucket(stored_decay: float) -> int:
+    """Bucket index for backtester._remap_decay(); -1 → zero weight."""
+    if stored_decay >= 0.95:
+        return 0
+    elif stored_decay >= 0.72:
+        return 1
+    elif stored_decay >= 0.47:
+        return 2
+    elif stored_decay > 0.0:
+        return 3
+    return -1
+
+
+# ---------------------------------------------------------------------------
+# Column cache — one SignalColumns per row list (train / val / test)
+# ---------------------------------------------------------------------------
+
+# {id(rows): (rows, SignalColumns)} — a rows listát is tároljuk, így az id()
+# nem kerülhet újrafelhasználásra amíg a bejegyzés él.
+_COLUMNS_CACHE: Dict[int, Tuple[list, SignalColumns]] = {}
+_COLUMNS_CACHE_MAX = 8
+
+
+def get_signal_columns(rows) -> SignalColumns:
+    """
+    Return the SignalColumns for a row list, building it on first use.
+
+    The optimizer evaluates the same train/val/test list objects thousands of
+    times, so the columns are cached per list object (FIFO, max 8 entries).
+    A SignalColumns argument is returned unchanged.
+    """
+    if isinstance(rows, SignalColumns):
+        return rows
+    key = id(rows)
+    hit = _COLUMNS_CACHE.get(key)
+    if hit is not None and hit[0] is rows and hit[1].n == len(rows):
+        return hit[1]
+    cols = SignalColumns.from_rows(rows)
+    if len(_COLUMNS_CACHE) >= _COLUMNS_CACHE_MAX:
+        _COLUMNS_CACHE.pop(next(iter(_COLUMNS_CACHE)))
+    _COLUMNS_CACHE[key] = (rows, cols)
+    return cols
@@ -47,6 +47,7 @@ Date: 2026-04-08
 """
 
 import math
+import os
 import random
 from typing import Dict, List, Optional, Tuple
 
@@ -63,6 +64,10 @@ MIN_TRADES = 150
 # A GA ösztönözve van, hogy legalább ennyi trade-et aktiváljon.
 VOLUME_TARGET = 300
 
+# Kiértékelő motor: "columnar" (NumPy batch, optimizer.columnar) vagy "scalar"
+# (soronkénti backtester.replay_and_simulate). Felülírható: OPTIMIZER_ENGINE env var.
+EVAL_ENGINE = os.environ.get("OPTIMIZER_ENGINE", "columnar")
+
 
 # ---------------------------------------------------------------------------
 # Primary fitness function — uses TradeSimResult from replay_and_simulate()
@@ -71,6 +76,7 @@ VOLUME_TARGET = 300
 def compute_fitness(
     sim_results: List[TradeSimResult],
     min_trades: int = MIN_TRADES,
+    n_inactive: int = 0,
 ) -> Tuple[float, dict]:
     """
     Compute fitness from fully simulated trade results.
@@ -81,6 +87,9 @@ def compute_fitness(
         Output of backtester.replay_and_simulate() for one config.
     min_trades : int
         Minimum number of active trades for a non-zero fitness.
+    n_inactive : int
+        Signals that produced no trade and are NOT in sim_results
+        (columnar engine with active_only=True) — counted as skipped.
 
     Returns
     -------
@@ -94,7 +103,7 @@ def compute_fitness(
     wins         = 0
     losses       = 0
     total        = 0
-    skipped      = 0   # HOLD or below-threshold signals
+    skipped      = n_inactive   # HOLD or below-threshold signals
 
     exit_reasons: Dict[str, int] = {}
 
@@ -180,10 +189,34 @@ def compute_fitness_for_subset(
         Decoded config dict from parameter_space.decode_vector().
     min_trades : int
         Minimum trades for non-zero fitness.
+
+    The columnar engine (optimizer.columnar) is used unless EVAL_ENGINE is
+    "scalar"; the SignalColumns of `rows` are built on first use and cached.
+    """
+    if EVAL_ENGINE == "scalar":
+        from optimizer.backtester import replay_and_simulate
+        sim_results = replay_and_simulate(rows, score_timeline, cfg)
+        return compute_fitness(sim_results, min_trades)
+
+    from optimizer.columnar import get_signal_columns, replay_and_simulate_columnar
+    cols = get_signal_columns(rows)
+    trades = replay_and_simulate_columnar(cols, score_timeline, cfg, active_only=True)
+    return compute_fitness(trades, min_trades, n_inactive=cols.n - len(trades))
+
+
+def compute_train_val_fitness(
+    train_rows: List[SignalSimRow],
+    val_rows: List[SignalSimRow],
+    score_timeline: dict,
+    cfg: dict,
+) -> Tuple[float, float, dict]:
+    """
+    (train_fit, val_fit, {"train": stats, "val": stats}) — a GA / BCD worker
+    értékelés egysége, ezt cache-eli az optimizer.fitness_cache.
     """
-    from optimizer.backtester import replay_and_simulate
-    sim_results = replay_and_simulate(rows, score_timeline, cfg)
-    return compute_fitness(sim_results, min_trades)
+    train_fit, train_stats = compute_fitness_for_subset(train_rows, score_timeline, cfg)
+    val_fit,   val_stats   = compute_fitness_for_subset(val_rows,   score_timeline, cfg)
+    return train_fit, val_fit, {"train": train_stats, "val": val_stats}
 
 
 # ---------------------------------------------------------------------------
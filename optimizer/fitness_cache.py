@@ -0,0 +1,313 @@
+"""
+TrendSignal Self-Tuning Engine - Fitness Result Cache
+
+Content-addressed cache: kvantált dekódolt config hash → (train_fit, val_fit, stats).
+
+Miért:
+  - A DEAP újraértékeli a crossover-klónokat és azokat az egyedeket, amelyek
+    dekódolt configja azonos (decode_vector() egész-kerekítése, phase /
+    trade_mode befagyasztott dimenziói)
+  - A BCD minden körben újraértékeli a seedelt current_best-et
+  A fitness csak a dekódolt configtól, a datasettől és a szimulátor kódtól
+  függ → a kulcs config_key(cfg) + dataset_fingerprint(train, val,
+  score_timeline), utóbbi a sorok / candle-ök tartalmát és a kódot is hash-eli.
+
+Működés:
+  - A cache a szülő processzben él; FitnessCache.evaluate() a batch-ből csak a
+    hiányzó (és batch-en belül deduplikált) configokat küldi a worker pool-nak
+    → a workerek közösen használják, egy config egy futásban egyszer fut le
+  - Memóriában LRU (OrderedDict, max_entries)
+  - Opcionálisan SQLite-ban perzisztálva dataset fingerprint szerint → egy
+    újraindított futás (azonos split) a korábbi eredményeket ingyen kapja
+
+Perzisztencia: OPTIMIZER_FITNESS_CACHE env var
+  - nincs megadva  → BASE_DIR / "optimizer_fitness_cache.db"
+  - "off" / "0"    → csak memória
+  - egyéb          → SQLite fájl útvonala
+
+Version: 1.0
+Date: 2026-10-16
+"""
+
+import dataclasses
+import hashlib
+import json
+import os
+import sqlite3
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_CACHE_PATH = BASE_DIR / "optimizer_fitness_cache.db"
+
+# Lebegőpontos config értékek kvantálása a kulcsban (tizedesjegyek)
+KEY_DECIMALS = 6
+
+# Memóriában tartott bejegyzések max. száma (LRU)
+DEFAULT_MAX_ENTRIES = 200_000
+
+# Emeld, ha a fingerprint / tárolt eredmény formátuma változik → régi perzisztált
+# eredmények automatikusan érvénytelenné válnak (más fingerprint)
+CACHE_VERSION = 2
+
+# A fitness-t meghatározó szimulációs kód (BASE_DIR-hez relatív) — a tartalmuk
+# a fingerprint része, így kódváltozásnál nem kell kézzel CACHE_VERSION-t emelni
+_SIM_SOURCES = (
+    "optimizer/backtester.py",
+    "optimizer/columnar.py",
+    "optimizer/fitness.py",
+    "optimizer/signal_data.py",
+    "optimizer/trade_simulator.py",
+    "src/recalculate_signals.py",
+    "src/signal_generator.py",
+    "src/trade_simulator_core.py",
+    "src/trading_calendar.py",
+)
+
+
+@dataclass(frozen=True)
+class CachedFitness:
+    """Egy config eredménye a train és val spliten."""
+    train_fit: float
+    val_fit: float
+    stats: dict             # {"train": {...}, "val": {...}} — compute_fitness() stats
+
+    @property
+    def fitness(self) -> float:
+        """min(train_fit, val_fit) — a GA / BCD fitness (v2.3.1)."""
+        return min(self.train_fit, self.val_fit)
+
+
+# ---------------------------------------------------------------------------
+# Keys
+# ---------------------------------------------------------------------------
+
+def config_key(cfg: dict) -> str:
+    """Kvantált dekódolt config → stabil hash (sorrend-független)."""
+    quantized = {
+        k: round(v, KEY_DECIMALS) if isinstance(v, float) else v
+        for k, v in cfg.items()
+    }
+    payload = json.dumps(quantized, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def simulator_fingerprint() -> str:
+    """
+    A replay / trade szimulációs kód ujjlenyomata (_SIM_SOURCES forrásfájlok
+    tartalma) → a szimulátor módosítása a perzisztált eredményeket érvényteleníti.
+    """
+    h = hashlib.sha1()
+    for rel in _SIM_SOURCES:
+        h.update(f"|{rel}:".encode())
+        try:
+            h.update((BASE_DIR / rel).read_bytes())
+        except OSError:
+            h.update(b"<missing>")
+    return h.hexdigest()
+
+
+def _candles_token(candles, store_ids: Dict[int, int]) -> str:
+    """future_candles → rövid hivatkozás; a CandleStore tartalmát a hívó hash-eli egyszer."""
+    store = getattr(candles, "store", None)
+    if store is not None:
+        return f"s{store_ids.setdefault(id(store), len(store_ids))}:{candles.start}:{candles.end}"
+    return repr([
+        (c.timestamp, c.open, c.high, c.low, c.close, c.volume) for c in candles
+    ])
+
+
+def dataset_fingerprint(train_rows, val_rows, score_timeline: dict) -> str:
+    """
+    A train/val split + score_timeline + szimulátor kód ujjlenyomata.
+
+    Minden, amit replay_and_simulate() olvas, bekerül: a SignalSimRow összes
+    mezője (score-ok, indikátorok, hírek), a future_candles OHLCV tartalma,
+    a teljes score_timeline és simulator_fingerprint(). Újraszámolt score,
+    frissített árfolyam vagy módosított szimulátor → új fingerprint, a régi
+    perzisztált eredmények nem jönnek vissza.
+    """
+    from optimizer.fitness import MIN_TRADES
+
+    h = hashlib.sha1()
+    h.update(f"v{CACHE_VERSION}|min_trades={MIN_TRADES}|sim={simulator_fingerprint()}".encode())
+
+    stores: Dict[int, object] = {}
+    store_ids: Dict[int, int] = {}
+    for name, rows in (("train", train_rows), ("val", val_rows)):
+        h.update(f"|{name}:{len(rows)}".encode())
+        for r in rows:
+            values = [
+                getattr(r, f.name) for f in dataclasses.fields(r)
+                if f.name != "future_candles"
+            ]
+            h.update(json.dumps(values, sort_keys=True, default=str).encode())
+            store = getattr(r.future_candles, "store", None)
+            if store is not None:
+                stores[id(store)] = store
+            h.update(_candles_token(r.future_candles, store_ids).encode())
+
+    # Közös CandleStore-ok tartalma egyszer, a hivatkozási sorrendben
+    for sid, idx in sorted(store_ids.items(), key=lambda kv: kv[1]):
+        store = stores[sid]
+        h.update(f"|store{idx}:{store.ticker}:{len(store)}".encode())
+        h.update(store.data.tobytes())
+
+    for ticker in sorted(score_timeline):
+        h.update(f"|{ticker}:{score_timeline[ticker]!r}".encode())
+    return h.hexdigest()
+
+
+# ---------------------------------------------------------------------------
+# Cache
+# ---------------------------------------------------------------------------
+
+def _resolve_db_path() -> Optional[Path]:
+    env = os.environ.get("OPTIMIZER_FITNESS_CACHE")
+    if env is None:
+        return DEFAULT_CACHE_PATH
+    if env.strip().lower() in ("", "0", "off", "false", "no"):
+        return None
+    return Path(env)
+
+
+class FitnessCache:
+    """
+    LRU fitness cache egy dataset fingerprinthez, opcionális SQLite háttérrel
+    (persist=True: db_path, vagy ha None, az OPTIMIZER_FITNESS_CACHE env var).
+
+        cache = FitnessCache(dataset_fingerprint(train, val, score_timeline))
+        results = cache.evaluate(cfgs, tasks, lambda ts: pool.map(worker, ts))
+        cache.close()
+    """
+
+    def __init__(
+        self,
+        fingerprint: str,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        persist: bool = True,
+        db_path: Optional[Path] = None,
+    ):
+        self.fingerprint = fingerprint
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._mem: "OrderedDict[str, CachedFitness]" = OrderedDict()
+        self._conn: Optional[sqlite3.Connection] = None
+
+        if persist and db_path is None:
+            db_path = _resolve_db_path()
+        if persist and db_path is not None:
+            try:
+                self._conn = sqlite3.connect(str(db_path), timeout=30)
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute("""
+                    CREATE TABLE IF NOT EXISTS fitness_cache (
+                        fingerprint TEXT NOT NULL,
+                        config_key  TEXT NOT NULL,
+                        train_fit   REAL NOT NULL,
+                        val_fit     REAL NOT NULL,
+                        stats_json  TEXT NOT NULL,
+                        PRIMARY KEY (fingerprint, config_key)
+                    )
+                """)
+                self._conn.commit()
+            except sqlite3.Error as e:
+                print(f"[FitnessCache] SQLite persistence disabled ({e})")
+                self._conn = None
+
+    # -- lookup / store --------------------------------------------------
+
+    def get(self, key: str) -> Optional[CachedFitness]:
+        hit = self._mem.get(key)
+        if hit is not None:
+            self._mem.move_to_end(key)
+            return hit
+        if self._conn is not None:
+            row = self._conn.execute(
+                "SELECT train_fit, val_fit, stats_json FROM fitness_cache "
+                "WHERE fingerprint = ? AND config_key = ?",
+                (self.fingerprint, key),
+            ).fetchone()
+            if row is not None:
+                hit = CachedFitness(row[0], row[1], json.loads(row[2]))
+                self._remember(key, hit)
+                return hit
+        return None
+
+    def put(self, key: str, value: CachedFitness):
+        self._remember(key, value)
+        if self._conn is not None:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO fitness_cache "
+                "(fingerprint, config_key, train_fit, val_fit, stats_json) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (self.fingerprint, key, value.train_fit, value.val_fit,
+                 json.dumps(value.stats)),
+            )
+
+    def _remember(self, key: str, value: CachedFitness):
+        self._mem[key] = value
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_entries:
+            self._mem.popitem(last=False)
+
+    # -- batch evaluation --------------------------------------------------
+
+    def evaluate(
+        self,
+        cfgs: List[dict],
+        tasks: list,
+        map_fn: Callable[[list], list],
+    ) -> List[CachedFitness]:
+        """
+        cfgs[i] dekódolt configjához tartozó eredmény; a cache-ben nem lévő
+        configok task-jait (batch-en belül deduplikálva) map_fn-nel értékeli.
+        map_fn: list of tasks → list of (train_fit, val_fit, stats).
+        """
+        results: List[Optional[CachedFitness]] = [None] * len(cfgs)
+        pending: Dict[str, Tuple[object, List[int]]] = {}
+
+        for i, cfg in enumerate(cfgs):
+            key = config_key(cfg)
+            hit = self.get(key)
+            if hit is not None:
+                self.hits += 1
+                results[i] = hit
+            elif key in pending:
+                self.hits += 1
+                pending[key][1].append(i)
+            else:
+                self.misses += 1
+                pending[key] = (tasks[i], [i])
+
+        if pending:
+            outputs = map_fn([task for task, _ in pending.values()])
+            for (key, (_, idxs)), out in zip(pending.items(), outputs):
+                value = CachedFitness(*out)
+                self.put(key, value)
+                for i in idxs:
+                    results[i] = value
+            if self._conn is not None:
+                self._conn.commit()
+
+        return results
+
+    def evaluate_one(self, cfg: dict, evaluate_fn: Callable[[], tuple]) -> CachedFitness:
+        """Egy config in-process értékelése cache-en keresztül."""
+        return self.evaluate([cfg], [None], lambda _tasks: [evaluate_fn()])[0]
+
+    # -- lifecycle -----------------------------------------------------------
+
+    def summary(self) -> str:
+        total = self.hits + self.misses
+        rate = self.hits / total * 100 if total else 0.0
+        return f"{self.hits}/{total} hits ({rate:.1f}%), {len(self._mem)} entries in memory"
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.commit()
+            self._conn.close()
+            self._conn = None
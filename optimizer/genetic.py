@@ -46,17 +46,25 @@ v2.3 changes (actual val in evolution — root-cause fix):
     eltávolítva — feleslegessé vált.
   - VAL_BLEND_WEIGHT konstans megtartva (dokumentációs célból, értéke irreleváns).
 
-Version: 2.3
-Date: 2026-03-01
+v2.4 changes (shared-memory dataset):
+  - A worker-ek a train/val/score_timeline-t optimizer.shared_dataset-en át kapják:
+    a candle tömbök egy shared memory blokkban vannak (zero-copy csatolás),
+    a temp pickle csak a sor-metaadatokat és a score_timeline-t tartalmazza
+
+v2.5 changes (fitness cache):
+  - optimizer.fitness_cache: dekódolt config hash → (train_fit, val_fit, stats);
+    a pool csak a még nem látott configokat kapja meg, a HoF / val / proposal
+    újraszámolások cache-ből jönnek; perzisztens SQLite dataset fingerprint szerint
+
+Version: 2.5
+Date: 2026-10-16
 """
 
 import json
 import multiprocessing
 import os
-import pickle
 import random
 import sqlite3
-import tempfile
 import time
 from pathlib import Path
 from typing import List, Optional, Tuple
@@ -65,13 +73,16 @@ import numpy as np
 from deap import base, creator, tools, algorithms
 
 from optimizer.signal_data import load_all_sim_data
+from optimizer.shared_dataset import SharedDataset, load_shared_dataset
 from optimizer.backtester import load_signal_rows, load_trade_outcomes, SignalRow  # backward compat
 from optimizer.fitness import (
     compute_fitness,
     compute_fitness_for_subset,
+    compute_train_val_fitness,
     split_rows,
     MIN_TRADES,
 )
+from optimizer.fitness_cache import FitnessCache, dataset_fingerprint
 from optimizer.parameter_space import (
     PARAM_DEFS,
     N_DIMS,
@@ -134,13 +145,14 @@ _worker_score_timeline = None
 def _worker_init(data_file: str):
     """
     Called once per worker process when the Pool is created.
-    Loads shared data from a temp pickle file instead of receiving it
-    via multiprocessing IPC pipe — avoids Windows pipe buffer overflow
-    deadlock when dataset is large (e.g. include_archive=True, ~50K rows).
+    Loads shared data from a temp file instead of receiving it via
+    multiprocessing IPC pipe — avoids Windows pipe buffer overflow deadlock
+    when dataset is large (e.g. include_archive=True, ~50K rows).
+    The candle arrays are attached zero-copy from shared memory
+    (optimizer.shared_dataset); only row metadata is unpickled per worker.
     """
     global _worker_train_rows, _worker_val_rows, _worker_score_timeline
-    with open(data_file, "rb") as f:
-        data = pickle.load(f)
+    data = load_shared_dataset(data_file)
     _worker_train_rows     = data["train"]
     _worker_val_rows       = data["val"]
     _worker_score_timeline = data["score_timeline"]
@@ -150,7 +162,9 @@ def _worker_evaluate(individual):
     """
     Top-level (picklable) function evaluated in worker processes.
     Uses module-level globals set by _worker_init().
-    Returns (fitness,) tuple as required by DEAP.
+    Returns (train_fit, val_fit, stats) — the parent turns it into the DEAP
+    fitness via FitnessCache (optimizer.fitness_cache) and caches it by
+    decoded config.
 
     v2.3.1 min-fitness:
         fitness = min(train_fit, val_fit)
@@ -165,20 +179,12 @@ def _worker_evaluate(individual):
         train_fit=0.38, val_fit=0.36   →  fitness=0.36  (lesz kiválasztva)
     """
     from optimizer.parameter_space import decode_vector
-    from optimizer.fitness import compute_fitness_for_subset
+    from optimizer.fitness import compute_train_val_fitness
     cfg = decode_vector(individual)
-
-    train_fit, _ = compute_fitness_for_subset(
-        _worker_train_rows, _worker_score_timeline, cfg
-    )
-    val_fit, _ = compute_fitness_for_subset(
-        _worker_val_rows, _worker_score_timeline, cfg
+    return compute_train_val_fitness(
+        _worker_train_rows, _worker_val_rows, _worker_score_timeline, cfg
     )
 
-    fitness = min(train_fit, val_fit)
-
-    return (fitness,)
-
 
 def _make_toolbox(
     lower: np.ndarray,
@@ -311,14 +317,20 @@ def run_optimizer(
     # --- Toolbox ---
     toolbox = _make_toolbox(mode_lower, mode_upper)
 
+    # Fitness cache: decoded config → (train_fit, val_fit, stats) for this split.
+    # Clones / rounding-identical / frozen-dim duplicates are evaluated only once.
+    cache = FitnessCache(dataset_fingerprint(train, val, score_timeline))
+
+    def _evaluate_cfg(cfg):
+        """In-process train/val evaluation of one config, through the cache."""
+        return cache.evaluate_one(
+            cfg, lambda: compute_train_val_fitness(train, val, score_timeline, cfg)
+        )
+
     # Single-process min-evaluate — same formula as _worker_evaluate (v2.3.1).
     # Used for the baseline seed individual (pop[0]) to stay consistent.
     def evaluate_single(individual):
-        cfg = decode_vector(individual)
-        train_fit, _ = compute_fitness_for_subset(train, score_timeline, cfg)
-        val_fit,   _ = compute_fitness_for_subset(val,   score_timeline, cfg)
-        fitness = min(train_fit, val_fit)
-        return (fitness,)
+        return (_evaluate_cfg(decode_vector(individual)).fitness,)
 
     toolbox.register("evaluate", evaluate_single)
 
@@ -335,134 +347,147 @@ def run_optimizer(
 
     print(f"[GA] Starting parallel fitness evaluation with {n_workers} worker(s)...")
 
-    # --- Shared data -> temp pickle file ---
+    # --- Shared data -> shared memory (candles) + temp file (row metadata) ---
     # Passing large initargs (train, val, score_timeline) directly via multiprocessing
     # IPC pipe overflows the Windows named pipe buffer when the dataset is large
-    # (e.g. include_archive=True, ~50 K rows). Instead we write a single temp file
-    # and pass only the file path to each worker — the OS file cache makes this fast.
-    _tmp_data_file = tempfile.NamedTemporaryFile(
-        suffix=".pkl", delete=False, prefix="optimizer_data_"
-    )
-    _tmp_data_path = _tmp_data_file.name
-    with open(_tmp_data_path, "wb") as _f:
-        pickle.dump({"train": train, "val": val, "score_timeline": score_timeline}, _f)
-    _tmp_data_file.close()
-    print(f"[GA] Shared data written to temp file ({os.path.getsize(_tmp_data_path) // 1024 // 1024} MB)")
+    # (e.g. include_archive=True, ~50 K rows). Instead the candle arrays go into one
+    # shared memory block and only a small temp file path is passed to each worker.
+    shared = SharedDataset({"train": train, "val": val, "score_timeline": score_timeline})
+    print(f"[GA] Shared data: candles {shared.candle_bytes // 1024 // 1024} MB in shared memory, "
+          f"metadata {shared.pickle_bytes // 1024 // 1024} MB temp file")
 
     # --- Open the worker pool (stays open for the entire run) ---
     # Windows requires the pool to be created inside an if __name__ == '__main__'
     # guard in scripts, but since this runs as a subprocess spawned by _runner.py
     # (which has the guard), we are safe here.
-    with multiprocessing.Pool(
-        processes=n_workers,
-        initializer=_worker_init,
-        initargs=(_tmp_data_path,),
-    ) as pool:
-
-        # Evaluate baseline individual (in-process, avoids pickling overhead)
-        pop[0].fitness.values = evaluate_single(pop[0])
-
-        # Evaluate rest of initial population in parallel
-        print(f"[GA] Evaluating initial population ({population_size} individuals)...")
-        fitnesses = pool.map(_worker_evaluate, pop[1:])
-        for ind, fit in zip(pop[1:], fitnesses):
-            ind.fitness.values = fit
-
-        # Hall of fame: top 3 individuals
-        hof = tools.HallOfFame(3)
-        hof.update(pop)
-
-        # Stats
-        stats = tools.Statistics(lambda ind: ind.fitness.values[0])
-        stats.register("best",  max)
-        stats.register("avg",   np.mean)
-        stats.register("worst", min)
-
-        best_train_fitness = max(ind.fitness.values[0] for ind in pop)
-        best_val_fitness   = 0.0
-        generations_run    = 0
-
-        print(f"[GA] Initial best fitness: {best_train_fitness:.4f}")
-
-        # --- Evolution loop ---
-        for gen in range(1, max_generations + 1):
-            generations_run = gen
-
-            # Check stop flag
-            if stop_flag_path and stop_flag_path.exists():
-                print(f"[GA] Stop flag detected at generation {gen}. Stopping.")
-                break
-
-            # Elitism: preserve top 2
-            elite = tools.selBest(pop, 2)
-            elite = [toolbox.clone(e) for e in elite]
-
-            # Select next generation
-            offspring = toolbox.select(pop, len(pop) - 2)
-            offspring = [toolbox.clone(o) for o in offspring]
-
-            # Crossover
-            for child1, child2 in zip(offspring[::2], offspring[1::2]):
-                if random.random() < crossover_prob:
-                    toolbox.mate(child1, child2)
-                    del child1.fitness.values
-                    del child2.fitness.values
-
-            # Mutation
-            for mutant in offspring:
-                if random.random() < mutation_prob:
-                    toolbox.mutate(mutant)
-                    del mutant.fitness.values
-
-            # Evaluate offspring in parallel
-            invalid = [ind for ind in offspring if not ind.fitness.valid]
-            if invalid:
-                fitnesses = pool.map(_worker_evaluate, invalid)
-                for ind, fit in zip(invalid, fitnesses):
-                    ind.fitness.values = fit
-
-            # Replace population (elitism)
-            pop[:] = elite + offspring
+    try:
+        with multiprocessing.Pool(
+            processes=n_workers,
+            initializer=_worker_init,
+            initargs=(shared.path,),
+        ) as pool:
+
+            def evaluate_parallel(individuals):
+                """Cache hits served locally, only unseen configs go to the pool."""
+                results = cache.evaluate(
+                    [decode_vector(ind) for ind in individuals],
+                    [list(ind) for ind in individuals],
+                    lambda tasks: pool.map(_worker_evaluate, tasks),
+                )
+                return [(r.fitness,) for r in results]
+
+            # Evaluate baseline individual (in-process, avoids pickling overhead)
+            pop[0].fitness.values = evaluate_single(pop[0])
+
+            # Evaluate rest of initial population in parallel
+            print(f"[GA] Evaluating initial population ({population_size} individuals)...")
+            fitnesses = evaluate_parallel(pop[1:])
+            for ind, fit in zip(pop[1:], fitnesses):
+                ind.fitness.values = fit
+
+            # Hall of fame: top 3 individuals
+            hof = tools.HallOfFame(3)
             hof.update(pop)
 
-            # Generation stats
-            gen_best  = max(ind.fitness.values[0] for ind in pop)
-            gen_avg   = np.mean([ind.fitness.values[0] for ind in pop])
-            gen_worst = min(ind.fitness.values[0] for ind in pop)
-
-            # Validate best individual on validation set every VAL_EVAL_EVERY gens.
-            # Between validation points, carry forward the last known val_fit.
-            if gen % VAL_EVAL_EVERY == 0 or gen == 1:
-                best_ind = tools.selBest(pop, 1)[0]
-                cfg_best = decode_vector(best_ind)
-                val_fit, _ = compute_fitness_for_subset(val, score_timeline, cfg_best)
-                best_val_fitness = val_fit
-
-            train_val_gap = (
-                (gen_best - best_val_fitness) / gen_best
-                if gen_best > 0 else 0.0
-            )
-
-            best_train_fitness = gen_best
-
-            # Write generation record to DB
-            _write_generation(
-                run_id=run_id,
-                generation=gen,
-                best_train=gen_best,
-                avg_train=gen_avg,
-                worst_train=gen_worst,
-                best_val=best_val_fitness,
-                train_val_gap=train_val_gap,
-                db_path=db_path,
-            )
-
-            if gen % 10 == 0 or gen <= 5:
-                val_marker = "" if gen % VAL_EVAL_EVERY == 0 or gen == 1 else " (cached)"
-                print(f"[GA] Gen {gen:3d}/{max_generations}: "
-                      f"best={gen_best:.4f}  avg={gen_avg:.4f}  "
-                      f"val={best_val_fitness:.4f}{val_marker}  "
-                      f"gap={train_val_gap*100:.1f}%")
+            # Stats
+            stats = tools.Statistics(lambda ind: ind.fitness.values[0])
+            stats.register("best",  max)
+            stats.register("avg",   np.mean)
+            stats.register("worst", min)
+
+            best_train_fitness = max(ind.fitness.values[0] for ind in pop)
+            best_val_fitness   = 0.0
+            generations_run    = 0
+
+            print(f"[GA] Initial best fitness: {best_train_fitness:.4f}")
+
+            # --- Evolution loop ---
+            for gen in range(1, max_generations + 1):
+                generations_run = gen
+
+                # Check stop flag
+                if stop_flag_path and stop_flag_path.exists():
+                    print(f"[GA] Stop flag detected at generation {gen}. Stopping.")
+                    break
+
+                # Elitism: preserve top 2
+                elite = tools.selBest(pop, 2)
+                elite = [toolbox.clone(e) for e in elite]
+
+                # Select next generation
+                offspring = toolbox.select(pop, len(pop) - 2)
+                offspring = [toolbox.clone(o) for o in offspring]
+
+                # Crossover
+                for child1, child2 in zip(offspring[::2], offspring[1::2]):
+                    if random.random() < crossover_prob:
+                        toolbox.mate(child1, child2)
+                        del child1.fitness.values
+                        del child2.fitness.values
+
+                # Mutation
+                for mutant in offspring:
+                    if random.random() < mutation_prob:
+                        toolbox.mutate(mutant)
+                        del mutant.fitness.values
+
+                # Evaluate offspring in parallel
+                invalid = [ind for ind in offspring if not ind.fitness.valid]
+                if invalid:
+                    fitnesses = evaluate_parallel(invalid)
+                    for ind, fit in zip(invalid, fitnesses):
+                        ind.fitness.values = fit
+
+                # Replace population (elitism)
+                pop[:] = elite + offspring
+                hof.update(pop)
+
+                # Generation stats
+                gen_best  = max(ind.fitness.values[0] for ind in pop)
+                gen_avg   = np.mean([ind.fitness.values[0] for ind in pop])
+                gen_worst = min(ind.fitness.values[0] for ind in pop)
+
+                # Validate best individual on validation set every VAL_EVAL_EVERY gens.
+                # Between validation points, carry forward the last known val_fit.
+                if gen % VAL_EVAL_EVERY == 0 or gen == 1:
+                    best_ind = tools.selBest(pop, 1)[0]
+                    cfg_best = decode_vector(best_ind)
+                    best_val_fitness = _evaluate_cfg(cfg_best).val_fit
+
+                train_val_gap = (
+                    (gen_best - best_val_fitness) / gen_best
+                    if gen_best > 0 else 0.0
+                )
+
+                best_train_fitness = gen_best
+
+                # Write generation record to DB
+                _write_generation(
+                    run_id=run_id,
+                    generation=gen,
+                    best_train=gen_best,
+                    avg_train=gen_avg,
+                    worst_train=gen_worst,
+                    best_val=best_val_fitness,
+                    train_val_gap=train_val_gap,
+                    db_path=db_path,
+                )
+
+                if gen % 10 == 0 or gen <= 5:
+                    val_marker = "" if gen % VAL_EVAL_EVERY == 0 or gen == 1 else " (cached)"
+                    print(f"[GA] Gen {gen:3d}/{max_generations}: "
+                          f"best={gen_best:.4f}  avg={gen_avg:.4f}  "
+                          f"val={best_val_fitness:.4f}{val_marker}  "
+                          f"gap={train_val_gap*100:.1f}%")
+    finally:
+        # Pool closed (normally or by an exception) → temp data file + shared
+        # memory block no longer needed; never leave /dev/shm segments behind
+        shared.close()
+        # Fitness cache SQLite connection: committed and closed here as well;
+        # the top-3 lookups below are served from the in-memory LRU
+        cache.close()
+
+    print(f"[GA] Fitness cache: {cache.summary()}")
 
     # --- Compute test fitness for top-3 individuals ---
     print(f"\n[GA] Evaluating top-3 candidates on test set...")
@@ -470,7 +495,6 @@ def run_optimizer(
     # Baseline: mindig az aktuális config.json értékei alapján számolódik
     cfg_baseline = decode_vector(get_current_baseline_vector())
     baseline_fit, baseline_stats = compute_fitness_for_subset(test, score_timeline, cfg_baseline)
-    baseline_train_fit, _ = compute_fitness_for_subset(train, score_timeline, cfg_baseline)
 
     # Deduplicate HoF: csak akkor veszünk fel új jelöltet, ha vektora kellően
     # különbözik az eddig felvettektől. Ha a GA nagyon konvergált, a HoF
@@ -494,8 +518,8 @@ def run_optimizer(
     for rank, ind_vec in enumerate(unique_hof, start=1):
         ind = ind_vec  # list of floats
         cfg = decode_vector(ind)
-        train_fit, train_stats = compute_fitness_for_subset(train, score_timeline, cfg)
-        val_fit,   val_stats   = compute_fitness_for_subset(val,   score_timeline, cfg)
+        cached = _evaluate_cfg(cfg)
+        train_fit, val_fit = cached.train_fit, cached.val_fit
         test_fit,  test_stats  = compute_fitness_for_subset(test,  score_timeline, cfg)
 
         improvement_pct = (
@@ -530,12 +554,6 @@ def run_optimizer(
             "config_diff":            vector_to_config_diff(ind, trade_mode=trade_mode),
         })
 
-    # Clean up temp data file
-    try:
-        os.unlink(_tmp_data_path)
-    except Exception:
-        pass
-
     elapsed = time.time() - t_start
     print(f"\n[GA] Done in {elapsed:.0f}s ({elapsed/60:.1f} min). "
           f"Generations: {generations_run}/{max_generations}")
@@ -0,0 +1,156 @@
+"""
+TrendSignal Self-Tuning Engine - Statistical Validation (NumPy kernels)
+
+Tömbös építőkövek az optimizer.validation rétegeihez:
+
+  1. bootstrap_indices()  : az összes bootstrap újramintavétel egyetlen
+                            (iterációk × n) index mátrixként; block_size > 1
+                            esetén cirkuláris block bootstrap (autokorrelált,
+                            időrendben egymást követő trade-ek)
+  2. profit_factors()     : profit factor soronként (axis=1), maszkolt
+                            összegekkel — NaN = nincs trade az adott pozíción
+  3. bootstrap_pf_diffs() : PF(proposal) - PF(baseline) eloszlás; független
+                            vagy páros (ugyanazok a signal indexek mindkét
+                            configra) újramintavétellel
+  4. window_sums()        : [start, end) ablakok gross profit / loss / win /
+                            trade összegei kumulatív összegekből (O(1) / ablak)
+
+Key design:
+  - PF definíció azonos a validation._profit_factor()-ral: csak veszteség nélkül
+    3.0 (ha van nyereség), különben 0.0
+  - Reprodukálható: ugyanaz a seed + ugyanazok a bemenetek → ugyanaz az
+    eloszlás. Az iterációkat memória-korlát szerinti darabokban húzzuk (a
+    darabolás csak n-től és az iterációszámtól függ)
+
+Version: 1.0
+Date: 2026-10-16
+"""
+
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Egy darabban legfeljebb ennyi (iteráció × n) index elem (~16 MB int64)
+MAX_CHUNK_ELEMENTS = 2_000_000
+
+# Csak nyerő trade-ek esetén a PF plafonja (mint _profit_factor / compute_fitness)
+PF_ALL_WINS = 3.0
+
+
+def as_pnl_array(pnls: Sequence[Optional[float]]) -> np.ndarray:
+    """P&L lista → float64 tömb; None → NaN (nincs trade)."""
+    if isinstance(pnls, np.ndarray):
+        return pnls.astype(float, copy=False)
+    return np.array([np.nan if p is None else p for p in pnls], dtype=float)
+
+
+def profit_factors(gross_profit: np.ndarray, gross_loss: np.ndarray) -> np.ndarray:
+    """PF gross összegekből: loss > 0 → profit / loss, különben 3.0 / 0.0."""
+    gross_profit = np.asarray(gross_profit, dtype=float)
+    gross_loss = np.asarray(gross_loss, dtype=float)
+    fallback = np.where(gross_profit > 0, PF_ALL_WINS, 0.0)
+    return np.divide(gross_profit, gross_loss, out=fallback, where=gross_loss > 0)
+
+
+def _gains_losses(pnls: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Pozíciónkénti nyereség / |veszteség| (NaN → 0, azaz maszkolva)."""
+    gains = np.where(pnls > 0, pnls, 0.0)
+    losses = np.where(pnls < 0, -pnls, 0.0)
+    return gains, losses
+
+
+def sample_profit_factors(pnls: np.ndarray, idx: np.ndarray) -> np.ndarray:
+    """idx (iterációk × k) szerinti minták PF-je soronként."""
+    gains, losses = _gains_losses(pnls)
+    return profit_factors(gains[idx].sum(axis=1), losses[idx].sum(axis=1))
+
+
+def bootstrap_indices(
+    rng: np.random.Generator,
+    n: int,
+    n_iterations: int,
+    block_size: int = 1,
+) -> np.ndarray:
+    """
+    (n_iterations × n) visszatevéses index mátrix.
+
+    block_size > 1: cirkuláris block bootstrap — ⌈n / block_size⌉ véletlen
+    kezdőpontú, block_size hosszú (a végén körbeforduló) blokk, n hosszra vágva.
+    """
+    if block_size <= 1:
+        return rng.integers(0, n, size=(n_iterations, n))
+    n_blocks = -(-n // block_size)
+    starts = rng.integers(0, n, size=(n_iterations, n_blocks))
+    idx = (starts[:, :, None] + np.arange(block_size)) % n
+    return idx.reshape(n_iterations, n_blocks * block_size)[:, :n]
+
+
+def _chunks(n_iterations: int, width: int):
+    step = max(1, MAX_CHUNK_ELEMENTS // max(1, width))
+    for start in range(0, n_iterations, step):
+        yield min(step, n_iterations - start)
+
+
+def bootstrap_pf_diffs(
+    baseline_pnls: np.ndarray,
+    proposal_pnls: np.ndarray,
+    n_iterations: int,
+    rng_seed: int = 42,
+    block_size: int = 1,
+    paired: bool = False,
+) -> np.ndarray:
+    """
+    PF(proposal minta) - PF(baseline minta) bootstrap eloszlás.
+
+    paired=False: a két P&L sorozat független újramintavétele (a hosszuk
+    eltérhet). paired=True: a két tömb signalonként igazított (NaN = az adott
+    config ott nem kötött trade-et) és mindkettő ugyanazzal az index
+    mátrixszal mintavételeződik.
+    """
+    rng = np.random.default_rng(rng_seed)
+    baseline_pnls = np.asarray(baseline_pnls, dtype=float)
+    proposal_pnls = np.asarray(proposal_pnls, dtype=float)
+    if paired and len(baseline_pnls) != len(proposal_pnls):
+        raise ValueError("paired bootstrap needs signal-aligned P&L arrays of equal length")
+
+    out = []
+    width = len(baseline_pnls) if paired else len(baseline_pnls) + len(proposal_pnls)
+    for size in _chunks(n_iterations, width):
+        if paired:
+            idx = bootstrap_indices(rng, len(baseline_pnls), size, block_size)
+            b_idx = p_idx = idx
+        else:
+            b_idx = bootstrap_indices(rng, len(baseline_pnls), size, block_size)
+            p_idx = bootstrap_indices(rng, len(proposal_pnls), size, block_size)
+        out.append(sample_profit_factors(proposal_pnls, p_idx) -
+                   sample_profit_factors(baseline_pnls, b_idx))
+    return np.concatenate(out) if out else np.empty(0)
+
+
+def window_sums(
+    pnls: np.ndarray,
+    starts: Sequence[int],
+    ends: Sequence[int],
+) -> Dict[str, np.ndarray]:
+    """
+    [start, end) ablakonként: gross_profit, gross_loss, wins, total.
+
+    compute_fitness() szemantikája: NaN = nincs trade; pnl > 0 → win, minden
+    más trade (0 is) loss oldali.
+    """
+    pnls = np.asarray(pnls, dtype=float)
+    active = ~np.isnan(pnls)
+    win = active & (pnls > 0)
+    columns = {
+        "gross_profit": np.where(win, pnls, 0.0),
+        "gross_loss":   np.where(active & ~win, np.abs(pnls), 0.0),
+        "wins":         win.astype(np.int64),
+        "total":        active.astype(np.int64),
+    }
+    starts = np.asarray(starts, dtype=np.int64)
+    ends = np.asarray(ends, dtype=np.int64)
+    out = {}
+    for name, col in columns.items():
+        cum = np.concatenate(([0], np.cumsum(col)))
+        out[name] = cum[ends] - cum[starts]
+    return out
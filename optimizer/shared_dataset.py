@@ -0,0 +1,173 @@
+"""
+TrendSignal Self-Tuning Engine - Shared-memory dataset for worker pools
+
+A GA / BCD worker pool-ok eddig a teljes train/val/score_timeline adatot
+kapták meg processzenként (pickle fájl vagy initargs) → N worker × teljes
+dataset RAM, és minden BCD körben új Pool + teljes adatátvitel.
+
+Itt:
+  1. SharedDataset (szülő oldal):
+       - minden CandleStore bar-tömbjét EGY multiprocessing.shared_memory
+         blokkba másolja (tickerenként egy szelet)
+       - a maradékot (SignalSimRow metaadatok, score_timeline) egy temp pickle
+         fájlba írja; a CandleStore-ok helyére csak (ticker, shm név, offset,
+         hossz) hivatkozás kerül (pickle persistent_id)
+  2. load_shared_dataset() (worker oldal):
+       - a pickle-t betölti, a CandleStore-okat zero-copy NumPy nézetként
+         csatolja a shared memory blokkra
+  3. A worker pool maradhat nyitva több BCD körön át — a workerek a
+     dataset-et egyszer csatolják, körönként csak a frozen vektor és az
+     aktív dimenziók utaznak a taskokkal.
+
+Windows-safe: a workerek csak a fájl útvonalát kapják (initargs), a shared
+memory blokkot név alapján nyitják meg.
+
+Version: 1.0
+Date: 2026-10-16
+"""
+
+import os
+import pickle
+import tempfile
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from optimizer.signal_data import CANDLE_DTYPE, CandleStore
+
+# Worker oldalon megnyitott shared memory blokkok — életben kell tartani,
+# különben a rájuk mutató NumPy nézetek felszabadított bufferre mutatnának.
+_ATTACHED: Dict[str, shared_memory.SharedMemory] = {}
+
+
+class _SharedPickler(pickle.Pickler):
+    """CandleStore → ("candles", ticker, offset, length) hivatkozás."""
+
+    def __init__(self, f, exports: Dict[int, Tuple[int, int]]):
+        super().__init__(f, protocol=pickle.HIGHEST_PROTOCOL)
+        self._exports = exports
+
+    def persistent_id(self, obj):
+        if isinstance(obj, CandleStore):
+            ref = self._exports.get(id(obj))
+            if ref is not None:
+                return ("candles", obj.ticker, ref[0], ref[1])
+        return None
+
+
+class _SharedUnpickler(pickle.Unpickler):
+    """("candles", ...) hivatkozás → shared memory-ra csatolt CandleStore."""
+
+    def __init__(self, f, candles: np.ndarray):
+        super().__init__(f)
+        self._candles = candles
+        self._stores: Dict[Tuple[str, int], CandleStore] = {}
+
+    def persistent_load(self, pid):
+        kind, ticker, offset, length = pid
+        if kind != "candles":
+            raise pickle.UnpicklingError(f"unknown persistent id: {kind!r}")
+        key = (ticker, offset)
+        store = self._stores.get(key)
+        if store is None:
+            store = CandleStore(ticker, self._candles[offset:offset + length])
+            self._stores[key] = store
+        return store
+
+
+class SharedDataset:
+    """
+    Szülő oldali tulajdonos: shared memory blokk (candle-ök) + temp pickle
+    fájl (minden más). Context managerként használva a végén mindkettőt
+    felszabadítja.
+
+        with SharedDataset({"train": train, "val": val,
+                            "score_timeline": score_timeline}) as ds:
+            with multiprocessing.Pool(initializer=_worker_init,
+                                      initargs=(ds.path,)) as pool:
+                ...
+
+    A szülő saját CandleStore-jai érintetlenek maradnak (a pool bezárása után
+    is használhatók).
+    """
+
+    def __init__(self, payload: dict):
+        stores = _collect_stores(payload)
+        total = sum(len(s) for s in stores)
+
+        self.shm: Optional[shared_memory.SharedMemory] = shared_memory.SharedMemory(
+            create=True, size=max(1, total * CANDLE_DTYPE.itemsize)
+        )
+        candles = np.ndarray((total,), dtype=CANDLE_DTYPE, buffer=self.shm.buf)
+
+        exports: Dict[int, Tuple[int, int]] = {}
+        offset = 0
+        for store in stores:
+            n = len(store)
+            candles[offset:offset + n] = store.data
+            exports[id(store)] = (offset, n)
+            offset += n
+        del candles  # a szülőnek nem kell nézet a blokkra
+
+        tmp = tempfile.NamedTemporaryFile(
+            suffix=".pkl", delete=False, prefix="optimizer_data_"
+        )
+        self.path = tmp.name
+        with tmp:
+            pickle.dump((self.shm.name, total), tmp, protocol=pickle.HIGHEST_PROTOCOL)
+            _SharedPickler(tmp, exports).dump(payload)
+
+        self.candle_bytes = total * CANDLE_DTYPE.itemsize
+        self.pickle_bytes = os.path.getsize(self.path)
+
+    def close(self):
+        """Temp fájl törlése + shared memory blokk felszabadítása (idempotens)."""
+        if self.path:
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+            self.path = None
+        if self.shm is not None:
+            self.shm.close()
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+            self.shm = None
+
+    def __enter__(self) -> "SharedDataset":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def load_shared_dataset(path: str) -> dict:
+    """
+    Worker oldal: a SharedDataset által írt fájl betöltése, a CandleStore-ok
+    zero-copy csatolása a shared memory blokkra. A payload dict-et adja vissza.
+    """
+    with open(path, "rb") as f:
+        shm_name, total = pickle.load(f)
+        shm = _ATTACHED.get(shm_name)
+        if shm is None:
+            shm = shared_memory.SharedMemory(name=shm_name)
+            _ATTACHED[shm_name] = shm
+        candles = np.ndarray((total,), dtype=CANDLE_DTYPE, buffer=shm.buf)
+        candles.flags.writeable = False
+        return _SharedUnpickler(f, candles).load()
+
+
+def _collect_stores(payload: dict) -> List[CandleStore]:
+    """A payload összes SignalSimRow-jának egyedi CandleStore-jai (első előfordulás sorrendben)."""
+    seen: Dict[int, CandleStore] = {}
+    for value in payload.values():
+        if not isinstance(value, list):
+            continue
+        for row in value:
+            store = getattr(getattr(row, "future_candles", None), "store", None)
+            if isinstance(store, CandleStore) and id(store) not in seen:
+                seen[id(store)] = store
+    return list(seen.values())
@@ -10,7 +10,10 @@ Loads all data needed for full trade re-simulation in one pass:
 
 Design goals:
   - Single DB pass, everything in memory → zero DB I/O during optimizer evaluation
-  - Estimated RAM: ~20-30 MB for 1097 signals × ~130 candles/day × 45 days (15m)
+  - Candles: tickerenként EGY strukturált NumPy tömb (CandleStore); a jelek csak
+    egy (store, start_idx, end_idx) nézetet (CandleView) tartanak → az átfedő
+    45 napos ablakok nem másolódnak jelenként, a pickle is tickerenként egyszer
+    tartalmazza a bar-okat
   - score_timeline used by simulate_trade() for opposing signal detection
 
 trade_mode filter:
@@ -18,8 +21,8 @@ trade_mode filter:
   "long"  → csak BUY/STRONG_BUY/MODERATE_BUY decision-ű jelzések
   "short" → csak SELL/STRONG_SELL/MODERATE_SELL decision-ű jelzések
 
-Version: 3.2 – MAX_ARCHIVE_SIGNALS 4000→50000 (no artificial cap on direction-filtered data)
-Date: 2026-03-29
+Version: 3.5 – CandleStore.trading_bars(): lusta TradingBars a gyorsított exit kereséshez
+Date: 2026-10-16
 """
 
 import json
@@ -27,7 +30,12 @@ import sqlite3
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from src.trade_simulator_core import ALERT_THRESHOLD as _ALERT_THRESHOLD
+from src.trade_simulator_core import TradingBars
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 DATABASE_PATH = BASE_DIR / "trendsignal.db"
@@ -66,8 +74,9 @@ class SignalSimRow:
       2. SL/TP recalculation (atr, confidence, nearest_support/resistance)
       3. Trade simulation (future_candles after entry)
 
-    future_candles is populated by load_all_sim_data(); it contains all 5m
-    candles from the signal's calculated_at through PRICE_LOOKAHEAD_DAYS.
+    future_candles is populated by load_all_sim_data(); it is a CandleView over
+    the ticker's CandleStore covering the 15m candles after calculated_at through
+    PRICE_LOOKAHEAD_DAYS. A plain List[PriceCandle] is also accepted everywhere.
     """
     # --- Identifiers ---
     signal_id: int
@@ -114,7 +123,172 @@ class SignalSimRow:
     nearest_resistance: Optional[float] = None
 
     # --- Trade simulation ---
-    future_candles: List[PriceCandle] = field(default_factory=list)
+    future_candles: "CandleView | List[PriceCandle]" = field(default_factory=list)
+
+
+# Strukturált dtype egy ticker összes 15m bar-jához (timestamp naive UTC)
+CANDLE_DTYPE = np.dtype([
+    ("timestamp", "datetime64[us]"),
+    ("open",      "f8"),
+    ("high",      "f8"),
+    ("low",       "f8"),
+    ("close",     "f8"),
+    ("volume",    "f8"),
+])
+
+
+class CandleStore:
+    """
+    Egy ticker összes 15m bar-ja egyetlen strukturált NumPy tömbben (CANDLE_DTYPE),
+    timestamp szerint rendezve. A data tömb lehet saját vagy shared memory
+    nézet is (optimizer.shared_dataset) — a store csak olvassa.
+
+    trading_bars(): processzenként lustán épített TradingBars (nem pickle-ölődik).
+    """
+
+    __slots__ = ("ticker", "data", "_trading")
+
+    def __init__(self, ticker: str, data: np.ndarray):
+        self.ticker = ticker
+        self.data = data
+        self._trading: Optional[TradingBars] = None
+
+    def __getstate__(self):
+        return self.ticker, self.data
+
+    def __setstate__(self, state):
+        self.ticker, self.data = state
+        self._trading = None
+
+    @classmethod
+    def from_candles(cls, ticker: str, candles: List[PriceCandle]) -> "CandleStore":
+        data = np.empty(len(candles), dtype=CANDLE_DTYPE)
+        for i, c in enumerate(candles):
+            data[i] = (c.timestamp, c.open, c.high, c.low, c.close, c.volume)
+        return cls(ticker, data)
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def window(self, after_ts: datetime, until_ts: datetime) -> "CandleView":
+        """Bar-ok: after_ts < timestamp <= until_ts (bináris kereséssel)."""
+        ts = self.data["timestamp"]
+        start = int(np.searchsorted(ts, np.datetime64(after_ts, "us"), side="right"))
+        end = int(np.searchsorted(ts, np.datetime64(until_ts, "us"), side="right"))
+        return CandleView(self, start, max(start, end))
+
+    def trading_bars(self) -> TradingBars:
+        """A ticker kereskedési bar-jai (első hívásra épül, utána cache-elt)."""
+        if self._trading is None:
+            d = self.data
+            self._trading = TradingBars(
+                self.ticker, d["timestamp"].tolist(),
+                d["open"], d["high"], d["low"], d["close"],
+            )
+        return self._trading
+
+
+_ITER_CHUNK = 64
+
+
+class CandleView:
+    """
+    (store, start_idx, end_idx) nézet egy CandleStore-ra — egy jel future_candles-e.
+
+    Sequence-ként viselkedik (len, bool, iterálás / indexelés PriceCandle-t ad),
+    a trade_simulator_core.simulate_exit pedig az iter_ohlc()-n keresztül
+    objektumgyártás nélkül járja be.
+    """
+
+    __slots__ = ("store", "start", "end")
+
+    def __init__(self, store: CandleStore, start: int, end: int):
+        self.store = store
+        self.start = start
+        self.end = end
+
+    @property
+    def ticker(self) -> str:
+        return self.store.ticker
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    def trading_window(self) -> Tuple[TradingBars, int, int]:
+        """(TradingBars, start, end) — a nézet kereskedési bar-jai simulate_exit_fast()-hoz."""
+        tb = self.store.trading_bars()
+        start, end = tb.window(self.start, self.end)
+        return tb, start, end
+
+    def iter_ohlc(self) -> Iterator[Tuple[datetime, float, float, float, float]]:
+        """
+        (timestamp, open, high, low, close) tuple-ök lustán, _ITER_CHUNK bar-os
+        darabokban Python típusokra konvertálva — a bar-walk korai exitjénél nem
+        konvertáljuk végig a teljes ablakot, és nem tartunk per-process másolatot.
+        """
+        data = self.store.data
+        for s in range(self.start, self.end, _ITER_CHUNK):
+            b = data[s:min(s + _ITER_CHUNK, self.end)]
+            yield from zip(
+                b["timestamp"].tolist(),
+                b["open"].tolist(),
+                b["high"].tolist(),
+                b["low"].tolist(),
+                b["close"].tolist(),
+            )
+
+    def _candle(self, i: int) -> PriceCandle:
+        r = self.store.data[i]
+        return PriceCandle(
+            timestamp=r["timestamp"].item(),
+            open=float(r["open"]),
+            high=float(r["high"]),
+            low=float(r["low"]),
+            close=float(r["close"]),
+            volume=float(r["volume"]),
+        )
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [self._candle(self.start + i) for i in range(*key.indices(len(self)))]
+        n = len(self)
+        if key < 0:
+            key += n
+        if not 0 <= key < n:
+            raise IndexError("CandleView index out of range")
+        return self._candle(self.start + key)
+
+    def __iter__(self):
+        for i in range(self.start, self.end):
+            yield self._candle(i)
+
+
+@dataclass
+class DirectionSignalIndex:
+    """
+    Prebuilt alert-level signal index for one (ticker, trade direction).
+
+    Built once at load time from the score_timeline, so simulate_trade() does
+    not re-filter and re-sort the ticker's whole timeline on every trade.
+      opp_ts           : opposing alert timestamps (sorted)
+      same_dir_signals : [(ts, sl)] same-direction alerts with SL (sorted by ts)
+      same_dir_ts      : timestamps of same_dir_signals (bisect key)
+    """
+    opp_ts: List[datetime]
+    same_dir_signals: List[Tuple[datetime, float]]
+    same_dir_ts: List[datetime]
+
+
+class ScoreTimeline(dict):
+    """
+    {ticker: [(ts, combined_score, sl, tp), ...]} — plain dict semantics, plus
+    `index`: {(ticker, "LONG"|"SHORT"): DirectionSignalIndex} prebuilt for every
+    ticker (see build_signal_index()).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.index: Dict[Tuple[str, str], DirectionSignalIndex] = {}
 
 
 # ---------------------------------------------------------------------------
@@ -127,7 +301,7 @@ def load_all_sim_data(
     include_archive: bool = False,
     trade_mode: str = "all",
     max_archive_signals: int = MAX_ARCHIVE_SIGNALS,
-) -> Tuple[List[SignalSimRow], Dict[str, List[Tuple[datetime, float]]]]:
+) -> Tuple[List[SignalSimRow], "ScoreTimeline"]:
     """
     Load everything needed for full trade re-simulation.
 
@@ -146,8 +320,10 @@ def load_all_sim_data(
     -------
     rows : List[SignalSimRow]
         Signal rows chronological order, with future_candles populated.
-    score_timeline : Dict[str, List[Tuple[datetime, float]]]
-        {ticker: [(timestamp, combined_score), ...]} for opposing signal detection.
+    score_timeline : ScoreTimeline
+        {ticker: [(timestamp, combined_score, sl, tp), ...]} for opposing signal
+        detection, with the per-(ticker, direction) DirectionSignalIndex prebuilt
+        in score_timeline.index.
     """
     conn = sqlite3.connect(str(db_path))
     conn.row_factory = sqlite3.Row
@@ -160,16 +336,20 @@ def load_all_sim_data(
         # Re-sort chronologically
         rows.sort(key=lambda r: r.calculated_at)
 
-    candle_map = _load_price_data(conn, rows, lookahead_days)
+    candle_map = _load_price_data(conn, rows)
     timeline   = _load_score_timeline(conn)
 
     conn.close()
 
-    # Attach future candles
+    # Attach future candles (CandleView a ticker store-jára — nincs másolás)
+    lookahead = timedelta(days=lookahead_days)
     for row in rows:
-        row.future_candles = candle_map.get(row.ticker, {}).get(
-            row.calculated_at, []
-        )
+        store = candle_map.get(row.ticker)
+        sig_ts = _parse_ts(row.calculated_at)
+        if store is None or sig_ts is None:
+            row.future_candles = []
+            continue
+        row.future_candles = store.window(sig_ts, sig_ts + lookahead)
 
     # trade_mode filter — a HOLD jelzések a backtesterben szűrődnek ki;
     # itt csak a direction-szintű szűrést végezzük el.
@@ -328,14 +508,13 @@ def _load_signal_rows(conn: sqlite3.Connection) -> List[SignalSimRow]:
 def _load_price_data(
     conn: sqlite3.Connection,
     rows: List[SignalSimRow],
-    lookahead_days: int,
-) -> Dict[str, Dict[str, List[PriceCandle]]]:
+) -> Dict[str, CandleStore]:
     """
-    For each signal row, load all 15m candles from calculated_at onward
-    up to lookahead_days later.
+    Load all 15m candles for every ticker referenced by rows.
 
-    Returns {ticker: {calculated_at: [PriceCandle, ...]}}
-    Candles are sorted ascending by timestamp.
+    Returns {ticker: CandleStore} — one array per ticker, sorted ascending by
+    timestamp. The per-signal window (calculated_at, calculated_at + lookahead]
+    is cut by load_all_sim_data() as a CandleView (binary search, no copy).
 
     Strategy: load ALL 15m price data for each ticker once, then slice
     per signal. This avoids N×SELECT queries.
@@ -355,70 +534,36 @@ def _load_price_data(
         ORDER BY ticker_symbol, timestamp ASC
     """.format(placeholders=placeholders), tickers).fetchall()
 
-    # Build {ticker: [(timestamp_dt, candle), ...]}
-    all_candles: Dict[str, List[PriceCandle]] = {}
+    # Build {ticker: [(ts, o, h, l, c, v), ...]} → one structured array per ticker
+    per_ticker: Dict[str, list] = {}
     for row in raw:
-        ticker = row["ticker_symbol"]
         ts = _parse_ts(row["timestamp"])
         if ts is None:
             continue
-        candle = PriceCandle(
-            timestamp=ts,
-            open=float(row["open"]),
-            high=float(row["high"]),
-            low=float(row["low"]),
-            close=float(row["close"]),
-            volume=float(row["volume"]) if row["volume"] else 0.0,
-        )
-        if ticker not in all_candles:
-            all_candles[ticker] = []
-        all_candles[ticker].append(candle)
-
-    # For each signal row, slice the candles that fall after calculated_at
-    # Use binary search (candles are sorted)
-    result: Dict[str, Dict[str, List[PriceCandle]]] = {}
-
-    for sig_row in rows:
-        ticker = sig_row.ticker
-        sig_ts = _parse_ts(sig_row.calculated_at)
-        if sig_ts is None or ticker not in all_candles:
-            continue
+        per_ticker.setdefault(row["ticker_symbol"], []).append((
+            ts,
+            float(row["open"]),
+            float(row["high"]),
+            float(row["low"]),
+            float(row["close"]),
+            float(row["volume"]) if row["volume"] else 0.0,
+        ))
 
-        end_ts = sig_ts + timedelta(days=lookahead_days)
-        candles = all_candles[ticker]
-
-        # Binary search for start index
-        lo, hi = 0, len(candles)
-        while lo < hi:
-            mid = (lo + hi) // 2
-            if candles[mid].timestamp <= sig_ts:
-                lo = mid + 1
-            else:
-                hi = mid
-        start_idx = lo
-
-        # Collect candles within the lookahead window
-        future = []
-        for c in candles[start_idx:]:
-            if c.timestamp > end_ts:
-                break
-            future.append(c)
-
-        if ticker not in result:
-            result[ticker] = {}
-        result[ticker][sig_row.calculated_at] = future
-
-    return result
+    return {
+        ticker: CandleStore(ticker, np.array(records, dtype=CANDLE_DTYPE))
+        for ticker, records in per_ticker.items()
+    }
 
 
 def _load_score_timeline(
     conn: sqlite3.Connection,
-) -> Dict[str, List[Tuple[datetime, float]]]:
+) -> "ScoreTimeline":
     """
     Load all signals (with combined_score) per ticker, sorted chronologically.
     Used for opposing signal detection during trade simulation.
 
-    Returns {ticker: [(created_at_dt, combined_score), ...]}
+    Returns ScoreTimeline {ticker: [(created_at_dt, combined_score, sl, tp), ...]}
+    with the direction index already built.
     """
     raw = conn.execute("""
         SELECT ticker_symbol, created_at, combined_score, stop_loss, take_profit
@@ -440,7 +585,73 @@ def _load_score_timeline(
             timeline[ticker] = []
         timeline[ticker].append((ts, score, sl, tp))
 
-    return timeline
+    result = ScoreTimeline(timeline)
+    result.index = build_signal_index(result)
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Opposing / same-direction signal index
+# ---------------------------------------------------------------------------
+
+def build_direction_index(
+    ticker_timeline: List[Tuple[datetime, float, Optional[float], Optional[float]]],
+    direction: str,
+) -> DirectionSignalIndex:
+    """
+    Build the opposing / same-direction alert index for one ticker timeline.
+
+    LONG:  opposing = score <= -ALERT_THRESHOLD, same-dir = score >= ALERT_THRESHOLD
+    SHORT: opposing = score >= ALERT_THRESHOLD,  same-dir = score <= -ALERT_THRESHOLD
+    Same-direction entries without SL are dropped (nothing to update with).
+    """
+    if direction == "LONG":
+        opp_ts = sorted([ts for ts, s, _, _ in ticker_timeline if s <= -_ALERT_THRESHOLD])
+        same = sorted(
+            [(ts, sl) for ts, s, sl, _ in ticker_timeline
+             if s >= _ALERT_THRESHOLD and sl is not None],
+            key=lambda x: x[0],
+        )
+    else:
+        opp_ts = sorted([ts for ts, s, _, _ in ticker_timeline if s >= _ALERT_THRESHOLD])
+        same = sorted(
+            [(ts, sl) for ts, s, sl, _ in ticker_timeline
+             if s <= -_ALERT_THRESHOLD and sl is not None],
+            key=lambda x: x[0],
+        )
+    return DirectionSignalIndex(
+        opp_ts=opp_ts,
+        same_dir_signals=same,
+        same_dir_ts=[ts for ts, _ in same],
+    )
+
+
+def build_signal_index(
+    score_timeline: Dict[str, list],
+) -> Dict[Tuple[str, str], DirectionSignalIndex]:
+    """Build DirectionSignalIndex for every (ticker, LONG/SHORT) of a score_timeline."""
+    return {
+        (ticker, direction): build_direction_index(tl, direction)
+        for ticker, tl in score_timeline.items()
+        for direction in ("LONG", "SHORT")
+    }
+
+
+def get_direction_index(
+    score_timeline: Dict[str, list],
+    ticker: str,
+    direction: str,
+) -> DirectionSignalIndex:
+    """
+    Prebuilt index from a ScoreTimeline; for a plain dict timeline the index
+    is built on the fly (backward compat — same cost as before).
+    """
+    index = getattr(score_timeline, "index", None)
+    if index:
+        hit = index.get((ticker, direction))
+        if hit is not None:
+            return hit
+    return build_direction_index(score_timeline.get(ticker, []), direction)
 
 
 # ---------------------------------------------------------------------------
@@ -11,20 +11,18 @@ Key design:
   - simulate_trade() a kanonikus core-t hívja → soha nem divergál a live/archive logikától
   - compute_sl_tp() és SimConfig megmaradnak (SL/TP számításhoz szükségesek)
 
-Version: 3.0 – simulate_trade() → trade_simulator_core delegálás
-Date: 2026-03-29
+Version: 3.1 – simulate_trade(): CandleView-n simulate_exit_fast() first-cross keresés
+Date: 2026-10-16
 """
 
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 
-from src.trade_simulator_core import (
-    simulate_exit as _core_simulate_exit,
-    ALERT_THRESHOLD as _ALERT_THRESHOLD,
-)
+from src.trade_simulator_core import simulate_exit as _core_simulate_exit
+from src.trade_simulator_core import simulate_exit_fast as _core_simulate_exit_fast
 
-from optimizer.signal_data import PriceCandle
+from optimizer.signal_data import PriceCandle, DirectionSignalIndex, build_direction_index
 
 # ---------------------------------------------------------------------------
 # Constants
@@ -421,11 +419,15 @@ def simulate_trade(
     score_timeline: List[Tuple[datetime, float, Optional[float], Optional[float]]],
     # ^ [(ts, combined_score, sl, tp)] for this ticker, all time
     sim_cfg: Optional[SimConfig] = None,
+    signal_index: Optional[DirectionSignalIndex] = None,
 ) -> Tuple[str, float, float]:
     """
     Kanonikus exit szimuláció — delegál a src.trade_simulator_core.simulate_exit()-hez.
     Azonos logikát futtat mint az archive_backtest_service és a live trade szimuláció.
 
+    signal_index: előre felépített (ticker, direction) index (signal_data.get_direction_index).
+    Ha None, a score_timeline-ból épül fel hívásonként (backward compat).
+
     Returns
     -------
     (exit_reason, exit_price, pnl_percent)
@@ -434,35 +436,39 @@ def simulate_trade(
         return "NO_EXIT", entry_price, 0.0
 
     # score_timeline → opp_list + same_dir_signals (ahogy az archive backtest csinálja)
-    if direction == "LONG":
-        opp_list = sorted([ts for ts, s, _, _ in score_timeline if s <= -_ALERT_THRESHOLD])
-        same_dir_signals = sorted(
-            [(ts, sl) for ts, s, sl, _ in score_timeline
-             if s >= _ALERT_THRESHOLD and sl is not None],
-            key=lambda x: x[0],
-        )
-    else:
-        opp_list = sorted([ts for ts, s, _, _ in score_timeline if s >= _ALERT_THRESHOLD])
-        same_dir_signals = sorted(
-            [(ts, sl) for ts, s, sl, _ in score_timeline
-             if s <= -_ALERT_THRESHOLD and sl is not None],
-            key=lambda x: x[0],
-        )
+    if signal_index is None:
+        signal_index = build_direction_index(score_timeline, direction)
 
     orig_sl_pct = abs(entry_price - stop_loss) / entry_price if entry_price > 0 else 0.0
 
-    result = _core_simulate_exit(
-        bars=future_candles,          # PriceCandle duck-typed: timestamp/open/high/low/close
-        direction=direction,
-        entry_price=entry_price,
-        sl=stop_loss,
-        tp=take_profit,
-        orig_sl_pct=orig_sl_pct,
-        signal_ts=entry_ts,
-        opp_list=opp_list,
-        same_dir_signals=same_dir_signals,
-        symbol=ticker,
-    )
+    # CandleView: first-cross keresés a ticker TradingBars-án; None → teljes bar-walk
+    result = None
+    if hasattr(future_candles, "trading_window"):
+        tb, start, end = future_candles.trading_window()
+        result = _core_simulate_exit_fast(
+            tb, start, end,
+            direction=direction,
+            entry_price=entry_price,
+            sl=stop_loss,
+            tp=take_profit,
+            signal_ts=entry_ts,
+            same_dir_signals=signal_index.same_dir_signals,
+            same_dir_ts=signal_index.same_dir_ts,
+        )
+    if result is None:
+        result = _core_simulate_exit(
+            bars=future_candles,          # PriceCandle duck-typed: timestamp/open/high/low/close
+            direction=direction,
+            entry_price=entry_price,
+            sl=stop_loss,
+            tp=take_profit,
+            orig_sl_pct=orig_sl_pct,
+            signal_ts=entry_ts,
+            opp_list=signal_index.opp_ts,
+            same_dir_signals=signal_index.same_dir_signals,
+            symbol=ticker,
+            same_dir_ts=signal_index.same_dir_ts,
+        )
 
     exit_reason = result["exit_reason"]
     exit_price  = result["exit_price"] if result["exit_price"] is not None else entry_price
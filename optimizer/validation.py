@@ -7,19 +7,35 @@ Implements the three validation layers from design doc v1.5 chapter 10:
   3. Walk-forward      — out-of-sample consistency (>=4/5 windows)
   4. Regime breakdown  — ADX-based market regime analysis
 
-Version: 1.0
-Date: 2026-02-23
+v1.1: NumPy (optimizer.resampling)
+  - egy replay configonként a teljes sorlistán → soronkénti P&L tömb
+    (_get_row_pnls, NaN = nincs trade); ebből dolgozik minden réteg
+  - bootstrap: az összes újramintavétel egy index mátrix, PF maszkolt
+    összegekkel axis=1 mentén; páros (proposal vs baseline ugyanazokon a
+    signalokon) és block bootstrap opció, reprodukálható seed
+  - walk-forward: az ablakok PF / fitness értékei kumulatív összegekből
+    (ablakonként nincs újra-szimuláció) → sűrűbb ablakrács is olcsó
+  - regime: maszkok a soronkénti P&L tömbön
+
+Version: 1.1
+Date: 2026-10-16
 """
 
 import json
-import random
-from typing import Dict, List, Optional, Tuple
+import math
+from typing import List, Optional, Tuple
 
 import numpy as np
 
 from optimizer.backtester import SignalSimRow, replay_and_simulate
-from optimizer.fitness import compute_fitness_for_subset, MIN_TRADES
+from optimizer.fitness import EVAL_ENGINE, VOLUME_TARGET, MIN_TRADES
 from optimizer.parameter_space import decode_vector, BASELINE_VECTOR
+from optimizer.resampling import (
+    as_pnl_array,
+    bootstrap_pf_diffs,
+    profit_factors,
+    window_sums,
+)
 
 
 # ---------------------------------------------------------------------------
@@ -34,6 +50,30 @@ def _profit_factor(pnl_list: List[float]) -> float:
     return gross_profit / gross_loss
 
 
+def _get_row_pnls(
+    rows: List[SignalSimRow],
+    score_timeline: dict,
+    cfg: dict,
+) -> np.ndarray:
+    """
+    P&L per signal row (NaN: no trade or NO_EXIT), aligned with `rows`.
+    Same engine as compute_fitness_for_subset() (columnar unless
+    OPTIMIZER_ENGINE=scalar); rows are independent, so any slice of the
+    result equals the replay of that slice.
+    """
+    if EVAL_ENGINE == "scalar":
+        sim_results = replay_and_simulate(rows, score_timeline, cfg)
+    else:
+        from optimizer.columnar import get_signal_columns, replay_and_simulate_columnar
+        sim_results = replay_and_simulate_columnar(
+            get_signal_columns(rows), score_timeline, cfg, active_only=False
+        )
+    return as_pnl_array([
+        float(r.pnl_percent) if r.trade_active and r.exit_reason != "NO_EXIT" else None
+        for r in sim_results
+    ])
+
+
 def _get_active_pnls(
     rows: List[SignalSimRow],
     score_timeline: dict,
@@ -41,15 +81,10 @@ def _get_active_pnls(
 ) -> List[float]:
     """
     Return list of P&L values for trades activated by this config.
-    Uses full v2 trade simulation pipeline (replay_and_simulate).
+    Uses full v2 trade simulation pipeline (see _get_row_pnls).
     """
-    sim_results = replay_and_simulate(rows, score_timeline, cfg)
-    pnls = []
-    for r in sim_results:
-        if not r.trade_active or r.exit_reason == "NO_EXIT":
-            continue
-        pnls.append(float(r.pnl_percent))
-    return pnls
+    pnls = _get_row_pnls(rows, score_timeline, cfg)
+    return pnls[~np.isnan(pnls)].tolist()
 
 
 # ---------------------------------------------------------------------------
@@ -186,21 +221,31 @@ def bootstrap_test(
     proposal_pnls: List[float],
     n_iterations: int = 1000,
     rng_seed: int = 42,
+    paired: bool = False,
+    block_size: int = 1,
 ) -> dict:
     """
     Bootstrap significance test.
     H0: proposed config is not better than baseline.
 
     Samples with replacement from both P&L lists and computes
-    the distribution of PF differences.
+    the distribution of PF differences (one index matrix, see
+    optimizer.resampling.bootstrap_pf_diffs).
+
+    paired=True: both inputs are signal-aligned arrays from _get_row_pnls()
+    (NaN = no trade) and are resampled with the same signal indices.
+    block_size > 1: circular block bootstrap for autocorrelated trades.
 
     Returns
     -------
     dict: p_value, significant, observed_diff, bootstrap_distribution_summary
     """
-    rng = np.random.default_rng(rng_seed)
+    base_arr = as_pnl_array(baseline_pnls)
+    prop_arr = as_pnl_array(proposal_pnls)
+    base_active = base_arr[~np.isnan(base_arr)]
+    prop_active = prop_arr[~np.isnan(prop_arr)]
 
-    if not baseline_pnls or not proposal_pnls:
+    if not len(base_active) or not len(prop_active):
         return {
             "p_value":    1.0,
             "significant": False,
@@ -208,21 +253,16 @@ def bootstrap_test(
             "note": "Insufficient data for bootstrap test",
         }
 
-    observed_pf_baseline = _profit_factor(baseline_pnls)
-    observed_pf_proposal = _profit_factor(proposal_pnls)
+    observed_pf_baseline = _profit_factor(base_active.tolist())
+    observed_pf_proposal = _profit_factor(prop_active.tolist())
     observed_diff = observed_pf_proposal - observed_pf_baseline
 
-    base_arr = np.array(baseline_pnls)
-    prop_arr = np.array(proposal_pnls)
-
-    boot_diffs = []
-    for _ in range(n_iterations):
-        b_sample = rng.choice(base_arr, size=len(base_arr), replace=True)
-        p_sample = rng.choice(prop_arr, size=len(prop_arr), replace=True)
-        boot_diffs.append(_profit_factor(p_sample.tolist()) -
-                          _profit_factor(b_sample.tolist()))
-
-    boot_arr = np.array(boot_diffs)
+    if paired:
+        boot_arr = bootstrap_pf_diffs(base_arr, prop_arr, n_iterations, rng_seed,
+                                      block_size, paired=True)
+    else:
+        boot_arr = bootstrap_pf_diffs(base_active, prop_active, n_iterations, rng_seed,
+                                      block_size)
     # p-value: fraction of bootstrap diffs <= 0 (H0: no improvement)
     p_value = float(np.mean(boot_arr <= 0))
 
@@ -237,6 +277,8 @@ def bootstrap_test(
         "boot_p5":          round(float(np.percentile(boot_arr, 5)), 4),
         "boot_p95":         round(float(np.percentile(boot_arr, 95)), 4),
         "n_iterations":     n_iterations,
+        "paired":           paired,
+        "block_size":       block_size,
     }
 
 
@@ -268,42 +310,41 @@ def walk_forward_validation(
     window_size = n // n_windows
     step = window_size // 2  # 50% overlap
 
-    windows = []
+    # Ablak határok: (index, start, end, test_start)
+    bounds = []
     for i in range(n_windows):
         start = i * step
         end   = min(start + window_size, n)
         if end - start < 50:
             break
-
-        window_rows  = rows[start:end]
-        test_start   = int(len(window_rows) * train_ratio)
-        test_rows    = window_rows[test_start:]
-
-        if len(test_rows) < 10:
+        test_start = start + int((end - start) * train_ratio)
+        if end - test_start < 10:
             continue
+        bounds.append((i, start, end, test_start))
 
-        prop_fit, prop_stats = compute_fitness_for_subset(
-            test_rows, score_timeline, proposal_cfg, min_trades=5
-        )
-        base_fit, base_stats = compute_fitness_for_subset(
-            test_rows, score_timeline, baseline_cfg, min_trades=5
-        )
-
-        prop_pf = prop_stats["profit_factor"]
-        base_pf = base_stats["profit_factor"]
-        pf_delta = prop_pf - base_pf
-
-        windows.append({
-            "window":          i + 1,
-            "signal_range":    f"{rows[start].calculated_at[:10]} to {rows[end-1].calculated_at[:10]}",
-            "test_signals":    len(test_rows),
-            "prop_fitness":    round(prop_fit, 4),
-            "base_fitness":    round(base_fit, 4),
-            "prop_pf":         round(prop_pf, 4),
-            "base_pf":         round(base_pf, 4),
-            "pf_delta":        round(pf_delta, 4),
-            "positive":        pf_delta > 0,
-        })
+    windows = []
+    if bounds:
+        # Egy replay configonként; az ablakok teszt szakaszai kumulatív összegekből
+        test_starts = [b[3] for b in bounds]
+        ends        = [b[2] for b in bounds]
+        prop_fit, prop_pf = _window_fitness(
+            _get_row_pnls(rows, score_timeline, proposal_cfg), test_starts, ends)
+        base_fit, base_pf = _window_fitness(
+            _get_row_pnls(rows, score_timeline, baseline_cfg), test_starts, ends)
+
+        for k, (i, start, end, test_start) in enumerate(bounds):
+            pf_delta = prop_pf[k] - base_pf[k]
+            windows.append({
+                "window":          i + 1,
+                "signal_range":    f"{rows[start].calculated_at[:10]} to {rows[end-1].calculated_at[:10]}",
+                "test_signals":    end - test_start,
+                "prop_fitness":    round(prop_fit[k], 4),
+                "base_fitness":    round(base_fit[k], 4),
+                "prop_pf":         round(prop_pf[k], 4),
+                "base_pf":         round(base_pf[k], 4),
+                "pf_delta":        round(pf_delta, 4),
+                "positive":        pf_delta > 0,
+            })
 
     positive_count = sum(1 for w in windows if w["positive"])
     consistent = positive_count >= max(1, len(windows) * 4 // 5)  # >=4/5
@@ -321,6 +362,27 @@ def walk_forward_validation(
     }
 
 
+def _window_fitness(
+    row_pnls: np.ndarray,
+    starts: List[int],
+    ends: List[int],
+) -> Tuple[List[float], List[float]]:
+    """
+    (fitness, profit_factor) per [start, end) window — compute_fitness()
+    formula (win_rate × PF × volume_factor); PF rounded to 4 decimals like
+    its stats["profit_factor"].
+    """
+    sums = window_sums(row_pnls, starts, ends)
+    pfs = profit_factors(sums["gross_profit"], sums["gross_loss"])
+    fitness, pf_rounded = [], []
+    for pf, wins, total in zip(pfs.tolist(), sums["wins"].tolist(), sums["total"].tolist()):
+        win_rate = wins / total if total > 0 else 0.0
+        volume_factor = min(1.0, math.sqrt(total / VOLUME_TARGET)) if total > 0 else 0.0
+        fitness.append(win_rate * pf * volume_factor)
+        pf_rounded.append(round(pf, 4))
+    return fitness, pf_rounded
+
+
 # ---------------------------------------------------------------------------
 # 4. Market Regime Breakdown
 # ---------------------------------------------------------------------------
@@ -344,40 +406,31 @@ def regime_breakdown(
       - ATR% > 3.5 → High Volatility (can overlap with above)
       - Else        → Mixed (excluded from regime-specific stats)
     """
-    sim_results = replay_and_simulate(rows, score_timeline, cfg)
-
-    buckets: Dict[str, List[float]] = {
-        "trending": [],
-        "sideways": [],
-        "high_vol": [],
+    pnls = _get_row_pnls(rows, score_timeline, cfg)
+    active = ~np.isnan(pnls)
+    adx = as_pnl_array([row.adx for row in rows])
+    atr_pct = as_pnl_array([row.volatility for row in rows])  # stored as ATR%
+
+    # Classify regime (NaN összehasonlítás False → hiányzó ADX / ATR% kimarad)
+    high_vol = atr_pct >= ATR_HIGHVOL_MIN
+    sideways = ~high_vol & (adx < ADX_SIDEWAYS_MAX)
+    masks = {
+        "trending": active & ~high_vol & ~sideways,  # ADX >= 30, mixed és hiányzó ADX is
+        "sideways": active & sideways,
+        "high_vol": active & high_vol,
     }
 
-    for r, row in zip(sim_results, rows):
-        if not r.trade_active or r.exit_reason == "NO_EXIT":
-            continue
-        pnl = r.pnl_percent
-
-        adx = row.adx
-        atr_pct = row.volatility  # stored as ATR%
-
-        # Classify regime
-        if atr_pct is not None and atr_pct >= ATR_HIGHVOL_MIN:
-            buckets["high_vol"].append(float(pnl))
-        elif adx is not None and adx >= ADX_TRENDING_MIN:
-            buckets["trending"].append(float(pnl))
-        elif adx is not None and adx < ADX_SIDEWAYS_MAX:
-            buckets["sideways"].append(float(pnl))
-        else:
-            buckets["trending"].append(float(pnl))  # default to trending
-
     result = {}
-    for regime, pnls in buckets.items():
-        pf = _profit_factor(pnls) if pnls else None
-        wr = (sum(1 for p in pnls if p > 0) / len(pnls)) if pnls else None
+    for regime, mask in masks.items():
+        regime_pnls = pnls[mask]
+        count = len(regime_pnls)
+        pf = float(profit_factors(regime_pnls[regime_pnls > 0].sum(),
+                                  -regime_pnls[regime_pnls < 0].sum())) if count else None
+        wr = int((regime_pnls > 0).sum()) / count if count else None
         result[regime] = {
             "profit_factor": round(pf, 3) if pf is not None else None,
             "win_rate":      round(wr, 3) if wr is not None else None,
-            "trade_count":   len(pnls),
+            "trade_count":   count,
         }
 
     return result
@@ -394,22 +447,30 @@ def validate_proposal(
     test_rows: List[SignalSimRow],
     run_walk_forward: bool = True,
     bootstrap_iterations: int = 1000,
+    paired_bootstrap: bool = False,
+    block_size: int = 1,
 ) -> dict:
     """
     Run the full validation pipeline for one candidate config vector.
 
+    paired_bootstrap / block_size: see bootstrap_test().
+
     Returns a complete validation result dict suitable for storing
     in config_proposals table.
     """
     proposal_cfg = decode_vector(proposal_vector)
     baseline_cfg = decode_vector(BASELINE_VECTOR)
 
-    # P&L lists for bootstrap
-    proposal_pnls = _get_active_pnls(test_rows, score_timeline, proposal_cfg)
-    baseline_pnls = _get_active_pnls(test_rows, score_timeline, baseline_cfg)
+    # Signal-aligned P&L arrays for bootstrap (NaN = no trade)
+    proposal_pnls = _get_row_pnls(test_rows, score_timeline, proposal_cfg)
+    baseline_pnls = _get_row_pnls(test_rows, score_timeline, baseline_cfg)
+    if not paired_bootstrap:
+        proposal_pnls = proposal_pnls[~np.isnan(proposal_pnls)]
+        baseline_pnls = baseline_pnls[~np.isnan(baseline_pnls)]
 
     # Bootstrap
-    boot = bootstrap_test(baseline_pnls, proposal_pnls, bootstrap_iterations)
+    boot = bootstrap_test(baseline_pnls, proposal_pnls, bootstrap_iterations,
+                          paired=paired_bootstrap, block_size=block_size)
 
     # Walk-forward
     wf = {}
@@ -423,6 +423,7 @@ def get_open_pnl(
 class ArchiveBacktestRequest(BaseModel):
     symbols: Optional[List[str]] = Field(None, description="Ticker symbols (None = összes)")
     score_threshold: float = Field(15.0, description="Minimum |combined_score|")
+    workers: Optional[int] = Field(None, description="Párhuzamos worker processzek (None = ARCHIVE_BACKTEST_WORKERS / 1 = szekvenciális)")
 
 
 @router.post("/archive-backtest")
@@ -440,6 +441,7 @@ def run_archive_backtest(request: ArchiveBacktestRequest):
         stats = service.run(
             symbols=request.symbols,
             score_threshold=request.score_threshold,
+            workers=request.workers,
         )
         elapsed = round(time.time() - t0, 2)
         return {"status": "ok", "execution_time_seconds": elapsed, "stats": stats}
@@ -518,6 +520,7 @@ def recalculate_and_resimulate(request: ArchiveBacktestRequest):
                 symbols=request.symbols,
                 score_threshold=request.score_threshold,
                 progress_callback=backtest_progress,
+                workers=request.workers,
             )
 
             elapsed = round(time.time() - t0, 2)
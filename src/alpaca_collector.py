@@ -65,8 +65,8 @@ def create_table(db_path: str = "trendsignal.db") -> None:
     conn = sqlite3.connect(db_path)
     cur = conn.cursor()
     cur.executescript("""
-        CREATE UNIQUE INDEX IF NOT EXISTS uq_price_data_symbol_ts_interval
-            ON price_data (ticker_symbol, timestamp, interval);
+        CREATE UNIQUE INDEX IF NOT EXISTS uq_price_data_symbol_interval_ts
+            ON price_data (ticker_symbol, interval, timestamp);
     """)
     conn.commit()
     conn.close()
@@ -177,10 +177,9 @@ def save_bars(
     row = cur.fetchone()
     ticker_id = row[0] if row else None
 
-    inserted = 0
-    skipped = 0
-
-    for i, bar in enumerate(bars):
+    rows = []
+    prev_close = None
+    for bar in bars:
         # Parse ISO 8601 timestamp → naive UTC
         ts_str = bar["t"]
         if ts_str.endswith("Z"):
@@ -193,28 +192,32 @@ def save_bars(
 
         o, h, l, c, v = bar["o"], bar["h"], bar["l"], bar["c"], bar["v"]
 
-        prev_close = bars[i - 1]["c"] if i > 0 else None
         price_change = round(c - prev_close, 6) if prev_close is not None else None
         price_change_pct = (
             round((c - prev_close) / prev_close * 100, 4)
             if prev_close else None
         )
-
-        try:
-            cur.execute(
-                """
-                INSERT INTO price_data
-                    (ticker_id, ticker_symbol, timestamp, interval,
-                     open, high, low, close, volume,
-                     price_change, price_change_pct)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                (ticker_id, symbol, ts_naive, interval,
-                 o, h, l, c, v, price_change, price_change_pct),
-            )
-            inserted += 1
-        except sqlite3.IntegrityError:
-            skipped += 1    # duplicate (unique index hit)
+        prev_close = c
+
+        rows.append((ticker_id, symbol, ts_naive, interval,
+                     o, h, l, c, v, price_change, price_change_pct))
+
+    # Egy executemany a uq_price_data_symbol_interval_ts indexre:
+    # a már meglévő bar-ok kimaradnak (mint korábban az IntegrityError ágon)
+    changes_before = conn.total_changes
+    cur.executemany(
+        """
+        INSERT INTO price_data
+            (ticker_id, ticker_symbol, timestamp, interval,
+             open, high, low, close, volume,
+             price_change, price_change_pct)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (ticker_symbol, interval, timestamp) DO NOTHING
+        """,
+        rows,
+    )
+    inserted = conn.total_changes - changes_before
+    skipped = len(rows) - inserted
 
     conn.commit()
     conn.close()
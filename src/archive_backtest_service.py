@@ -8,16 +8,25 @@ Logika:
 - SL/TP: a signal által javasolt szintek; az új entry price alapján érvényesség-ellenőrzés fut
 - Exit logika: → src/trade_simulator_core.py (kanonikus implementáció, optimizer is ezt hívja)
 - Teljesítmény: ticker-enkénti in-memory price lookup (1 DB lekérés/ticker)
+- Párhuzamos mód (workers > 1): a tickerek szimulációja process pool-ban fut
+  (saját read-only kapcsolat workerenként, WAL), a trade sorokat a szülő egyetlen
+  író kapcsolaton írja tickerenként DELETE + INSERT + COMMIT — backup / restore
+  szemantika változatlan
 
-Version: 5.0 – Exit szimuláció kiszervezve trade_simulator_core-ba (szinkron az optimizerrel)
+Version: 5.1 – Párhuzamos ticker szimuláció (process pool) + egyetlen író
+Date: 2026-10-16
 """
 
 from __future__ import annotations
 
 import logging
+import multiprocessing
+import os
 import sqlite3
-import pytz
 from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import islice
+from pathlib import Path
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 
@@ -29,19 +38,7 @@ from src.trade_simulator_core import (
 )
 from config import get_config as _get_config
 from src.entry_gates import check_entry_gates
-
-_ET_TZ = pytz.timezone('America/New_York')
-
-
-def _us_eod_utc(dt_utc: datetime) -> datetime:
-    """4:00 PM ET (DST-aware) → naive UTC datetime.
-    EDT: 20:00 UTC | EST: 21:00 UTC — automatikusan kezeli a nyári/téli időszámítást."""
-    utc_aware = pytz.utc.localize(dt_utc)
-    et_time   = utc_aware.astimezone(_ET_TZ)
-    et_close  = _ET_TZ.localize(
-        et_time.replace(hour=16, minute=0, second=0, microsecond=0, tzinfo=None)
-    )
-    return et_close.astimezone(pytz.utc).replace(tzinfo=None)
+from src.trading_calendar import session_close_utc
 
 logger = logging.getLogger(__name__)
 
@@ -52,9 +49,50 @@ from src.trade_simulator_core import ALERT_THRESHOLD  # noqa: E402
 TRADE_FEE_PCT      = 0.002                            # Round-trip díj: 0.2%
 DIRECTION_2H_TOLERANCE = timedelta(minutes=20)        # ±tűrés 5m bar keresésnél
 
+# Párhuzamos mód alapértelmezetten KI (1 = szekvenciális, a korábbi viselkedés);
+# bekapcsolás: workers paraméter vagy ARCHIVE_BACKTEST_WORKERS env (pl. cpu_count - 1)
+DEFAULT_WORKERS = 1
+
+_STAT_KEYS = ("signals_processed", "trades_created", "tp_hit", "sl_hit",
+              "stagnation", "opposing", "eod", "max_hold", "open", "skipped")
+
+_INSERT_TRADE_SQL = """INSERT INTO archive_simulated_trades
+   (archive_signal_id, ticker_symbol, direction, status,
+    entry_price, entry_time, stop_loss_price, take_profit_price,
+    exit_price, exit_time, exit_reason,
+    pnl_percent, pnl_net_percent, duration_bars, combined_score,
+    overall_confidence, is_real_trade,
+    direction_2h_eligible, direction_2h_correct, direction_2h_pct)
+   VALUES
+   (:archive_signal_id, :ticker_symbol, :direction, :status,
+    :entry_price, :entry_time, :stop_loss_price, :take_profit_price,
+    :exit_price, :exit_time, :exit_reason,
+    :pnl_percent, :pnl_net_percent, :duration_bars, :combined_score,
+    :overall_confidence, :is_real_trade,
+    :direction_2h_eligible, :direction_2h_correct, :direction_2h_pct)
+"""
+
 
 # ── Segédfüggvények ──────────────────────────────────────────────────────────
 
+def _resolve_workers(workers: Optional[int]) -> int:
+    if workers is None:
+        env = os.environ.get("ARCHIVE_BACKTEST_WORKERS")
+        workers = int(env) if env else DEFAULT_WORKERS
+    return max(1, workers)
+
+
+def _simulate_ticker_worker(db_path: str, symbol: str, score_threshold: float) -> Tuple[str, List[Dict], Dict]:
+    """Process pool worker: egy ticker szimulációja saját (csak olvasó) kapcsolaton."""
+    conn = sqlite3.connect(f"{Path(db_path).resolve().as_uri()}?mode=ro", uri=True, timeout=30)
+    conn.row_factory = sqlite3.Row
+    try:
+        trades, stats = ArchiveBacktestService(db_path)._simulate_ticker(conn, symbol, score_threshold)
+    finally:
+        conn.close()
+    return symbol, trades, stats
+
+
 # ── ArchiveBacktestService ────────────────────────────────────────────────────
 
 class ArchiveBacktestService:
@@ -76,6 +114,7 @@ class ArchiveBacktestService:
         symbols: Optional[List[str]] = None,
         score_threshold: float = 15.0,
         progress_callback=None,
+        workers: Optional[int] = None,
     ) -> Dict:
         """
         Futtatja az archív backtestet az összes (vagy megadott) tickerre.
@@ -85,10 +124,16 @@ class ArchiveBacktestService:
         aktuálisan feldolgozott ticker kerül elveszett állapotba (újrafuttatáskor
         helyreáll).
 
+        Párhuzamos módban (workers > 1) a tickereket process pool szimulálja, az
+        írás ugyanúgy ezen az egy kapcsolaton, tickerenként fut (befejezési
+        sorrendben) — a backup / restore logika azonos.
+
         Args:
             symbols:           Ha None, minden ticker fut.
             score_threshold:   Minimum |combined_score| a szimulációhoz.
             progress_callback: Opcionális callable(ticker, index, total) a progress UI-hoz.
+            workers:           Worker processzek száma; None → ARCHIVE_BACKTEST_WORKERS
+                               env vagy DEFAULT_WORKERS (1 → szekvenciális).
 
         Returns:
             Stats dict.
@@ -152,31 +197,11 @@ class ArchiveBacktestService:
             logger.info(f"Archive backtest: {total} ticker")
             print(f"[ArchiveBacktest] {total} ticker feldolgozása indul...", flush=True)
 
-            total_stats = {
-                "tickers": 0,
-                "signals_processed": 0,
-                "trades_created": 0,
-                "tp_hit": 0,
-                "sl_hit": 0,
-                "stagnation": 0,
-                "opposing": 0,
-                "eod": 0,
-                "max_hold": 0,
-                "open": 0,
-                "skipped": 0,
-            }
+            total_stats = {"tickers": 0, **{k: 0 for k in _STAT_KEYS}}
 
-            for i, symbol in enumerate(all_symbols, 1):
-                if progress_callback:
-                    try:
-                        progress_callback(symbol, i, total)
-                    except Exception:
-                        pass
-                print(f"[ArchiveBacktest] [{i}/{total}] {symbol} ...", flush=True)
-                stats = self._run_ticker(conn, symbol, score_threshold)
+            def _accumulate(i: int, symbol: str, stats: Dict):
                 total_stats["tickers"] += 1
-                for k in ("signals_processed", "trades_created", "tp_hit",
-                          "sl_hit", "stagnation", "opposing", "eod", "max_hold", "open", "skipped"):
+                for k in _STAT_KEYS:
                     total_stats[k] += stats.get(k, 0)
                 logger.info(
                     f"  {symbol}: {stats['trades_created']} trade "
@@ -191,6 +216,23 @@ class ArchiveBacktestService:
                     flush=True,
                 )
 
+            n_workers = min(_resolve_workers(workers), total)
+            if n_workers > 1:
+                self._run_parallel(
+                    conn, all_symbols, score_threshold, n_workers,
+                    progress_callback, _accumulate,
+                )
+            else:
+                for i, symbol in enumerate(all_symbols, 1):
+                    if progress_callback:
+                        try:
+                            progress_callback(symbol, i, total)
+                        except Exception:
+                            pass
+                    print(f"[ArchiveBacktest] [{i}/{total}] {symbol} ...", flush=True)
+                    stats = self._run_ticker(conn, symbol, score_threshold)
+                    _accumulate(i, symbol, stats)
+
             # ── Siker: backup törlése ────────────────────────────────────────
             conn.execute(f"DROP TABLE IF EXISTS {_BAK}")
             conn.commit()
@@ -212,6 +254,45 @@ class ArchiveBacktestService:
 
     # ── Belső metódusok ──────────────────────────────────────────────────────
 
+    def _run_parallel(
+        self,
+        conn: sqlite3.Connection,
+        all_symbols: List[str],
+        score_threshold: float,
+        n_workers: int,
+        progress_callback,
+        on_ticker_done,
+    ):
+        """
+        Tickerek szimulációja process pool-ban; az írás (DELETE + INSERT + COMMIT)
+        kizárólag itt, a hívó kapcsolatán, tickerenként — egyetlen író.
+
+        spawn context: a run() jellemzően az API háttérszálából fut, többszálú
+        processzből fork-olni nem biztonságos.
+        """
+        total = len(all_symbols)
+        print(f"[ArchiveBacktest] Párhuzamos mód: {n_workers} worker", flush=True)
+        ctx = multiprocessing.get_context("spawn")
+        executor = ProcessPoolExecutor(max_workers=n_workers, mp_context=ctx)
+        try:
+            futures = {
+                executor.submit(_simulate_ticker_worker, self.db_path, symbol, score_threshold): symbol
+                for symbol in all_symbols
+            }
+            for i, fut in enumerate(as_completed(futures), 1):
+                symbol, trades, stats = fut.result()
+                if progress_callback:
+                    try:
+                        progress_callback(symbol, i, total)
+                    except Exception:
+                        pass
+                self._write_ticker(conn, symbol, trades)
+                on_ticker_done(i, symbol, stats)
+        except BaseException:
+            executor.shutdown(wait=True, cancel_futures=True)
+            raise
+        executor.shutdown(wait=True)
+
     def _get_symbols(self, conn: sqlite3.Connection, symbols: Optional[List[str]]) -> List[str]:
         if symbols:
             return symbols
@@ -223,11 +304,15 @@ class ArchiveBacktestService:
     def _run_ticker(
         self, conn: sqlite3.Connection, symbol: str, score_threshold: float
     ) -> Dict:
-        stats = {
-            "signals_processed": 0, "trades_created": 0,
-            "tp_hit": 0, "sl_hit": 0, "stagnation": 0,
-            "opposing": 0, "eod": 0, "max_hold": 0, "open": 0, "skipped": 0,
-        }
+        trades, stats = self._simulate_ticker(conn, symbol, score_threshold)
+        self._write_ticker(conn, symbol, trades)
+        return stats
+
+    def _simulate_ticker(
+        self, conn: sqlite3.Connection, symbol: str, score_threshold: float
+    ) -> Tuple[List[Dict], Dict]:
+        """Egy ticker összes trade-jének szimulációja (csak olvas) → (trade sorok, stats)."""
+        stats = {k: 0 for k in _STAT_KEYS}
 
         # 1. Betöltjük az összes 15m bar-t memóriába
         #    bars: lista, rendezett timestamp szerint
@@ -235,9 +320,15 @@ class ArchiveBacktestService:
         bars = self._load_price_bars(conn, symbol, interval='15m')
         if not bars:
             logger.warning(f"  {symbol}: nincs 15m ár adat, kihagyva")
-            return stats
+            return [], stats
 
         bars_ts = [b["ts"] for b in bars]
+        # Core Bar-ok tickerenként egyszer — a trade-ek ennek a szeletét járják be
+        core_bars = [
+            _Bar(timestamp=b["ts"], open=b["open"], high=b["high"],
+                 low=b["low"], close=b["close"])
+            for b in bars
+        ]
 
         # 1b. Betöltjük az 5m bar-okat a 2H direction számításhoz
         bars_5m = self._load_price_bars(conn, symbol, interval='5m')
@@ -265,6 +356,9 @@ class ArchiveBacktestService:
              if s["score"] <= -ALERT_THRESHOLD and s["stop_loss"]],
             key=lambda x: x[0],
         )
+        # bisect kulcsok tickerenként egyszer — ne épüljön újra minden trade-nél
+        same_dir_long_ts  = [ts for ts, _ in same_dir_long]
+        same_dir_short_ts = [ts for ts, _ in same_dir_short]
 
         # 4. Minden signalhoz szimuláció
         trades_to_insert: List[Dict] = []
@@ -353,7 +447,8 @@ class ArchiveBacktestService:
             opp_list = opp_short if direction == "LONG" else opp_long
 
             # Azonos irányú signal lista SL frissítéshez
-            same_dir = same_dir_long if direction == "LONG" else same_dir_short
+            same_dir    = same_dir_long if direction == "LONG" else same_dir_short
+            same_dir_ts = same_dir_long_ts if direction == "LONG" else same_dir_short_ts
 
             # Exit szimulálás
             result = self._simulate_exit(
@@ -369,6 +464,8 @@ class ArchiveBacktestService:
                 opp_list=opp_list,
                 same_dir_signals=same_dir,
                 symbol=symbol,
+                same_dir_ts=same_dir_ts,
+                core_bars=core_bars,
             )
 
             exit_price  = result["exit_price"]
@@ -436,35 +533,21 @@ class ArchiveBacktestService:
             else:
                 stats["open"] += 1
 
-        # 5. Per-ticker DELETE (régi adatok) + Bulk INSERT + COMMIT
-        # Adatbiztonsági garancia: ha a processz megszakad egy ticker közben,
-        # csak az adott ticker adatai vesznek el; az összes korábbi ticker safe.
+        return trades_to_insert, stats
+
+    def _write_ticker(self, conn: sqlite3.Connection, symbol: str, trades: List[Dict]):
+        """
+        Per-ticker DELETE (régi adatok) + Bulk INSERT + COMMIT.
+        Adatbiztonsági garancia: ha a processz megszakad egy ticker közben,
+        csak az adott ticker adatai vesznek el; az összes korábbi ticker safe.
+        """
         conn.execute(
             "DELETE FROM archive_simulated_trades WHERE ticker_symbol = ?", (symbol,)
         )
-        if trades_to_insert:
-            conn.executemany(
-                """INSERT INTO archive_simulated_trades
-                   (archive_signal_id, ticker_symbol, direction, status,
-                    entry_price, entry_time, stop_loss_price, take_profit_price,
-                    exit_price, exit_time, exit_reason,
-                    pnl_percent, pnl_net_percent, duration_bars, combined_score,
-                    overall_confidence, is_real_trade,
-                    direction_2h_eligible, direction_2h_correct, direction_2h_pct)
-                   VALUES
-                   (:archive_signal_id, :ticker_symbol, :direction, :status,
-                    :entry_price, :entry_time, :stop_loss_price, :take_profit_price,
-                    :exit_price, :exit_time, :exit_reason,
-                    :pnl_percent, :pnl_net_percent, :duration_bars, :combined_score,
-                    :overall_confidence, :is_real_trade,
-                    :direction_2h_eligible, :direction_2h_correct, :direction_2h_pct)
-                """,
-                trades_to_insert,
-            )
+        if trades:
+            conn.executemany(_INSERT_TRADE_SQL, trades)
         conn.commit()  # ← per-ticker commit: megszakítás esetén a korábbi tickerek megmaradnak
 
-        return stats
-
     # ── Ár / bar segédek ─────────────────────────────────────────────────────
 
     def _load_price_bars(self, conn: sqlite3.Connection, symbol: str, interval: str = '15m') -> List[Dict]:
@@ -554,10 +637,7 @@ class ArchiveBacktestService:
             return {"eligible": False, "correct": None, "pct": None}
 
         # EOD időpont (DST-aware)
-        if symbol.endswith('.BD'):
-            eod = entry_time.replace(hour=16, minute=0, second=0, microsecond=0)
-        else:
-            eod = _us_eod_utc(entry_time)   # 20:00 UTC (EDT) vagy 21:00 UTC (EST)
+        eod = session_close_utc(entry_time, symbol)   # BÉT: 16:00 UTC | US: 20:00 (EDT) / 21:00 (EST) UTC
 
         raw_exit  = entry_time + timedelta(hours=2)
         exit_time = min(raw_exit, eod - timedelta(minutes=5))
@@ -615,19 +695,27 @@ class ArchiveBacktestService:
         opp_list: List[datetime],
         same_dir_signals: List[Tuple[datetime, float]],
         symbol: str,
+        same_dir_ts: Optional[List[datetime]] = None,
+        core_bars: Optional[List[_Bar]] = None,
     ) -> Dict:
         """
         Exit szimuláció — delegál a src.trade_simulator_core.simulate_exit()-hez.
         A kanonikus szimulációs logika ott van; az optimizer is ugyanazt hívja.
+
+        core_bars: a bars tickerenként egyszer Bar-okká konvertálva (opcionális) —
+        ilyenkor a core lustán járja be start_idx-től, nincs trade-enkénti másolás.
         """
-        # Dict-eket Bar-okká konvertálunk (a core duck-typed, de Bar attribútumokra számít)
-        core_bars = [
-            _Bar(timestamp=b["ts"], open=b["open"], high=b["high"],
-                 low=b["low"], close=b["close"])
-            for b in bars[start_idx:]
-        ]
+        if core_bars is not None:
+            trade_bars = islice(core_bars, start_idx, None)
+        else:
+            # Dict-eket Bar-okká konvertálunk (a core duck-typed, de Bar attribútumokra számít)
+            trade_bars = [
+                _Bar(timestamp=b["ts"], open=b["open"], high=b["high"],
+                     low=b["low"], close=b["close"])
+                for b in bars[start_idx:]
+            ]
         return _core_simulate_exit(
-            bars=core_bars,
+            bars=trade_bars,
             direction=direction,
             entry_price=entry_price,
             sl=sl,
@@ -637,4 +725,5 @@ class ArchiveBacktestService:
             opp_list=opp_list,
             same_dir_signals=same_dir_signals,
             symbol=symbol,
+            same_dir_ts=same_dir_ts,
         )
@@ -23,33 +23,27 @@ SL/TP UPDATE RULES:
 - Only non-neutral same-direction signals trigger updates (|score| >= 25)
 - The entry signal itself is excluded from updates
 
-Version: 4.0 - Fine-tuning simulation
-Date: 2026-02-21
+PRELOAD (v4.1):
+- Egy futáson belül symbolonként egyszer töltjük be az 5m gyertyákat
+  (PriceService.preload_5m_candles) és a signalokat (_signal_cache) a
+  legkorábbi ellenőrzött entry-től → a 15 perces slot-walk memóriából fut,
+  nem slotonként 3-5 DB lekérdezéssel. A preload után keletkezett adatra
+  (now közeli slotok) és valódi adathiányra marad a DB / yfinance út.
+
+Version: 4.1 - Batched per-symbol candle + signal preload
+Date: 2026-10-16
 """
 
+from bisect import bisect_right
 from datetime import datetime, timedelta
 from typing import List, Optional, Dict, Tuple
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, or_
 import logging
 import time
-import pytz
-
-_ET_TZ = pytz.timezone('America/New_York')
-
-
-def _us_eod_utc(dt_utc: datetime) -> datetime:
-    """4:00 PM ET (DST-aware) → naive UTC datetime.
-    EDT: 20:00 UTC | EST: 21:00 UTC — automatikusan kezeli a nyári/téli időszámítást."""
-    utc_aware = pytz.utc.localize(dt_utc)
-    et_time   = utc_aware.astimezone(_ET_TZ)
-    et_close  = _ET_TZ.localize(
-        et_time.replace(hour=16, minute=0, second=0, microsecond=0, tzinfo=None)
-    )
-    return et_close.astimezone(pytz.utc).replace(tzinfo=None)
 
 from src.models import Signal, SimulatedTrade, PriceData
-from src.database import SessionLocal
+from src.trading_calendar import session_close_utc
 from src.trade_manager import TradeManager
 from src.exceptions import InsufficientDataError, InvalidSignalError, PositionAlreadyExistsError
 
@@ -62,6 +56,11 @@ class BacktestService:
     def __init__(self, db: Session):
         self.db = db
         self.trade_manager = TradeManager(db)
+        # symbol → (after_utc, until_utc, created_at lista, signalok) — _preload_symbol()
+        self._signal_cache: Dict[str, Tuple[datetime, datetime, List[datetime], List[Signal]]] = {}
+        # A futás "most"-ja (run_backtest állítja): a preloadok és az exit check
+        # ugyanaddig mennek → symbolonként egy betöltés / futás
+        self._run_now: Optional[datetime] = None
     
     def run_backtest(
         self,
@@ -86,6 +85,7 @@ class BacktestService:
         """
         start_time = time.time()
         run_start_dt = datetime.utcnow()
+        self._run_now = run_start_dt
         
         logger.info("=" * 70)
         logger.info("🔄 Backtest Start")
@@ -113,21 +113,25 @@ class BacktestService:
         }
         
         # Process each signal
-        for i, signal in enumerate(signals, 1):
-            if i % 50 == 0:
-                logger.info(f"   Progress: {i}/{len(signals)}...")
-            
-            try:
-                result = self._process_signal(signal)
-                stats[result] += 1
-                
-            except Exception as e:
-                logger.error(f"❌ Signal {signal.id} ({signal.ticker_symbol}): {e}")
-                stats['errors'].append({
-                    'signal_id': signal.id,
-                    'symbol': signal.ticker_symbol,
-                    'error': str(e)
-                })
+        try:
+            for i, signal in enumerate(signals, 1):
+                if i % 50 == 0:
+                    logger.info(f"   Progress: {i}/{len(signals)}...")
+
+                try:
+                    result = self._process_signal(signal)
+                    stats[result] += 1
+
+                except Exception as e:
+                    logger.error(f"❌ Signal {signal.id} ({signal.ticker_symbol}): {e}")
+                    stats['errors'].append({
+                        'signal_id': signal.id,
+                        'symbol': signal.ticker_symbol,
+                        'error': str(e)
+                    })
+        finally:
+            self._clear_preload()
+            self._run_now = None
         
         # Commit
         self.db.commit()
@@ -196,6 +200,64 @@ class BacktestService:
             )
         return {"migrated": migrated, "skipped": skipped}
     
+    # ──────────────────────────────────────────────────────────────
+    # PRELOAD (symbolonként egyszer / futás)
+    # ──────────────────────────────────────────────────────────────
+
+    def _preload_symbol(self, symbol: str, since_utc: datetime) -> None:
+        """
+        5m gyertyák és signalok betöltése since_utc napjának elejétől a futás
+        most-jáig, ha a meglévő preload nem fedi le (egy későbbi trade korábbi
+        entry-je esetén bővítve újratölt).
+        """
+        now_utc = self._now()
+        day_start = since_utc.replace(hour=0, minute=0, second=0, microsecond=0)
+
+        self.trade_manager.price_service.preload_5m_candles(symbol, day_start, now_utc)
+
+        cached = self._signal_cache.get(symbol)
+        if cached is not None and cached[0] <= day_start:
+            return
+        signals = self.db.query(Signal).filter(
+            Signal.ticker_symbol == symbol,
+            Signal.created_at > day_start,
+            Signal.created_at <= now_utc,
+        ).order_by(Signal.created_at.asc(), Signal.id.asc()).all()
+        self._signal_cache[symbol] = (
+            day_start, now_utc, [sig.created_at for sig in signals], signals
+        )
+
+    def _now(self) -> datetime:
+        """A futás rögzített most-ja, run_backtest-en kívül az aktuális idő."""
+        return self._run_now or datetime.utcnow()
+
+    def _clear_preload(self) -> None:
+        self._signal_cache.clear()
+        self.trade_manager.price_service.clear_preloaded()
+
+    def _signals_between(
+        self, trade: SimulatedTrade, after_utc: datetime, until_utc: datetime
+    ) -> List[Signal]:
+        """
+        A trade symboljának signaljai after_utc < created_at <= until_utc, az entry
+        signal nélkül — preloadból, ha lefedi, különben DB lekérdezéssel.
+        """
+        cached = self._signal_cache.get(trade.symbol)
+        if cached is not None and cached[0] <= after_utc and until_utc <= cached[1]:
+            _, _, created, signals = cached
+            lo = bisect_right(created, after_utc)
+            hi = bisect_right(created, until_utc)
+            return [sig for sig in signals[lo:hi] if sig.id != trade.entry_signal_id]
+
+        return self.db.query(Signal).filter(
+            and_(
+                Signal.ticker_symbol == trade.symbol,
+                Signal.created_at > after_utc,
+                Signal.created_at <= until_utc,
+                Signal.id != trade.entry_signal_id
+            )
+        ).all()
+
     def _process_signal(self, signal: Signal) -> str:
         """
         Process single signal - ensure it has a trade.
@@ -317,7 +379,8 @@ class BacktestService:
         
         # Start checking from execution time (signal + 15min) — eliminates the unchecked gap
         check_time_utc = trade.entry_execution_time
-        now_utc = datetime.utcnow()
+        self._preload_symbol(trade.symbol, check_time_utc - timedelta(minutes=15))
+        now_utc = self._now()
 
         price_service = self.trade_manager.price_service
 
@@ -462,23 +525,14 @@ class BacktestService:
         if trade.direction != 'LONG':
             return
 
-        # Az aznapi utolsó 5m gyertya záróárának lekérése
+        # Az aznapi utolsó 5m gyertya záróárának lekérése (preload vagy DB)
         try:
             day_start = eod_time_utc.replace(hour=0, minute=0, second=0, microsecond=0)
             day_end = eod_time_utc
 
-            db = SessionLocal()
-            try:
-                result = db.query(PriceData.close).filter(
-                    PriceData.ticker_symbol == trade.symbol,
-                    PriceData.interval == '5m',
-                    PriceData.timestamp >= day_start,
-                    PriceData.timestamp <= day_end
-                ).order_by(PriceData.timestamp.desc()).first()
-
-                day_close = float(result[0]) if result else None
-            finally:
-                db.close()
+            day_close = self.trade_manager.price_service.get_last_5m_close(
+                trade.symbol, day_start, day_end
+            )
 
         except Exception as e:
             logger.warning(f"   EOD trailing SL: nem sikerult a napi close lekérese ({trade.symbol}): {e}")
@@ -891,14 +945,7 @@ class BacktestService:
         entry_signal_time = trade.entry_execution_time - timedelta(minutes=15)
         execution_cutoff = check_time_utc - timedelta(minutes=15)
 
-        signals = self.db.query(Signal).filter(
-            and_(
-                Signal.ticker_symbol == trade.symbol,
-                Signal.created_at > entry_signal_time,
-                Signal.created_at <= execution_cutoff,
-                Signal.id != trade.entry_signal_id
-            )
-        ).all()
+        signals = self._signals_between(trade, entry_signal_time, execution_cutoff)
 
         best = None
         for signal in signals:
@@ -928,14 +975,7 @@ class BacktestService:
         # Az entry signal időpontja: entry_execution_time - 15 perc (a végrehajtási késés inverze)
         entry_signal_time = trade.entry_execution_time - timedelta(minutes=15)
 
-        signals = self.db.query(Signal).filter(
-            and_(
-                Signal.ticker_symbol == trade.symbol,
-                Signal.created_at > entry_signal_time,
-                Signal.created_at <= check_time_utc,
-                Signal.id != trade.entry_signal_id
-            )
-        ).all()
+        signals = self._signals_between(trade, entry_signal_time, check_time_utc)
 
         best = None
         for signal in signals:
@@ -978,10 +1018,7 @@ class BacktestService:
             return
 
         # EOD időpont (DST-aware)
-        if symbol.endswith('.BD'):
-            eod = entry_time.replace(hour=16, minute=0, second=0, microsecond=0)
-        else:
-            eod = _us_eod_utc(entry_time)   # 20:00 UTC (EDT) vagy 21:00 UTC (EST)
+        eod = session_close_utc(entry_time, symbol)   # BÉT: 16:00 UTC | US: 20:00 (EDT) / 21:00 (EST) UTC
 
         raw_exit = entry_time + timedelta(hours=2)
         exit_time = min(raw_exit, eod - timedelta(minutes=5))
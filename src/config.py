@@ -51,6 +51,11 @@ USE_MULTILINGUAL = True  # Use multilingual model for non-English
 # FinBERT device
 FINBERT_DEVICE = None  # None = auto-detect (cuda if available, else cpu)
 
+# FinBERT micro-batching (finbert_batcher.py): a gyűjtő szálak kéréseit
+# legfeljebb ennyi ms-ig gyűjti, és max. ennyi szöveget futtat egy forward pass-ban
+FINBERT_BATCH_SIZE = 16
+FINBERT_BATCH_WAIT_MS = 5
+
 
 # ==========================================
 # NEWS COLLECTION (Tier rendszer v2.0)
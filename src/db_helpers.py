@@ -2,16 +2,50 @@
 TrendSignal MVP - Database Helper Functions
 Utility functions for database operations with proper timestamp handling
 
-Version: 2.1 - Added Price Data & Technical Indicator Persistence
+Version: 2.2 - Batched news persistence (save_news_items_to_db)
+Date: 2026-10-16
 """
 
 from datetime import datetime, timezone, timedelta, date as date_type
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from sqlalchemy.orm import Session
 
 from src.sentiment_analyzer import NewsItem
 
 
+def _news_record_values(news_item: NewsItem, url_hash: str, source_id: int, fetched_at: datetime) -> dict:
+    """news_items sor oszlopértékei egy NewsItem-ből (egyes és batch mentés közös)."""
+    return dict(
+        url=news_item.url,
+        url_hash=url_hash,
+        source_id=source_id,
+        title=news_item.title,
+        description=news_item.description,
+        published_at=news_item.published_at,  # ✅ CRITICAL: Use original timestamp
+        fetched_at=fetched_at,
+        language='en',  # Default, could be detected
+        is_relevant=True,
+        relevance_score=1.0,
+        sentiment_score=news_item.sentiment_score,
+        sentiment_confidence=news_item.sentiment_confidence,
+        sentiment_label=news_item.sentiment_label,
+        is_duplicate=False,
+        # LLM Context Checker fields (v2.1)
+        finbert_score=news_item.sentiment_score,
+        active_score=getattr(news_item, 'active_score', None),
+        active_score_source=getattr(news_item, 'active_score_source', 'finbert'),
+        llm_score=getattr(news_item, 'llm_score', None),
+        llm_price_impact=getattr(news_item, 'llm_price_impact', None),
+        llm_impact_level=getattr(news_item, 'llm_impact_level', None),
+        llm_impact_duration=getattr(news_item, 'llm_impact_duration', None),
+        llm_catalyst_type=getattr(news_item, 'llm_catalyst_type', None),
+        llm_priced_in=getattr(news_item, 'llm_priced_in', None),
+        llm_confidence=getattr(news_item, 'llm_confidence', None),
+        llm_reason=getattr(news_item, 'llm_reason', None),
+        llm_latency_ms=getattr(news_item, 'llm_latency_ms', None),
+    )
+
+
 def save_news_item_to_db(news_item: NewsItem, ticker_symbol: str, db: Session) -> bool:
     """
     Save a single NewsItem to database with ORIGINAL published_at timestamp
@@ -84,33 +118,7 @@ def save_news_item_to_db(news_item: NewsItem, ticker_symbol: str, db: Session) -
         
         # Create new news item record with ORIGINAL published_at timestamp
         news_record = NewsItemModel(
-            url=news_item.url,
-            url_hash=url_hash,
-            source_id=source.id,
-            title=news_item.title,
-            description=news_item.description,
-            published_at=news_item.published_at,  # ✅ CRITICAL: Use original timestamp
-            fetched_at=datetime.now(timezone.utc),
-            language='en',  # Default, could be detected
-            is_relevant=True,
-            relevance_score=1.0,
-            sentiment_score=news_item.sentiment_score,
-            sentiment_confidence=news_item.sentiment_confidence,
-            sentiment_label=news_item.sentiment_label,
-            is_duplicate=False,
-            # LLM Context Checker fields (v2.1)
-            finbert_score=news_item.sentiment_score,
-            active_score=getattr(news_item, 'active_score', None),
-            active_score_source=getattr(news_item, 'active_score_source', 'finbert'),
-            llm_score=getattr(news_item, 'llm_score', None),
-            llm_price_impact=getattr(news_item, 'llm_price_impact', None),
-            llm_impact_level=getattr(news_item, 'llm_impact_level', None),
-            llm_impact_duration=getattr(news_item, 'llm_impact_duration', None),
-            llm_catalyst_type=getattr(news_item, 'llm_catalyst_type', None),
-            llm_priced_in=getattr(news_item, 'llm_priced_in', None),
-            llm_confidence=getattr(news_item, 'llm_confidence', None),
-            llm_reason=getattr(news_item, 'llm_reason', None),
-            llm_latency_ms=getattr(news_item, 'llm_latency_ms', None),
+            **_news_record_values(news_item, url_hash, source.id, datetime.now(timezone.utc))
         )
         
         db.add(news_record)
@@ -140,6 +148,135 @@ def save_news_item_to_db(news_item: NewsItem, ticker_symbol: str, db: Session) -
         return False
 
 
+# SQLite bind paraméter limit alatt maradunk (IN lista darabolása)
+_IN_CHUNK = 500
+
+
+def save_news_items_to_db(news_items: List[NewsItem], ticker_symbol: str, db: Session) -> int:
+    """
+    Batch változata a save_news_item_to_db()-nek, egy ticker összes hírére.
+
+    Ugyanaz a szemantika cikkenként, de:
+      - ticker és source id-k egyszer feloldva
+      - meglévő url_hash-ek és news_tickers linkek egy-egy IN lekérdezéssel
+      - új sorok egy executemany INSERT ... ON CONFLICT(url_hash) DO NOTHING-gal
+      - egyetlen commit a batch végén (1 fsync / ticker a cikkenkénti helyett)
+
+    Race: ha egy másik szál közben beszúrta ugyanazt az url_hash-t, a sor
+    csendben kimarad (mint az egyes mentés IntegrityError ágában).
+
+    Returns:
+        A mentett/frissített cikkek száma (ahány save_news_item_to_db() hívás True-t adott volna)
+    """
+    if not news_items:
+        return 0
+
+    try:
+        from src.models import NewsItem as NewsItemModel, NewsTicker, Ticker as TickerModel, NewsSource
+        from sqlalchemy import insert
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+        import hashlib
+
+        ticker = db.query(TickerModel.id).filter(TickerModel.symbol == ticker_symbol).first()
+        if not ticker:
+            print(f"⚠️ Ticker {ticker_symbol} not found in database, skipping news save")
+            return 0
+        ticker_id = ticker.id
+
+        # url_hash → NewsItem (batch-en belül az első előfordulás számít)
+        by_hash = {}
+        for item in news_items:
+            if item.url is None:
+                continue
+            by_hash.setdefault(hashlib.md5(item.url.encode()).hexdigest(), item)
+        hashes = list(by_hash)
+
+        # Meglévő hírek + a ticker linkjei (IN lekérdezések)
+        existing = {}
+        for i in range(0, len(hashes), _IN_CHUNK):
+            for row in db.query(
+                NewsItemModel.id, NewsItemModel.url_hash, NewsItemModel.sentiment_score
+            ).filter(NewsItemModel.url_hash.in_(hashes[i:i + _IN_CHUNK])):
+                existing[row.url_hash] = row
+
+        existing_ids = [row.id for row in existing.values()]
+        linked = set()
+        for i in range(0, len(existing_ids), _IN_CHUNK):
+            linked.update(news_id for (news_id,) in db.query(NewsTicker.news_id).filter(
+                NewsTicker.news_id.in_(existing_ids[i:i + _IN_CHUNK]),
+                NewsTicker.ticker_id == ticker_id,
+            ))
+
+        saved = 0
+        new_links = []
+        for url_hash, row in existing.items():
+            item = by_hash[url_hash]
+            if row.id not in linked:
+                # Link existing news to this ticker
+                new_links.append(row.id)
+                saved += 1
+            elif (row.sentiment_score is not None
+                  and abs(row.sentiment_score - item.sentiment_score) > 0.1):
+                # Already linked, update sentiment if changed
+                db.query(NewsItemModel).filter(NewsItemModel.id == row.id).update(
+                    {'sentiment_score': item.sentiment_score,
+                     'sentiment_label': item.sentiment_label},
+                    synchronize_session=False,
+                )
+                saved += 1
+
+        new_items = [(h, item) for h, item in by_hash.items() if h not in existing]
+        if new_items:
+            # Source id-k: meglévők névvel (első találat), hiányzók létrehozása
+            names = list(dict.fromkeys(item.source for _, item in new_items))
+            source_ids = {}
+            for src_id, name in db.query(NewsSource.id, NewsSource.name).filter(
+                NewsSource.name.in_(names)
+            ).order_by(NewsSource.id):
+                source_ids.setdefault(name, src_id)
+            for _, item in new_items:
+                if item.source not in source_ids:
+                    source = NewsSource(
+                        name=item.source,
+                        type='api',
+                        credibility_weight=item.credibility,
+                        is_enabled=True
+                    )
+                    db.add(source)
+                    db.flush()
+                    source_ids[item.source] = source.id
+
+            fetched_at = datetime.now(timezone.utc)
+            table = NewsItemModel.__table__
+            stmt = (
+                sqlite_insert(table)
+                .on_conflict_do_nothing(index_elements=['url_hash'])
+                .returning(table.c.id)
+            )
+            inserted = db.execute(stmt, [
+                _news_record_values(item, h, source_ids[item.source], fetched_at)
+                for h, item in new_items
+            ]).scalars().all()
+            new_links.extend(inserted)
+            saved += len(inserted)
+
+        if new_links:
+            db.execute(insert(NewsTicker.__table__), [
+                {'news_id': news_id, 'ticker_id': ticker_id, 'relevance_score': 1.0}
+                for news_id in new_links
+            ])
+
+        db.commit()
+        return saved
+
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error saving news batch to DB: {e}")
+        import traceback
+        traceback.print_exc()
+        return 0
+
+
 def get_recent_news_from_db(
     ticker_symbol: str,
     db: Session,
@@ -274,6 +411,28 @@ def get_price_data_from_db(
     Returns:
         DataFrame with OHLCV data or None if not found/stale
     """
+    df, fresh = get_price_data_with_freshness(ticker_symbol, interval, days, db)
+    if df is not None and not fresh and not allow_stale:
+        return None
+    return df
+
+
+def get_price_data_with_freshness(
+    ticker_symbol: str,
+    interval: str,
+    days: int,
+    db: Session
+) -> Tuple[Optional['pd.DataFrame'], bool]:
+    """
+    get_price_data_from_db() egy lekérdezéssel: a tárolt adat (akkor is, ha
+    elavult) + a frissességi döntés. Így a hívó elavult cache esetén a
+    visszakapott history-ra építhet delta fetch-et, második olvasás nélkül.
+
+    Friss: az utolsó gyertya a küszöbön belül van, vagy azóta nem nyitott a piac.
+
+    Returns:
+        (DataFrame vagy None, friss-e)
+    """
     try:
         import pandas as pd
         from src.models import PriceData, Ticker as TickerModel
@@ -281,7 +440,7 @@ def get_price_data_from_db(
         # Get ticker
         ticker = db.query(TickerModel).filter(TickerModel.symbol == ticker_symbol).first()
         if not ticker:
-            return None
+            return None, False
         
         # Calculate cutoff time
         cutoff_time = datetime.now(timezone.utc) - timedelta(days=days)
@@ -289,12 +448,13 @@ def get_price_data_from_db(
         # Query price data
         price_records = db.query(PriceData).filter(
             PriceData.ticker_id == ticker.id,
+            PriceData.ticker_symbol == ticker_symbol,  # uq_price_data_symbol_interval_ts
             PriceData.interval == interval,
             PriceData.timestamp >= cutoff_time
         ).order_by(PriceData.timestamp.asc()).all()
         
         if not price_records:
-            return None
+            return None, False
         
         # ✅ FRESHNESS CHECK: Is the latest candle recent enough?
         latest_timestamp = price_records[-1].timestamp
@@ -315,19 +475,16 @@ def get_price_data_from_db(
         }
         
         max_age = staleness_threshold.get(interval, 30)
+        fresh = True
         
         if age_minutes > max_age:
-            if not allow_stale:
-                # If market hasn't opened since last candle, the DB data IS the freshest
-                # possible – no point hitting yfinance for identical data.
-                if not _market_has_opened_since(latest_timestamp, now, ticker_symbol):
-                    print(f"⏸️ Cache STALE but market CLOSED for {ticker_symbol} ({interval}): returning DB data (age={age_minutes:.1f}min)")
-                else:
-                    print(f"🔄 Cache STALE for {ticker_symbol} ({interval}): latest={latest_timestamp}, age={age_minutes:.1f}min > {max_age}min")
-                    return None  # Market was open since last candle → force refresh
+            # If market hasn't opened since last candle, the DB data IS the freshest
+            # possible – no point hitting yfinance for identical data.
+            if not _market_has_opened_since(latest_timestamp, now, ticker_symbol):
+                print(f"⏸️ Cache STALE but market CLOSED for {ticker_symbol} ({interval}): returning DB data (age={age_minutes:.1f}min)")
             else:
-                print(f"⚠️ Cache STALE (fallback) for {ticker_symbol} ({interval}): age={age_minutes:.1f}min > {max_age}min – returning stale data")
-                # fall through and return the stale data below
+                print(f"🔄 Cache STALE for {ticker_symbol} ({interval}): latest={latest_timestamp}, age={age_minutes:.1f}min > {max_age}min")
+                fresh = False  # Market was open since last candle → force refresh
         else:
             print(f"✅ Cache FRESH for {ticker_symbol} ({interval}): latest={latest_timestamp}, age={age_minutes:.1f}min")
         
@@ -345,13 +502,76 @@ def get_price_data_from_db(
         df = pd.DataFrame(data, index=[r.timestamp for r in price_records])
         df.index.name = 'Datetime'
         
-        return df
+        return df, fresh
         
     except Exception as e:
         print(f"❌ Error retrieving price data from DB: {e}")
         import traceback
         traceback.print_exc()
-        return None
+        return None, False
+
+
+_price_index_ready = False
+
+
+def _price_data_unique_index_exists(db: Session) -> bool:
+    """
+    A bulk upsert ON CONFLICT célja: uq_price_data_symbol_interval_ts unique index
+    (vagy a migráció előtti uq_price_data_symbol_ts_interval — ugyanaz az
+    oszlophalmaz, az ON CONFLICT cél nem függ a sorrendtől).
+    Új adatbázisokon a séma (models.PriceData), régieken az index migráció
+    (python -m src.index_migration) hozza létre. Itt csak ellenőrizzük — a
+    hívó sessionjében nincs DDL / commit. Hiányzó index → soronkénti mentés.
+    """
+    global _price_index_ready
+    if _price_index_ready:
+        return True
+    try:
+        from sqlalchemy import text
+        _price_index_ready = db.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'index' "
+            "AND name IN ('uq_price_data_symbol_interval_ts', 'uq_price_data_symbol_ts_interval')"
+        )).first() is not None
+    except Exception as e:
+        print(f"⚠️ price_data index check failed ({e}), using row-by-row save")
+        return False
+    if not _price_index_ready:
+        print("⚠️ uq_price_data_symbol_interval_ts missing (run python -m src.index_migration), "
+              "using row-by-row save")
+    return _price_index_ready
+
+
+def _clean_price_frame(df: 'pd.DataFrame', ticker_symbol: str) -> 'pd.DataFrame':
+    """
+    Hiányos yfinance sorok kezelése mentés előtt: hiányzó OHLC → a sor kimarad
+    (a price_data oszlopai NOT NULL), hiányzó Volume → 0.
+
+    Raises:
+        KeyError: ha egy nem üres frame-ből hiányzik egy OHLCV oszlop
+    """
+    if df.empty:
+        return df
+    missing = [col for col in ('Open', 'High', 'Low', 'Close', 'Volume') if col not in df.columns]
+    if missing:
+        raise KeyError(f"missing price columns for {ticker_symbol}: {missing}")
+
+    ohlc = ['Open', 'High', 'Low', 'Close']
+    incomplete = df[ohlc].isna().any(axis=1)
+    if incomplete.any():
+        print(f"⚠️ Skipping {int(incomplete.sum())} price rows with missing OHLC for {ticker_symbol}")
+        df = df[~incomplete]
+    if df['Volume'].isna().any():
+        df = df.assign(Volume=df['Volume'].fillna(0))
+    return df
+
+
+def _utc_naive_index(df: 'pd.DataFrame') -> list:
+    """DataFrame index → naive UTC datetime lista (naive index: UTC-nek tekintjük)."""
+    import pandas as pd
+    idx = pd.DatetimeIndex(df.index)
+    if idx.tz is not None:
+        idx = idx.tz_convert('UTC').tz_localize(None)
+    return idx.to_pydatetime().tolist()
 
 
 def save_price_data_to_db(
@@ -362,6 +582,106 @@ def save_price_data_to_db(
 ) -> bool:
     """
     Save price data to database with proper UTC timezone handling
+
+    Bulk upsert: a DataFrame egyszer tömbökké alakul, az írás egyetlen
+    INSERT ... ON CONFLICT(ticker_symbol, interval, timestamp) DO UPDATE
+    (executemany). Ha a unique index nem elérhető, soronkénti mentés.
+    
+    Args:
+        df: DataFrame with OHLCV data (yfinance format)
+        ticker_symbol: Stock ticker symbol
+        interval: Candle interval ('5m', '15m', '1h', '1d')
+        db: Database session
+    
+    Returns:
+        True if saved successfully, False otherwise
+    """
+    if not _price_data_unique_index_exists(db):
+        return _save_price_data_rowwise(df, ticker_symbol, interval, db)
+
+    try:
+        from src.models import PriceData, Ticker as TickerModel
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+        df = _clean_price_frame(df, ticker_symbol)
+        
+        # Get or create ticker
+        ticker = db.query(TickerModel).filter(TickerModel.symbol == ticker_symbol).first()
+        if not ticker:
+            ticker = TickerModel(
+                symbol=ticker_symbol,
+                name=ticker_symbol,
+                is_active=True
+            )
+            db.add(ticker)
+            db.flush()
+
+        if df.empty:
+            db.commit()
+            return True
+
+        # ✅ CRITICAL: UTC timestamps (naive UTC, ahogy az adatbázisban vannak)
+        timestamps = _utc_naive_index(df)
+        opens = df['Open'].to_numpy(dtype=float).tolist()
+        highs = df['High'].to_numpy(dtype=float).tolist()
+        lows = df['Low'].to_numpy(dtype=float).tolist()
+        closes = df['Close'].to_numpy(dtype=float).tolist()
+        volumes = df['Volume'].to_numpy().astype('int64').tolist()
+
+        # Új vs frissített sorok száma a loghoz: egy lekérdezés a timestamp tartományra
+        ts_set = set(timestamps)
+        existing = {
+            ts for (ts,) in db.query(PriceData.timestamp).filter(
+                PriceData.ticker_symbol == ticker_symbol,
+                PriceData.interval == interval,
+                PriceData.timestamp >= min(timestamps),
+                PriceData.timestamp <= max(timestamps),
+            )
+            if ts in ts_set
+        }
+        updated_count = len(existing)
+        saved_count = len(ts_set) - updated_count
+
+        table = PriceData.__table__
+        stmt = sqlite_insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['ticker_symbol', 'interval', 'timestamp'],
+            set_={col: stmt.excluded[col] for col in ('open', 'high', 'low', 'close', 'volume')},
+        )
+        db.execute(stmt, [
+            {
+                'ticker_id': ticker.id,
+                'ticker_symbol': ticker_symbol,  # ✅ FIX: Add ticker_symbol
+                'interval': interval,
+                'timestamp': ts,
+                'open': o, 'high': h, 'low': l, 'close': c, 'volume': v,
+            }
+            for ts, o, h, l, c, v in zip(timestamps, opens, highs, lows, closes, volumes)
+        ])
+        db.commit()
+        
+        if saved_count > 0 or updated_count > 0:
+            print(f"💾 Saved {saved_count} new, updated {updated_count} price records for {ticker_symbol} ({interval})")
+        
+        return True
+        
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error saving price data to DB: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def _save_price_data_rowwise(
+    df: 'pd.DataFrame',
+    ticker_symbol: str,
+    interval: str,
+    db: Session
+) -> bool:
+    """
+    Soronkénti mentés (SELECT + UPDATE/INSERT gyertyánként) – fallback, ha a
+    uq_price_data_symbol_interval_ts index hiányzik.
     
     Args:
         df: DataFrame with OHLCV data (yfinance format)
@@ -374,6 +694,8 @@ def save_price_data_to_db(
     """
     try:
         from src.models import PriceData, Ticker as TickerModel
+
+        df = _clean_price_frame(df, ticker_symbol)
         
         # Get or create ticker
         ticker = db.query(TickerModel).filter(TickerModel.symbol == ticker_symbol).first()
@@ -2,8 +2,8 @@
 TrendSignal MVP - FinBERT Sentiment Analyzer
 Real FinBERT implementation for financial sentiment analysis
 
-Version: 2.0 (FinBERT Integration)
-Date: 2024-12-27
+Version: 2.1 (micro-batched shared inference)
+Date: 2026-10-16
 """
 
 import threading
@@ -20,6 +20,7 @@ warnings.filterwarnings('ignore')
 
 _global_finbert_lock = threading.Lock()
 _global_finbert_instance: 'Optional[FinBERTAnalyzer]' = None
+_global_batcher_instance = None
 
 
 def get_global_finbert() -> 'FinBERTAnalyzer':
@@ -31,6 +32,26 @@ def get_global_finbert() -> 'FinBERTAnalyzer':
         return _global_finbert_instance
 
 
+def get_global_finbert_batcher():
+    """
+    A közös FinBERT modell elé tett micro-batching sor (FinBERTBatcher).
+    Ugyanaz az analyze() / analyze_batch() interfész; a párhuzamos gyűjtő
+    szálak kérései egy forward pass-ban futnak.
+    """
+    global _global_batcher_instance
+    finbert = get_global_finbert()
+    with _global_finbert_lock:
+        if _global_batcher_instance is None:
+            from config import FINBERT_BATCH_SIZE, FINBERT_BATCH_WAIT_MS
+            from finbert_batcher import FinBERTBatcher
+            _global_batcher_instance = FinBERTBatcher(
+                finbert,
+                max_batch_size=FINBERT_BATCH_SIZE,
+                max_wait_ms=FINBERT_BATCH_WAIT_MS,
+            )
+        return _global_batcher_instance
+
+
 # ==========================================
 # FINBERT SENTIMENT ANALYZER
 # ==========================================
@@ -205,7 +226,7 @@ class SentimentAnalyzerFinBERT:
     def __init__(self, config=None, ticker_symbol=None):
         self.config = config
         self.ticker_symbol = ticker_symbol
-        self.finbert = get_global_finbert()
+        self.finbert = get_global_finbert_batcher()
     
     def analyze_text(self, text: str, ticker_symbol: Optional[str] = None) -> Dict[str, float]:
         """
@@ -0,0 +1,142 @@
+"""
+TrendSignal MVP - FinBERT Micro-Batcher
+
+Processzen belüli inference sor a közös FinBERT modell elé.
+
+Miért:
+  - A hírgyűjtők (RSS, Yahoo, Finnhub, GNews, ... — tickerenként külön szálon)
+    cikkenként hívták a FinBERTAnalyzer.analyze()-t → egy-szekvenciás forward
+    pass, a szálak egymás után várnak ugyanarra a modellre
+  - CPU-n egy N-es batch forward pass sokkal olcsóbb, mint N darab egyes
+
+Működés:
+  - submit(text) → Future; a kérés egy közös sorba kerül
+  - egy háttérszál az első kérés után max_wait_ms-ig gyűjti a többi szál
+    kéréseit, hossz szerint rendezi őket, max_batch_size-os batch-ekre bontja
+    (a padding így batch-en belül minimális), batch-enként EGY
+    analyze_batch() forward pass fut, az eredmények a Future-ökön át jutnak
+    vissza a hívókhoz
+  - analyze() / analyze_batch() ugyanazt az interfészt adja, mint a
+    FinBERTAnalyzer → drop-in csere
+
+Version: 1.0
+Date: 2026-10-16
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_MAX_BATCH_SIZE = 16
+DEFAULT_MAX_WAIT_MS = 5.0
+
+# Egy gyűjtési körben legfeljebb ennyi batch-nyi kérést veszünk ki a sorból
+# (ennyiből válogat a hossz szerinti rendezés)
+_COLLECT_BATCHES = 4
+
+
+class FinBERTBatcher:
+    """
+    Micro-batching wrapper egy analyze_batch(texts, max_length) metódussal
+    rendelkező analyzer (FinBERTAnalyzer) köré. Thread-safe.
+
+        batcher = FinBERTBatcher(get_global_finbert())
+        result = batcher.analyze(text)          # blokkol, amíg a batch lefut
+    """
+
+    def __init__(
+        self,
+        analyzer,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        max_wait_ms: float = DEFAULT_MAX_WAIT_MS,
+        max_length: int = 512,
+    ):
+        self.analyzer = analyzer
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.max_length = max_length
+
+        self.batches_run = 0
+        self.texts_run = 0
+
+        self._queue: "queue.Queue[Tuple[str, Future]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    # -- public API ----------------------------------------------------------
+
+    def submit(self, text: str) -> Future:
+        """Kérés a sorba; a Future eredménye az analyze() dict-je."""
+        future: Future = Future()
+        self._ensure_worker()
+        self._queue.put((text, future))
+        return future
+
+    def analyze(self, text: str, max_length: Optional[int] = None) -> Dict[str, float]:
+        """FinBERTAnalyzer.analyze() interfész — a kérés a közös batch-be kerül."""
+        return self.submit(text).result()
+
+    def analyze_batch(self, texts: list, max_length: Optional[int] = None) -> list:
+        """FinBERTAnalyzer.analyze_batch() interfész — a más szálak kéréseivel együtt fut."""
+        futures = [self.submit(t) for t in texts]
+        return [f.result() for f in futures]
+
+    def stats(self) -> str:
+        avg = self.texts_run / self.batches_run if self.batches_run else 0.0
+        return f"{self.texts_run} texts in {self.batches_run} batches (avg {avg:.1f})"
+
+    # -- worker ----------------------------------------------------------------
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._start_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run, name="finbert-batcher", daemon=True
+                )
+                self._worker.start()
+
+    def _collect(self) -> List[Tuple[str, Future]]:
+        """Az első kérés után max_wait-ig (vagy a gyűjtési limitig) gyűjt."""
+        pending = [self._queue.get()]
+        limit = self.max_batch_size * _COLLECT_BATCHES
+        deadline = time.monotonic() + self.max_wait
+        while len(pending) < limit:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    pending.append(self._queue.get(timeout=remaining))
+                else:
+                    pending.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return pending
+
+    def _run(self):
+        while True:
+            pending = self._collect()
+            # Hossz szerinti rendezés → hasonló hosszú szövegek egy batch-ben,
+            # kevesebb padding (a karakterhossz a tokenhossz jó közelítése)
+            pending.sort(key=lambda item: len(item[0]))
+            for i in range(0, len(pending), self.max_batch_size):
+                self._run_batch(pending[i:i + self.max_batch_size])
+
+    def _run_batch(self, batch: List[Tuple[str, Future]]):
+        batch = [(text, f) for text, f in batch if f.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        try:
+            results = self.analyzer.analyze_batch(
+                [text for text, _ in batch], max_length=self.max_length
+            )
+        except Exception as e:
+            for _, f in batch:
+                f.set_exception(e)
+            return
+        self.batches_run += 1
+        self.texts_run += len(batch)
+        for (_, f), result in zip(batch, results):
+            f.set_result(result)
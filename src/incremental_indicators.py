@@ -0,0 +1,479 @@
+"""
+TrendSignal MVP - Incremental Indicator Engine
+
+Perzisztált, bar-onként O(1) frissülő indikátor állapot a live refresh-hez.
+
+Miért:
+  - calculate_technical_score() minden 15 perces ciklusban, minden tickerre
+    a teljes 5m / 1h / 1d történetre újraszámolta az SMA / EMA / RSI / MACD /
+    Bollinger / Stochastic / ADX / ATR sorozatokat, pedig két refresh között
+    csak 1-2 új gyertya érkezik
+  - minden indikátor ablakos (rolling N) vagy EMA → a frissítéshez elég a
+    legutóbbi N bar + az EMA-k aktuális értéke
+
+Működés:
+  - IndicatorState: (ticker, interval) állapot — ablakonként ring buffer +
+    futó összeg, EMA-k, előző bar; push(bar) O(1)
+  - IndicatorEngine.snapshot(ticker, interval, df, ...): a df utolsó
+    (még formálódó) gyertyája előtti bar-okig léptetett állapotot
+    tart karban, az utolsó gyertyát egy másolatra alkalmazza → a formálódó
+    gyertya revíziója nem rontja el az állapotot
+  - folytonosság ellenőrzés: az állapot utolsó bar-ja (és az ablak
+    timestampjei) megegyeznek a df megfelelő soraival; ha nem (rés, backfill,
+    revízió, restart utáni hosszú kiesés) → teljes újraszámolás a df-ből
+  - az állapot az indicator_state táblában perzisztál (JSON), restart után
+    onnan folytatódik; a tábla az init_db() / index_migration dolga, az
+    engine SAVEPOINT-ban ír, a commit a hívó session-jéé
+
+Az értékek a calculate_technical_score() pandas képleteivel egyeznek
+(rolling mean / std ddof=1 / min / max, ewm(adjust=False)); az EMA-k
+a df eleje helyett korábbról indulnak, ami 5 nap 5m gyertya után
+numerikusan elhanyagolható eltérés.
+
+Version: 1.1
+Date: 2026-10-16
+"""
+
+import json
+import math
+import threading
+from collections import deque
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+STATE_VERSION = 1
+
+# Ennyi bar timestampjét őrizzük a folytonosság ellenőrzéshez (= leghosszabb ablak)
+_TS_TAIL = 50
+
+# (név, ablak) — calculate_technical_score() rolling ablakai
+_WINDOWS = {
+    'close_20':  20,     # SMA20, Bollinger közép + szórás
+    'close_50':  50,     # SMA50
+    'gain_14':   14,     # RSI (egyszerű rolling mean, nem Wilder)
+    'loss_14':   14,
+    'low_14':    14,     # Stochastic
+    'high_14':   14,
+    'stoch_k_3': 3,
+    'volume_20': 20,     # Volume SMA
+    'hl_14':     14,     # ATR (high - low rolling mean)
+    'tr_14':     14,     # ADX
+    'pdm_14':    14,
+    'mdm_14':    14,
+    'dx_14':     14,
+}
+
+# (név, span) — ewm(span, adjust=False)
+_EMAS = {'ema_12': 12, 'ema_26': 26, 'macd_signal': 9}
+
+
+def _div(a: float, b: float) -> float:
+    """Lebegőpontos osztás numpy szemantikával (x/0 → ±inf, 0/0 → nan)."""
+    if b == 0 or math.isnan(b):
+        if math.isnan(a) or a == 0 or math.isnan(b):
+            return math.nan
+        return math.copysign(math.inf, a) * (math.copysign(1.0, b))
+    return a / b
+
+
+class _Window:
+    """Rolling ablak: ring buffer + futó összeg (NaN-ok nélkül) + NaN számláló."""
+
+    __slots__ = ('n', 'buf', 'total', 'nans', 'pushes')
+
+    def __init__(self, n: int, values: Optional[List[float]] = None):
+        self.n = n
+        self.buf: deque = deque(maxlen=n)
+        self.total = 0.0
+        self.nans = 0
+        self.pushes = 0
+        for v in values or ():
+            self.push(v)
+
+    def push(self, x: float):
+        if len(self.buf) == self.n:
+            old = self.buf[0]
+            if math.isnan(old):
+                self.nans -= 1
+            else:
+                self.total -= old
+        self.buf.append(x)
+        if math.isnan(x):
+            self.nans += 1
+        else:
+            self.total += x
+        self.pushes += 1
+        if self.pushes >= self.n:
+            # Időnkénti pontos újraösszegzés → a futó összeg nem driftel
+            self.total = sum(v for v in self.buf if not math.isnan(v))
+            self.pushes = 0
+
+    @property
+    def ready(self) -> bool:
+        """pandas rolling(n): n darab nem-NaN érték kell."""
+        return len(self.buf) == self.n and self.nans == 0
+
+    def mean(self) -> float:
+        return self.total / self.n if self.ready else math.nan
+
+    def std(self) -> float:
+        """Minta szórás (ddof=1), két menetben a bufferből."""
+        if not self.ready or self.n < 2:
+            return math.nan
+        m = self.total / self.n
+        return math.sqrt(sum((v - m) ** 2 for v in self.buf) / (self.n - 1))
+
+    def min(self) -> float:
+        return min(self.buf) if self.ready else math.nan
+
+    def max(self) -> float:
+        return max(self.buf) if self.ready else math.nan
+
+    def copy(self) -> '_Window':
+        w = _Window.__new__(_Window)
+        w.n, w.buf, w.total, w.nans, w.pushes = self.n, deque(self.buf, maxlen=self.n), self.total, self.nans, self.pushes
+        return w
+
+
+class _EMA:
+    """ewm(span, adjust=False).mean() — a pandas rekurzióval azonos lépésekkel."""
+
+    __slots__ = ('alpha', 'value')
+
+    def __init__(self, span: int, value: Optional[float] = None):
+        self.alpha = 2.0 / (span + 1.0)
+        self.value = value
+
+    def push(self, x: float) -> float:
+        if self.value is None:
+            self.value = x
+        else:
+            old_wt, new_wt = 1.0 - self.alpha, self.alpha
+            self.value = (old_wt * self.value + new_wt * x) / (old_wt + new_wt)
+        return self.value
+
+    def copy(self) -> '_EMA':
+        e = _EMA.__new__(_EMA)
+        e.alpha, e.value = self.alpha, self.value
+        return e
+
+
+class IndicatorState:
+    """Egy (ticker, interval) indikátor állapota; push() bar-onként O(1)."""
+
+    def __init__(self):
+        self.windows = {name: _Window(n) for name, n in _WINDOWS.items()}
+        self.emas = {name: _EMA(span) for name, span in _EMAS.items()}
+        self.prev: Optional[tuple] = None          # (high, low, close) az előző bar-ból
+        self.last_bar: Optional[tuple] = None      # (ts, high, low, close, volume)
+        self.ts_tail: deque = deque(maxlen=_TS_TAIL)
+        self.bars = 0
+
+    # -- update ----------------------------------------------------------------
+
+    def push(self, ts: str, h: float, l: float, c: float, v: float):
+        w = self.windows
+
+        w['close_20'].push(c)
+        w['close_50'].push(c)
+        w['volume_20'].push(v)
+        w['low_14'].push(l)
+        w['high_14'].push(h)
+        w['hl_14'].push(h - l)
+
+        if self.prev is None:
+            # Első bar: diff() NaN → gain/loss 0, DM 0, TR = high - low
+            gain = loss = 0.0
+            tr, pdm, mdm = h - l, 0.0, 0.0
+        else:
+            ph, pl, pc = self.prev
+            delta = c - pc
+            gain = delta if delta > 0 else 0.0
+            loss = -delta if delta < 0 else 0.0
+            tr = max(h - l, abs(h - pc), abs(l - pc))
+            up, down = h - ph, pl - l
+            pdm = up if (up > down and up > 0) else 0.0
+            mdm = down if (down > up and down > 0) else 0.0
+        w['gain_14'].push(gain)
+        w['loss_14'].push(loss)
+        w['tr_14'].push(tr)
+        w['pdm_14'].push(pdm)
+        w['mdm_14'].push(mdm)
+
+        atr = w['tr_14'].mean()
+        plus_di = 100 * _div(w['pdm_14'].mean(), atr)
+        minus_di = 100 * _div(w['mdm_14'].mean(), atr)
+        w['dx_14'].push(100 * _div(abs(plus_di - minus_di), plus_di + minus_di))
+
+        low14, high14 = w['low_14'].min(), w['high_14'].max()
+        w['stoch_k_3'].push(100 * _div(c - low14, high14 - low14))
+
+        ema12 = self.emas['ema_12'].push(c)
+        ema26 = self.emas['ema_26'].push(c)
+        self.emas['macd_signal'].push(ema12 - ema26)
+
+        self.prev = (h, l, c)
+        self.last_bar = (ts, h, l, c, v)
+        self.ts_tail.append(ts)
+        self.bars += 1
+
+    # -- read ------------------------------------------------------------------
+
+    def values(self) -> Dict[str, float]:
+        """Az utolsó bar indikátorai, calculate_technical_score() oszlopneveivel."""
+        w = self.windows
+        sma20 = w['close_20'].mean()
+        std20 = w['close_20'].std()
+        macd = self.emas['ema_12'].value - self.emas['ema_26'].value
+        macd_signal = self.emas['macd_signal'].value
+
+        rs = _div(w['gain_14'].mean(), w['loss_14'].mean())
+        rsi = 100 - _div(100, 1 + rs) if not math.isnan(rs) else math.nan
+
+        return {
+            'sma_20':         sma20,
+            'sma_50':         w['close_50'].mean(),
+            'rsi':            rsi,
+            'ema_12':         self.emas['ema_12'].value,
+            'ema_26':         self.emas['ema_26'].value,
+            'macd':           macd,
+            'macd_signal':    macd_signal,
+            'macd_histogram': macd - macd_signal,
+            'stoch_k':        w['stoch_k_3'].buf[-1],
+            'stoch_d':        w['stoch_k_3'].mean(),
+            'bb_middle':      sma20,
+            'bb_upper':       sma20 + std20 * 2,
+            'bb_lower':       sma20 - std20 * 2,
+            'volume_sma':     w['volume_20'].mean(),
+            'hl_atr':         w['hl_14'].mean(),
+            'adx':            w['dx_14'].mean(),
+        }
+
+    # -- copy / serialize ------------------------------------------------------
+
+    def copy(self) -> 'IndicatorState':
+        s = IndicatorState.__new__(IndicatorState)
+        s.windows = {k: v.copy() for k, v in self.windows.items()}
+        s.emas = {k: v.copy() for k, v in self.emas.items()}
+        s.prev, s.last_bar, s.bars = self.prev, self.last_bar, self.bars
+        s.ts_tail = deque(self.ts_tail, maxlen=_TS_TAIL)
+        return s
+
+    def to_json(self) -> str:
+        return json.dumps({
+            'version': STATE_VERSION,
+            'windows': {k: list(v.buf) for k, v in self.windows.items()},
+            'emas':    {k: v.value for k, v in self.emas.items()},
+            'prev':    self.prev,
+            'last_bar': self.last_bar,
+            'ts_tail': list(self.ts_tail),
+            'bars':    self.bars,
+        })
+
+    @classmethod
+    def from_json(cls, raw: str) -> Optional['IndicatorState']:
+        """None, ha a tárolt állapot más verziójú / sérült (→ újraszámolás)."""
+        try:
+            data = json.loads(raw)
+            if data.get('version') != STATE_VERSION or set(data['windows']) != set(_WINDOWS):
+                return None
+            s = cls()
+            s.windows = {k: _Window(_WINDOWS[k], [math.nan if x is None else x for x in vals])
+                         for k, vals in data['windows'].items()}
+            for k, value in data['emas'].items():
+                s.emas[k].value = value
+            s.prev = tuple(data['prev']) if data['prev'] else None
+            s.last_bar = tuple(data['last_bar']) if data['last_bar'] else None
+            s.ts_tail = deque(data['ts_tail'], maxlen=_TS_TAIL)
+            s.bars = data['bars']
+            return s
+        except Exception:
+            return None
+
+
+def _ts_key(ts) -> str:
+    return pd.Timestamp(ts).isoformat()
+
+
+class IndicatorEngine:
+    """
+    (ticker, interval) → IndicatorState, memóriában + indicator_state táblában.
+
+        engine = get_indicator_engine()
+        values = engine.snapshot('AAPL', '5m', df, 'close', 'high', 'low', db=db)
+    """
+
+    def __init__(self):
+        self._states: Dict[tuple, IndicatorState] = {}
+        self._locks: Dict[tuple, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._table_ready = False
+        self._table_warned = False
+        self.incremental = 0
+        self.rebuilds = 0
+
+    def _key_lock(self, key: tuple) -> threading.Lock:
+        with self._lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def snapshot(
+        self,
+        ticker_symbol: str,
+        interval: str,
+        df: pd.DataFrame,
+        close_col: str,
+        high_col: Optional[str],
+        low_col: Optional[str],
+        volume_col: Optional[str] = 'volume',
+        db=None,
+    ) -> Optional[Dict[str, float]]:
+        """
+        A df utolsó gyertyájának indikátorai. None, ha a df nem alkalmas
+        (hiányzó oszlop, NaN az új bar-okban) → a hívó a teljes pandas
+        számolásra esik vissza.
+        """
+        if df is None or len(df) == 0 or not high_col or not low_col:
+            return None
+        if volume_col not in df.columns:
+            volume_col = None
+
+        key = (ticker_symbol, interval)
+        with self._key_lock(key):
+            state = self._states.get(key)
+            if state is None and db is not None:
+                state = self._load(db, ticker_symbol, interval)
+
+            start = self._resume_position(state, df, close_col, high_col, low_col, volume_col)
+            rebuilt = start is None
+            if rebuilt:
+                state, start = IndicatorState(), 0
+                self.rebuilds += 1
+            else:
+                self.incremental += 1
+
+            # Lezárt bar-ok: az utolsó (formálódó) gyertya előttiek
+            end = len(df) - 1
+            if not self._push_rows(state, df, start, end, close_col, high_col, low_col, volume_col):
+                self._states.pop(key, None)
+                return None
+            self._states[key] = state
+
+            if db is not None and (rebuilt or end > start):
+                self._save(db, ticker_symbol, interval, state)
+
+            current = state.copy()
+            if not self._push_rows(current, df, end, len(df), close_col, high_col, low_col, volume_col):
+                return None
+            return current.values()
+
+    # -- internals -------------------------------------------------------------
+
+    @staticmethod
+    def _row(df, i, close_col, high_col, low_col) -> tuple:
+        row = df.iloc[i]
+        return float(row[high_col]), float(row[low_col]), float(row[close_col])
+
+    def _resume_position(self, state, df, close_col, high_col, low_col, volume_col) -> Optional[int]:
+        """
+        Az állapot utolsó bar-ja utáni df pozíció, vagy None (→ újraszámolás),
+        ha az állapot nem folytatható: nincs meg a df-ben, a bar értékei
+        megváltoztak, vagy az ablaknyi előzmény timestampjei eltérnek.
+        """
+        if state is None or state.last_bar is None:
+            return None
+        last_ts = pd.Timestamp(state.last_bar[0])
+        try:
+            pos = int(df.index.searchsorted(last_ts))
+        except TypeError:
+            return None
+        if pos >= len(df) - 1 or _ts_key(df.index[pos]) != state.last_bar[0]:
+            return None
+        if state.last_bar[1:4] != self._row(df, pos, close_col, high_col, low_col):
+            return None
+        n_tail = min(len(state.ts_tail), pos + 1)
+        tail = [_ts_key(t) for t in df.index[pos + 1 - n_tail:pos + 1]]
+        if tail != list(state.ts_tail)[-n_tail:]:
+            return None
+        if n_tail < len(state.ts_tail) and state.bars > pos + 1:
+            # A df rövidebb, mint az állapot ablaka: a pandas számolás sem látná a régebbi bar-okat
+            return None
+        return pos + 1
+
+    def _push_rows(self, state, df, start, end, close_col, high_col, low_col, volume_col) -> bool:
+        if end <= start:
+            return True
+        cols = [high_col, low_col, close_col] + ([volume_col] if volume_col else [])
+        block = df[cols].iloc[start:end].to_numpy(dtype=float)
+        if np.isnan(block).any():
+            return False
+        for j, ts in enumerate(df.index[start:end]):
+            v = float(block[j, 3]) if volume_col else math.nan
+            state.push(_ts_key(ts), float(block[j, 0]), float(block[j, 1]), float(block[j, 2]), v)
+        return True
+
+    def _has_table(self, db) -> bool:
+        """Létezik-e az indicator_state tábla (csak olvas; a pozitív választ megjegyzi)."""
+        if self._table_ready:
+            return True
+        from sqlalchemy import inspect
+        if inspect(db.connection()).has_table("indicator_state"):
+            self._table_ready = True
+        elif not self._table_warned:
+            self._table_warned = True
+            print("  ⚠️ [Indicators] indicator_state table missing, state not persisted "
+                  "(run init_db() or python -m src.index_migration)")
+        return self._table_ready
+
+    def _load(self, db, ticker_symbol: str, interval: str) -> Optional[IndicatorState]:
+        try:
+            from src.models import IndicatorState as IndicatorStateModel
+            if not self._has_table(db):
+                return None
+            row = db.get(IndicatorStateModel, (ticker_symbol, interval))
+            return IndicatorState.from_json(row.state_json) if row is not None else None
+        except Exception as e:
+            print(f"  ⚠️ [Indicators] State load failed ({ticker_symbol} {interval}): {e}")
+            return None
+
+    def _save(self, db, ticker_symbol: str, interval: str, state: IndicatorState):
+        """
+        Upsert a hívó session-jébe SAVEPOINT-on belül: hiba (pl. database is
+        locked) csak az állapot sort görgeti vissza, a hívó tranzakciója
+        használható marad. A commit a hívóé.
+        """
+        try:
+            from src.models import IndicatorState as IndicatorStateModel
+            if not self._has_table(db):
+                return
+            with db.begin_nested():
+                db.merge(IndicatorStateModel(
+                    ticker_symbol=ticker_symbol,
+                    interval=interval,
+                    last_timestamp=pd.Timestamp(state.last_bar[0]).to_pydatetime(),
+                    bars=state.bars,
+                    state_json=state.to_json(),
+                ))
+        except Exception as e:
+            print(f"  ⚠️ [Indicators] State save failed ({ticker_symbol} {interval}): {e}")
+
+    def summary(self) -> str:
+        return f"{self.incremental} incremental, {self.rebuilds} full rebuilds, {len(self._states)} states"
+
+
+# ==========================================
+# MODULE-LEVEL SINGLETON
+# ==========================================
+
+_global_engine_lock = threading.Lock()
+_global_engine: Optional[IndicatorEngine] = None
+
+
+def get_indicator_engine() -> IndicatorEngine:
+    """A processz közös indikátor engine-je (minden ticker szál)."""
+    global _global_engine
+    with _global_engine_lock:
+        if _global_engine is None:
+            _global_engine = IndicatorEngine()
+        return _global_engine
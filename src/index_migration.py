@@ -0,0 +1,335 @@
+"""
+TrendSignal MVP - Index Migration + EXPLAIN QUERY PLAN checker
+
+A forró lekérdezések mind (ticker_symbol, interval, timestamp tartomány)
+szerint szűrnek, a price_data-n viszont csak egyoszlopos indexek voltak
+(ticker_symbol, timestamp). A signal_calculations ~15 egyoszlopos float
+indexét semmi nem használja, viszont minden INSERT-nél karban kell tartani.
+
+Ez a modul:
+  0. létrehozza a hiányzó új táblákat (indicator_state), ha a DB az
+     init_db() create_all-ja előtti
+  1. létrehozza a hot path-ok composite indexeit (IF NOT EXISTS)
+  2. eldobja a redundáns / soha nem használt indexeket (IF EXISTS), és a
+     leváltottakat, ha az utódjuk már létezik (price_data: egyetlen unique
+     (ticker_symbol, interval, timestamp) index az upsert és a lekérdezések alatt)
+  3. EXPLAIN QUERY PLAN-nel ellenőrzi, hogy minden regisztrált forró
+     lekérdezés indexet használ (nincs teljes tábla scan), és ahol meg van
+     adva, a várt composite indexet
+
+Idempotens: többször futtatható hiba nélkül. Nem létező táblákat kihagy.
+
+Usage:
+    python -m src.index_migration              # migráció + ellenőrzés
+    python -m src.index_migration --dry-run    # csak kiírja, mit tenne
+    python -m src.index_migration --check      # csak ellenőrzés
+    python -m src.index_migration --db path/to/trendsignal.db
+
+Version: 1.2
+Date: 2026-10-16
+"""
+
+import argparse
+import sqlite3
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_DB_PATH = BASE_DIR / "trendsignal.db"
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    name: str
+    table: str
+    columns: Tuple[str, ...]
+    unique: bool = False
+
+    def create_sql(self) -> str:
+        kind = "UNIQUE INDEX" if self.unique else "INDEX"
+        return (f"CREATE {kind} IF NOT EXISTS {self.name} "
+                f"ON {self.table} ({', '.join(self.columns)})")
+
+
+@dataclass(frozen=True)
+class HotQuery:
+    """
+    Egy forró lekérdezés reprezentatív SQL-je (ahogy a kód / az ORM kiadja).
+    index: ha megadva, a plannek ezt az indexet kell használnia.
+    """
+    name: str
+    table: str
+    sql: str
+    params: tuple
+    index: Optional[str] = None
+
+
+# ── Composite indexek ────────────────────────────────────────────────────────
+
+COMPOSITE_INDEXES: List[IndexSpec] = [
+    # save_price_data_to_db / alpaca_collector bulk upsert ON CONFLICT célja, és
+    # get_price_data_from_db, PriceService (5m), BacktestService preload,
+    # signal_data._load_price_data, ArchiveBacktestService._load_price_bars,
+    # gen_archive_signals.load_15m
+    IndexSpec("uq_price_data_symbol_interval_ts", "price_data",
+              ("ticker_symbol", "interval", "timestamp"), unique=True),
+    # BacktestService._preload_symbol / _signals_between
+    IndexSpec("ix_signals_symbol_created", "signals",
+              ("ticker_symbol", "created_at")),
+]
+
+# ── Új táblák ────────────────────────────────────────────────────────────────
+
+# src/models.py-val egyező DDL, meglévő DB-hez (api.py init_db() nélkül)
+TABLES: List[Tuple[str, str]] = [
+    ("indicator_state",
+     "CREATE TABLE IF NOT EXISTS indicator_state ("
+     "ticker_symbol VARCHAR(10) NOT NULL, "
+     "interval VARCHAR(5) NOT NULL, "
+     "last_timestamp DATETIME, "
+     "bars INTEGER, "
+     "state_json TEXT NOT NULL, "
+     "updated_at DATETIME DEFAULT (CURRENT_TIMESTAMP), "
+     "PRIMARY KEY (ticker_symbol, interval))"),
+]
+
+# ── Eldobandó indexek ────────────────────────────────────────────────────────
+
+# Ugyanazon oszlopokon álló régi indexek → csak akkor dobjuk, ha az utódjuk
+# már létezik (duplikátumok miatt elmaradt unique index esetén maradnak)
+SUPERSEDED_INDEXES: List[Tuple[str, str, str]] = [
+    ("uq_price_data_symbol_ts_interval", "price_data", "uq_price_data_symbol_interval_ts"),
+    ("ix_price_data_symbol_interval_ts", "price_data", "uq_price_data_symbol_interval_ts"),
+]
+
+# A composite index prefixe → redundáns
+REDUNDANT_INDEXES: List[Tuple[str, str]] = [
+    ("ix_price_data_ticker_symbol", "price_data"),
+    ("ix_signals_ticker_symbol", "signals"),
+]
+
+# signal_calculations egyoszlopos indexei, amelyekre egyetlen lekérdezés sem
+# szűr (a tábla signal_id alapján olvasott audit trail)
+_DEAD_SIGNAL_CALC_COLUMNS = (
+    "id",                       # INTEGER PRIMARY KEY mellett felesleges
+    "current_price", "atr_pct", "rsi", "volatility", "news_count",
+    "sentiment_score", "sentiment_confidence",
+    "technical_score", "technical_confidence",
+    "risk_score", "combined_score",
+    "weight_sentiment", "weight_technical", "weight_risk",
+)
+DEAD_INDEXES: List[Tuple[str, str]] = [
+    (f"ix_signal_calculations_{col}", "signal_calculations")
+    for col in _DEAD_SIGNAL_CALC_COLUMNS
+]
+
+# ── Forró lekérdezések (EXPLAIN QUERY PLAN checker) ─────────────────────────
+
+_TS = "2026-01-01 00:00:00.000000"
+_TS2 = "2026-01-02 00:00:00.000000"
+
+HOT_QUERIES: List[HotQuery] = [
+    HotQuery(
+        "db_helpers.get_price_data_from_db", "price_data",
+        "SELECT * FROM price_data WHERE ticker_id = ? AND ticker_symbol = ? "
+        "AND interval = ? AND timestamp >= ? ORDER BY timestamp ASC",
+        (1, "AAPL", "1h", _TS),
+        "uq_price_data_symbol_interval_ts",
+    ),
+    HotQuery(
+        "PriceService.get_5min_candle_at_time", "price_data",
+        "SELECT timestamp, open, high, low, close, volume FROM price_data "
+        "WHERE ticker_symbol = ? AND interval = '5m' "
+        "AND timestamp >= ? AND timestamp <= ? ORDER BY timestamp",
+        ("AAPL", _TS, _TS2),
+        "uq_price_data_symbol_interval_ts",
+    ),
+    HotQuery(
+        "PriceService.get_last_5m_close", "price_data",
+        "SELECT close FROM price_data WHERE ticker_symbol = ? AND interval = '5m' "
+        "AND timestamp >= ? AND timestamp <= ? ORDER BY timestamp DESC LIMIT 1",
+        ("AAPL", _TS, _TS2),
+        "uq_price_data_symbol_interval_ts",
+    ),
+    HotQuery(
+        "signal_data._load_price_data", "price_data",
+        "SELECT ticker_symbol, timestamp, open, high, low, close, volume "
+        "FROM price_data WHERE interval = '15m' AND ticker_symbol IN (?, ?) "
+        "ORDER BY ticker_symbol, timestamp ASC",
+        ("AAPL", "MSFT"),
+        "uq_price_data_symbol_interval_ts",
+    ),
+    HotQuery(
+        "ArchiveBacktestService._load_price_bars", "price_data",
+        "SELECT timestamp, open, high, low, close FROM price_data "
+        "WHERE ticker_symbol = ? AND interval = ? ORDER BY timestamp",
+        ("AAPL", "15m"),
+        "uq_price_data_symbol_interval_ts",
+    ),
+    HotQuery(
+        "gen_archive_signals.load_15m", "price_data",
+        "SELECT timestamp, open, high, low, close, volume FROM price_data "
+        "WHERE ticker_symbol=? AND interval='15m' ORDER BY timestamp",
+        ("AAPL",),
+        "uq_price_data_symbol_interval_ts",
+    ),
+    HotQuery(
+        "BacktestService._preload_symbol (signals)", "signals",
+        "SELECT * FROM signals WHERE ticker_symbol = ? AND created_at > ? "
+        "AND created_at <= ? ORDER BY created_at ASC, id ASC",
+        ("AAPL", _TS, _TS2),
+        "ix_signals_symbol_created",
+    ),
+    HotQuery(
+        "live_to_archive_migrator (signal_calculations)", "signal_calculations",
+        "SELECT * FROM signal_calculations WHERE signal_id = ? ORDER BY id DESC LIMIT 1",
+        (1,),
+        "ix_signal_calculations_signal_id",
+    ),
+]
+
+
+# ── Helpers ──────────────────────────────────────────────────────────────────
+
+def _existing_tables(conn: sqlite3.Connection) -> set:
+    return {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+
+def _existing_indexes(conn: sqlite3.Connection) -> set:
+    return {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+
+
+def migrate(conn: sqlite3.Connection, dry_run: bool = False) -> dict:
+    """
+    Új táblák + composite indexek létrehozása, redundáns / halott indexek eldobása.
+    Returns: {"tables": [...], "created": [...], "dropped": [...]}
+    """
+    tables = _existing_tables(conn)
+    indexes = _existing_indexes(conn)
+    new_tables, created, dropped = [], [], []
+
+    for table, ddl in TABLES:
+        if table not in tables:
+            print(f"   [ADD]  table {table}")
+            if not dry_run:
+                conn.execute(ddl)
+            new_tables.append(table)
+
+    for spec in COMPOSITE_INDEXES:
+        if spec.table in tables and spec.name not in indexes:
+            print(f"   [ADD]  {spec.name} ON {spec.table} ({', '.join(spec.columns)})")
+            if not dry_run:
+                try:
+                    conn.execute(spec.create_sql())
+                except sqlite3.IntegrityError as e:
+                    # Unique index meglévő duplikátumokon → kihagyjuk, a hívók fallbackje fut
+                    print(f"   [WARN] {spec.name} not created: {e}")
+                    continue
+            created.append(spec.name)
+            indexes.add(spec.name)
+
+    for name, table, successor in SUPERSEDED_INDEXES:
+        if table in tables and name in indexes and successor in indexes:
+            print(f"   [DROP] {name} ({table}, replaced by {successor})")
+            if not dry_run:
+                conn.execute(f"DROP INDEX IF EXISTS {name}")
+            dropped.append(name)
+
+    for name, table in REDUNDANT_INDEXES + DEAD_INDEXES:
+        if table in tables and name in indexes:
+            print(f"   [DROP] {name} ({table})")
+            if not dry_run:
+                conn.execute(f"DROP INDEX IF EXISTS {name}")
+            dropped.append(name)
+
+    if not dry_run:
+        conn.commit()
+        if created:
+            # Planner statisztika az új indexekhez
+            conn.execute("PRAGMA optimize")
+    return {"tables": new_tables, "created": created, "dropped": dropped}
+
+
+def explain(conn: sqlite3.Connection, sql: str, params: Sequence = ()) -> List[str]:
+    """EXPLAIN QUERY PLAN detail sorai."""
+    return [row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", tuple(params))]
+
+
+def uses_index(plan: List[str], table: str) -> Optional[str]:
+    """
+    A tábla hozzáférése indexen át megy-e. Visszaadja a plan sort, ha igen;
+    None, ha teljes tábla scan van (SCAN <table> USING nélkül) vagy a tábla
+    nem szerepel.
+    """
+    hit = None
+    for detail in plan:
+        words = detail.split()
+        if len(words) < 2 or words[0] not in ("SEARCH", "SCAN") or words[1] != table:
+            continue
+        if "USING" not in words:
+            return None          # teljes tábla scan
+        hit = detail
+    return hit
+
+
+def check_hot_queries(conn: sqlite3.Connection, verbose: bool = True) -> List[str]:
+    """
+    Minden regisztrált forró lekérdezésre EXPLAIN QUERY PLAN.
+    Returns: a hibás lekérdezések nevei (teljes scan, vagy nem a várt index).
+    """
+    tables = _existing_tables(conn)
+    failures = []
+    for q in HOT_QUERIES:
+        if q.table not in tables:
+            if verbose:
+                print(f"   [SKIP] {q.name} (nincs {q.table} tábla)")
+            continue
+        plan = explain(conn, q.sql, q.params)
+        hit = uses_index(plan, q.table)
+        if hit is None or (q.index and f" {q.index}" not in hit):
+            failures.append(q.name)
+            if verbose:
+                expected = f" (expected {q.index})" if q.index else ""
+                print(f"   [FAIL] {q.name}: {' | '.join(plan)}{expected}")
+        elif verbose:
+            print(f"   [OK]   {q.name}: {hit}")
+    return failures
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="price_data / signal index migration + EXPLAIN checker")
+    parser.add_argument("--db", default=str(DEFAULT_DB_PATH), help="SQLite database path")
+    parser.add_argument("--dry-run", action="store_true", help="csak kiírja a változásokat")
+    parser.add_argument("--check", action="store_true", help="csak EXPLAIN QUERY PLAN ellenőrzés")
+    args = parser.parse_args(argv)
+
+    db_path = Path(args.db)
+    if not db_path.exists():
+        print(f"[ERROR] Database file not found: {db_path}")
+        return 1
+
+    conn = sqlite3.connect(str(db_path), timeout=30)
+    try:
+        if not args.check:
+            print("[MIGRATE] Tables + indexes...")
+            result = migrate(conn, dry_run=args.dry_run)
+            print(f"   {len(result['tables'])} tables, {len(result['created'])} indexes created, "
+                  f"{len(result['dropped'])} dropped"
+                  + (" (dry run)" if args.dry_run else ""))
+
+        print("[CHECK] EXPLAIN QUERY PLAN...")
+        failures = check_hot_queries(conn)
+        assert not failures, f"hot queries without index: {failures}"
+        print("[OK] Every hot query uses an index")
+        return 0
+    except AssertionError as e:
+        print(f"[FAIL] {e}")
+        return 1
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
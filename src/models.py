@@ -3,10 +3,10 @@ Database models - SIMPLIFIED VERSION
 NO relationships() - only ForeignKey constraints
 This prevents SQLAlchemy registry conflicts
 
-Version: 2.1 - Added SimulatedTrade model
-Date: 2026-02-17
+Version: 2.4 - IndicatorState (persisted incremental indicator state)
+Date: 2026-10-16
 """
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Text, ForeignKey, BigInteger, Date
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Text, ForeignKey, BigInteger, Date, Index
 from sqlalchemy.sql import func
 from src.database import Base
 
@@ -128,11 +128,16 @@ class NewsCategory(Base):
 class PriceData(Base):
     """Historical price data"""
     __tablename__ = "price_data"
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        # Upsert kulcs (save_price_data_to_db / alpaca_collector ON CONFLICT) és egyben a
+        # hot path indexe: ticker_symbol = ? AND interval = ? AND timestamp tartomány (index_migration.py)
+        Index('uq_price_data_symbol_interval_ts', 'ticker_symbol', 'interval', 'timestamp', unique=True),
+        {'extend_existing': True},
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     ticker_id = Column(Integer, ForeignKey("tickers.id"))
-    ticker_symbol = Column(String(10), nullable=False, index=True)
+    ticker_symbol = Column(String(10), nullable=False)
     timestamp = Column(DateTime, nullable=False, index=True)
     interval = Column(String(5), nullable=False)
     
@@ -193,14 +198,30 @@ class TechnicalIndicator(Base):
     calculated_at = Column(DateTime, server_default=func.now())
 
 
+class IndicatorState(Base):
+    """Inkrementális indikátor állapot (src/incremental_indicators.py) tickerenként és intervallumonként"""
+    __tablename__ = "indicator_state"
+    __table_args__ = {'extend_existing': True}
+
+    ticker_symbol = Column(String(10), primary_key=True)
+    interval = Column(String(5), primary_key=True)
+    last_timestamp = Column(DateTime)          # utolsó lezárt bar
+    bars = Column(Integer, default=0)          # ennyi bar ment át az állapoton
+    state_json = Column(Text, nullable=False)  # ring bufferek + EMA-k (IndicatorState.to_json)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+
 class Signal(Base):
     """Generated trading signals"""
     __tablename__ = "signals"
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        Index('ix_signals_symbol_created', 'ticker_symbol', 'created_at'),
+        {'extend_existing': True},
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     ticker_id = Column(Integer, ForeignKey("tickers.id"))
-    ticker_symbol = Column(String(10), nullable=False, index=True)
+    ticker_symbol = Column(String(10), nullable=False)
     technical_indicator_id = Column(Integer, ForeignKey("technical_indicators.id"), nullable=True)
     
     decision = Column(String(20), nullable=False)
@@ -228,20 +249,25 @@ class Signal(Base):
 
 
 class SignalCalculation(Base):
-    """Audit trail for signal calculations"""
+    """Audit trail for signal calculations
+
+    Csak signal_id / ticker_symbol / calculated_at / decision indexelt — a
+    score oszlopokra nincs szűrés, az indexeik csak az INSERT-et lassították
+    (eldobva: index_migration.py).
+    """
     __tablename__ = "signal_calculations"
     __table_args__ = {'extend_existing': True}
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     signal_id = Column(Integer, ForeignKey("signals.id", ondelete="CASCADE"), nullable=False, index=True)
     ticker_symbol = Column(String(10), nullable=False, index=True)
     calculated_at = Column(DateTime(timezone=False), nullable=False, index=True)
     
     # INPUT VALUES
-    current_price = Column(Float, index=True)
+    current_price = Column(Float)
     atr = Column(Float)
-    atr_pct = Column(Float, index=True)
-    rsi = Column(Float, index=True)
+    atr_pct = Column(Float)
+    rsi = Column(Float)
     macd = Column(Float)
     macd_signal = Column(Float)
     macd_histogram = Column(Float)
@@ -255,24 +281,24 @@ class SignalCalculation(Base):
     stoch_k = Column(Float)
     stoch_d = Column(Float)
     
-    volatility = Column(Float, index=True)
+    volatility = Column(Float)
     nearest_support = Column(Float)
     nearest_resistance = Column(Float)
-    news_count = Column(Integer, index=True)
+    news_count = Column(Integer)
     
     # SCORE VALUES
-    sentiment_score = Column(Float, index=True)
-    sentiment_confidence = Column(Float, index=True)
-    technical_score = Column(Float, index=True)
-    technical_confidence = Column(Float, index=True)
-    risk_score = Column(Float, index=True)
+    sentiment_score = Column(Float)
+    sentiment_confidence = Column(Float)
+    technical_score = Column(Float)
+    technical_confidence = Column(Float)
+    risk_score = Column(Float)
     risk_confidence = Column(Float)
-    combined_score = Column(Float, index=True)
+    combined_score = Column(Float)
     
     # CONFIGURATION
-    weight_sentiment = Column(Float, index=True)
-    weight_technical = Column(Float, index=True)
-    weight_risk = Column(Float, index=True)
+    weight_sentiment = Column(Float)
+    weight_technical = Column(Float)
+    weight_risk = Column(Float)
     
     threshold_buy = Column(Float)
     threshold_sell = Column(Float)
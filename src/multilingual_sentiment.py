@@ -2,11 +2,11 @@
 TrendSignal MVP - Multilingual Sentiment Handler
 Automatic language detection and appropriate sentiment analysis
 
-Version: 1.0
-Date: 2024-12-27
+Version: 1.2
+Date: 2026-10-16
 """
 
-from typing import Dict, Optional
+from typing import Dict, Iterable, Optional
 import re
 import threading
 
@@ -75,8 +75,11 @@ class MultilingualSentimentAnalyzer:
     """
     Automatically route to appropriate sentiment analyzer based on language
     
-    - English → FinBERT
+    - English → FinBERT (közös micro-batching soron át, finbert_batcher.py)
     - Hungarian → Enhanced Keywords
+
+    FinBERT előtt url_hash alapú lookup (sentiment_cache.py): ha a cikk URL-je
+    már ismert (memória LRU vagy news_items), a tárolt score-t adja vissza.
     """
     
     def __init__(self, config=None, ticker_symbol=None):
@@ -85,6 +88,9 @@ class MultilingualSentimentAnalyzer:
         
         # Initialize both engines
         self._init_engines()
+
+        from src.sentiment_cache import get_sentiment_cache
+        self.sentiment_cache = get_sentiment_cache()
     
     def _init_engines(self):
         """Initialize FinBERT and keyword-based analyzers"""
@@ -94,8 +100,8 @@ class MultilingualSentimentAnalyzer:
         self.finbert_available = False
         if USE_FINBERT:
             try:
-                from finbert_analyzer import get_global_finbert
-                self.finbert = get_global_finbert()
+                from finbert_analyzer import get_global_finbert_batcher
+                self.finbert = get_global_finbert_batcher()
                 self.finbert_available = True
                 print("   [OK] FinBERT ready for English news")
             except Exception as e:
@@ -111,13 +117,29 @@ class MultilingualSentimentAnalyzer:
         self.keyword_analyzer.use_finbert = False
         print("[OK] Enhanced keywords ready for Hungarian news")
     
-    def analyze_text(self, text: str, ticker_symbol: Optional[str] = None) -> Dict[str, float]:
+    def prefetch(self, urls: Iterable[str]) -> int:
+        """
+        Egy gyűjtő körének URL-jei → egyetlen url_hash IN (...) lekérdezés,
+        az ismert cikkek a cache-be kerülnek. Visszaadja a találatok számát.
+        """
+        if not self.finbert_available:
+            return 0
+        from src.sentiment_cache import url_hash
+        return len(self.sentiment_cache.get_many(url_hash(u) for u in urls if u))
+
+    def analyze_text(
+        self,
+        text: str,
+        ticker_symbol: Optional[str] = None,
+        url: Optional[str] = None,
+    ) -> Dict[str, float]:
         """
         Analyze sentiment with automatic language detection
         
         Args:
             text: News text
             ticker_symbol: Optional ticker for context
+            url: Optional article URL – ha ismert, a tárolt FinBERT score jön vissza
         
         Returns:
             Sentiment dictionary with language info
@@ -129,10 +151,23 @@ class MultilingualSentimentAnalyzer:
         
         # Route to appropriate analyzer
         if language == 'en' and self.finbert_available:
-            # English → FinBERT
+            # English → FinBERT (ismert URL esetén a tárolt eredmény)
+            key = None
+            if url:
+                from src.sentiment_cache import url_hash
+                key = url_hash(url)
+                cached = self.sentiment_cache.get(key)
+                if cached is not None:
+                    result = cached.sentiment_result()
+                    result['language'] = 'en'
+                    result['method'] = 'finbert'
+                    result['cached'] = True
+                    return result
             result = self.finbert.analyze(text)
             result['language'] = 'en'
             result['method'] = 'finbert'
+            if key is not None:
+                self.sentiment_cache.put(key, result)
         else:
             # Hungarian (or English fallback) → Keywords
             result = self.keyword_analyzer._mock_sentiment_analysis(text, ticker)
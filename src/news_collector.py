@@ -1,5 +1,5 @@
 """
-TrendSignal MVP – News Collector v3.0
+TrendSignal MVP – News Collector v3.2
 Tier-vezérelt, valós idejű, kvóta-tudatos hírgyűjtés.
 
 Stratégia (v2.0 – TrendSignal_Hir_Strategia.docx):
@@ -22,9 +22,13 @@ Kizárva (free tier delay):
   - NewsAPI    (akár 1 hónapos késleltetés)
   - AlphaVantage (több órás-napos + 25 req/nap)
 
-Deduplikáció: URL + Jaccard title-similarity (≥0.80, 30 perc ablak)
+Deduplikáció: URL + Jaccard title-similarity (≥0.80, 30 perc ablak) –
+  prefix-szűrt token index (src.news_dedup) + gördülő szignatúra tár a
+  tickerek / refresh ciklusok közötti újra-szindikált cikkekre
 
-Verzió: 3.0 | 2026-02-25
+Sentiment cache: ismert URL-ekre (url_hash) nincs újra FinBERT / LLM hívás.
+
+Verzió: 3.2 | 2026-10-16
 """
 
 import requests
@@ -114,8 +118,12 @@ if TYPE_CHECKING:
     from src.multilingual_sentiment import MultilingualSentimentAnalyzer
 
 # Jaccard deduplikáció paraméterei
-_JACCARD_THRESHOLD = 0.80   # 80%-os hasonlóság
-_JACCARD_TIME_WINDOW = 1800  # 30 perc (másodperc)
+from src.news_dedup import (
+    JACCARD_THRESHOLD as _JACCARD_THRESHOLD,
+    JACCARD_TIME_WINDOW as _JACCARD_TIME_WINDOW,
+    deduplicate,
+    get_news_dedup_store,
+)
 
 
 class NewsCollector:
@@ -363,7 +371,7 @@ class NewsCollector:
         # ════════════════════════════════════════════════════════════
         # POST-PROCESS
         # ════════════════════════════════════════════════════════════
-        all_news = self._deduplicate_news(all_news)
+        all_news = self._deduplicate_news(all_news, ticker_symbol)
         all_news.sort(key=lambda x: x.published_at, reverse=True)
 
         # LLM Context Check – deduplikacio utan, DB mentes elott
@@ -428,11 +436,11 @@ class NewsCollector:
             )
             analyzed_items = []
             cutoff_time = datetime.now(timezone.utc) - timedelta(hours=lookback_hours)
+            news_items = [item for item in news_items if item['published_at'] >= cutoff_time]
+            sentiment_analyzer.prefetch([item['url'] for item in news_items])
             for item in news_items:
-                if item['published_at'] < cutoff_time:
-                    continue
                 text = f"{item['title']}. {item.get('description', '')}"
-                sentiment = sentiment_analyzer.analyze_text(text, ticker_symbol)
+                sentiment = sentiment_analyzer.analyze_text(text, ticker_symbol, url=item['url'])
                 analyzed_items.append(NewsItem(
                     title=item['title'],
                     description=item.get('description', ''),
@@ -469,11 +477,11 @@ class NewsCollector:
             )
             analyzed_items = []
             cutoff_time = datetime.now(timezone.utc) - timedelta(hours=lookback_hours)
+            news_items = [item for item in news_items if item['published_at'] >= cutoff_time]
+            sentiment_analyzer.prefetch([item['url'] for item in news_items])
             for item in news_items:
-                if item['published_at'] < cutoff_time:
-                    continue
                 text = f"{item['title']}. {item.get('description', '')}"
-                sentiment = sentiment_analyzer.analyze_text(text, ticker_symbol)
+                sentiment = sentiment_analyzer.analyze_text(text, ticker_symbol, url=item['url'])
                 analyzed_items.append(NewsItem(
                     title=item['title'],
                     description=item.get('description', ''),
@@ -547,9 +555,12 @@ class NewsCollector:
                 max_articles=10,
             )
             analyzed_items = []
+            sentiment_analyzer.prefetch([item.get('url', '') for item in news_items])
             for item in news_items:
                 text = f"{item.get('title', '')}. {item.get('description', '')}"
-                sentiment = sentiment_analyzer.analyze_text(text, ticker_symbol)
+                sentiment = sentiment_analyzer.analyze_text(
+                    text, ticker_symbol, url=item.get('url', '')
+                )
                 published_str = item.get('published_at', '')
                 if isinstance(published_str, str):
                     try:
@@ -636,12 +647,14 @@ class NewsCollector:
     # Deduplikáció (URL + Jaccard title-similarity)
     # ------------------------------------------------------------------
 
-    def _deduplicate_news(self, news_items: List[NewsItem]) -> List[NewsItem]:
+    def _deduplicate_news(self, news_items: List[NewsItem], ticker_symbol: str = '') -> List[NewsItem]:
         """
-        Duplikáció szűrés két szinten:
+        Duplikáció szűrés három szinten:
         1. Pontos URL egyezés
         2. Jaccard title-similarity ≥ 0.80 AND ≤ 30 perces időablak
            → magasabb credibility-jű marad meg
+        3. Ugyanez a ticker korábban (előző ciklus) megtartott cikkeivel
+           szemben → a kanonikus cikk kerül a helyére
         """
         # 1. URL-alapú szűrés
         seen_urls: set = set()
@@ -651,56 +664,17 @@ class NewsCollector:
                 seen_urls.add(item.url)
                 url_unique.append(item)
 
-        # 2. Jaccard title-similarity szűrés
-        final: List[NewsItem] = []
-        for candidate in url_unique:
-            is_dup = False
-            for existing in final:
-                if self._is_jaccard_duplicate(candidate, existing):
-                    # A magasabb credibility-jűt tartjuk meg
-                    if candidate.credibility > existing.credibility:
-                        final.remove(existing)
-                        # nem breakelünk, hátha több duplikátumal is egyezik
-                    else:
-                        is_dup = True
-                    break
-            if not is_dup:
-                final.append(candidate)
+        # 2. Jaccard title-similarity szűrés (token index, nem páronként)
+        final = deduplicate(url_unique, _JACCARD_THRESHOLD, _JACCARD_TIME_WINDOW)
+
+        # 3. A ticker korábbi ciklusainak kanonikus cikkei (gördülő tár)
+        final = get_news_dedup_store().resolve(final, ticker_symbol)
 
         removed = len(news_items) - len(final)
         if removed > 0:
             print(f"🔄 Deduplikáció: {removed} duplikátum eltávolítva (URL+Jaccard)")
         return final
 
-    @staticmethod
-    def _is_jaccard_duplicate(
-        item1: NewsItem,
-        item2: NewsItem,
-        threshold: float = _JACCARD_THRESHOLD,
-        time_window_sec: int = _JACCARD_TIME_WINDOW,
-    ) -> bool:
-        """
-        True ha a két cikk valószínűleg ugyanaz a tartalom.
-
-        Feltételek (mindkettő teljesüljön):
-        - Jaccard(title1, title2) ≥ threshold
-        - |published_at1 - published_at2| ≤ time_window_sec
-        """
-        words1 = set(item1.title.lower().split())
-        words2 = set(item2.title.lower().split())
-        union = words1 | words2
-        if not union:
-            return False
-        jaccard = len(words1 & words2) / len(union)
-        if jaccard < threshold:
-            return False
-        # Időablak ellenőrzés
-        try:
-            time_diff = abs((item1.published_at - item2.published_at).total_seconds())
-            return time_diff <= time_window_sec
-        except Exception:
-            return False
-
     # ------------------------------------------------------------------
     # Segédfüggvények
     # ------------------------------------------------------------------
@@ -741,15 +715,25 @@ class NewsCollector:
         from src.config import LLM_API_KEY
         from src.llm_context_checker import LLMContextChecker
         from src.db_helpers import get_llm_cached_news
+        from src.sentiment_cache import get_sentiment_cache
 
         # ── 1. DB-cache lookup ────────────────────────────────────────
-        # Egy batch SQL-lekerdezesben megnezzuk, melyik URL volt mar LLM-mel ertekelt.
+        # Elobb a sentiment cache (a gyujtok mar elotoltottek), a maradekra
+        # egy batch SQL-lekerdezesben megnezzuk, melyik URL volt mar LLM-mel ertekelt.
+        sentiment_cache = get_sentiment_cache()
         url_hash_map = {
             hashlib.md5(item.url.encode()).hexdigest(): item
             for item in news_items
             if item.url
         }
-        cached_records = get_llm_cached_news(list(url_hash_map.keys()), self.db)
+        cached_records = {
+            key: record
+            for key, record in sentiment_cache.get_many(url_hash_map.keys()).items()
+            if record.has_llm
+        }
+        uncached_keys = [key for key in url_hash_map if key not in cached_records]
+        if uncached_keys:
+            cached_records.update(get_llm_cached_news(uncached_keys, self.db))
 
         uncached_items: List[NewsItem] = []
         llm_cached = 0
@@ -822,6 +806,10 @@ class NewsCollector:
 
             print(f"  [LLM] {ticker_symbol}: {llm_ok} uj API-hivas OK, {llm_fail} fallback-to-FinBERT")
 
+            # Az uj LLM-eredmenyek a cache-be → a kovetkezo ciklus DB nelkul talalja
+            for item in uncached_items:
+                sentiment_cache.remember_item(item)
+
         except Exception as e:
             print(f"  [LLM] Batch check failed for {ticker_symbol}: {e} -- fallback to FinBERT")
             for item in uncached_items:
@@ -829,13 +817,10 @@ class NewsCollector:
                 item.active_score_source = 'finbert'
 
     def _save_news_to_db(self, news_items: List[NewsItem], ticker_symbol: str):
-        """Hírek mentése az adatbázisba."""
+        """Hírek mentése az adatbázisba (egy batch, egy commit tickerenként)."""
         try:
-            from src.db_helpers import save_news_item_to_db
-            saved_count = sum(
-                1 for item in news_items
-                if save_news_item_to_db(item, ticker_symbol, self.db)
-            )
+            from src.db_helpers import save_news_items_to_db
+            saved_count = save_news_items_to_db(news_items, ticker_symbol, self.db)
             if saved_count > 0:
                 print(f"💾 Mentve: {saved_count} hír az adatbázisba")
         except Exception as e:
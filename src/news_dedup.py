@@ -0,0 +1,333 @@
+"""
+TrendSignal MVP - News near-duplicate index (Jaccard, 30 perces ablak)
+
+A NewsCollector._deduplicate_news() Jaccard title-similarity szűrése.
+
+Miért:
+  - minden jelöltet az összes eddig megtartott cikkel páronként
+    összevetett + list.remove() a cikluson belül → 200–500
+    cikkes multi-source batch-en négyzetes, és ez a run_batch_analysis
+    9 szálán tickerenként ismétlődik
+  - egy cikk újra-szindikált változata (más URL, ugyanaz a cím) a következő
+    refresh ciklusban új cikként ment tovább az LLM scoringra és a DB-be
+
+Működés:
+  - szignatúra: a cím szóhalmaza (title.lower().split(), mint eddig) +
+    időkulcs: 30 perces bucket (naive / aware published_at külön — ezek
+    eddig sem voltak összevethetők)
+  - prefix-szűrt inverted index: Jaccard ≥ t esetén a két halmaz (globális
+    token-sorrendben vett) |x| - ⌈t·|x|⌉ + 1 hosszú prefixei biztosan
+    közös tokent tartalmaznak → csak a prefix tokenekre indexelünk /
+    keresünk, a szomszédos (±1) időbucketekben
+  - a jelölteket pontos Jaccard + időablak ellenőrzés dönti el, az eddigi
+    szabályokkal: Jaccard ≥ 0.80 ÉS ≤ 30 perc, a magasabb credibility marad
+    (egyenlőségnél a korábbi); több egyezésnél az elsőként megtartott számít
+  - NewsDedupStore: processz-szintű gördülő szignatúra tár (refresh
+    ciklusok között, tickerenként külön). Ha egy túlélő cikk ugyanannak a
+    tickernek egy korábban megtartott, a mostani batch-ben nem szereplő
+    cikkének közeli duplikátuma, a kanonikus (korábbi, legalább ugyanolyan
+    credibility-jű) cikk másolata kerül a helyére az LLM scoring előtt — a
+    sztori nem vész el a signalból, csak egyszer szerepel, mindig ugyanazzal
+    az URL-lel (sentiment cache találat). Tickerek között nincs csere: a
+    cikk sentimentje / relevanciája tickerfüggő
+
+Version: 1.1
+Date: 2026-10-16
+"""
+
+import math
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from dataclasses import replace
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+JACCARD_THRESHOLD = 0.80        # 80%-os hasonlóság
+JACCARD_TIME_WINDOW = 1800      # 30 perc (másodperc)
+
+DEFAULT_MAX_ENTRIES = 20_000
+DEFAULT_TTL_SECONDS = 24 * 3600  # ennyi ideig nem látott kanonikus cikk kiesik
+
+_EPOCH = datetime(1970, 1, 1)
+
+# tokens: frozenset (pontos Jaccard), prefix: index kulcs tokenek,
+# seconds: published_at epoch mp, tz: aware-e, bucket: 30 perces időbucket
+Signature = namedtuple("Signature", "tokens prefix seconds tz bucket")
+
+
+def _token_order(token: str) -> tuple:
+    """Globális token-sorrend a prefixekhez (hash → a gyakori szavak szétszórva)."""
+    return (hash(token), token)
+
+
+def signature(
+    item,
+    threshold: float = JACCARD_THRESHOLD,
+    time_window_sec: int = JACCARD_TIME_WINDOW,
+) -> Optional[Signature]:
+    """
+    A cikk szignatúrája, vagy None, ha semmivel sem lehet duplikátum
+    (üres cím, hiányzó / nem datetime published_at).
+    """
+    tokens = frozenset((item.title or '').lower().split())
+    published = getattr(item, 'published_at', None)
+    if not tokens or not isinstance(published, datetime):
+        return None
+    aware = published.utcoffset() is not None
+    seconds = published.timestamp() if aware else (published - _EPOCH).total_seconds()
+
+    n = len(tokens)
+    overlap = max(1, math.ceil(threshold * n - 1e-9))
+    ordered = sorted(tokens, key=_token_order)
+    prefix = ordered[:max(1, n - overlap + 1)]
+    return Signature(tokens, prefix, seconds, aware, int(seconds // time_window_sec))
+
+
+def is_near_duplicate(
+    a: Signature,
+    b: Signature,
+    threshold: float = JACCARD_THRESHOLD,
+    time_window_sec: int = JACCARD_TIME_WINDOW,
+) -> bool:
+    """
+    True, ha a két cikk valószínűleg ugyanaz a tartalom — az egyetlen
+    near-duplicate szabály (deduplicate() és NewsDedupStore is first_match()-en át):
+    Jaccard(cím szóhalmazok) ≥ threshold ÉS |Δpublished_at| ≤ time_window_sec.
+    Naive és aware published_at nem összevethető → False.
+    """
+    if a.tz != b.tz:
+        return False
+    union = len(a.tokens | b.tokens)
+    if len(a.tokens & b.tokens) / union < threshold:
+        return False
+    return abs(a.seconds - b.seconds) <= time_window_sec
+
+
+class NearDuplicateIndex:
+    """
+    Prefix-szűrt token inverted index időbucketekkel.
+
+    Kulcsok: növekvő egészek (beszúrási sorrend); first_match() a
+    legkisebb kulcsú egyező bejegyzést adja (= az elsőként megtartott).
+    Törlés lusta: az index listákban maradó halott kulcsokat átugorjuk,
+    és ha túl sok gyűlik össze, újraépítjük az indexet.
+    """
+
+    def __init__(self, threshold: float = JACCARD_THRESHOLD,
+                 time_window_sec: int = JACCARD_TIME_WINDOW):
+        self.threshold = threshold
+        self.time_window_sec = time_window_sec
+        self._postings: Dict[tuple, List[int]] = {}
+        self._sigs: Dict[int, Signature] = {}
+        self._dead = 0
+
+    def add(self, key: int, sig: Signature):
+        self._sigs[key] = sig
+        for token in sig.prefix:
+            self._postings.setdefault((sig.tz, sig.bucket, token), []).append(key)
+
+    def remove(self, key: int):
+        if self._sigs.pop(key, None) is not None:
+            self._dead += 1
+            if self._dead > 1024 and self._dead > len(self._sigs):
+                self._rebuild()
+
+    def first_match(self, sig: Signature, exclude: Iterable[int] = ()) -> Optional[int]:
+        """A legkisebb kulcs, amelynek szignatúrája sig közeli duplikátuma."""
+        found = set()
+        for bucket in (sig.bucket - 1, sig.bucket, sig.bucket + 1):
+            for token in sig.prefix:
+                found.update(self._postings.get((sig.tz, bucket, token), ()))
+        found.difference_update(exclude)
+        for key in sorted(found):
+            other = self._sigs.get(key)
+            if other is not None and is_near_duplicate(
+                sig, other, self.threshold, self.time_window_sec
+            ):
+                return key
+        return None
+
+    def _rebuild(self):
+        sigs = self._sigs
+        self._postings = {}
+        self._sigs = {}
+        self._dead = 0
+        for key, sig in sigs.items():
+            self.add(key, sig)
+
+    def __len__(self) -> int:
+        return len(self._sigs)
+
+
+def deduplicate(
+    items: List,
+    threshold: float = JACCARD_THRESHOLD,
+    time_window_sec: int = JACCARD_TIME_WINDOW,
+) -> List:
+    """
+    Jaccard title-similarity szűrés egy batch-en (sorrendtartó).
+
+    Egy jelölt az elsőként megtartott közeli duplikátumával versenyez: ha
+    magasabb a credibility-je, kiszorítja (és a lista végére kerül),
+    különben eldobjuk.
+    """
+    index = NearDuplicateIndex(threshold, time_window_sec)
+    kept: Dict[int, object] = {}
+    for seq, candidate in enumerate(items):
+        sig = signature(candidate, threshold, time_window_sec)
+        if sig is None:
+            kept[seq] = candidate
+            continue
+        match = index.first_match(sig)
+        if match is not None:
+            if candidate.credibility > kept[match].credibility:
+                index.remove(match)
+                del kept[match]
+            else:
+                continue
+        kept[seq] = candidate
+        index.add(seq, sig)
+    return list(kept.values())
+
+
+# ==========================================
+# GÖRDÜLŐ SZIGNATÚRA TÁR (tickerek / ciklusok között)
+# ==========================================
+
+# item: a kanonikus cikk másolata; seen_at: utoljára látva (monotonic)
+_StoreEntry = namedtuple("_StoreEntry", "ticker url item seen_at")
+
+
+class NewsDedupStore:
+    """
+    Thread-safe gördülő tár a korábban megtartott (kanonikus) cikkekről,
+    tickerenként külön indexszel (a TTL és a max_entries közös).
+
+        store = get_news_dedup_store()
+        news = store.resolve(deduplicate(news), 'AAPL')
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        threshold: float = JACCARD_THRESHOLD,
+        time_window_sec: int = JACCARD_TIME_WINDOW,
+        clock=None,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.threshold = threshold
+        self.time_window_sec = time_window_sec
+        self.replaced = 0
+        self._clock = clock or time.monotonic
+        self._indexes: Dict[str, NearDuplicateIndex] = {}
+        self._entries: "OrderedDict[int, _StoreEntry]" = OrderedDict()
+        self._by_url: Dict[tuple, int] = {}   # (ticker, url) → key
+        self._next_key = 0
+        self._lock = threading.Lock()
+
+    def resolve(self, items: List, ticker_symbol: str = '') -> List:
+        """
+        A batch-en belül már deduplikált cikkek összevetése a ticker
+        korábbi cikkeivel (más tickerek cikkei nem számítanak).
+
+        - ugyanaz az URL: a cikk marad, a tárban frissül
+        - egy korábban megtartott, a batch-ben nem szereplő cikk közeli
+          duplikátuma: ha annak credibility-je legalább ekkora, a másolata
+          kerül a helyére (egyszer), különben a jelölt lesz a kanonikus
+        - új sztori: bekerül a tárba
+        """
+        now = self._clock()
+        batch_urls = {item.url for item in items}
+        out: List = []
+        ticker = ticker_symbol
+        with self._lock:
+            self._expire(now)
+            index = self._indexes.get(ticker)
+            if index is None:
+                index = self._indexes[ticker] = NearDuplicateIndex(self.threshold, self.time_window_sec)
+            # a batch saját cikkeiről a batch-en belüli dedup már döntött
+            batch_keys = {self._by_url[(ticker, url)] for url in batch_urls
+                          if (ticker, url) in self._by_url}
+            emitted = set()
+            for item in items:
+                sig = signature(item, self.threshold, self.time_window_sec)
+                key = self._by_url.get((ticker, item.url))
+                if sig is None or key is not None:
+                    if key is not None:
+                        self._drop(key)
+                    if sig is not None:
+                        batch_keys.add(self._add(ticker, item, sig, now))
+                    out.append(item)
+                    continue
+
+                match = index.first_match(sig, exclude=batch_keys)
+                if match is not None:
+                    canonical = self._entries[match]
+                    if canonical.item.credibility >= item.credibility:
+                        self._entries[match] = canonical._replace(seen_at=now)
+                        self._entries.move_to_end(match)
+                        self.replaced += 1
+                        if canonical.url not in emitted and canonical.url not in batch_urls:
+                            emitted.add(canonical.url)
+                            out.append(replace(canonical.item))
+                        continue
+                    self._drop(match)
+                batch_keys.add(self._add(ticker, item, sig, now))
+                out.append(item)
+        return out
+
+    def _add(self, ticker: str, item, sig: Signature, now: float) -> int:
+        key = self._next_key
+        self._next_key += 1
+        self._entries[key] = _StoreEntry(ticker, item.url, replace(item), now)
+        self._by_url[(ticker, item.url)] = key
+        self._indexes[ticker].add(key, sig)
+        while len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries)))
+        return key
+
+    def _drop(self, key: int):
+        entry = self._entries.pop(key)
+        if self._by_url.get((entry.ticker, entry.url)) == key:
+            del self._by_url[(entry.ticker, entry.url)]
+        self._indexes[entry.ticker].remove(key)
+
+    def _expire(self, now: float):
+        # _entries seen_at szerint rendezett (frissítéskor a végére kerül)
+        cutoff = now - self.ttl_seconds
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if entry.seen_at >= cutoff:
+                break
+            self._drop(key)
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._entries):
+                self._drop(key)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def summary(self) -> str:
+        return f"{len(self._entries)} canonical articles, {self.replaced} cross-cycle duplicates replaced"
+
+
+# ==========================================
+# MODULE-LEVEL SINGLETON
+# ==========================================
+
+_global_store_lock = threading.Lock()
+_global_store: Optional[NewsDedupStore] = None
+
+
+def get_news_dedup_store() -> NewsDedupStore:
+    """A processz közös dedup tára (minden NewsCollector / ticker szál)."""
+    global _global_store
+    with _global_store_lock:
+        if _global_store is None:
+            _global_store = NewsDedupStore()
+        return _global_store
@@ -0,0 +1,376 @@
+"""
+TrendSignal MVP - Price Cache (read-through, candle-aligned TTL)
+
+Közös árfolyam cache a price_data / yfinance előtt.
+
+Miért:
+  - utils._PRICE_CACHE korlátlan dict volt, amit minden batch futás elején
+    ürítettünk → két egymást követő refresh (és minden API hívás) újra
+    felépítette ugyanazt a változatlan történetet az ORM sorokból
+  - PriceService és a signals API minden 5m gyertya lookupnál külön
+    lekérdezést futtatott ugyanarra a napra
+
+Működés:
+  - kulcs: (ticker, interval, variáns) — variáns a period ('5d', '3mo', ...)
+    vagy a nap (5m napi bucket)
+  - lejárat: az interval következő gyertyazárása (session-hez igazítva,
+    src.trading_calendar); piaczárás után a következő session első
+    gyertyájáig érvényes. Üres / None eredmény (üres napi bucket is)
+    legfeljebb NEGATIVE_TTL-ig. Lezárt napok nem üres 5m bucketjei nem járnak
+    le (csak LRU / invalidate)
+  - korlát: LRU, a bejegyzések sorszáma alapján (max_rows)
+  - ugyanarra a kulcsra párhuzamosan érkező kérések közül egy tölt, a többi
+    ugyanarra a Future-re vár
+  - invalidate(ticker, interval): új sorok mentése után (fetch_price_data);
+    a közben futó töltés eredménye nem kerül a cache-be (elavult lehet)
+  - load_5m_days(): több (ticker, nap) bucket előtöltése egy lekérdezéssel
+    (signals API /history: egy lap összes direction eredménye)
+
+A cache-elt DataFrame-ek / listák közösek — a hívók csak olvashatják őket.
+
+Version: 1.2
+Date: 2026-10-16
+"""
+
+import threading
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict, namedtuple
+from concurrent.futures import Future
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from src.trading_calendar import is_weekend, session_bounds
+
+DEFAULT_MAX_ROWS = 500_000
+
+# None / üres eredmény (hálózati hiba, rate limit) ennyi ideig cache-elt
+NEGATIVE_TTL = timedelta(seconds=60)
+
+# Piaczárás után ennyi ideig még érkezhetnek a nap utolsó gyertyái (refresh ciklus)
+_SETTLE = timedelta(hours=1)
+
+# Lejárat nélküli bejegyzés (lezárt nap)
+NEVER = datetime.max
+
+_INTERVAL_MINUTES = {
+    '1m': 1, '2m': 2, '5m': 5, '15m': 15, '30m': 30,
+    '60m': 60, '90m': 90, '1h': 60,
+}
+
+# 5m gyertya — attribútumai a PriceData sorral azonosak (timestamp/open/...)
+Candle = namedtuple("Candle", "timestamp open high low close volume")
+
+# load_5m_days(): ennyi (ticker, nap) ablak egy lekérdezésben (3 paraméter / ablak)
+LOAD_CHUNK_KEYS = 300
+
+# Egy nap 5m gyertyái + timestampjeik (bisect)
+_DayBucket = namedtuple("_DayBucket", "timestamps candles")
+
+
+def next_candle_close(symbol: str, interval: str, now: datetime) -> datetime:
+    """
+    Az interval következő gyertyazárása now után (naive UTC).
+
+    Intraday: session nyitás + k × interval (az utolsó gyertya a
+    sessionzárásnál zár); 1d: a napi session zárása. Hétvégén / zárás után
+    a következő kereskedési nap első zárása.
+    """
+    minutes = _INTERVAL_MINUTES.get(interval)
+    day = now.date()
+    for _ in range(8):
+        if not is_weekend(datetime.combine(day, datetime.min.time())):
+            open_utc, close_utc = session_bounds(day, symbol)
+            if now < close_utc:
+                if minutes is None:
+                    return close_utc
+                step = timedelta(minutes=minutes)
+                if now < open_utc:
+                    return min(open_utc + step, close_utc)
+                k = (now - open_utc) // step + 1
+                return min(open_utc + k * step, close_utc)
+        day += timedelta(days=1)
+    return now + timedelta(days=1)
+
+
+def _day_expiry(symbol: str, day: date, now: datetime) -> datetime:
+    """5m napi bucket lejárata: session alatt a következő 5m zárás, utána lezárva."""
+    _, close_utc = session_bounds(day, symbol)
+    if now >= close_utc + _SETTLE:
+        return NEVER
+    if now < close_utc:
+        return next_candle_close(symbol, '5m', now)
+    return close_utc + _SETTLE
+
+
+def _weight(value: Any) -> int:
+    """LRU súly: sorok száma (DataFrame / napi bucket), legalább 1."""
+    if isinstance(value, _DayBucket):
+        return max(1, len(value.candles))
+    try:
+        return max(1, len(value))
+    except TypeError:
+        return 1
+
+
+def _is_failed(value: Any) -> bool:
+    """None / üres DataFrame / üres napi bucket — a loader nem kapott adatot (rövid TTL)."""
+    if isinstance(value, _DayBucket):
+        return not value.candles
+    return value is None or bool(getattr(value, 'empty', False))
+
+
+class PriceCache:
+    """
+    Thread-safe read-through LRU (ticker, interval, variáns) → árfolyam adat.
+
+        cache = get_price_cache()
+        df = cache.get_or_load('AAPL', '5m', '5d', lambda: fetch_price_data(...))
+        candles = cache.get_5m_candles('AAPL', start_utc, end_utc)
+    """
+
+    def __init__(self, max_rows: int = DEFAULT_MAX_ROWS, session_factory=None, clock=None):
+        self.max_rows = max_rows
+        self.hits = 0
+        self.misses = 0
+        self.waits = 0
+        self._session_factory = session_factory
+        self._clock = clock or datetime.utcnow
+        # key → (value, expires_at, weight)
+        self._mem: "OrderedDict[tuple, Tuple[Any, datetime, int]]" = OrderedDict()
+        self._rows = 0
+        # key → (Future, generation); invalidate() a futó töltés generációját
+        # emeli → az elavult eredmény nem kerül a cache-be
+        self._inflight: Dict[tuple, Tuple[Future, int]] = {}
+        # (ticker, interval | None) → invalidate() számláló — version()
+        self._versions: Dict[Tuple[str, Optional[str]], int] = {}
+        self._lock = threading.Lock()
+
+    # -- read-through ----------------------------------------------------------
+
+    def get_or_load(
+        self,
+        symbol: str,
+        interval: str,
+        variant: Any,
+        loader: Callable[[], Any],
+        expires_at: Optional[datetime] = None,
+    ) -> Any:
+        """
+        A cache-elt érték, vagy loader() eredménye (egyszerre egy töltés
+        kulcsonként; a többi szál megvárja). expires_at alapértelmezés: az
+        interval következő gyertyazárása.
+        """
+        key = (symbol, interval, variant)
+        now = self._clock()
+        with self._lock:
+            entry = self._mem.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._mem.move_to_end(key)
+                    self.hits += 1
+                    return entry[0]
+                self._drop(key)
+            inflight = self._inflight.get(key)
+            owner = inflight is None
+            if owner:
+                future = Future()
+                self._inflight[key] = (future, 0)
+                self.misses += 1
+            else:
+                future = inflight[0]
+                self.waits += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            value = loader()
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_exception(e)
+            raise
+
+        if expires_at is None:
+            expires_at = next_candle_close(symbol, interval, now)
+        self._finish(key, value, expires_at, now)
+        return value
+
+    # -- 5m candles (PriceService, signals API) ---------------------------------
+
+    def get_5m_candles(self, symbol: str, start_utc: datetime, end_utc: datetime) -> List[Candle]:
+        """[start_utc, end_utc] 5m gyertyái, időrendben — napi bucketekből."""
+        candles: List[Candle] = []
+        now = self._clock()
+        day = start_utc.date()
+        while day <= end_utc.date():
+            ts, rows = self.get_or_load(
+                symbol, '5m', day,
+                lambda d=day: self._load_5m_day(symbol, d),
+                expires_at=_day_expiry(symbol, day, now),
+            )
+            candles.extend(rows[bisect_left(ts, start_utc):bisect_right(ts, end_utc)])
+            day += timedelta(days=1)
+        return candles
+
+    def load_5m_days(self, keys: Iterable[Tuple[str, date]]) -> int:
+        """
+        A hiányzó (ticker, nap) 5m bucketek előtöltése egyetlen lekérdezéssel
+        (darabonként LOAD_CHUNK_KEYS kulcs) — egy lapnyi signal értékelése
+        előtt. A már tárolt / éppen töltődő bucketeket kihagyja.
+        Visszatérés: a betöltött bucketek száma.
+        """
+        now = self._clock()
+        with self._lock:
+            missing = []
+            for symbol, day in sorted(set(keys)):
+                key = (symbol, '5m', day)
+                entry = self._mem.get(key)
+                if key not in self._inflight and (entry is None or entry[1] <= now):
+                    # Saját töltésként regisztrálva: a párhuzamos get_5m_candles
+                    # megvárja, az invalidate() pedig elavultnak jelölheti
+                    self._inflight[key] = (Future(), 0)
+                    self.misses += 1
+                    missing.append((symbol, day))
+        for start in range(0, len(missing), LOAD_CHUNK_KEYS):
+            chunk = missing[start:start + LOAD_CHUNK_KEYS]
+            try:
+                buckets = self._load_5m_days(chunk)
+            except BaseException as e:
+                with self._lock:
+                    futures = [self._inflight.pop((symbol, '5m', day))[0]
+                               for symbol, day in missing[start:]]
+                for future in futures:
+                    future.set_exception(e)
+                raise
+            for symbol, day in chunk:
+                self._finish((symbol, '5m', day), buckets[(symbol, day)],
+                             _day_expiry(symbol, day, now), now)
+        return len(missing)
+
+    def _load_5m_day(self, symbol: str, day: date) -> _DayBucket:
+        return self._load_5m_days([(symbol, day)])[(symbol, day)]
+
+    def _load_5m_days(self, keys: List[Tuple[str, date]]) -> Dict[Tuple[str, date], _DayBucket]:
+        from sqlalchemy import and_, or_
+        from src.models import PriceData
+        if self._session_factory is None:
+            from src.database import SessionLocal
+            self._session_factory = SessionLocal
+
+        windows = []
+        for symbol, day in keys:
+            day_start = datetime.combine(day, datetime.min.time())
+            windows.append(and_(
+                PriceData.ticker_symbol == symbol,
+                PriceData.timestamp >= day_start,
+                PriceData.timestamp < day_start + timedelta(days=1),
+            ))
+        db = self._session_factory()
+        try:
+            rows = db.query(
+                PriceData.ticker_symbol, PriceData.timestamp, PriceData.open,
+                PriceData.high, PriceData.low, PriceData.close, PriceData.volume,
+            ).filter(
+                PriceData.interval == '5m',
+                or_(*windows),
+            ).order_by(PriceData.ticker_symbol, PriceData.timestamp).all()
+        finally:
+            db.close()
+
+        grouped: Dict[Tuple[str, date], List[Candle]] = {key: [] for key in keys}
+        for symbol, *values in rows:
+            candles = grouped.get((symbol, values[0].date()))
+            if candles is not None:
+                candles.append(Candle(*values))
+        return {key: _DayBucket([c.timestamp for c in candles], candles)
+                for key, candles in grouped.items()}
+
+    # -- maintenance -----------------------------------------------------------
+
+    def invalidate(self, symbol: str, interval: Optional[str] = None) -> int:
+        """
+        A ticker (adott interval) tárolt bejegyzéseinek eldobása. A futó töltések
+        a várakozóknak még visszaadják az eredményt, de nem kerülnek a cache-be
+        (a töltés a mentés előtti állapotot olvashatta).
+        """
+        with self._lock:
+            keys = [k for k in self._mem
+                    if k[0] == symbol and (interval is None or k[1] == interval)]
+            for key in keys:
+                self._drop(key)
+            for key, (future, generation) in self._inflight.items():
+                if key[0] == symbol and (interval is None or key[1] == interval):
+                    self._inflight[key] = (future, generation + 1)
+            vkey = (symbol, interval)
+            self._versions[vkey] = self._versions.get(vkey, 0) + 1
+            return len(keys)
+
+    def version(self, symbol: str, interval: str) -> int:
+        """
+        A ticker + interval invalidálási számlálója: megváltozik minden
+        invalidate() / clear() után. Saját másolatot tartó hívók (PriceService
+        preload) ezzel ismerik fel, hogy közben új sorok kerültek a DB-be.
+        """
+        with self._lock:
+            return (self._versions.get((symbol, interval), 0)
+                    + self._versions.get((symbol, None), 0)
+                    + self._versions.get(("", None), 0))
+
+    def clear(self):
+        with self._lock:
+            self._mem.clear()
+            self._rows = 0
+            for key, (future, generation) in self._inflight.items():
+                self._inflight[key] = (future, generation + 1)
+            self._versions[("", None)] = self._versions.get(("", None), 0) + 1
+
+    def _finish(self, key: tuple, value: Any, expires_at: datetime, now: datetime):
+        """Egy töltés lezárása: tárolás (ha közben nem invalidálták) + a várakozók értesítése."""
+        if _is_failed(value):
+            expires_at = min(expires_at, now + NEGATIVE_TTL)
+        with self._lock:
+            future, generation = self._inflight.pop(key)
+            if generation == 0:
+                self._remember(key, value, expires_at)
+        future.set_result(value)
+
+    def _remember(self, key: tuple, value: Any, expires_at: datetime):
+        if key in self._mem:
+            self._drop(key)
+        weight = _weight(value)
+        self._mem[key] = (value, expires_at, weight)
+        self._rows += weight
+        while self._rows > self.max_rows and len(self._mem) > 1:
+            old_key = next(iter(self._mem))
+            self._drop(old_key)
+
+    def _drop(self, key: tuple):
+        _, _, weight = self._mem.pop(key)
+        self._rows -= weight
+
+    def __len__(self) -> int:
+        return len(self._mem)
+
+    def summary(self) -> str:
+        total = self.hits + self.misses + self.waits
+        rate = (self.hits + self.waits) / total * 100 if total else 0.0
+        return (f"{self.hits + self.waits}/{total} hits ({rate:.1f}%, {self.waits} shared loads), "
+                f"{len(self._mem)} entries, {self._rows} rows in memory")
+
+
+# ==========================================
+# MODULE-LEVEL SINGLETON
+# ==========================================
+
+_global_cache_lock = threading.Lock()
+_global_cache: Optional[PriceCache] = None
+
+
+def get_price_cache() -> PriceCache:
+    """A processz közös price cache-e (fetch_dual_timeframe, PriceService, signals API)."""
+    global _global_cache
+    with _global_cache_lock:
+        if _global_cache is None:
+            _global_cache = PriceCache()
+        return _global_cache
@@ -6,26 +6,38 @@ ASSUMPTIONS:
 - Signal.created_at = UTC (timezone-naive)
 - PriceData.timestamp = UTC (timezone-naive)
 - NO timezone conversion needed
-- Trading hours check: 9:30-16:00 ET (DST-aware via pytz), 8:00-16:00 UTC (BÉT)
+- Trading hours check: 9:30-16:00 ET (DST-aware), 8:00-16:00 UTC (BÉT) — src.trading_calendar
 
-Version: 3.0 - Simplified
-Date: 2026-02-17
+PRELOAD (backtest): preload_5m_candles() egy lekérdezéssel memóriába tölti egy
+symbol 5m gyertyáit egy időtartományra; a lefedett tartományba eső lookupok
+(get_5min_candle_at_time, get_last_5m_close) DB nélkül, bisect-tel futnak.
+A preload a DB-t nem takarja el: mentés (PriceCache.invalidate) után eldobódik,
+és ahol nincs benne gyertya, ott a DB-t (PriceCache) is megkérdezzük.
+yfinance fallback csak valódi adathiánynál.
+
+SHARED CACHE: preload nélkül a 5m lookupok a közös PriceCache napi
+bucketjeiből mennek (src.price_cache) — napi egy lekérdezés, ugyanaz a tár,
+mint fetch_dual_timeframe és a signals API mögött.
+
+Version: 3.3 - 5m lookups via shared PriceCache day buckets
+Date: 2026-10-16
 """
 
 import yfinance as yf
+from bisect import bisect_left, bisect_right
 from datetime import datetime, timedelta, time
-from typing import Optional, Dict
+from typing import Optional, Dict, List, Tuple
 import logging
 import pytz
 
 from src.exceptions import InsufficientDataError
 from src.database import SessionLocal
 from src.models import PriceData
+from src.price_cache import Candle, get_price_cache
+from src.trading_calendar import is_trading_hours, is_weekend
 
 logger = logging.getLogger(__name__)
 
-_ET_TZ = pytz.timezone('America/New_York')
-
 # Module-level cache: set of (symbol, date) pairs where yfinance returned no data
 # (e.g. market holidays like Good Friday).  Prevents hammering yfinance with
 # dozens of repeated calls that all fail for the same calendar day.
@@ -37,30 +49,97 @@ class PriceService:
     
     def __init__(self):
         """Initialize price service"""
-        pass
+        # symbol → (start_utc, end_utc, timestamps, candles, cache version) — preload_5m_candles()
+        self._preloaded_5m: Dict[str, Tuple[datetime, datetime, List[datetime], List[Candle], int]] = {}
+
+    # ── Preloaded 5m candles (batch callers) ─────────────────────────────────
+
+    def preload_5m_candles(self, symbol: str, start_utc: datetime, end_utc: datetime) -> int:
+        """
+        Egy symbol összes 5m gyertyája [start_utc, end_utc] között memóriába, egy
+        lekérdezéssel. Ha a meglévő preload már lefedi a tartományt, nem tölt újra.
+
+        Returns:
+            Betöltött gyertyák száma.
+        """
+        current = self._preloaded_5m.get(symbol)
+        if (current is not None and current[0] <= start_utc and end_utc <= current[1]
+                and current[4] == get_price_cache().version(symbol, '5m')):
+            return len(current[3])
+
+        version = get_price_cache().version(symbol, '5m')
+        db = SessionLocal()
+        try:
+            rows = db.query(
+                PriceData.timestamp, PriceData.open, PriceData.high,
+                PriceData.low, PriceData.close, PriceData.volume,
+            ).filter(
+                PriceData.ticker_symbol == symbol,
+                PriceData.interval == '5m',
+                PriceData.timestamp >= start_utc,
+                PriceData.timestamp <= end_utc,
+            ).order_by(PriceData.timestamp).all()
+        finally:
+            db.close()
+
+        candles = [Candle(*r) for r in rows]
+        self._preloaded_5m[symbol] = (
+            start_utc, end_utc, [c.timestamp for c in candles], candles, version
+        )
+        logger.debug(f"   {symbol}: {len(candles)} 5m candle preloaded ({start_utc} → {end_utc})")
+        return len(candles)
+
+    def clear_preloaded(self):
+        """Preloaded gyertyák eldobása (a batch futás végén)."""
+        self._preloaded_5m.clear()
+
+    def _preloaded_range(self, symbol: str, start_utc: datetime, end_utc: datetime) -> Optional[List[Candle]]:
+        """
+        [start_utc, end_utc] gyertyái a preloadból, vagy None, ha a tartományt
+        a preload nem fedi le (ilyenkor a hívó a közös PriceCache-t kérdezi).
+        A preload eldobódik, ha a symbol 5m sorai azóta invalidálódtak (mentés).
+        """
+        pre = self._preloaded_5m.get(symbol)
+        if pre is None or start_utc < pre[0] or end_utc > pre[1]:
+            return None
+        _, _, ts, candles, version = pre
+        if version != get_price_cache().version(symbol, '5m'):
+            del self._preloaded_5m[symbol]
+            return None
+        return candles[bisect_left(ts, start_utc):bisect_right(ts, end_utc)]
+
+    def _candles_5m(self, symbol: str, start_utc: datetime, end_utc: datetime) -> List[Candle]:
+        """
+        [start_utc, end_utc] 5m gyertyái: preload, különben a közös PriceCache.
+        Üres preload szelet esetén is a PriceCache (DB) dönt — a preload után
+        más processz által írt sorokat így sem takarja el.
+        """
+        candles = self._preloaded_range(symbol, start_utc, end_utc)
+        if not candles:
+            candles = get_price_cache().get_5m_candles(symbol, start_utc, end_utc)
+        return candles
+
+    def get_last_5m_close(self, symbol: str, start_utc: datetime, end_utc: datetime) -> Optional[float]:
+        """Az utolsó 5m gyertya záróára [start_utc, end_utc]-ben (preload vagy PriceCache)."""
+        candles = self._candles_5m(symbol, start_utc, end_utc)
+        return float(candles[-1].close) if candles else None
     
     def _is_trading_hours(self, utc_time: datetime, symbol: str) -> bool:
         """
         DST-aware kereskedési idő ellenőrzés.
 
-        US piacok: 9:30–16:00 ET (pytz konverzió).
+        US piacok: 9:30–16:00 ET (src.trading_calendar, naponta cache-elt session határok).
           - EST (téli): 14:30–21:00 UTC
           - EDT (nyári, ~márc.–nov.): 13:30–20:00 UTC
         BÉT: 8:00–16:00 UTC (CET/CEST = azonos UTC-offszet .BD tickereknél).
 
         utc_time: naive UTC datetime.
         """
-        if symbol.endswith('.BD'):
-            td = utc_time.hour + utc_time.minute / 60.0
-            return 8.0 <= td < 16.0
-        # US: DST-aware konverzió
-        et_time = pytz.utc.localize(utc_time).astimezone(_ET_TZ)
-        td = et_time.hour + et_time.minute / 60.0
-        return 9.5 <= td < 16.0  # 9:30–16:00 ET
+        return is_trading_hours(utc_time, symbol)
     
     def _is_weekend(self, utc_time: datetime) -> bool:
         """Check if weekend (Saturday=5, Sunday=6)"""
-        return utc_time.weekday() >= 5
+        return is_weekend(utc_time)
 
     def _next_market_open_utc(self, utc_time: datetime, symbol: str) -> datetime:
         """
@@ -160,51 +239,40 @@ class PriceService:
 
         logger.debug(f"   {symbol}: Signal {signal_time_utc} → execution {execution_time_utc} UTC")
         
-        # STEP 1: Try DB first (FAST)
+        # STEP 1: Try DB first (FAST) — preload vagy a közös PriceCache napi bucketje
         try:
-            db = SessionLocal()
-            try:
-                # Search window
-                time_start = execution_time_utc - timedelta(minutes=tolerance_minutes)
-                time_end = execution_time_utc + timedelta(minutes=tolerance_minutes)
+            # Search window
+            time_start = execution_time_utc - timedelta(minutes=tolerance_minutes)
+            time_end = execution_time_utc + timedelta(minutes=tolerance_minutes)
+
+            candles = self._candles_5m(symbol, time_start, time_end)
+            
+            if candles:
+                # Find closest
+                closest = min(
+                    candles,
+                    key=lambda c: abs((c.timestamp - execution_time_utc).total_seconds())
+                )
                 
-                # Query DB (timestamps are UTC)
-                candles = db.query(PriceData).filter(
-                    PriceData.ticker_symbol == symbol,
-                    PriceData.interval == '5m',
-                    PriceData.timestamp >= time_start,
-                    PriceData.timestamp <= time_end
-                ).all()
+                time_diff_minutes = abs(
+                    (closest.timestamp - execution_time_utc).total_seconds() / 60
+                )
                 
-                if candles:
-                    # Find closest
-                    closest = min(
-                        candles,
-                        key=lambda c: abs((c.timestamp - execution_time_utc).total_seconds())
-                    )
-                    
-                    time_diff_minutes = abs(
-                        (closest.timestamp - execution_time_utc).total_seconds() / 60
+                if time_diff_minutes <= tolerance_minutes:
+                    logger.info(
+                        f"   ✅ DB: {symbol} @ {closest.timestamp} "
+                        f"(offset: {time_diff_minutes:.1f}min), close=${closest.close:.2f}"
                     )
                     
-                    if time_diff_minutes <= tolerance_minutes:
-                        logger.info(
-                            f"   ✅ DB: {symbol} @ {closest.timestamp} "
-                            f"(offset: {time_diff_minutes:.1f}min), close=${closest.close:.2f}"
-                        )
-                        
-                        return {
-                            'timestamp': closest.timestamp,
-                            'open': float(closest.open),
-                            'high': float(closest.high),
-                            'low': float(closest.low),
-                            'close': float(closest.close),
-                            'volume': int(closest.volume)
-                        }
-            
-            finally:
-                db.close()
-        
+                    return {
+                        'timestamp': closest.timestamp,
+                        'open': float(closest.open),
+                        'high': float(closest.high),
+                        'low': float(closest.low),
+                        'close': float(closest.close),
+                        'volume': int(closest.volume)
+                    }
+
         except Exception as e:
             logger.warning(f"   DB error for {symbol}: {e}")
         
@@ -8,6 +8,16 @@ Usage:
     python -m src.recalculate_signals --dry-run
     python -m src.recalculate_signals --ticker AAPL
     python -m src.recalculate_signals --status active
+    python -m src.recalculate_signals --mode all-scores
+
+Score recalculation (component-scores / archive-scores) is columnar: the
+indicator columns are loaded once into NumPy arrays, the 12 component scores
+are evaluated with array operations (compute_combined_scores_columnar — same
+results as compute_combined_score_from_indicators), and the results are
+written back with one bulk UPDATE in a single transaction.
+
+Version: 1.1 - Columnar score recalculation
+Date: 2026-10-16
 """
 
 import sys
@@ -16,6 +26,9 @@ import io
 import json
 import argparse
 from datetime import datetime, timezone
+from typing import Dict, List, Sequence
+
+import numpy as np
 
 # Force UTF-8 output on Windows to avoid cp1250 encode errors
 if sys.stdout.encoding and sys.stdout.encoding.lower() != 'utf-8':
@@ -528,6 +541,261 @@ def compute_combined_score_from_indicators(ind: dict, config) -> dict:
     }
 
 
+# Indicator inputs of compute_combined_score_from_indicators() (numeric columns)
+SCORE_INPUTS = (
+    "current_price", "sma_20", "sma_50", "rsi", "macd_histogram",
+    "bb_upper", "bb_middle", "bb_lower", "stoch_k", "stoch_d", "atr_pct",
+    "nearest_support", "nearest_resistance", "adx",
+    "sentiment_score", "sentiment_confidence", "risk_reward_ratio",
+)
+
+# signal_calculations component score columns (sentiment_signal = sentiment_score)
+COMPONENT_COLUMNS = (
+    "sma_trend_score", "rsi_momentum_score", "macd_signal_score",
+    "bb_position_score", "stoch_cross_score", "volume_confirm_score",
+    "sentiment_recency_score", "volatility_risk_score", "sr_proximity_score",
+    "trend_strength_score", "rr_quality_score",
+)
+
+# Ennyi változást írunk ki soronként; a többiről csak összesítés
+_MAX_PRINTED_CHANGES = 20
+
+
+def _float_column(values: Sequence) -> np.ndarray:
+    """None → NaN float tömb."""
+    return np.array(values, dtype=np.float64) if len(values) else np.zeros(0)
+
+
+def _or(values: np.ndarray, default) -> np.ndarray:
+    """A skalár út `x or default` fallbackje (None/NaN és 0 → default)."""
+    return np.where(np.isnan(values) | (values == 0), default, values)
+
+
+def _round2(values: np.ndarray) -> np.ndarray:
+    """Python round(x, 2) elemenként — np.round a .5 határesetekben eltérne."""
+    return np.array([round(v, 2) for v in values.tolist()], dtype=np.float64)
+
+
+def _piecewise(conditions: list, branches: list, default) -> np.ndarray:
+    """np.select a nem választott ágak 0-val osztási warningjai nélkül."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.select(conditions, branches, default)
+
+
+def compute_combined_scores_columnar(ind: Dict[str, np.ndarray], decisions: Sequence, config) -> Dict[str, np.ndarray]:
+    """
+    compute_combined_score_from_indicators() for all rows at once.
+
+    Args:
+        ind:       SCORE_INPUTS → float arrays (NaN = missing/None)
+        decisions: decision string per row (None allowed)
+    Returns:
+        Same keys as the scalar function (COMPONENT_COLUMNS +
+        _sentiment_signal_score + combined_score), rounded the same way.
+    """
+    n = len(decisions)
+
+    def col(name):
+        values = ind.get(name)
+        return np.full(n, np.nan) if values is None else values
+
+    price = _or(col("current_price"), 0.0)
+    sma_20, sma_50 = col("sma_20"), col("sma_50")
+    has_sma = ~np.isnan(sma_20) & ~np.isnan(sma_50)
+    trend_dir = np.where(has_sma, np.where(sma_20 > sma_50, 1, -1), 0)
+
+    # ── SMA trend (calculate_sma_component_score) ──────────────────────
+    sma_raw = (
+        np.where(price > sma_20, config.tech_sma20_bullish, -config.tech_sma20_bearish)
+        + np.where(price > sma_50, config.tech_sma50_bullish, -config.tech_sma50_bearish)
+        + np.where(sma_20 > sma_50, config.tech_golden_cross, -config.tech_death_cross)
+    )
+    sma_trend = np.clip((np.where(has_sma, sma_raw, 0) / 60.0) * 100, -100, 100)
+
+    # ── RSI (calculate_rsi_component_score, same branch order) ─────────
+    rsi = col("rsi")
+    rsi_raw = np.select(
+        [
+            (config.rsi_neutral_low < rsi) & (rsi < config.rsi_neutral_high),
+            (config.rsi_neutral_high <= rsi) & (rsi < config.rsi_overbought),
+            (config.rsi_oversold < rsi) & (rsi <= config.rsi_neutral_low),
+            rsi >= config.rsi_overbought,
+            (rsi <= config.rsi_oversold) & (trend_dir >= 0),
+        ],
+        [
+            config.tech_rsi_neutral,
+            config.tech_rsi_bullish,
+            config.tech_rsi_weak_bullish,
+            -config.tech_rsi_overbought,
+            config.tech_rsi_oversold,
+        ],
+        default=0,
+    )
+    rsi_momentum = np.clip((rsi_raw / 30.0) * 100, -100, 100)
+
+    # ── MACD ───────────────────────────────────────────────────────────
+    macd_hist = col("macd_histogram")
+    macd_signal = np.where(np.isnan(macd_hist), 0.0, np.clip(macd_hist * 20, -100, 100))
+
+    # ── Bollinger ──────────────────────────────────────────────────────
+    bb_upper, bb_middle, bb_lower = col("bb_upper"), col("bb_middle"), col("bb_lower")
+    bb_width = bb_upper - bb_lower
+    with np.errstate(divide="ignore", invalid="ignore"):
+        bb_pos = (price - bb_lower) / bb_width
+    bb_position = np.select(
+        [bb_pos > 0.8, (bb_pos < 0.2) & (trend_dir >= 0), bb_pos < 0.2, (bb_pos >= 0.4) & (bb_pos <= 0.6)],
+        [-70.0, 70.0, 0.0, 30.0],
+        default=0.0,
+    )
+    has_bb = ~np.isnan(bb_upper) & ~np.isnan(bb_middle) & ~np.isnan(bb_lower) & (bb_width > 0)
+    bb_position = np.where(has_bb, bb_position, 0.0)
+
+    # ── Stochastic ─────────────────────────────────────────────────────
+    stoch_k = col("stoch_k")
+    stoch_cross = np.select(
+        [
+            (stoch_k < config.stoch_oversold) & (trend_dir >= 0),
+            stoch_k < config.stoch_oversold,
+            stoch_k > config.stoch_overbought,
+        ],
+        [100.0, 0.0, -100.0],
+        default=0.0,
+    )
+
+    # ── Sentiment ──────────────────────────────────────────────────────
+    sentiment = _or(col("sentiment_score"), 0.0)
+    sentiment_conf = _or(col("sentiment_confidence"), 0.5)
+    sentiment_dir = np.where(sentiment >= 0, 1, -1)
+    sentiment_recency = np.clip((sentiment_conf * 2 - 1) * 100 * sentiment_dir, -100, 100)
+
+    # ── Volatility (ATR %) ─────────────────────────────────────────────
+    atr_pct = _or(col("atr_pct"), 2.0)
+    vl, lo = config.atr_vol_very_low, config.atr_vol_low
+    mo, hi = config.atr_vol_moderate, config.atr_vol_high
+    vol_raw = _piecewise(
+        [atr_pct < vl, atr_pct < lo, atr_pct < mo, atr_pct < hi],
+        [
+            np.full(n, 0.8),
+            0.8 - ((atr_pct - vl) / (lo - vl)) * 0.4,
+            0.4 - ((atr_pct - lo) / (mo - lo)) * 0.4,
+            0.0 - ((atr_pct - mo) / (hi - mo)) * 0.4,
+        ],
+        np.maximum(-0.8, -0.4 - ((atr_pct - hi) / 2.0) * 0.4),
+    )
+    volatility_risk = np.clip(vol_raw / 0.8 * 100, -100, 100)
+
+    # ── S/R proximity ──────────────────────────────────────────────────
+    ns = _or(col("nearest_support"), 0.0)
+    nr = _or(col("nearest_resistance"), 0.0)
+    ns = np.where(ns != 0, ns, price * 0.97)
+    nr = np.where(nr != 0, nr, price * 1.03)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        support_dist    = ((price - ns) / price) * 100
+        resistance_dist = ((nr - price) / price) * 100
+    min_distance = np.where(price > 0, np.minimum(np.abs(support_dist), np.abs(resistance_dist)), 5.0)
+    d = min_distance
+    prox_raw = _piecewise(
+        [d < 1.0, d < 2.0, d < 4.0, d < 6.0],
+        [
+            np.full(n, -0.8),
+            -0.8 + ((d - 1.0) / 1.0) * 0.4,
+            -0.4 + ((d - 2.0) / 2.0) * 0.4,
+            0.0  + ((d - 4.0) / 2.0) * 0.4,
+        ],
+        np.minimum(0.8, 0.4 + ((d - 6.0) / 4.0) * 0.4),
+    )
+    sr_proximity = np.clip(prox_raw / 0.8 * 100, -100, 100)
+
+    # ── Trend strength (ADX) ───────────────────────────────────────────
+    adx = col("adx")
+    avs, as_, amo = config.adx_very_strong, config.adx_strong, config.adx_moderate
+    aw, avw = config.adx_weak, config.adx_very_weak
+    trend_raw = _piecewise(
+        [np.isnan(adx), adx > avs, adx > as_, adx > amo, adx > aw, adx > avw],
+        [
+            np.zeros(n),
+            np.full(n, 0.8),
+            0.5 + ((adx - as_) / (avs - as_)) * 0.3,
+            0.3 + ((adx - amo) / (as_ - amo)) * 0.2,
+            0.0 + ((adx - aw)  / (amo - aw))  * 0.3,
+            -0.3 + ((adx - avw) / (aw - avw)) * 0.3,
+        ],
+        np.maximum(-0.8, -0.3 - ((avw - adx) / 10) * 0.5),
+    )
+    trend_strength = np.clip(trend_raw / 0.8 * 100, -100, 100)
+
+    # ── R:R quality ────────────────────────────────────────────────────
+    rr = col("risk_reward_ratio")
+    decision_str = [d or "" for d in decisions]
+    has_dir = ~np.isnan(rr) & np.array([d not in ("HOLD", "") for d in decision_str], dtype=bool)
+    direction = np.array([1 if "BUY" in d.upper() else -1 for d in decision_str], dtype=np.float64)
+    rr_quality = np.select(
+        [~has_dir, rr >= 3.0, rr >= 2.5, rr >= 2.0],
+        [np.zeros(n), 100 * direction, 67 * direction, 33 * direction],
+        default=0.0,
+    )
+
+    # ── Weighted sum (same term order as the scalar function) ──────────
+    cw = config.COMPONENT_WEIGHTS
+    combined = (
+        sma_trend         * cw["sma_trend"]         +
+        rsi_momentum      * cw["rsi_momentum"]      +
+        macd_signal       * cw["macd_signal"]       +
+        bb_position       * cw["bb_position"]       +
+        stoch_cross       * cw["stoch_cross"]       +
+        0                 * cw["volume_confirm"]    +
+        sentiment         * cw["sentiment_signal"]  +
+        sentiment_recency * cw["sentiment_recency"] +
+        volatility_risk   * cw["volatility_risk"]   +
+        sr_proximity      * cw["sr_proximity"]      +
+        trend_strength    * cw["trend_strength"]    +
+        rr_quality        * cw["rr_quality"]
+    )
+
+    return {
+        "sma_trend_score":         _round2(sma_trend),
+        "rsi_momentum_score":      _round2(rsi_momentum),
+        "macd_signal_score":       _round2(macd_signal),
+        "bb_position_score":       _round2(bb_position),
+        "stoch_cross_score":       _round2(stoch_cross),
+        "volume_confirm_score":    np.zeros(n),
+        "sentiment_recency_score": _round2(sentiment_recency),
+        "volatility_risk_score":   _round2(volatility_risk),
+        "sr_proximity_score":      _round2(sr_proximity),
+        "trend_strength_score":    _round2(trend_strength),
+        "rr_quality_score":        _round2(rr_quality),
+        "_sentiment_signal_score": _round2(sentiment),
+        "combined_score":          _round2(combined),
+    }
+
+
+def _print_changes(changes: List[str], total_changed: int):
+    """Az első _MAX_PRINTED_CHANGES változás soronként, a többi összesítve."""
+    for line in changes[:_MAX_PRINTED_CHANGES]:
+        print(line)
+    if total_changed > _MAX_PRINTED_CHANGES:
+        print(f"  ... and {total_changed - _MAX_PRINTED_CHANGES} more changed scores")
+
+
+def _score_rows_scalar(items: list, score_row, label, keys: Sequence, stats: dict):
+    """
+    Soronkénti fallback, ha a columnar út kivételt dob (pl. nem numerikus
+    érték egy oszlopban): a hibás sor WARNING + errors, a többi megy tovább,
+    mint a soronkénti változatban.
+
+    Returns: (a sikeresen pontozott elemek, keys → float tömb)
+    """
+    kept, results = [], []
+    for item in items:
+        try:
+            results.append(score_row(item))
+            kept.append(item)
+        except Exception as e:
+            print(f"  WARNING {label(item)}: {e}")
+            stats["errors"] += 1
+    return kept, {k: np.array([r[k] for r in results], dtype=np.float64) for k in keys}
+
+
 def _compute_risk_sub_scores(calc, config):
     """
     Reconstruct volatility_risk / sr_proximity / trend_strength scores
@@ -650,7 +918,12 @@ def recalculate_component_scores(
     Backfill 12-component scores on existing signal_calculations records
     using stored indicator values. Also recomputes combined_score with the
     new formula and updates both signals and signal_calculations tables.
+
+    Columnar: one query for the signals, one for their (first)
+    signal_calculations row, array evaluation, then one bulk UPDATE per
+    table in a single transaction.
     """
+    from sqlalchemy import update
     from src.config import get_config
     config = get_config()
     cw = config.COMPONENT_WEIGHTS
@@ -658,70 +931,103 @@ def recalculate_component_scores(
     db = SessionLocal()
     stats = {"total": 0, "updated": 0, "skipped": 0, "errors": 0, "score_changed": 0}
 
-    try:
-        query = db.query(Signal).filter(Signal.decision != "HOLD")
+    def _filtered(query):
+        query = query.filter(Signal.decision != "HOLD")
         if ticker_filter:
             query = query.filter(Signal.ticker_symbol == ticker_filter.upper())
         if status_filter:
             query = query.filter(Signal.status == status_filter)
+        return query
 
-        signals = query.order_by(Signal.id.asc()).all()
+    try:
+        signals = _filtered(db.query(
+            Signal.id, Signal.ticker_symbol, Signal.decision, Signal.strength, Signal.combined_score,
+        )).order_by(Signal.id.asc()).all()
         stats["total"] = len(signals)
 
         print(f"\n{'='*70}")
         print(f"  Component score recalculation {'[DRY RUN] ' if dry_run else ''}-- {len(signals)} signals")
         print(f"{'='*70}")
 
+        # Signalonként az első (legkisebb id-jű) signal_calculations sor
+        calc_fields = ("current_price", "sma_20", "sma_50", "rsi", "macd_histogram",
+                       "bb_upper", "bb_middle", "bb_lower", "stoch_k", "stoch_d", "atr_pct",
+                       "nearest_support", "nearest_resistance", "adx",
+                       "sentiment_score", "sentiment_confidence", "decision", "risk_reward_ratio")
+        calc_rows = _filtered(db.query(
+            SignalCalculation.signal_id, SignalCalculation.id,
+            *[getattr(SignalCalculation, f) for f in calc_fields],
+        ).join(Signal, Signal.id == SignalCalculation.signal_id)).order_by(SignalCalculation.id.asc()).all()
+        first_calc = {}
+        for row in calc_rows:
+            first_calc.setdefault(row[0], row)
+
+        pairs = []
         for signal in signals:
-            calc = db.query(SignalCalculation).filter(
-                SignalCalculation.signal_id == signal.id
-            ).first()
-
+            calc = first_calc.get(signal.id)
             if calc is None or calc.current_price is None:
                 stats["skipped"] += 1
                 continue
+            pairs.append((signal, calc))
 
+        if pairs:
             try:
-                comp = compute_component_scores_from_record(calc, config)
-                sentiment_signal_score = comp.pop("_sentiment_signal_score")
-
-                new_combined = (
-                    comp["sma_trend_score"]         * cw["sma_trend"]         +
-                    comp["rsi_momentum_score"]       * cw["rsi_momentum"]      +
-                    comp["macd_signal_score"]        * cw["macd_signal"]       +
-                    comp["bb_position_score"]        * cw["bb_position"]       +
-                    comp["stoch_cross_score"]        * cw["stoch_cross"]       +
-                    comp["volume_confirm_score"]     * cw["volume_confirm"]    +
-                    sentiment_signal_score           * cw["sentiment_signal"]  +
-                    comp["sentiment_recency_score"]  * cw["sentiment_recency"] +
-                    comp["volatility_risk_score"]    * cw["volatility_risk"]   +
-                    comp["sr_proximity_score"]       * cw["sr_proximity"]      +
-                    comp["trend_strength_score"]     * cw["trend_strength"]    +
-                    comp["rr_quality_score"]         * cw["rr_quality"]
+                ind = {f: _float_column([getattr(c, f) for _, c in pairs])
+                       for f in calc_fields if f != "decision"}
+                comp = compute_combined_scores_columnar(ind, [c.decision for _, c in pairs], config)
+            except Exception as e:
+                print(f"  WARNING columnar scoring failed ({e}), scoring row by row")
+                pairs, comp = _score_rows_scalar(
+                    pairs, lambda p: compute_component_scores_from_record(p[1], config),
+                    lambda p: f"Signal #{p[0].id}",
+                    COMPONENT_COLUMNS + ("_sentiment_signal_score", "combined_score"), stats,
                 )
-                new_combined = round(new_combined, 2)
-                old_combined = signal.combined_score or 0
-
-                score_changed = abs(new_combined - old_combined) > 0.01
-                if score_changed:
-                    stats["score_changed"] += 1
-
-                print(f"  Signal #{signal.id} {signal.ticker_symbol:6s} "
-                      f"{signal.strength} {signal.decision}: "
-                      f"score {old_combined:+.2f} -> {new_combined:+.2f}"
-                      f"{' <- CHANGED' if score_changed else ''}")
-
-                if not dry_run:
-                    for col, val in comp.items():
-                        setattr(calc, col, val)
-                    calc.combined_score = new_combined
-                    signal.combined_score = new_combined
-
-                stats["updated"] += 1
+            calcs = [calc for _, calc in pairs]
+            sentiment_signal_score = comp.pop("_sentiment_signal_score")
+            comp.pop("combined_score")
+
+            # A (kerekített) komponensekből, mint a soronkénti változat
+            new_combined = _round2(
+                comp["sma_trend_score"]         * cw["sma_trend"]         +
+                comp["rsi_momentum_score"]      * cw["rsi_momentum"]      +
+                comp["macd_signal_score"]       * cw["macd_signal"]       +
+                comp["bb_position_score"]       * cw["bb_position"]       +
+                comp["stoch_cross_score"]       * cw["stoch_cross"]       +
+                comp["volume_confirm_score"]    * cw["volume_confirm"]    +
+                sentiment_signal_score          * cw["sentiment_signal"]  +
+                comp["sentiment_recency_score"] * cw["sentiment_recency"] +
+                comp["volatility_risk_score"]   * cw["volatility_risk"]   +
+                comp["sr_proximity_score"]      * cw["sr_proximity"]      +
+                comp["trend_strength_score"]    * cw["trend_strength"]    +
+                comp["rr_quality_score"]        * cw["rr_quality"]
+            )
+            old_combined = _or(_float_column([s.combined_score for s, _ in pairs]), 0.0)
+            changed = np.abs(new_combined - old_combined) > 0.01
+            stats["score_changed"] = int(changed.sum())
+            stats["updated"] = len(pairs)
+
+            lines = []
+            for i in np.flatnonzero(changed)[:_MAX_PRINTED_CHANGES]:
+                signal = pairs[i][0]
+                lines.append(f"  Signal #{signal.id} {signal.ticker_symbol:6s} "
+                             f"{signal.strength} {signal.decision}: "
+                             f"score {old_combined[i]:+.2f} -> {new_combined[i]:+.2f} <- CHANGED")
+            _print_changes(lines, stats["score_changed"])
 
-            except Exception as e:
-                print(f"  WARNING Signal #{signal.id}: {e}")
-                stats["errors"] += 1
+            if not dry_run:
+                comp_lists = {col: comp[col].tolist() for col in COMPONENT_COLUMNS}
+                combined_list = new_combined.tolist()
+                calc_params = [
+                    {"id": c.id, "combined_score": combined_list[i],
+                     **{col: comp_lists[col][i] for col in COMPONENT_COLUMNS}}
+                    for i, c in enumerate(calcs)
+                ]
+                signal_params = [
+                    {"id": s.id, "combined_score": combined_list[i]}
+                    for i, (s, _) in enumerate(pairs)
+                ]
+                db.execute(update(SignalCalculation), calc_params)
+                db.execute(update(Signal), signal_params)
 
         if not dry_run:
             db.commit()
@@ -750,6 +1056,30 @@ def recalculate_component_scores(
     return stats
 
 
+def _score_archive_row(row: dict, optional: Sequence, config) -> dict:
+    """Egy archive_signals sor pontszáma a skalár úton (a columnar út fallbackje)."""
+    return compute_combined_score_from_indicators({
+        "current_price":        row["close_price"] or row["entry_price"],
+        "sma_20":               row["sma_20"],
+        "sma_50":               row["sma_50"],
+        "rsi":                  row["rsi"],
+        "macd_histogram":       row["macd_hist"],
+        "bb_upper":             row["bb_upper"],
+        "bb_middle":            None,  # not in archive_signals
+        "bb_lower":             row["bb_lower"],
+        "stoch_k":              row["stoch_k"],
+        "stoch_d":              row["stoch_d"],
+        "atr_pct":              row["atr_pct"],
+        "nearest_support":      row["nearest_support"],
+        "nearest_resistance":   row["nearest_resistance"],
+        "adx":                  row["adx"] if "adx" in optional else None,
+        "sentiment_score":      row["sentiment_score"],
+        "sentiment_confidence": row["sentiment_confidence"] if "sentiment_confidence" in optional else 0.5,
+        "decision":             row["decision"],
+        "risk_reward_ratio":    row["risk_reward_ratio"],
+    }, config)
+
+
 def recalculate_archive_scores(
     dry_run: bool = False,
     ticker_filter: str = None,
@@ -759,6 +1089,10 @@ def recalculate_archive_scores(
     12-component formula (same as live signals). Updates archive_signals.combined_score
     in-place so archive backtest always uses the same formula as live.
 
+    Columnar: the indicator columns are read once, scored with
+    compute_combined_scores_columnar(), and only the changed rows are written
+    back in one executemany inside a single (short) write transaction.
+
     Note: archive_signals has no adx column → trend_strength_score defaults to 0
     for records that pre-date ADX tracking.
     """
@@ -768,15 +1102,20 @@ def recalculate_archive_scores(
 
     db_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "trendsignal.db")
     conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
 
     stats = {"total": 0, "updated": 0, "skipped": 0, "errors": 0, "score_changed": 0}
 
     try:
         cols = [r[1] for r in conn.execute("PRAGMA table_info(archive_signals)").fetchall()]
-        has_adx = "adx" in cols
-
-        query = "SELECT * FROM archive_signals WHERE decision != 'HOLD'"
+        optional = [c for c in ("adx", "sentiment_confidence") if c in cols]
+
+        select_cols = [
+            "id", "ticker_symbol", "decision", "combined_score", "close_price", "entry_price",
+            "sma_20", "sma_50", "rsi", "macd_hist", "bb_upper", "bb_lower", "stoch_k", "stoch_d",
+            "atr_pct", "nearest_support", "nearest_resistance", "sentiment_score",
+            "risk_reward_ratio",
+        ] + optional
+        query = f"SELECT {', '.join(select_cols)} FROM archive_signals WHERE decision != 'HOLD'"
         params = []
         if ticker_filter:
             query += " AND ticker_symbol = ?"
@@ -791,52 +1130,72 @@ def recalculate_archive_scores(
         print(f"{'='*70}")
 
         updates = []
-        for row in rows:
+        if rows:
+            columns = dict(zip(select_cols, zip(*rows)))
             try:
+                close = _float_column(columns["close_price"])
+                entry = _float_column(columns["entry_price"])
                 ind = {
-                    "current_price":        row["close_price"] or row["entry_price"],
-                    "sma_20":               row["sma_20"],
-                    "sma_50":               row["sma_50"],
-                    "rsi":                  row["rsi"],
-                    "macd_histogram":       row["macd_hist"],
-                    "bb_upper":             row["bb_upper"],
-                    "bb_middle":            None,  # not in archive_signals
-                    "bb_lower":             row["bb_lower"],
-                    "stoch_k":              row["stoch_k"],
-                    "stoch_d":              row["stoch_d"],
-                    "atr_pct":              row["atr_pct"],
-                    "nearest_support":      row["nearest_support"],
-                    "nearest_resistance":   row["nearest_resistance"],
-                    "adx":                  row["adx"] if has_adx else None,
-                    "sentiment_score":      row["sentiment_score"],
-                    "sentiment_confidence": row["sentiment_confidence"] if "sentiment_confidence" in cols else 0.5,
-                    "decision":             row["decision"],
-                    "risk_reward_ratio":    row["risk_reward_ratio"],
+                    # close_price or entry_price
+                    "current_price":      np.where(np.isnan(close) | (close == 0), entry, close),
+                    "sma_20":             _float_column(columns["sma_20"]),
+                    "sma_50":             _float_column(columns["sma_50"]),
+                    "rsi":                _float_column(columns["rsi"]),
+                    "macd_histogram":     _float_column(columns["macd_hist"]),
+                    "bb_upper":           _float_column(columns["bb_upper"]),
+                    # bb_middle: not in archive_signals → Bollinger score 0
+                    "bb_lower":           _float_column(columns["bb_lower"]),
+                    "stoch_k":            _float_column(columns["stoch_k"]),
+                    "stoch_d":            _float_column(columns["stoch_d"]),
+                    "atr_pct":            _float_column(columns["atr_pct"]),
+                    "nearest_support":    _float_column(columns["nearest_support"]),
+                    "nearest_resistance": _float_column(columns["nearest_resistance"]),
+                    "sentiment_score":    _float_column(columns["sentiment_score"]),
+                    "risk_reward_ratio":  _float_column(columns["risk_reward_ratio"]),
                 }
-                result = compute_combined_score_from_indicators(ind, config)
-                new_score = result["combined_score"]
-                old_score = row["combined_score"] or 0
-
-                if abs(new_score - old_score) > 0.01:
-                    stats["score_changed"] += 1
-                    print(f"  #{row['id']:6d} {row['ticker_symbol']:8s} {row['decision']:12s}: "
-                          f"{old_score:+.2f} -> {new_score:+.2f}")
-
-                if not dry_run:
-                    updates.append((new_score, row["id"]))
-
-                stats["updated"] += 1
+                for c in optional:
+                    ind[c] = _float_column(columns[c])
+                if "sentiment_confidence" not in optional:
+                    ind["sentiment_confidence"] = np.full(len(rows), 0.5)
 
+                result = compute_combined_scores_columnar(ind, columns["decision"], config)
             except Exception as e:
-                print(f"  WARNING #{row['id']}: {e}")
-                stats["errors"] += 1
+                print(f"  WARNING columnar scoring failed ({e}), scoring row by row")
+                rows, result = _score_rows_scalar(
+                    rows, lambda row: _score_archive_row(dict(zip(select_cols, row)), optional, config),
+                    lambda row: f"#{row[0]}", ("combined_score",), stats,
+                )
+                columns = dict(zip(select_cols, zip(*rows))) if rows else {c: () for c in select_cols}
+            stats["updated"] = len(rows)
+            new_score = result["combined_score"]
+            old_score = _or(_float_column(columns["combined_score"]), 0.0)
+
+            changed = np.abs(new_score - old_score) > 0.01
+            stats["score_changed"] = int(changed.sum())
+            changed_idx = np.flatnonzero(changed)
+
+            _print_changes(
+                [f"  #{columns['id'][i]:6d} {columns['ticker_symbol'][i]:8s} {columns['decision'][i]:12s}: "
+                 f"{old_score[i]:+.2f} -> {new_score[i]:+.2f}"
+                 for i in changed_idx[:_MAX_PRINTED_CHANGES]],
+                stats["score_changed"],
+            )
+
+            # Csak a ténylegesen eltérő sorok (a 0.01 alatti eltérés is írandó)
+            stored = _float_column(columns["combined_score"])
+            differs = np.flatnonzero(np.isnan(stored) | (new_score != stored))
+            new_list = new_score.tolist()
+            updates = [(new_list[i], columns["id"][i]) for i in differs]
 
         if not dry_run and updates:
-            conn.executemany("UPDATE archive_signals SET combined_score = ? WHERE id = ?", updates)
-            conn.commit()
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.executemany("UPDATE archive_signals SET combined_score = ? WHERE id = ?", updates)
             print(f"\nChanges committed: {len(updates)} archive signals updated.")
+        elif dry_run:
+            print("\n[DRY RUN] No changes written.")
         else:
-            print(f"\n[DRY RUN] No changes written.")
+            print("\nNo archive signal scores changed.")
 
     except Exception as e:
         print(f"\nFatal error: {e}")
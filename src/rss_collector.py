@@ -9,8 +9,10 @@ Források:
   - Seeking Alpha  – Ticker-specifikus elemzések (credibility: 0.82)
   - StockTwits     – Retail social sentiment (credibility: 0.50)
 
-Verzió: 1.1 | 2026-03-01
+Verzió: 1.2 | 2026-10-16
 Változások:
+  - Sentiment cache: a gyűjtők a FinBERT előtt egy url_hash IN (...) lekérdezéssel
+    előtöltik a már ismert cikkek score-jait (MultilingualSentimentAnalyzer.prefetch)
   - SEC EDGAR: requests + kötelező User-Agent (email), feedparser.parse(content) mode
   - BÉT RSS: requests + charset recovery (UTF-8 → ISO-8859-2 → Windows-1250 fallback)
   - Nasdaq RSS: requests + browser User-Agent (Nasdaq blokkolja a feedparser UA-t)
@@ -118,6 +120,20 @@ def _parse_feed_date(entry) -> datetime:
     return datetime.now(timezone.utc)
 
 
+def _prefetch_sentiment(
+    sentiment_analyzer: Optional['MultilingualSentimentAnalyzer'],
+    urls: List[str],
+) -> None:
+    """Ismert cikkek sentimentjének előtöltése egy lekérdezéssel (ha az analyzer támogatja)."""
+    prefetch = getattr(sentiment_analyzer, 'prefetch', None)
+    if prefetch is None or not urls:
+        return
+    try:
+        prefetch(urls)
+    except Exception:
+        pass
+
+
 def _make_news_item(
     title: str,
     description: str,
@@ -138,7 +154,7 @@ def _make_news_item(
     if sentiment_analyzer and ticker_symbol:
         text = f"{title}. {description}"
         try:
-            result = sentiment_analyzer.analyze_text(text, ticker_symbol)
+            result = sentiment_analyzer.analyze_text(text, ticker_symbol, url=url)
             sentiment_score = result['score']
             sentiment_confidence = result['confidence']
             sentiment_label = result['label']
@@ -178,7 +194,6 @@ def _get_sec_edgar_feed() -> object:
     Feedparser alapértelmezett UA-ja nincs email → 403 / garbled XML.
     Megoldás: requests-szel töltjük le, feedparser.parse(content) módban dolgozzuk fel.
     """
-    import time
     now = time.monotonic()
     with _sec_edgar_lock:
         if _sec_edgar_cache["feed"] is not None and (now - _sec_edgar_cache["fetched_at"]) < _SEC_EDGAR_CACHE_TTL:
@@ -249,14 +264,13 @@ class SecEdgarCollector:
                     # Normalizálás: vezető nullák eltávolítása
                     cik_to_ticker[cik.lstrip("0")] = ticker
 
+            matches = []
             for entry in feed.entries:
                 published_at = _parse_feed_date(entry)
                 if published_at < cutoff:
                     continue
 
-                title = entry.get('title', '')
                 link = entry.get('link', '')
-                summary = entry.get('summary', '')
 
                 # CIK kinyerése az URL-ből pl. ".../data/320193/..."
                 matched_ticker = None
@@ -268,6 +282,13 @@ class SecEdgarCollector:
 
                 if not matched_ticker:
                     continue
+                matches.append((entry, published_at, link, matched_ticker))
+
+            _prefetch_sentiment(sentiment_analyzer, [m[2] for m in matches])
+
+            for entry, published_at, link, matched_ticker in matches:
+                title = entry.get('title', '')
+                summary = entry.get('summary', '')
 
                 item = _make_news_item(
                     title=title,
@@ -336,11 +357,18 @@ class NasdaqRssCollector:
             if feed.bozo and not feed.entries:
                 return []
 
-            items = []
+            entries = []
             for entry in feed.entries:
                 published_at = _parse_feed_date(entry)
-                if published_at < cutoff:
-                    continue
+                if published_at >= cutoff:
+                    entries.append((entry, published_at))
+            _prefetch_sentiment(
+                sentiment_analyzer,
+                [entry.get('link', entry.get('id', '')) for entry, _ in entries],
+            )
+
+            items = []
+            for entry, published_at in entries:
 
                 title = entry.get('title', '')
                 link = entry.get('link', entry.get('id', ''))
@@ -436,6 +464,7 @@ class BetRssCollector:
                 print(f"  ⚠️ BÉT RSS parse hiba: {feed.bozo_exception}")
                 return result
 
+            matches = []
             for entry in feed.entries:
                 published_at = _parse_feed_date(entry)
                 if published_at < cutoff:
@@ -449,17 +478,22 @@ class BetRssCollector:
                 for ticker in bet_tickers:
                     keywords = BET_KEYWORDS.get(ticker, [])
                     if any(kw.lower() in text_lower for kw in keywords):
-                        item = _make_news_item(
-                            title=title,
-                            description=summary,
-                            url=link,
-                            published_at=published_at,
-                            source=self.SOURCE_NAME,
-                            credibility=self.CREDIBILITY,
-                            sentiment_analyzer=sentiment_analyzer,
-                            ticker_symbol=ticker,
-                        )
-                        result[ticker].append(item)
+                        matches.append((title, summary, link, published_at, ticker))
+
+            _prefetch_sentiment(sentiment_analyzer, [m[2] for m in matches])
+
+            for title, summary, link, published_at, ticker in matches:
+                item = _make_news_item(
+                    title=title,
+                    description=summary,
+                    url=link,
+                    published_at=published_at,
+                    source=self.SOURCE_NAME,
+                    credibility=self.CREDIBILITY,
+                    sentiment_analyzer=sentiment_analyzer,
+                    ticker_symbol=ticker,
+                )
+                result[ticker].append(item)
 
         except Exception as e:
             print(f"  ❌ BÉT RSS hiba: {e}")
@@ -511,11 +545,18 @@ class SeekingAlphaRssCollector:
             if feed.bozo and not feed.entries:
                 return []
 
-            items = []
+            entries = []
             for entry in feed.entries:
                 published_at = _parse_feed_date(entry)
-                if published_at < cutoff:
-                    continue
+                if published_at >= cutoff:
+                    entries.append((entry, published_at))
+            _prefetch_sentiment(
+                sentiment_analyzer,
+                [entry.get('link', entry.get('id', '')) for entry, _ in entries],
+            )
+
+            items = []
+            for entry, published_at in entries:
 
                 title = entry.get('title', '')
                 link = entry.get('link', entry.get('id', ''))
@@ -0,0 +1,221 @@
+"""
+TrendSignal MVP - Sentiment Cache (url_hash alapú)
+
+Lookup réteg a FinBERT inference előtt.
+
+Miért:
+  - Minden 15 perces ciklus ugyanazokat az RSS / API cikkeket kéri le a
+    lookback ablakban, és mindegyikre újra lefutott a FinBERT — csak a
+    save_news_item_to_db() vette észre url_hash alapján, hogy a cikk már megvan
+  - Egy cikk FinBERT eredménye statikus (ugyanaz a szöveg → ugyanaz a score)
+
+Működés:
+  - Memóriában LRU: url_hash → CachedNews (sentiment + llm_* mezők)
+  - get_many(url_hashes): a memóriában nem lévőket EGY `url_hash IN (...)`
+    lekérdezéssel tölti be a news_items táblából (saját rövid életű session →
+    a gyűjtő szálakból is biztonságosan hívható)
+  - put() / remember_item(): a frissen számolt eredmények is bekerülnek,
+    így a következő ciklusban DB lekérdezés sem kell
+  - A LLM mezők ugyanúgy újrahasznosíthatók, mint get_llm_cached_news()-nál
+
+Version: 1.0
+Date: 2026-10-16
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from typing import Dict, Iterable, Optional
+
+DEFAULT_MAX_ENTRIES = 50_000
+
+# SQLite bind paraméter limit alatt maradunk (IN lista darabolása)
+_IN_CHUNK = 500
+
+_LLM_FIELDS = (
+    'llm_score', 'llm_price_impact', 'llm_impact_level', 'llm_impact_duration',
+    'llm_catalyst_type', 'llm_priced_in', 'llm_confidence', 'llm_reason',
+    'llm_latency_ms',
+)
+
+
+def url_hash(url: str) -> str:
+    """news_items.url_hash — ugyanaz, mint save_news_item_to_db()-ben."""
+    return hashlib.md5(url.encode()).hexdigest()
+
+
+@dataclass(frozen=True)
+class CachedNews:
+    """Egy cikk tárolt pontszámai (a news_items oszlopnevekkel)."""
+    url_hash: str
+    sentiment_score: float
+    sentiment_confidence: Optional[float]
+    sentiment_label: Optional[str]
+    active_score_source: Optional[str] = None
+    llm_score: Optional[float] = None
+    llm_price_impact: Optional[str] = None
+    llm_impact_level: Optional[int] = None
+    llm_impact_duration: Optional[str] = None
+    llm_catalyst_type: Optional[str] = None
+    llm_priced_in: Optional[bool] = None
+    llm_confidence: Optional[str] = None
+    llm_reason: Optional[str] = None
+    llm_latency_ms: Optional[int] = None
+
+    @property
+    def has_llm(self) -> bool:
+        """Ugyanaz a feltétel, mint get_llm_cached_news()-ban."""
+        return (
+            self.active_score_source == 'llm'
+            and self.llm_score is not None
+            and self.llm_score != 0.0
+        )
+
+    def sentiment_result(self) -> Dict[str, float]:
+        """analyze_text() formátumú eredmény."""
+        return {
+            'score': self.sentiment_score,
+            'confidence': self.sentiment_confidence if self.sentiment_confidence is not None else 0.5,
+            'label': self.sentiment_label or 'neutral',
+        }
+
+
+class SentimentCache:
+    """
+    Thread-safe LRU url_hash → CachedNews, a news_items tábla előtt.
+
+        cache = get_sentiment_cache()
+        hits = cache.get_many([url_hash(u) for u in urls])   # 1 SQL a hiányzókra
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, session_factory=None):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._session_factory = session_factory
+        self._mem: "OrderedDict[str, CachedNews]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    # -- lookup ----------------------------------------------------------------
+
+    def get(self, key: str) -> Optional[CachedNews]:
+        with self._lock:
+            hit = self._mem.get(key)
+            if hit is not None:
+                self._mem.move_to_end(key)
+            return hit
+
+    def get_many(self, url_hashes: Iterable[str]) -> Dict[str, CachedNews]:
+        """
+        A megadott hash-ek közül a cache-ben vagy a DB-ben meglévők.
+        A memóriában nem lévőket egyetlen (darabolt) IN lekérdezéssel keresi.
+        """
+        keys = list(dict.fromkeys(url_hashes))
+        n_keys = len(keys)
+        found: Dict[str, CachedNews] = {}
+        missing = []
+        with self._lock:
+            for key in keys:
+                hit = self._mem.get(key)
+                if hit is not None:
+                    self._mem.move_to_end(key)
+                    found[key] = hit
+                else:
+                    missing.append(key)
+
+        if missing:
+            loaded = self._load(missing)
+            with self._lock:
+                for key, value in loaded.items():
+                    self._remember(key, value)
+            found.update(loaded)
+
+        with self._lock:
+            self.hits += len(found)
+            self.misses += n_keys - len(found)
+        return found
+
+    def _load(self, keys: list) -> Dict[str, CachedNews]:
+        try:
+            from src.models import NewsItem as NewsItemModel
+            if self._session_factory is None:
+                from src.database import SessionLocal
+                self._session_factory = SessionLocal
+
+            columns = [getattr(NewsItemModel, f) for f in (
+                'url_hash', 'sentiment_score', 'sentiment_confidence',
+                'sentiment_label', 'active_score_source',
+            ) + _LLM_FIELDS]
+
+            db = self._session_factory()
+            try:
+                rows = []
+                for i in range(0, len(keys), _IN_CHUNK):
+                    rows.extend(db.query(*columns).filter(
+                        NewsItemModel.url_hash.in_(keys[i:i + _IN_CHUNK]),
+                        NewsItemModel.sentiment_score.isnot(None),
+                    ).all())
+            finally:
+                db.close()
+            return {row[0]: CachedNews(*row) for row in rows}
+
+        except Exception as e:
+            print(f"⚠️ [Sentiment cache] DB lookup failed: {e}")
+            return {}
+
+    # -- store -----------------------------------------------------------------
+
+    def put(self, key: str, result: Dict[str, float]):
+        """Frissen számolt analyze_text() eredmény felvétele (a meglévő llm_* mezők maradnak)."""
+        with self._lock:
+            old = self._mem.get(key)
+            value = CachedNews(key, result['score'], result.get('confidence'), result.get('label'))
+            if old is not None:
+                value = replace(old, sentiment_score=value.sentiment_score,
+                                sentiment_confidence=value.sentiment_confidence,
+                                sentiment_label=value.sentiment_label)
+            self._remember(key, value)
+
+    def remember_item(self, item):
+        """NewsItem (sentiment + LLM eredmény) felvétele a cache-be, pl. az LLM lépés után."""
+        if not item.url:
+            return
+        value = CachedNews(
+            url_hash(item.url),
+            item.sentiment_score,
+            item.sentiment_confidence,
+            item.sentiment_label,
+            getattr(item, 'active_score_source', None),
+            **{f: getattr(item, f, None) for f in _LLM_FIELDS},
+        )
+        with self._lock:
+            self._remember(value.url_hash, value)
+
+    def _remember(self, key: str, value: CachedNews):
+        self._mem[key] = value
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_entries:
+            self._mem.popitem(last=False)
+
+    def summary(self) -> str:
+        total = self.hits + self.misses
+        rate = self.hits / total * 100 if total else 0.0
+        return f"{self.hits}/{total} hits ({rate:.1f}%), {len(self._mem)} entries in memory"
+
+
+# ==========================================
+# MODULE-LEVEL SINGLETON
+# ==========================================
+
+_global_cache_lock = threading.Lock()
+_global_cache: Optional[SentimentCache] = None
+
+
+def get_sentiment_cache() -> SentimentCache:
+    """A processz közös sentiment cache-e (minden ticker és gyűjtő szál)."""
+    global _global_cache
+    with _global_cache_lock:
+        if _global_cache is None:
+            _global_cache = SentimentCache()
+        return _global_cache
@@ -2,8 +2,8 @@
 TrendSignal MVP - Signal Generator Module  
 Generates BUY/SELL/HOLD trading signals with dynamic configuration
 
-Version: 1.2 - Robust DataFrame Handling
-Date: 2024-12-28
+Version: 1.3 - Incremental indicator engine in calculate_technical_score
+Date: 2026-10-16
 """
 
 import pandas as pd
@@ -1385,6 +1385,14 @@ def generate_signals_for_tickers(
                 news_count=sentiment_data.get("news_count", 0)
             )
 
+            if db_thread is not None:
+                # calculate_technical_score flush-olt indikátor állapota
+                try:
+                    db_thread.commit()
+                except Exception as e:
+                    db_thread.rollback()
+                    logger.warning(f"Indicator state commit failed for {ticker_symbol}: {e}")
+
             print(f"✅ Signal: {signal.strength} {signal.decision}")
             return signal
 
@@ -1680,10 +1688,11 @@ def calculate_stochastic_component_score(current, sma_trend_direction, config) -
     return 0, {}
 
 
-def calculate_volume_component_score(df, current) -> Tuple[float, Dict]:
-    """Calculate Volume score normalized to -100 to +100"""
+def calculate_volume_component_score(df, current, volume_sma=None) -> Tuple[float, Dict]:
+    """Calculate Volume score normalized to -100 to +100 (volume_sma: precomputed 20-bar SMA)"""
     if 'volume' in df.columns and len(df) >= 20:
-        volume_sma = df['volume'].rolling(20).mean().iloc[-1]
+        if volume_sma is None:
+            volume_sma = df['volume'].rolling(20).mean().iloc[-1]
         current_volume = current.get('volume', 0)
         
         if pd.notna(volume_sma) and volume_sma > 0:
@@ -1707,6 +1716,73 @@ def calculate_volume_component_score(df, current) -> Tuple[float, Dict]:
     return 0, {}
 
 
+# Intraday indicator columns exposed on `current` (calculate_technical_score)
+_INTRADAY_INDICATORS = (
+    'sma_20', 'rsi', 'ema_12', 'ema_26', 'macd', 'macd_signal', 'macd_histogram',
+    'stoch_k', 'stoch_d', 'bb_middle', 'bb_upper', 'bb_lower',
+)
+
+
+def _latest_intraday_indicators(df: pd.DataFrame, close_col: str, high_col, low_col) -> Dict:
+    """
+    Full pandas recomputation of the intraday indicators (last candle only).
+    Fallback when the incremental engine cannot be used (missing columns, NaN).
+    """
+    close = df[close_col]
+    values = {
+        'sma_20': close.rolling(20).mean().iloc[-1],
+        'sma_50': close.rolling(50).mean().iloc[-1],
+    }
+
+    delta = close.diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+    rs = gain / loss
+    values['rsi'] = (100 - (100 / (1 + rs))).iloc[-1]
+
+    ema_12 = close.ewm(span=12, adjust=False).mean()
+    ema_26 = close.ewm(span=26, adjust=False).mean()
+    macd = ema_12 - ema_26
+    macd_signal = macd.ewm(span=9, adjust=False).mean()
+    values.update({
+        'ema_12': ema_12.iloc[-1], 'ema_26': ema_26.iloc[-1],
+        'macd': macd.iloc[-1], 'macd_signal': macd_signal.iloc[-1],
+        'macd_histogram': (macd - macd_signal).iloc[-1],
+    })
+
+    if high_col and low_col:
+        low_14 = df[low_col].rolling(window=14).min()
+        high_14 = df[high_col].rolling(window=14).max()
+        stoch_k = 100 * ((close - low_14) / (high_14 - low_14))
+        values['stoch_k'] = stoch_k.iloc[-1]
+        values['stoch_d'] = stoch_k.rolling(window=3).mean().iloc[-1]
+
+    bb_middle = close.rolling(window=20).mean()
+    bb_std = close.rolling(window=20).std()
+    values['bb_middle'] = bb_middle.iloc[-1]
+    values['bb_upper'] = (bb_middle + (bb_std * 2)).iloc[-1]
+    values['bb_lower'] = (bb_middle - (bb_std * 2)).iloc[-1]
+    return values
+
+
+def _trend_indicators(engine, ticker_symbol: str, df_trend: pd.DataFrame, db) -> Optional[Dict]:
+    """SMA50 / ADX of the trend (1h) frame from the incremental engine, or None."""
+    trend_high = trend_low = trend_close = None
+    for col in df_trend.columns:
+        if 'high' in col:
+            trend_high = col
+        elif 'low' in col:
+            trend_low = col
+        elif 'close' in col:
+            trend_close = col
+    if not (trend_high and trend_low and trend_close):
+        return None
+    values = engine.snapshot(ticker_symbol, '1h', df_trend, trend_close, trend_high, trend_low, db=db)
+    if values is None:
+        return None
+    return {'sma_50': values['sma_50'], 'adx': values['adx'], 'close_col': trend_close}
+
+
 def calculate_technical_score(
     df: pd.DataFrame, 
     ticker_symbol: str, 
@@ -1762,8 +1838,19 @@ def calculate_technical_score(
         
         print(f"  ✅ Using columns: close={close_col}, high={high_col}, low={low_col}")
         
-        # Calculate indicators from INTRADAY data (5m)
-        df['sma_20'] = df[close_col].rolling(20).mean()
+        # Indicators from INTRADAY data (5m): incremental engine (O(1) per new
+        # candle, persisted state); full pandas recomputation as fallback
+        from src.incremental_indicators import get_indicator_engine
+        engine = get_indicator_engine()
+        intraday_values = engine.snapshot(ticker_symbol, '5m', df, close_col, high_col, low_col, db=db)
+        if intraday_values is None:
+            intraday_values = _latest_intraday_indicators(df, close_col, high_col, low_col)
+        intraday = {k: v for k, v in intraday_values.items() if k in _INTRADAY_INDICATORS}
+
+        # Trend timeframe (1h): SMA50 + ADX from the same engine
+        trend_values = None
+        if df_trend is not None and len(df_trend) >= 28:
+            trend_values = _trend_indicators(engine, ticker_symbol, df_trend, db)
         
         # SMA 50 - use TREND data (1h) if available, otherwise intraday
         if df_trend is not None and len(df_trend) >= 50:
@@ -1775,66 +1862,20 @@ def calculate_technical_score(
                     break
             
             if trend_close_col:
-                df_trend['sma_50'] = df_trend[trend_close_col].rolling(50).mean()
-                sma_50_value = df_trend['sma_50'].iloc[-1]
+                if trend_values is not None and trend_values['close_col'] == trend_close_col:
+                    sma_50_value = trend_values['sma_50']
+                else:
+                    sma_50_value = df_trend[trend_close_col].rolling(50).mean().iloc[-1]
                 print(f"  ✅ SMA50 from TREND data (1h): {sma_50_value:.2f}")
             else:
-                df['sma_50'] = df[close_col].rolling(50).mean()
-                sma_50_value = df['sma_50'].iloc[-1]
+                intraday['sma_50'] = intraday_values['sma_50']
+                sma_50_value = intraday['sma_50']
         else:
-            df['sma_50'] = df[close_col].rolling(50).mean()
-            sma_50_value = df['sma_50'].iloc[-1] if 'sma_50' in df.columns else None
-        
-        # RSI from INTRADAY data
-        delta = df[close_col].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        df['rsi'] = 100 - (100 / (1 + rs))
-        
-        # EMA 12 and 26 for MACD
-        df['ema_12'] = df[close_col].ewm(span=12, adjust=False).mean()
-        df['ema_26'] = df[close_col].ewm(span=26, adjust=False).mean()
-        
-        # MACD
-        df['macd'] = df['ema_12'] - df['ema_26']
-        df['macd_signal'] = df['macd'].ewm(span=9, adjust=False).mean()
-        df['macd_histogram'] = df['macd'] - df['macd_signal']
-        
-        # Stochastic Oscillator
-        if high_col and low_col:
-            low_14 = df[low_col].rolling(window=14).min()
-            high_14 = df[high_col].rolling(window=14).max()
-            df['stoch_k'] = 100 * ((df[close_col] - low_14) / (high_14 - low_14))
-            df['stoch_d'] = df['stoch_k'].rolling(window=3).mean()
-        
-        # Bollinger Bands
-        df['bb_middle'] = df[close_col].rolling(window=20).mean()
-        bb_std = df[close_col].rolling(window=20).std()
-        df['bb_upper'] = df['bb_middle'] + (bb_std * 2)
-        df['bb_lower'] = df['bb_middle'] - (bb_std * 2)
-        
-        # CCI (Commodity Channel Index)
-        if high_col and low_col:
-            tp = (df[high_col] + df[low_col] + df[close_col]) / 3  # Typical Price
-            sma_tp = tp.rolling(window=20).mean()
-            mad = tp.rolling(window=20).apply(lambda x: abs(x - x.mean()).mean())
-            df['cci'] = (tp - sma_tp) / (0.015 * mad)
-        
-        # OBV (On-Balance Volume)
-        if 'volume' in df.columns:
-            obv = [0]
-            for i in range(1, len(df)):
-                if df[close_col].iloc[i] > df[close_col].iloc[i-1]:
-                    obv.append(obv[-1] + df['volume'].iloc[i])
-                elif df[close_col].iloc[i] < df[close_col].iloc[i-1]:
-                    obv.append(obv[-1] - df['volume'].iloc[i])
-                else:
-                    obv.append(obv[-1])
-            df['obv'] = obv
+            intraday['sma_50'] = intraday_values['sma_50']
+            sma_50_value = intraday['sma_50']
         
         # Latest values from INTRADAY
-        current = df.iloc[-1]
+        current = pd.concat([df.iloc[-1], pd.Series(intraday, dtype=float)])
         
         # DEBUG: Check what's actually in current
         print(f"  🔍 DEBUG: current.index = {list(current.index)}")
@@ -1884,7 +1925,9 @@ def calculate_technical_score(
         )
         
         # 6. Volume Score
-        volume_score, volume_details = calculate_volume_component_score(df, current)
+        volume_score, volume_details = calculate_volume_component_score(
+            df, current, volume_sma=intraday_values.get('volume_sma')
+        )
         
         # ===== WEIGHTED TECHNICAL SCORE =====
         tech_score = (
@@ -1944,7 +1987,12 @@ def calculate_technical_score(
         
         # ADX - Trend Strength Indicator from TREND timeframe (1h)
         adx = None
-        if df_trend is not None and len(df_trend) >= 28:
+        if trend_values is not None:
+            adx = trend_values['adx'] if pd.notna(trend_values['adx']) else None
+            if adx is not None:
+                key_signals.append(f"ADX: {adx:.1f} (1h trend)")
+                print(f"  ✅ ADX calculated from TREND data: {adx:.1f}")
+        elif df_trend is not None and len(df_trend) >= 28:
             try:
                 # Find columns in trend df
                 trend_high = None
@@ -2052,8 +2100,14 @@ def calculate_technical_score(
                 
                 if daily_high and daily_low and daily_close:
                     # Calculate True Range (daily)
-                    high_low = df_daily_copy[daily_high] - df_daily_copy[daily_low]
-                    atr = high_low.rolling(14).mean().iloc[-1]
+                    daily_values = engine.snapshot(
+                        ticker_symbol, '1d', df_daily_copy, daily_close, daily_high, daily_low, db=db
+                    )
+                    if daily_values is not None:
+                        atr = daily_values['hl_atr']
+                    else:
+                        high_low = df_daily_copy[daily_high] - df_daily_copy[daily_low]
+                        atr = high_low.rolling(14).mean().iloc[-1]
                     atr_pct = (atr / df_daily_copy[daily_close].iloc[-1]) * 100
                     print(f"  ✅ ATR from DAILY data (1d, 14-period): {atr_pct:.2f}%")
                 else:
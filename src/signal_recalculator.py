@@ -22,13 +22,28 @@ What this service updates per archive_signal:
   - decision, strength : re-determined from new combined_score + confidence
   - stop_loss, take_profit, risk_reward_ratio : recalculated from stored close_price/atr
 
-Version: 1.0
-Date: 2026-03-30
+Performance:
+  - Sentiment: a ticker hírei időrendben + prefix összegek (_NewsWindow);
+    signalonként a 24h ablak és a decay bucket határok bisect-tel, a
+    bucketek összegei prefix különbségként → O(log n) / signal a korábbi
+    teljes hírlista szűrés (O(signals × news)) helyett
+  - Párhuzamos mód (workers > 1): a tickerek számítása process pool-ban fut
+    (saját read-only kapcsolat workerenként), az UPDATE-eket a szülő egyetlen
+    író kapcsolaton írja tickerenként executemany + COMMIT — backup / restore
+    szemantika változatlan
+
+Version: 1.1
+Date: 2026-10-16
 """
 
 import logging
+import multiprocessing
+import os
 import sqlite3
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime, timedelta
+from itertools import accumulate
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
@@ -37,6 +52,47 @@ logger = logging.getLogger(__name__)
 BASE_DIR = Path(__file__).resolve().parent.parent
 DATABASE_PATH = BASE_DIR / "trendsignal.db"
 
+# Párhuzamos mód alapértelmezetten KI (1 = szekvenciális, a korábbi viselkedés);
+# bekapcsolás: workers paraméter vagy SIGNAL_RECALC_WORKERS env (pl. cpu_count - 1)
+DEFAULT_WORKERS = 1
+
+_UPDATE_SQL = """
+    UPDATE archive_signals SET
+        decision            = :decision,
+        strength            = :strength,
+        combined_score      = :combined_score,
+        base_combined_score = :base_combined_score,
+        alignment_bonus     = :alignment_bonus,
+        rr_correction       = :rr_correction,
+        sentiment_score     = :sentiment_score,
+        technical_score     = :technical_score,
+        risk_score          = :risk_score,
+        overall_confidence  = :overall_confidence,
+        entry_price         = :entry_price,
+        stop_loss           = :stop_loss,
+        take_profit         = :take_profit,
+        risk_reward_ratio   = :risk_reward_ratio
+    WHERE id = :id
+"""
+
+
+def _resolve_workers(workers: Optional[int]) -> int:
+    if workers is None:
+        env = os.environ.get("SIGNAL_RECALC_WORKERS")
+        workers = int(env) if env else DEFAULT_WORKERS
+    return max(1, workers)
+
+
+def _compute_ticker_worker(db_path: str, symbol: str, cfg) -> Tuple[str, List[Dict]]:
+    """Process pool worker: egy ticker UPDATE sorai saját (csak olvasó) kapcsolaton."""
+    conn = sqlite3.connect(f"{Path(db_path).resolve().as_uri()}?mode=ro", uri=True, timeout=30)
+    conn.row_factory = sqlite3.Row
+    try:
+        updates = SignalRecalculator(db_path)._compute_ticker(conn, symbol, cfg)
+    finally:
+        conn.close()
+    return symbol, updates
+
 
 # ---------------------------------------------------------------------------
 # Main service
@@ -62,7 +118,12 @@ class SignalRecalculator:
         "risk_score, overall_confidence, stop_loss, take_profit, risk_reward_ratio"
     )
 
-    def run(self, symbols: Optional[List[str]] = None, progress_callback=None) -> Dict:
+    def run(
+        self,
+        symbols: Optional[List[str]] = None,
+        progress_callback=None,
+        workers: Optional[int] = None,
+    ) -> Dict:
         """
         Recalculate all (or specified) archive_signals with current config.
 
@@ -72,6 +133,10 @@ class SignalRecalculator:
         - Siker esetén a backup törlődik.
         - Következő futás elején, ha backup létezik: auto-restore → clean start.
 
+        Párhuzamos módban (workers > 1) a tickereket process pool számolja, az
+        írás továbbra is itt, egyetlen kapcsolaton, tickerenként történik.
+        workers: None → SIGNAL_RECALC_WORKERS env vagy DEFAULT_WORKERS (1 → szekvenciális).
+
         Returns stats dict with signals_updated count per ticker.
         """
         from src.config import get_config
@@ -144,21 +209,27 @@ class SignalRecalculator:
             print(f"[SignalRecalculator] {len(all_symbols)} ticker feldolgozása indul...", flush=True)
             logger.info(f"SignalRecalculator: {len(all_symbols)} tickers to process")
 
-            total_updated = 0
             ticker_stats: Dict[str, int] = {}
             total = len(all_symbols)
-            for i, symbol in enumerate(all_symbols, 1):
-                if progress_callback:
-                    try:
-                        progress_callback(symbol, i, total)
-                    except Exception:
-                        pass
-                updated = self._process_ticker(conn, symbol, cfg)
-                total_updated += updated
+
+            def _accumulate(i: int, symbol: str, updated: int):
                 ticker_stats[symbol] = updated
                 print(f"[SignalRecalculator] [{i}/{total}] {symbol}: {updated} signal frissítve", flush=True)
                 logger.info(f"  {symbol}: {updated} signals updated")
 
+            n_workers = min(_resolve_workers(workers), total)
+            if n_workers > 1:
+                self._run_parallel(conn, all_symbols, cfg, n_workers, progress_callback, _accumulate)
+            else:
+                for i, symbol in enumerate(all_symbols, 1):
+                    if progress_callback:
+                        try:
+                            progress_callback(symbol, i, total)
+                        except Exception:
+                            pass
+                    _accumulate(i, symbol, self._process_ticker(conn, symbol, cfg))
+            total_updated = sum(ticker_stats.values())
+
             # ── Siker: backup törlése ────────────────────────────────────────
             conn.execute(f"DROP TABLE {self._BAK}")
             conn.commit()
@@ -183,7 +254,57 @@ class SignalRecalculator:
     # Per-ticker processing
     # -----------------------------------------------------------------------
 
+    def _run_parallel(
+        self,
+        conn: sqlite3.Connection,
+        all_symbols: List[str],
+        cfg,
+        n_workers: int,
+        progress_callback,
+        on_ticker_done,
+    ):
+        """
+        Tickerek számítása process pool-ban; az UPDATE + COMMIT kizárólag itt,
+        a hívó kapcsolatán, tickerenként — egyetlen író.
+
+        spawn context: a run() jellemzően az API háttérszálából fut, többszálú
+        processzből fork-olni nem biztonságos. A cfg-t a szülő adja át, így a
+        workerek ugyanazzal a konfigurációval számolnak, mint szekvenciálisan.
+        """
+        total = len(all_symbols)
+        print(f"[SignalRecalculator] Párhuzamos mód: {n_workers} worker", flush=True)
+        ctx = multiprocessing.get_context("spawn")
+        executor = ProcessPoolExecutor(max_workers=n_workers, mp_context=ctx)
+        try:
+            futures = {
+                executor.submit(_compute_ticker_worker, self.db_path, symbol, cfg): symbol
+                for symbol in all_symbols
+            }
+            for i, fut in enumerate(as_completed(futures), 1):
+                symbol, updates = fut.result()
+                if progress_callback:
+                    try:
+                        progress_callback(symbol, i, total)
+                    except Exception:
+                        pass
+                on_ticker_done(i, symbol, self._write_ticker(conn, updates))
+        except BaseException:
+            executor.shutdown(wait=True, cancel_futures=True)
+            raise
+        executor.shutdown(wait=True)
+
     def _process_ticker(self, conn: sqlite3.Connection, symbol: str, cfg) -> int:
+        return self._write_ticker(conn, self._compute_ticker(conn, symbol, cfg))
+
+    @staticmethod
+    def _write_ticker(conn: sqlite3.Connection, updates: List[Dict]) -> int:
+        if updates:
+            conn.executemany(_UPDATE_SQL, updates)
+            conn.commit()  # per-ticker commit: megszakítás esetén a korábbi tickerek megmaradnak
+        return len(updates)
+
+    def _compute_ticker(self, conn: sqlite3.Connection, symbol: str, cfg) -> List[Dict]:
+        """Egy ticker összes signaljának új értékei (csak olvas) → UPDATE paraméter sorok."""
         # Load all archive_signals for this ticker
         signal_rows = conn.execute("""
             SELECT
@@ -206,7 +327,7 @@ class SignalRecalculator:
         """, (symbol,)).fetchall()
 
         if not signal_rows:
-            return 0
+            return []
 
         # Load all relevant news for this ticker once (is_relevant=1, not duplicate)
         news_rows = conn.execute("""
@@ -223,7 +344,7 @@ class SignalRecalculator:
             ORDER BY published_at ASC
         """, (symbol,)).fetchall()
 
-        # Build list of news dicts for in-memory filtering
+        # Build list of news dicts → időrendi index (bisect + prefix összegek)
         all_news = []
         for n in news_rows:
             ts = _parse_ts(n["published_at"])
@@ -235,41 +356,20 @@ class SignalRecalculator:
                 "sentiment_confidence": _f(n["sentiment_confidence"]) or 0.5,
                 "llm_impact_duration": n["llm_impact_duration"],
             })
+        news_window = _NewsWindow(all_news, cfg)
 
         updates = []
         for sig in signal_rows:
-            update = self._recalculate_signal(sig, all_news, cfg)
+            update = self._recalculate_signal(sig, news_window, cfg)
             if update is not None:
                 updates.append(update)
-
-        if updates:
-            conn.executemany("""
-                UPDATE archive_signals SET
-                    decision            = :decision,
-                    strength            = :strength,
-                    combined_score      = :combined_score,
-                    base_combined_score = :base_combined_score,
-                    alignment_bonus     = :alignment_bonus,
-                    rr_correction       = :rr_correction,
-                    sentiment_score     = :sentiment_score,
-                    technical_score     = :technical_score,
-                    risk_score          = :risk_score,
-                    overall_confidence  = :overall_confidence,
-                    entry_price         = :entry_price,
-                    stop_loss           = :stop_loss,
-                    take_profit         = :take_profit,
-                    risk_reward_ratio   = :risk_reward_ratio
-                WHERE id = :id
-            """, updates)
-            conn.commit()  # per-ticker commit: megszakítás esetén a korábbi tickerek megmaradnak
-
-        return len(updates)
+        return updates
 
     # -----------------------------------------------------------------------
     # Per-signal recalculation
     # -----------------------------------------------------------------------
 
-    def _recalculate_signal(self, sig, all_news: List[Dict], cfg) -> Optional[Dict]:
+    def _recalculate_signal(self, sig, news_window: "_NewsWindow", cfg) -> Optional[Dict]:
         sig_ts = _parse_ts(sig["signal_timestamp"])
         if sig_ts is None:
             return None
@@ -285,9 +385,9 @@ class SignalRecalculator:
         risk_score = self._calc_risk_score(sig, cfg)
 
         # ── 3. Sentiment score ──────────────────────────────────────────────
-        news_for_signal = self._get_news_for_signal(all_news, sig_ts)
-        if news_for_signal:
-            sent_score, sent_conf = self._calc_sentiment_score(news_for_signal, sig_ts, cfg)
+        sentiment = news_window.sentiment(sig_ts)
+        if sentiment is not None:
+            sent_score, sent_conf = sentiment
         else:
             # Fall back to stored value (no archive news found)
             raw = _f(sig["sentiment_score"]) or 0.0
@@ -694,105 +794,6 @@ class SignalRecalculator:
             trend_conf * cfg.risk_trend_strength_weight
         )
 
-    # -----------------------------------------------------------------------
-    # Sentiment score (from archive_news_items + new decay weights)
-    # Mirrors signal_generator.py aggregate_sentiment_from_news()
-    # -----------------------------------------------------------------------
-
-    @staticmethod
-    def _get_news_for_signal(all_news: List[Dict], sig_ts: datetime) -> List[Dict]:
-        """Return news items published within 24h before signal_timestamp."""
-        window_start = sig_ts - timedelta(hours=24)
-        return [n for n in all_news if window_start <= n["ts"] <= sig_ts]
-
-    def _calc_sentiment_score(
-        self, news_items: List[Dict], sig_ts: datetime, cfg
-    ) -> Tuple[float, float]:
-        """
-        Calculate sentiment score and confidence from archive_news_items.
-        Returns (sentiment_score_-100_to_100, sentiment_confidence_0_to_1).
-        """
-        decay_weights = cfg.decay_weights
-        duration_weight = cfg.duration_weight
-
-        weighted_scores = []
-        weights_sum = 0.0
-        confidences = []
-        raw_scores_for_conf = []
-
-        for item in news_items:
-            news_ts = item["ts"]
-            age_hours = (sig_ts - news_ts).total_seconds() / 3600.0
-
-            if age_hours < 2:
-                decay = decay_weights.get("0-2h", 1.0)
-            elif age_hours < 6:
-                decay = decay_weights.get("2-6h", 0.85)
-            elif age_hours < 12:
-                decay = decay_weights.get("6-12h", 0.60)
-            elif age_hours < 24:
-                decay = decay_weights.get("12-24h", 0.35)
-            else:
-                decay = 0.0
-
-            if decay <= 0:
-                continue
-
-            duration = duration_weight.get(item.get("llm_impact_duration") or "days", 1.0)
-            # Archive news items don't have source credibility stored → default 1.0
-            credibility = 1.0
-            score = item["active_score"]  # already in -1..+1 range (finbert/llm)
-
-            effective_weight = decay * credibility * duration
-            weighted_scores.append(score * effective_weight)
-            weights_sum += effective_weight
-            confidences.append(item["sentiment_confidence"])
-            raw_scores_for_conf.append(score)
-
-        if weights_sum <= 0.0 or not weighted_scores:
-            return 0.0, 0.5
-
-        # Weighted average sentiment (-1..+1) × 100 = -100..+100
-        weighted_avg = sum(weighted_scores) / weights_sum
-        sentiment_score = float(_clamp(weighted_avg * 100.0, -100.0, 100.0))
-
-        # Confidence calculation (mirrors signal_generator.py aggregate_sentiment_from_news)
-        news_count = len(news_items)
-
-        # Component 1: FinBERT confidence (capped)
-        finbert_conf = sum(confidences) / len(confidences) if confidences else 0.5
-        finbert_conf_normalized = min(finbert_conf * 0.85, 0.90)
-
-        # Component 2: News volume factor
-        if news_count >= cfg.sentiment_conf_full_news_count:
-            volume_factor = 1.0
-        elif news_count >= cfg.sentiment_conf_high_news_count:
-            volume_factor = 0.85
-        elif news_count >= cfg.sentiment_conf_med_news_count:
-            volume_factor = 0.70
-        elif news_count >= cfg.sentiment_conf_low_news_count:
-            volume_factor = 0.55
-        else:
-            volume_factor = 0.40
-
-        # Component 3: Sentiment consistency
-        pos_threshold = cfg.sentiment_positive_threshold
-        neg_threshold = cfg.sentiment_negative_threshold
-        positive_count = sum(1 for s in raw_scores_for_conf if s > pos_threshold)
-        negative_count = sum(1 for s in raw_scores_for_conf if s < neg_threshold)
-        if news_count > 0:
-            consistency = max(positive_count, negative_count) / news_count
-        else:
-            consistency = 0.5
-
-        sentiment_conf = (
-            finbert_conf_normalized * 0.40 +
-            volume_factor           * 0.35 +
-            consistency             * 0.25
-        )
-
-        return sentiment_score, float(sentiment_conf)
-
     # -----------------------------------------------------------------------
     # Alignment bonus (mirrors signal_generator.py _calculate_alignment_bonus)
     # -----------------------------------------------------------------------
@@ -871,6 +872,100 @@ class SignalRecalculator:
             return "HOLD", "NEUTRAL"
 
 
+# ---------------------------------------------------------------------------
+# Sentiment score (from archive_news_items + new decay weights)
+# Mirrors signal_generator.py aggregate_sentiment_from_news()
+# ---------------------------------------------------------------------------
+
+class _NewsWindow:
+    """
+    Egy ticker hírei időrendben, prefix összegekkel.
+
+    sentiment(sig_ts) a signal előtti 24h ablak (window_start <= ts <= sig_ts)
+    sentiment score-ját / confidence-ét adja: az ablak és a decay bucketek
+    határai bisect-tel, a bucketenkénti összegek (score × duration, duration,
+    confidence, pozitív / negatív darabszám) prefix különbségként.
+    """
+
+    # (decay_weights kulcs, bucket felső korhatár órában, alapértelmezett decay)
+    _BUCKETS = (("0-2h", 2, 1.0), ("2-6h", 6, 0.85), ("6-12h", 12, 0.60), ("12-24h", 24, 0.35))
+
+    def __init__(self, news_items: List[Dict], cfg):
+        items = sorted(news_items, key=lambda n: n["ts"])
+        duration_weight = cfg.duration_weight
+        pos_threshold = cfg.sentiment_positive_threshold
+        neg_threshold = cfg.sentiment_negative_threshold
+
+        self.cfg = cfg
+        self.ts = [n["ts"] for n in items]
+        # Archive news items don't have source credibility stored → credibility 1.0
+        durations = [duration_weight.get(n.get("llm_impact_duration") or "days", 1.0) for n in items]
+        scores = [n["active_score"] for n in items]  # already in -1..+1 range (finbert/llm)
+        self._weighted = list(accumulate((s * d for s, d in zip(scores, durations)), initial=0.0))
+        self._duration = list(accumulate(durations, initial=0.0))
+        self._conf = list(accumulate((n["sentiment_confidence"] for n in items), initial=0.0))
+        self._pos = list(accumulate((s > pos_threshold for s in scores), initial=0))
+        self._neg = list(accumulate((s < neg_threshold for s in scores), initial=0))
+
+    def sentiment(self, sig_ts: datetime) -> Optional[Tuple[float, float]]:
+        """
+        (sentiment_score_-100_to_100, sentiment_confidence_0_to_1), vagy None,
+        ha a 24h ablakban nincs hír (a hívó a tárolt értékre esik vissza).
+        """
+        cfg = self.cfg
+        hi = bisect_right(self.ts, sig_ts)
+        news_count = hi - bisect_left(self.ts, sig_ts - timedelta(hours=24))
+        if news_count == 0:
+            return None
+
+        decay_weights = cfg.decay_weights
+        weighted = weights_sum = conf_sum = 0.0
+        decayed = positive_count = negative_count = 0
+        # age < N óra ⇔ ts > sig_ts - N óra; a pontosan 24 órás hír decay 0
+        for key, hours, default in self._BUCKETS:
+            lo = bisect_right(self.ts, sig_ts - timedelta(hours=hours))
+            decay = decay_weights.get(key, default)
+            if decay > 0 and hi > lo:
+                weighted += decay * (self._weighted[hi] - self._weighted[lo])
+                weights_sum += decay * (self._duration[hi] - self._duration[lo])
+                conf_sum += self._conf[hi] - self._conf[lo]
+                decayed += hi - lo
+                positive_count += self._pos[hi] - self._pos[lo]
+                negative_count += self._neg[hi] - self._neg[lo]
+            hi = lo
+
+        if weights_sum <= 0.0 or not decayed:
+            return 0.0, 0.5
+
+        # Weighted average sentiment (-1..+1) × 100 = -100..+100
+        sentiment_score = float(_clamp(weighted / weights_sum * 100.0, -100.0, 100.0))
+
+        # Component 1: FinBERT confidence (capped)
+        finbert_conf_normalized = min(conf_sum / decayed * 0.85, 0.90)
+
+        # Component 2: News volume factor
+        if news_count >= cfg.sentiment_conf_full_news_count:
+            volume_factor = 1.0
+        elif news_count >= cfg.sentiment_conf_high_news_count:
+            volume_factor = 0.85
+        elif news_count >= cfg.sentiment_conf_med_news_count:
+            volume_factor = 0.70
+        elif news_count >= cfg.sentiment_conf_low_news_count:
+            volume_factor = 0.55
+        else:
+            volume_factor = 0.40
+
+        # Component 3: Sentiment consistency
+        consistency = max(positive_count, negative_count) / news_count
+
+        sentiment_conf = (
+            finbert_conf_normalized * 0.40 +
+            volume_factor           * 0.35 +
+            consistency             * 0.25
+        )
+        return sentiment_score, float(sentiment_conf)
+
+
 # ---------------------------------------------------------------------------
 # Helpers
 # ---------------------------------------------------------------------------
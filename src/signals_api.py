@@ -8,42 +8,60 @@ Add to your FastAPI app (api.py):
 """
 from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, select
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 import logging
 import json
-import pytz
 from datetime import datetime, timedelta
 
-_ET_TZ = pytz.timezone('America/New_York')
-
-def _us_eod_utc(dt_utc: datetime) -> datetime:
-    """4:00 PM ET (DST-aware) → naive UTC. EDT: 20:00 UTC | EST: 21:00 UTC."""
-    utc_aware = pytz.utc.localize(dt_utc)
-    et_time   = utc_aware.astimezone(_ET_TZ)
-    et_close  = _ET_TZ.localize(
-        et_time.replace(hour=16, minute=0, second=0, microsecond=0, tzinfo=None)
-    )
-    return et_close.astimezone(pytz.utc).replace(tzinfo=None)
-
-
-def _is_us_trading_hours(dt_utc: datetime) -> bool:
-    """DST-aware US kereskedési óra ellenőrzés (9:30–16:00 ET → UTC)."""
-    utc_aware  = pytz.utc.localize(dt_utc)
-    et_time    = utc_aware.astimezone(_ET_TZ)
-    et_decimal = et_time.hour + et_time.minute / 60.0
-    return 9.5 <= et_decimal < 16.0
+from src.price_cache import get_price_cache
+from src.trading_calendar import is_trading_hours, is_weekend, session_close_utc
 
 # Database imports
 from src.database import get_db
-from src.models import Ticker, Signal, SignalCalculation, SimulatedTrade, PriceData
+from src.models import Ticker, Signal, SignalCalculation, SimulatedTrade
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/v1/signals", tags=["Signals"])
 
 
+# Direction eredmény ablak: (entry_time, exit_time, hit_eod)
+_DIRECTION_CANDLE_TOLERANCE = timedelta(minutes=20)
+
+
+def _direction_window(
+    signal_created_at: datetime,
+    ticker_symbol: str,
+    decision: str,
+) -> tuple | None:
+    """
+    A 2H direction értékelés időablaka: (entry_time, exit_time, hit_eod),
+    vagy None, ha a signal nem értékelhető (HOLD, after-hours, < 5 perc).
+    Csak naptár számítás — nincs DB / cache hozzáférés.
+    """
+    if decision == 'HOLD':
+        return None
+
+    entry_time = signal_created_at + timedelta(minutes=15)
+
+    # Kereskedési idő és hétvége ellenőrzés (DST-aware, src.trading_calendar)
+    if is_weekend(entry_time) or not is_trading_hours(entry_time, ticker_symbol):
+        return None
+
+    # Piacvégi időpont (UTC, DST-aware): BÉT 16:00 UTC | US 20:00 (EDT) / 21:00 (EST) UTC
+    eod = session_close_utc(entry_time, ticker_symbol)
+
+    raw_exit_time = entry_time + timedelta(hours=2)
+    exit_time     = min(raw_exit_time, eod - timedelta(minutes=5))
+
+    if (exit_time - entry_time).total_seconds() < 300:
+        return None  # Kevesebb mint 5 perc kereskedési idő maradt
+
+    return entry_time, exit_time, raw_exit_time > eod
+
+
 def _compute_direction_result(
     signal_created_at: datetime,
     ticker_symbol: str,
@@ -64,48 +82,16 @@ def _compute_direction_result(
         - Kilépési referencia: entry + 2h, max EOD - 5 perc
         - 5m gyertyák ±20 perces toleranciával
     """
-    if decision == 'HOLD':
+    window = _direction_window(signal_created_at, ticker_symbol, decision)
+    if window is None:
         return None
+    entry_time, exit_time, hit_eod = window
 
-    entry_time = signal_created_at + timedelta(minutes=15)
-
-    # Kereskedési idő és hétvége ellenőrzés
-    def _is_weekend(t: datetime) -> bool:
-        return t.weekday() >= 5
-
-    def _is_trading(t: datetime, sym: str) -> bool:
-        if sym.endswith('.BD'):
-            dec = t.hour + t.minute / 60.0
-            return 8.0 <= dec < 16.0
-        return _is_us_trading_hours(t)   # DST-aware
-
-    if _is_weekend(entry_time) or not _is_trading(entry_time, ticker_symbol):
-        return None
-
-    # Piacvégi időpont (UTC, DST-aware)
-    if ticker_symbol.endswith('.BD'):
-        eod = entry_time.replace(hour=16, minute=0, second=0, microsecond=0)
-    else:
-        eod = _us_eod_utc(entry_time)   # 20:00 UTC (EDT) vagy 21:00 UTC (EST)
-
-    raw_exit_time = entry_time + timedelta(hours=2)
-    exit_time     = min(raw_exit_time, eod - timedelta(minutes=5))
-
-    if (exit_time - entry_time).total_seconds() < 300:
-        return None  # Kevesebb mint 5 perc kereskedési idő maradt
-
-    hit_eod = raw_exit_time > eod
-
-    # Legközelebbi 5m gyertya a target időponthoz
-    def _nearest_candle(t: datetime, tol_min: int = 20):
-        t_low  = t - timedelta(minutes=tol_min)
-        t_high = t + timedelta(minutes=tol_min)
-        rows = db.query(PriceData).filter(
-            PriceData.ticker_symbol == ticker_symbol,
-            PriceData.interval == '5m',
-            PriceData.timestamp >= t_low,
-            PriceData.timestamp <= t_high,
-        ).all()
+    # Legközelebbi 5m gyertya a target időponthoz (közös PriceCache napi bucket)
+    def _nearest_candle(t: datetime):
+        rows = get_price_cache().get_5m_candles(
+            ticker_symbol, t - _DIRECTION_CANDLE_TOLERANCE, t + _DIRECTION_CANDLE_TOLERANCE
+        )
         if not rows:
             return None
         return min(rows, key=lambda c: abs((c.timestamp - t).total_seconds()))
@@ -133,6 +119,43 @@ def _compute_direction_result(
     }
 
 
+def _compute_direction_results(signals: list, db: Session) -> Dict[int, dict | None]:
+    """
+    _compute_direction_result() egy lapnyi signalra: az összes szükséges
+    (ticker, nap) 5m bucket egy price_data lekérdezéssel töltődik a
+    PriceCache-be, utána minden lookup cache találat.
+    """
+    days = set()
+    for signal in signals:
+        window = _direction_window(signal.created_at, signal.ticker_symbol, signal.decision)
+        if window is None:
+            continue
+        for t in window[:2]:
+            day = (t - _DIRECTION_CANDLE_TOLERANCE).date()
+            while day <= (t + _DIRECTION_CANDLE_TOLERANCE).date():
+                days.add((signal.ticker_symbol, day))
+                day += timedelta(days=1)
+    get_price_cache().load_5m_days(days)
+    return {
+        signal.id: _compute_direction_result(
+            signal.created_at, signal.ticker_symbol, signal.decision, db
+        )
+        for signal in signals
+    }
+
+
+def _parse_history_cursor(cursor: str) -> tuple:
+    """/history keyset cursor: '<created_at ISO>_<id>' → (datetime, id)."""
+    try:
+        ts, _, signal_id = cursor.rpartition('_')
+        return datetime.fromisoformat(ts), int(signal_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid cursor. Expected <created_at ISO>_<id>, got: {cursor}"
+        )
+
+
 def to_python(val):
     """Convert numpy types to Python native types"""
     import numpy as np
@@ -506,6 +529,7 @@ async def get_signal_history(
     exit_reasons: Optional[List[str]] = Query(None),
     limit: int = 100,
     offset: int = 0,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
     """
@@ -521,6 +545,8 @@ async def get_signal_history(
     - max_score: Maximum combined score
     - limit: Maximum number of results (default: 100)
     - offset: Pagination offset (default: 0)
+    - cursor: Keyset cursor from a previous response's next_cursor
+      (created_at, id); if given, offset is ignored
     
     Returns signals with status='active', 'expired' or 'archived'
     """
@@ -684,53 +710,67 @@ async def get_signal_history(
             if exit_reason_conditions:
                 query = query.filter(or_(*exit_reason_conditions))
 
-        # Get total count before pagination
-        total_count = query.count()
-
-        # Compute P&L summary across ALL filtered signals (not just current page)
-        all_signal_ids_for_summary = [s.id for s in query.all()]
+        # Total count + P&L summary across ALL filtered signals (not just current
+        # page) — egyetlen aggregát lekérdezés: szűrt signal id-k LEFT JOIN trade-ek
+        from sqlalchemy import case
+        filtered_ids = query.with_entities(Signal.id).subquery()
+        is_closed = SimulatedTrade.status == 'CLOSED'
+        summary_row = db.query(
+            func.count(func.distinct(filtered_ids.c.id)),
+            func.sum(case((is_closed, 1), else_=0)),
+            func.sum(case((SimulatedTrade.status == 'OPEN', 1), else_=0)),
+            func.sum(case((is_closed, SimulatedTrade.pnl_amount_huf))),
+            func.sum(case((is_closed, SimulatedTrade.pnl_percent))),
+            func.sum(case((and_(is_closed, func.coalesce(SimulatedTrade.pnl_amount_huf, 0) >= 0), 1), else_=0)),
+        ).select_from(filtered_ids).outerjoin(
+            SimulatedTrade, SimulatedTrade.entry_signal_id == filtered_ids.c.id
+        ).one()
+        total_count, closed_cnt, open_cnt, total_huf, total_pct, win_cnt = summary_row
+        closed_cnt = closed_cnt or 0
 
         pnl_summary = {
-            "closed_count": 0,
-            "open_count": 0,
+            "closed_count": closed_cnt,
+            "open_count": open_cnt or 0,
             "open_trade_ids": [],
             "total_pnl_huf": None,
             "total_pnl_percent": None,
             "total_net_pnl_percent": None,
             "win_rate": None,
         }
-        if all_signal_ids_for_summary:
-            all_trades_for_summary = db.query(SimulatedTrade).filter(
-                SimulatedTrade.entry_signal_id.in_(all_signal_ids_for_summary)
-            ).all()
-            closed_huf_values = [
-                float(t.pnl_amount_huf)
-                for t in all_trades_for_summary
-                if t.status == 'CLOSED' and t.pnl_amount_huf is not None
+        if open_cnt:
+            pnl_summary["open_trade_ids"] = [
+                trade_id for (trade_id,) in db.query(SimulatedTrade.id).filter(
+                    SimulatedTrade.status == 'OPEN',
+                    SimulatedTrade.entry_signal_id.in_(select(filtered_ids.c.id)),
+                ).order_by(SimulatedTrade.id)
             ]
-            closed_pct_values = [
-                float(t.pnl_percent)
-                for t in all_trades_for_summary
-                if t.status == 'CLOSED' and t.pnl_percent is not None
-            ]
-            _TARGET_POS_HUF = 700_000
-            closed_cnt = sum(1 for t in all_trades_for_summary if t.status == 'CLOSED')
-            win_cnt    = sum(1 for t in all_trades_for_summary if t.status == 'CLOSED' and (t.pnl_amount_huf or 0) >= 0)
-            pnl_summary["closed_count"] = closed_cnt
-            pnl_summary["open_count"] = sum(1 for t in all_trades_for_summary if t.status == 'OPEN')
-            pnl_summary["open_trade_ids"] = [t.id for t in all_trades_for_summary if t.status == 'OPEN']
-            if closed_huf_values:
-                total_huf = sum(closed_huf_values)
-                pnl_summary["total_pnl_huf"] = total_huf
-                # Átlagos %/trade: átlagos HUF nyereség / target pozícióméret
-                pnl_summary["total_net_pnl_percent"] = (total_huf / closed_cnt) / _TARGET_POS_HUF * 100
-            if closed_pct_values:
-                pnl_summary["total_pnl_percent"] = sum(closed_pct_values)
-            if closed_cnt > 0:
-                pnl_summary["win_rate"] = win_cnt / closed_cnt * 100
-
-        # Order by created_at descending (newest first) and apply pagination
-        signals = query.order_by(Signal.created_at.desc()).limit(limit).offset(offset).all()
+        _TARGET_POS_HUF = 700_000
+        if total_huf is not None:
+            pnl_summary["total_pnl_huf"] = float(total_huf)
+            # Átlagos %/trade: átlagos HUF nyereség / target pozícióméret
+            pnl_summary["total_net_pnl_percent"] = (float(total_huf) / closed_cnt) / _TARGET_POS_HUF * 100
+        if total_pct is not None:
+            pnl_summary["total_pnl_percent"] = float(total_pct)
+        if closed_cnt > 0:
+            pnl_summary["win_rate"] = (win_cnt or 0) / closed_cnt * 100
+
+        # Order by created_at descending (newest first), id tie-break.
+        # cursor: keyset lapozás (created_at, id) < cursor — a created_at
+        # indexen (rowid = id) mélységtől független; különben limit/offset
+        page_query = query
+        if cursor:
+            cursor_ts, cursor_id = _parse_history_cursor(cursor)
+            page_query = page_query.filter(or_(
+                Signal.created_at < cursor_ts,
+                and_(Signal.created_at == cursor_ts, Signal.id < cursor_id),
+            ))
+        page_query = page_query.order_by(Signal.created_at.desc(), Signal.id.desc()).limit(limit)
+        if not cursor:
+            page_query = page_query.offset(offset)
+        signals = page_query.all()
+        next_cursor = None
+        if signals and len(signals) == limit and signals[-1].created_at is not None:
+            next_cursor = f"{signals[-1].created_at.isoformat()}_{signals[-1].id}"
 
         # Fetch all simulated trades for these signals in one query
         signal_ids = [s.id for s in signals]
@@ -742,6 +782,9 @@ async def get_signal_history(
             for trade in trades:
                 trades_by_signal[trade.entry_signal_id] = trade
 
+        # 2H direction eredmények: egy price_data lekérdezés a teljes lapra
+        direction_results = _compute_direction_results(signals, db)
+
         # Format response (same format as get_signals)
         signals_list = []
         for signal in signals:
@@ -763,9 +806,7 @@ async def get_signal_history(
                     "usd_huf_rate": float(trade.usd_huf_rate) if trade.usd_huf_rate is not None else None,
                 }
 
-            direction_result = _compute_direction_result(
-                signal.created_at, signal.ticker_symbol, signal.decision, db
-            )
+            direction_result = direction_results[signal.id]
 
             signals_list.append({
                 "id": signal.id,
@@ -802,6 +843,7 @@ async def get_signal_history(
             "signals": signals_list,
             "total": total_count,
             "pnl_summary": pnl_summary,
+            "next_cursor": next_cursor,
             "filters_applied": {
                 "from_date": from_date,
                 "to_date": to_date,
@@ -811,7 +853,8 @@ async def get_signal_history(
                 "min_score": min_score,
                 "max_score": max_score,
                 "limit": limit,
-                "offset": offset
+                "offset": offset,
+                "cursor": cursor,
             }
         }
         
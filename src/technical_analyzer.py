@@ -2,8 +2,8 @@
 TrendSignal MVP - Technical Analysis Module
 Manual implementation of technical indicators (no pandas-ta dependency)
 
-Version: 1.0
-Date: 2024-12-27
+Version: 1.1
+Date: 2026-10-16
 """
 
 import pandas as pd
@@ -183,52 +183,98 @@ def detect_support_resistance(
             current_price = float(recent_df['Close'].iloc[-1])
     
     # STRICTER PIVOT DETECTION: configurable order (default 7 bars each side)
-    # order parameter passed from function arguments
-    supports = []
-    resistances = []
-
-    def _scalar(val):
-        """Extract scalar float from potentially MultiIndex Series value."""
-        if isinstance(val, pd.Series):
-            return float(val.iloc[0])
-        return float(val)
-
-    # Find local minima (support) with order bars each side
-    # A true swing low must be STRICTLY lower than ALL surrounding bars
-    for i in range(order, len(recent_df) - order):
-        left_window  = recent_df['Low'].iloc[i-order:i]
-        right_window = recent_df['Low'].iloc[i+1:i+order+1]
-        current_value = recent_df['Low'].iloc[i]
-
-        try:
-            current_float = _scalar(current_value)
-            left_min      = _scalar(left_window.min())
-            right_min     = _scalar(right_window.min())
-        except Exception:
-            continue
-
-        # Strictly less than all neighbours on both sides
-        if current_float < left_min and current_float < right_min:
-            supports.append(current_float)
-
-    # Find local maxima (resistance) with order bars each side
-    # A true swing high must be STRICTLY higher than ALL surrounding bars
-    for i in range(order, len(recent_df) - order):
-        left_window  = recent_df['High'].iloc[i-order:i]
-        right_window = recent_df['High'].iloc[i+1:i+order+1]
-        current_value = recent_df['High'].iloc[i]
-
-        try:
-            current_float = _scalar(current_value)
-            left_max      = _scalar(left_window.max())
-            right_max     = _scalar(right_window.max())
-        except Exception:
-            continue
-
-        # Strictly greater than all neighbours on both sides
-        if current_float > left_max and current_float > right_max:
-            resistances.append(current_float)
+    # A true swing low/high must be STRICTLY lower/higher than ALL surrounding bars
+    supports, resistances = detect_pivots(
+        _first_column(recent_df['Low']), _first_column(recent_df['High']), order
+    )
     
+    return build_sr_levels(supports, resistances, current_price, proximity_pct, min_samples)
+
+
+def _first_column(col) -> np.ndarray:
+    """OHLC column as float array (MultiIndex columns: first ticker)."""
+    if isinstance(col, pd.DataFrame):
+        col = col.iloc[:, 0]
+    return np.asarray(col, dtype=float)
+
+
+def _pivot_mask(values: np.ndarray, order: int, lows: bool) -> np.ndarray:
+    """
+    Strict swing pivots with `order` bars on each side, using rolling-window
+    extrema (sliding_window_view) instead of per-bar slicing.
+
+    NaN neighbours are skipped (pandas min/max semantics); a side with no
+    valid neighbour, or a NaN bar itself, is never a pivot.
+    """
+    n = len(values)
+    mask = np.zeros(n, dtype=bool)
+    if order < 1 or n < 2 * order + 1:
+        return mask
+
+    nan = np.isnan(values)
+    filled = np.where(nan, np.inf if lows else -np.inf, values)
+    windows = np.lib.stride_tricks.sliding_window_view(filled, order)
+    extreme = windows.min(axis=1) if lows else windows.max(axis=1)   # extreme[j] = window [j, j+order)
+    has_value = np.lib.stride_tricks.sliding_window_view(~nan, order).any(axis=1)
+
+    idx = np.arange(order, n - order)
+    left, right = idx - order, idx + 1
+    current = values[idx]
+    if lows:
+        hit = (current < extreme[left]) & (current < extreme[right])
+    else:
+        hit = (current > extreme[left]) & (current > extreme[right])
+    mask[idx] = hit & has_value[left] & has_value[right]
+    return mask
+
+
+def detect_pivot_indices(low, high, order: int = 7) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Bar positions of the swing lows and swing highs (see detect_pivots()).
+
+    A pivot's status only depends on its `order` neighbours on each side, so
+    positions i < n - order are final once bar n - 1 is known.
+
+    Returns: (support_idx, resistance_idx) as ascending int arrays
+    """
+    low = np.asarray(low, dtype=float)
+    high = np.asarray(high, dtype=float)
+    return (np.flatnonzero(_pivot_mask(low, order, lows=True)),
+            np.flatnonzero(_pivot_mask(high, order, lows=False)))
+
+
+def detect_pivots(low, high, order: int = 7) -> Tuple[list, list]:
+    """
+    Swing lows (supports) and swing highs (resistances) in bar order.
+
+    A bar i (order <= i < len - order) is a swing low if its Low is strictly
+    below every Low in the `order` bars on each side; swing highs likewise.
+
+    Returns: (supports, resistances) as lists of floats
+    """
+    low = np.asarray(low, dtype=float)
+    high = np.asarray(high, dtype=float)
+    sup_idx, res_idx = detect_pivot_indices(low, high, order)
+    return low[sup_idx].tolist(), high[res_idx].tolist()
+
+
+def build_sr_levels(
+    supports: list,
+    resistances: list,
+    current_price: float,
+    proximity_pct: float = 0.04,
+    min_samples: int = 3
+) -> Dict[str, list]:
+    """
+    Turn raw pivot prices into S/R levels (clustering, distance filter, top N).
+
+    Second half of detect_support_resistance(); callable on its own when the
+    pivots are already known (e.g. maintained incrementally by the archive
+    signal generator).
+
+    Returns:
+        Same structure as detect_support_resistance()
+    """
     # CLUSTER nearby levels with proximity_pct tolerance and min_samples validation
     supports = cluster_levels(supports, proximity_pct, min_samples)
     resistances = cluster_levels(resistances, proximity_pct, min_samples)
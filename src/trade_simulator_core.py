@@ -22,24 +22,39 @@ SL dinamikusan frissülhet:
   - EOD trailing SL (csak LONG): nap végén day_close × (1 - sl_pct), csak felfelé;
     LONG_TRAILING_TIGHTEN_DAY-tól szűkebb szorzó
 
-Version: 1.3 – breakeven SL = entry ± BREAKEVEN_FEE_PCT (jutalékot fedező breakeven)
-Date: 2026-03-29
+Gyorsított út (simulate_exit_fast):
+  TradingBars — tickerenként egyszer: a kereskedési bar-ok oszloposan + blokk
+  max/min tömbök. Az SL/TP első átlépése blokk-kereséssel (nem bar-walk); ha
+  előtte útvonalfüggő szabály (same-dir SL, breakeven, TP tightening, LONG
+  trailing SL) léphetne életbe, None-t ad és a hívó a teljes simulate_exit()-et
+  futtatja — az eredmény bitre azonos.
+
+Kereskedési idő / EOD: src.trading_calendar (naponta cache-elt session határok,
+TradingBars-hoz vektorizált bar_flags()) — bar-onként nincs pytz konverzió.
+
+Version: 1.6 – kereskedési naptár: src.trading_calendar (közös a live / API kóddal)
+Date: 2026-10-16
 """
 
-from bisect import bisect_left
+from bisect import bisect_left, bisect_right
 from dataclasses import dataclass
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
-import pytz
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+import numpy as np
 
-_ET_TZ = pytz.timezone('America/New_York')
+from src.trading_calendar import (
+    bar_flags as _bar_flags,
+    is_last_bar_of_day as _is_last_bar_of_day,
+    is_trading_hours as _is_trading_hours,   # re-export: archive_backtest_service importálja
+    is_weekend as _is_weekend,
+)
 
 # ── Konstansok ───────────────────────────────────────────────────────────────
 
 ALERT_THRESHOLD              = 25           # Opposing / same-dir signal küszöb
 MAX_HOLD_BARS                = 10 * 26      # 10 kereskedési nap × 26 bar/nap (15m, 09:30–16:00 ET)
 # US_OPEN_UTC / US_CLOSE_UTC: csak EST referencia — DST-ben a tényleges UTC órák eltérnek.
-# _is_trading_hours() DST-aware pytz konverzióval dolgozik, ezeket a konstansokat ne használd.
+# _is_trading_hours() DST-aware (src.trading_calendar), ezeket a konstansokat ne használd.
 US_OPEN_UTC                  = (14, 30)     # 09:30 ET EST-ben (EDT-ben: 13:30 UTC!)
 US_CLOSE_UTC                 = (21,  0)     # 16:00 ET EST-ben (EDT-ben: 20:00 UTC!)
 STAGNATION_CONSECUTIVE_SLOTS = 10           # 10 × 15 min = 150 perc oldalazás → exit
@@ -66,10 +81,81 @@ class Bar:
     close: float
 
 
+class TradingBars:
+    """
+    Egy ticker kereskedési bar-jai (hétvége / kereskedési időn kívüli bar-ok
+    nélkül) oszloposan — simulate_exit_fast() bemenete. Tickerenként egyszer
+    épül, a jelek (start, end) index-tartományt használnak belőle.
+
+    src_idx      : a bar indexe az eredeti (szűretlen) bar sorozatban
+    last_of_day  : a nap utolsó kereskedési bar-ja (EOD kezelés)
+    day_index    : kereskedési nap sorszáma (trading_calendar.bar_flags)
+    _bmax/_bmin  : high/low maximuma/minimuma _BLOCK méretű blokkonként
+                   (first-cross kereséshez)
+    """
+
+    _BLOCK = 64
+
+    def __init__(self, symbol: str, timestamps: List[datetime],
+                 opens, highs, lows, closes):
+        flags = _bar_flags(timestamps, symbol)
+        keep = np.flatnonzero(flags.is_trading)
+        self.symbol = symbol
+        self.src_idx = keep.astype(np.int64)
+        self.ts = [timestamps[i] for i in keep.tolist()]
+        self.open = np.asarray(opens, dtype=np.float64)[self.src_idx]
+        self.high = np.asarray(highs, dtype=np.float64)[self.src_idx]
+        self.low = np.asarray(lows, dtype=np.float64)[self.src_idx]
+        self.close = np.asarray(closes, dtype=np.float64)[self.src_idx]
+        self.last_of_day = flags.is_last_bar_of_day[keep]
+        self.day_index = flags.trading_day_index[keep]
+        starts = np.arange(0, len(keep), self._BLOCK)
+        if len(keep):
+            self._bmax = np.maximum.reduceat(self.high, starts)
+            self._bmin = np.minimum.reduceat(self.low, starts)
+        else:
+            self._bmax = self._bmin = np.empty(0)
+
+    def __len__(self) -> int:
+        return len(self.ts)
+
+    def window(self, src_start: int, src_end: int) -> Tuple[int, int]:
+        """Eredeti [src_start, src_end) bar-tartomány → kereskedési bar index-tartomány."""
+        a = int(np.searchsorted(self.src_idx, src_start, side="left"))
+        b = int(np.searchsorted(self.src_idx, src_end, side="left"))
+        return a, b
+
+    def first_high_at_or_above(self, a: int, b: int, level: float) -> int:
+        """Első k ∈ [a, b), ahol high[k] >= level (nincs: b)."""
+        return self._first_cross(self.high, self._bmax, a, b, level, up=True)
+
+    def first_low_at_or_below(self, a: int, b: int, level: float) -> int:
+        """Első k ∈ [a, b), ahol low[k] <= level (nincs: b)."""
+        return self._first_cross(self.low, self._bmin, a, b, level, up=False)
+
+    def _first_cross(self, values, blocks, a, b, level, up) -> int:
+        B = self._BLOCK
+        hit = (lambda v: v >= level) if up else (lambda v: v <= level)
+        head_end = min(b, (a // B + 1) * B)
+        found = np.flatnonzero(hit(values[a:head_end]))
+        if found.size:
+            return a + int(found[0])
+        if head_end >= b:
+            return b
+        b0, b1 = head_end // B, b // B
+        blk = np.flatnonzero(hit(blocks[b0:b1]))
+        if blk.size:
+            s = (b0 + int(blk[0])) * B
+            return s + int(np.flatnonzero(hit(values[s:s + B]))[0])
+        tail = b1 * B
+        found = np.flatnonzero(hit(values[tail:b]))
+        return tail + int(found[0]) if found.size else b
+
+
 # ── Publikus API ─────────────────────────────────────────────────────────────
 
 def simulate_exit(
-    bars: List,                                    # List[Bar] vagy List[PriceCandle] (duck-typed)
+    bars: List,                                    # List[Bar] / List[PriceCandle] / CandleView
     direction: str,                                # "LONG" | "SHORT"
     entry_price: float,
     sl: float,
@@ -79,6 +165,7 @@ def simulate_exit(
     opp_list: List[datetime],                      # Opposing signal timestampok (rendezve)
     same_dir_signals: List[Tuple[datetime, float]],# [(ts, sl_price)] azonos irányú alert-szintű
     symbol: str,                                   # Ticker (BÉT: .BD végű, US: egyéb)
+    same_dir_ts: Optional[List[datetime]] = None,  # same_dir_signals timestampjai (előre épített)
 ) -> Dict:
     """
     Végigmegy a bar-okon és megkeresi az első exit triggert.
@@ -88,6 +175,9 @@ def simulate_exit(
     bars : List[Bar]
         Rendezett bar lista az entry bar-tól (inclusive). Duck-typed: Bar vagy PriceCandle
         egyaránt elfogadott, feltéve hogy timestamp/open/high/low/close attribútumai vannak.
+        Oszlopos nézet (pl. optimizer.signal_data.CandleView) is átadható: ha van
+        iter_ohlc() metódusa, a (timestamp, open, high, low, close) tuple-öket
+        járjuk be közvetlenül, bar objektumok nélkül.
     direction : "LONG" | "SHORT"
     entry_price : Belépési ár
     sl : Kezdeti stop-loss ár
@@ -97,6 +187,9 @@ def simulate_exit(
     opp_list : Opposing signal timestampok (rendezve) — LONG-hoz SELL signalok, SHORT-hoz BUY-ok
     same_dir_signals : [(ts, sl_price)] — azonos irányú alert-szintű signalok SL frissítéshez
     symbol : Ticker symbol
+    same_dir_ts : same_dir_signals timestampjai külön listában (opcionális).
+        Ha a hívó előre felépítette, a bisect közvetlenül ezen fut — nem épül
+        új lista minden trade-nél.
 
     Returns
     -------
@@ -121,10 +214,11 @@ def simulate_exit(
     bars_held = 0
 
     # Pointer az azonos irányú signalokban — signal_ts utáni első elemtől indulunk
-    sd_idx = bisect_left([s[0] for s in same_dir_signals], signal_ts)
+    if same_dir_ts is None:
+        same_dir_ts = [s[0] for s in same_dir_signals]
+    sd_idx = bisect_left(same_dir_ts, signal_ts)
 
-    for bar in bars:
-        bar_ts = bar.timestamp
+    for bar_ts, o, h, l, c in _iter_bars(bars):
 
         # Kereskedési időn kívüli bar-okat kihagyjuk
         if _is_weekend(bar_ts) or not _is_trading_hours(bar_ts, symbol):
@@ -150,11 +244,11 @@ def simulate_exit(
         # Grace period: az első STAGNATION_GRACE_BARS kereskedési bar alatt
         # nem számolunk — a trade-nek időt adunk a kibontakozáshoz.
         if stagnation_band > 0 and bars_held > STAGNATION_GRACE_BARS:
-            in_band = abs(bar.close - entry_price) <= stagnation_band
+            in_band = abs(c - entry_price) <= stagnation_band
             stagnation_slots = stagnation_slots + 1 if in_band else 0
             if stagnation_slots >= STAGNATION_CONSECUTIVE_SLOTS:
                 return {
-                    "exit_price":    bar.close,
+                    "exit_price":    c,
                     "exit_time":     bar_ts,
                     "exit_reason":   "STAGNATION_EXIT",
                     "duration_bars": bars_held,
@@ -163,7 +257,6 @@ def simulate_exit(
             stagnation_slots = 0  # grace period alatt a számláló nullán marad
 
         # ── 2. SL / TP ────────────────────────────────────────────────────
-        h, l, o = bar.high, bar.low, bar.open
 
         if direction == "LONG":
             sl_hit = l <= current_sl
@@ -193,17 +286,17 @@ def simulate_exit(
         if direction == "LONG":
             tp_range_val = initial_tp - entry_price
             if tp_range_val > 0:
-                tp_progress = (bar.close - entry_price) / tp_range_val
+                tp_progress = (c - entry_price) / tp_range_val
                 if tp_progress >= 0.50:
-                    new_tp = bar.close + 0.15 * tp_range_val
+                    new_tp = c + 0.15 * tp_range_val
                     if new_tp < current_tp:
                         current_tp = round(new_tp, 4)
         elif direction == "SHORT":
             tp_range_val = entry_price - initial_tp
             if tp_range_val > 0:
-                tp_progress = (entry_price - bar.close) / tp_range_val
+                tp_progress = (entry_price - c) / tp_range_val
                 if tp_progress >= 0.50:
-                    new_tp = bar.close - 0.15 * tp_range_val
+                    new_tp = c - 0.15 * tp_range_val
                     if new_tp > current_tp:
                         current_tp = round(new_tp, 4)
 
@@ -247,18 +340,15 @@ def simulate_exit(
 
         # ── 3. OPPOSING_SIGNAL – LETILTVA (elemzés: -1700pp kumulált veszteség, 46.4% dir_acc)
         # if pending_opp_exit is not None and bar_ts >= pending_opp_exit:
-        #     return {"exit_price": bar.open, "exit_time": bar_ts,
+        #     return {"exit_price": o, "exit_time": bar_ts,
         #             "exit_reason": "OPPOSING_SIGNAL", "duration_bars": bars_held}
 
         # ── 4. EOD kezelés (nap utolsó barján) ───────────────────────────
-        bar_end = bar_ts + timedelta(minutes=15)
-        is_last_bar_of_day = not _is_trading_hours(bar_end, symbol) and not _is_weekend(bar_end)
-
-        if is_last_bar_of_day:
+        if _is_last_bar_of_day(bar_ts, symbol):
             if direction == "SHORT":
                 # SHORT trade-ek intraday kötelezők – nap végén zárjuk
                 return {
-                    "exit_price":    bar.close,
+                    "exit_price":    c,
                     "exit_time":     bar_ts,
                     "exit_reason":   "EOD_AUTO_LIQUIDATION",
                     "duration_bars": bars_held,
@@ -266,18 +356,18 @@ def simulate_exit(
             else:
                 # LONG: EOD trailing SL (csak felfelé, profit lock-in)
                 trading_days_held += 1
-                if bar.close > entry_price:
+                if c > entry_price:
                     eff_sl_pct = (orig_sl_pct * LONG_TRAILING_TIGHTEN_FACTOR
                                   if trading_days_held >= LONG_TRAILING_TIGHTEN_DAY
                                   else orig_sl_pct)
-                    trailing_sl = round(bar.close * (1.0 - eff_sl_pct), 4)
+                    trailing_sl = round(c * (1.0 - eff_sl_pct), 4)
                     if trailing_sl > current_sl:
                         current_sl = trailing_sl
 
         # ── 5. MAX HOLD ───────────────────────────────────────────────────
         if bars_held > MAX_HOLD_BARS:
             return {
-                "exit_price":    bar.close,
+                "exit_price":    c,
                 "exit_time":     bar_ts,
                 "exit_reason":   "MAX_HOLD_LIQUIDATION",
                 "duration_bars": bars_held,
@@ -298,29 +388,134 @@ def simulate_exit(
     }
 
 
-# ── Belső segédfüggvények ────────────────────────────────────────────────────
+def simulate_exit_fast(
+    tb: TradingBars,
+    start: int,                                    # kereskedési bar index (TradingBars.window)
+    end: int,
+    direction: str,
+    entry_price: float,
+    sl: float,
+    tp: float,
+    signal_ts: datetime,
+    same_dir_signals: List[Tuple[datetime, float]],# [(ts, sl_price)] azonos irányú alert-szintű
+    same_dir_ts: List[datetime],                   # same_dir_signals timestampjai
+) -> Optional[Dict]:
+    """
+    simulate_exit() gyorsított útja, ha az exit-et NEM előzi meg útvonalfüggő
+    szabály. Ugyanazt a Dict-et adja, mint simulate_exit() az azonos bar-okon;
+    None, ha nem dönthető el teljes bar-walk nélkül:
+      - azonos irányú signal, ami az exit bar-ig (bezárólag) javítaná az SL-t
+      - TP tightening / breakeven / LONG EOD trailing SL az exit előtt
+        (ill. ugyanazon a bar-on, ha az exit a 2b re-check után jönne)
+
+    Az SL/TP első átlépése TradingBars blokk max/min kereséssel megy, a
+    stagnation / tightening / breakeven / EOD maszkok csak az exit horizontig.
+    """
+    n = end - start
+    if n <= 0:
+        return {"exit_price": None, "exit_time": None, "exit_reason": "OPEN", "duration_bars": 0}
+
+    long_ = direction == "LONG"
+    if long_:
+        k_sl = tb.first_low_at_or_below(start, end, sl) - start
+        k_tp = tb.first_high_at_or_above(start, end, tp) - start
+    else:
+        k_sl = tb.first_high_at_or_above(start, end, sl) - start
+        k_tp = tb.first_low_at_or_below(start, end, tp) - start
+    k_hit = min(k_sl, k_tp)
+
+    # Exit horizont: SL/TP, MAX_HOLD vagy az ablak vége
+    k_max_hold = MAX_HOLD_BARS if MAX_HOLD_BARS < n else n
+    horizon = min(k_hit, k_max_hold, n - 1)
+    sl_ = slice(start, start + horizon + 1)
+    h, l, c = tb.high[sl_], tb.low[sl_], tb.close[sl_]
+
+    # ── Útvonalfüggő módosítások (a bar SL/TP checkje UTÁN lépnek életbe) ──
+    initial_risk = abs(entry_price - sl)
+    k_mod = n
+    if long_:
+        tp_range = tp - entry_price
+        if tp_range > 0:
+            k_mod = min(k_mod, _first_true((c - entry_price) / tp_range >= 0.50, n))
+        if initial_risk > 0 and sl < entry_price:
+            k_mod = min(k_mod, _first_true(h >= entry_price + 1.0 * initial_risk, n))
+        k_mod = min(k_mod, _first_true(tb.last_of_day[sl_] & (c > entry_price), n))
+        k_eod = n
+    else:
+        tp_range = entry_price - tp
+        if tp_range > 0:
+            k_mod = min(k_mod, _first_true((entry_price - c) / tp_range >= 0.50, n))
+        if initial_risk > 0 and sl > entry_price:
+            k_mod = min(k_mod, _first_true(l <= entry_price - 1.0 * initial_risk, n))
+        k_eod = _first_true(tb.last_of_day[sl_], n)
+
+    # ── Stagnation (a bar SL/TP checkje ELŐTT) ─────────────────────────────
+    k_stag = n
+    band = STAGNATION_BAND_FACTOR * initial_risk if initial_risk > 0 else 0.0
+    first_full = STAGNATION_GRACE_BARS + STAGNATION_CONSECUTIVE_SLOTS - 1
+    if band > 0 and horizon >= first_full:
+        in_band = np.abs(c[STAGNATION_GRACE_BARS:] - entry_price) <= band
+        run = np.concatenate(([0], np.cumsum(in_band)))
+        full = run[STAGNATION_CONSECUTIVE_SLOTS:] - run[:-STAGNATION_CONSECUTIVE_SLOTS]
+        k_stag = _first_true(full >= STAGNATION_CONSECUTIVE_SLOTS, n)
+        if k_stag < n:
+            k_stag += first_full
+
+    # ── Exit kiválasztás (bar-on belüli sorrend: stag → SL/TP → mod → EOD → max hold)
+    if k_stag < n and k_stag <= k_hit and k_stag <= k_eod and k_stag <= k_max_hold:
+        k, allowed = k_stag, k_mod >= k_stag
+        result = {"exit_price": float(c[k]), "exit_reason": "STAGNATION_EXIT"}
+    elif k_hit < n and k_hit <= k_eod and k_hit <= k_max_hold:
+        k, allowed = k_hit, k_mod >= k_hit
+        if k_sl == k_tp:
+            o = tb.open[start + k]
+            sl_first = abs(o - sl) <= abs(o - tp)
+        else:
+            sl_first = k_sl < k_tp
+        result = ({"exit_price": sl, "exit_reason": "SL_HIT"} if sl_first
+                  else {"exit_price": tp, "exit_reason": "TP_HIT"})
+    elif k_eod < n and k_eod <= k_max_hold:
+        k, allowed = k_eod, k_mod > k_eod
+        result = {"exit_price": float(c[k]), "exit_reason": "EOD_AUTO_LIQUIDATION"}
+    elif k_max_hold < n:
+        k, allowed = k_max_hold, k_mod > k_max_hold
+        result = {"exit_price": float(c[k]), "exit_reason": "MAX_HOLD_LIQUIDATION"}
+    else:
+        k, allowed = n - 1, k_mod >= n
+        result = {"exit_price": None, "exit_reason": "OPEN"}
+
+    if not allowed:
+        return None
+
+    # Azonos irányú signal az exit bar-ig (bezárólag), ami javítja az SL-t
+    lo = bisect_right(same_dir_ts, signal_ts)
+    hi = bisect_right(same_dir_ts, tb.ts[start + k], lo)
+    for _, sig_sl in same_dir_signals[lo:hi]:
+        if (sig_sl > sl) if long_ else (sig_sl < sl):
+            return None
+
+    if result["exit_reason"] == "OPEN":
+        result["exit_time"] = None
+        result["duration_bars"] = n
+    else:
+        result["exit_time"] = tb.ts[start + k]
+        result["duration_bars"] = k + 1
+    return result
 
-def _is_trading_hours(dt: datetime, symbol: str) -> bool:
-    """DST-aware kereskedési idő ellenőrzés.
 
-    US piacok: 9:30–16:00 ET (pytz DST-konverzióval).
-      - EST (téli): 14:30–21:00 UTC
-      - EDT (nyári, ~márc.–nov.): 13:30–20:00 UTC
-    BÉT: 8:00–16:00 UTC (CET/CEST egyforma UTC-offszet a .BD tickereknél).
+# ── Belső segédfüggvények ────────────────────────────────────────────────────
 
-    dt: naive UTC datetime (ahogy az adatbázisban tárolva van).
-    """
-    if symbol.endswith(".BD"):
-        td = dt.hour + dt.minute / 60.0
-        return 8.0 <= td < 16.0
-    # US: DST-aware konverzió
-    et_time = pytz.utc.localize(dt).astimezone(_ET_TZ)
-    td = et_time.hour + et_time.minute / 60.0
-    return 9.5 <= td < 16.0  # 9:30–16:00 ET
+def _first_true(mask: np.ndarray, default: int) -> int:
+    idx = np.flatnonzero(mask)
+    return int(idx[0]) if idx.size else default
 
 
-def _is_weekend(dt: datetime) -> bool:
-    return dt.weekday() >= 5
+def _iter_bars(bars) -> Iterator[Tuple[datetime, float, float, float, float]]:
+    """(timestamp, open, high, low, close) tuple-ök — oszlopos nézetből vagy bar objektumokból."""
+    iter_ohlc = getattr(bars, "iter_ohlc", None)
+    if iter_ohlc is not None:
+        return iter_ohlc()
+    return ((b.timestamp, b.open, b.high, b.low, b.close) for b in bars)
 
 
 def _find_opposing_signal(
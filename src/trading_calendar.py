@@ -0,0 +1,160 @@
+"""
+Kereskedési naptár — közös implementáció.
+
+Egy helyen van a kereskedési idő logika, amit eddig négy modul másolt:
+  - trade_simulator_core  (exit szimuláció, archive backtest, optimizer)
+  - BacktestService       (live trade szimuláció)
+  - PriceService          (_is_trading_hours / _is_weekend)
+  - signals_api           (direction result: entry ellenőrzés, EOD)
+
+Piacok (naive UTC timestampok, ahogy az adatbázisban vannak):
+  US  : 9:30–16:00 ET, DST-aware
+          EST (téli): 14:30–21:00 UTC | EDT (nyári): 13:30–20:00 UTC
+  BÉT : 8:00–16:00 UTC (.BD tickerek)
+
+A pytz konverzió naponta egyszer fut (session_bounds() cache), bar-onként
+csak két datetime összehasonlítás marad. Nagy bar-sorozatokra bar_flags()
+NumPy-jal, egy lépésben számolja a bar-onkénti flag-eket.
+
+Version: 1.0
+Date: 2026-10-16
+"""
+
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from typing import Tuple
+
+import numpy as np
+import pytz
+
+_ET_TZ = pytz.timezone('America/New_York')
+
+US_SESSION_OPEN_ET  = time(9, 30)
+US_SESSION_CLOSE_ET = time(16, 0)
+BET_SESSION_UTC     = (time(8, 0), time(16, 0))
+BAR_MINUTES         = 15
+
+
+def is_bet(symbol: str) -> bool:
+    return symbol.endswith('.BD')
+
+
+def is_weekend(dt: datetime) -> bool:
+    return dt.weekday() >= 5
+
+
+@lru_cache(maxsize=8192)
+def _us_session_utc(day: date) -> Tuple[datetime, datetime]:
+    """Egy ET naptári nap 9:30–16:00 ET sessionje naive UTC-ben."""
+    def _to_utc(t: time) -> datetime:
+        local = _ET_TZ.localize(datetime.combine(day, t))
+        return local.astimezone(pytz.utc).replace(tzinfo=None)
+    return _to_utc(US_SESSION_OPEN_ET), _to_utc(US_SESSION_CLOSE_ET)
+
+
+@lru_cache(maxsize=8192)
+def _et_midnight_utc(day: date) -> datetime:
+    """Az ET nap kezdete (00:00 ET) naive UTC-ben."""
+    local = _ET_TZ.localize(datetime.combine(day, time(0, 0)))
+    return local.astimezone(pytz.utc).replace(tzinfo=None)
+
+
+def session_bounds(day: date, symbol: str) -> Tuple[datetime, datetime]:
+    """
+    (open_utc, close_utc) — a nap kereskedési sessionje naive UTC-ben.
+    Hétvégén is értelmezett (a hétvége szűrés külön: is_weekend()).
+    """
+    if is_bet(symbol):
+        return (datetime.combine(day, BET_SESSION_UTC[0]),
+                datetime.combine(day, BET_SESSION_UTC[1]))
+    return _us_session_utc(day)
+
+
+def is_trading_hours(dt: datetime, symbol: str) -> bool:
+    """
+    DST-aware kereskedési idő ellenőrzés: open_utc <= dt < close_utc.
+
+    A 9:30–16:00 ET session mindig ugyanarra az UTC naptári napra esik, mint az
+    ET nap, így elég dt UTC napjának sessionjét nézni.
+    """
+    open_utc, close_utc = session_bounds(dt.date(), symbol)
+    return open_utc <= dt < close_utc
+
+
+def us_eod_utc(dt_utc: datetime) -> datetime:
+    """4:00 PM ET (DST-aware) dt ET napján → naive UTC. EDT: 20:00 UTC | EST: 21:00 UTC."""
+    day = dt_utc.date()
+    if dt_utc < _et_midnight_utc(day):
+        day -= timedelta(days=1)       # UTC éjfél után, de ET-ben még az előző nap
+    return _us_session_utc(day)[1]
+
+
+def session_close_utc(dt_utc: datetime, symbol: str) -> datetime:
+    """A dt napi sessionjének zárása naive UTC-ben (BÉT: 16:00 UTC, US: 16:00 ET)."""
+    if is_bet(symbol):
+        return datetime.combine(dt_utc.date(), BET_SESSION_UTC[1])
+    return us_eod_utc(dt_utc)
+
+
+def is_last_bar_of_day(bar_ts: datetime, symbol: str) -> bool:
+    """A bar zárása (bar_ts + 15 perc) már a sessionön kívül esik, hétköznap."""
+    bar_end = bar_ts + timedelta(minutes=BAR_MINUTES)
+    return not is_trading_hours(bar_end, symbol) and not is_weekend(bar_end)
+
+
+# ── Bar-onkénti flag-ek (vektorizált) ────────────────────────────────────────
+
+@dataclass
+class BarFlags:
+    """
+    Egy ticker bar-sorozatának naptári flag-jei (azonos hosszú tömbök).
+
+    is_trading        : hétköznap és kereskedési időben van
+    is_last_bar_of_day: is_last_bar_of_day() — a bar zárása után a session véget ér
+    trading_day_index : kereskedési bar-oknál a kereskedési nap sorszáma (0-tól), egyébként -1
+    """
+    is_trading: np.ndarray
+    is_last_bar_of_day: np.ndarray
+    trading_day_index: np.ndarray
+
+
+def _weekend_mask(days: np.ndarray) -> np.ndarray:
+    # 1970-01-01 csütörtök → (napszám + 3) % 7: hétfő = 0
+    return (days.astype(np.int64) + 3) % 7 >= 5
+
+
+def _trading_mask(ts: np.ndarray, symbol: str) -> np.ndarray:
+    days = ts.astype('datetime64[D]')
+    uniq, inv = np.unique(days, return_inverse=True)
+    bounds = [session_bounds(d, symbol) for d in uniq.tolist()]
+    opens = np.array([b[0] for b in bounds], dtype='datetime64[us]')
+    closes = np.array([b[1] for b in bounds], dtype='datetime64[us]')
+    return (opens[inv] <= ts) & (ts < closes[inv])
+
+
+def bar_flags(timestamps, symbol: str) -> BarFlags:
+    """
+    is_trading / is_last_bar_of_day / trading_day_index egy lépésben.
+
+    timestamps: naive UTC datetime-ok (lista) vagy datetime64 tömb, rendezve.
+    Bar-onként ugyanazt adja, mint is_weekend() / is_trading_hours() /
+    is_last_bar_of_day(); a pytz konverzió csak az egyedi napokra fut.
+    """
+    ts = np.asarray(timestamps, dtype='datetime64[us]')
+    if ts.size == 0:
+        empty = np.zeros(0, dtype=bool)
+        return BarFlags(empty, empty.copy(), np.zeros(0, dtype=np.int64))
+
+    days = ts.astype('datetime64[D]')
+    trading = ~_weekend_mask(days) & _trading_mask(ts, symbol)
+
+    ends = ts + np.timedelta64(BAR_MINUTES, 'm')
+    last = ~_trading_mask(ends, symbol) & ~_weekend_mask(ends.astype('datetime64[D]'))
+
+    day_index = np.full(ts.size, -1, dtype=np.int64)
+    if trading.any():
+        _, dense = np.unique(days[trading], return_inverse=True)
+        day_index[trading] = dense
+    return BarFlags(trading, last, day_index)
+
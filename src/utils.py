@@ -2,11 +2,14 @@
 TrendSignal MVP - Utilities Module with Database Integration - OPTIMIZED 2× BUFFER
 Helper functions and utilities with DB persistence for price data
 
-Version: 1.2 - Optimized Backfill (2× Buffer Rule)
-Date: 2026-02-03
+Version: 1.4 - Delta fetching since the last stored candle
+Date: 2026-10-16
 Changes:
 - v1.1: Database Support + DEBUG
 - v1.2: Optimized periods based on 2× buffer of max indicator lookback (SMA_200)
+- v1.3: fetch_dual_timeframe reads through PriceCache (candle-aligned TTL, LRU)
+- v1.4: Stale DB cache → yfinance delta fetch since the last stored candle, merged
+        into the stored history; full-period fetch only beyond the provider limit
 """
 
 import yfinance as yf
@@ -31,23 +34,34 @@ def fetch_price_data(
     Fetch price data using yfinance with optional database caching.
     Returns None if data is unavailable (network error, rate limit, etc.).
     Callers must treat None as "no signal" rather than generating a zero signal.
+
+    Stale DB cache: only the candles since the last stored one are requested
+    (delta fetch), saved, and merged into the stored history. The full period
+    is downloaded only when there is no history or the gap exceeds the
+    provider's limit for the interval.
     """
     print(f"🔍 DEBUG: fetch_price_data called for {ticker_symbol} ({interval}, {period})")
 
     # ── 1. Try fresh DB cache ──────────────────────────────────────────
     if use_cache and db:
         try:
-            from src.db_helpers import get_price_data_from_db
+            from src.db_helpers import get_price_data_with_freshness
 
             period_days = _period_to_days(period)
             print(f"🔍 DEBUG: Trying DB cache ({period_days} days)...")
-            df = get_price_data_from_db(ticker_symbol, interval, period_days, db)
+            history, fresh = get_price_data_with_freshness(ticker_symbol, interval, period_days, db)
+
+            if fresh and history is not None and len(history) > 0:
+                print(f"✅ Loaded {len(history)} candles from DB cache for {ticker_symbol} ({interval})")
+                return history
 
-            if df is not None and len(df) > 0:
-                print(f"✅ Loaded {len(df)} candles from DB cache for {ticker_symbol} ({interval})")
-                return df
+            print(f"🔍 DEBUG: DB cache returned None, empty or stale")
 
-            print(f"🔍 DEBUG: DB cache returned None or empty")
+            # ── 1b. Delta fetch since the last stored candle ──────────────
+            if history is not None and len(history) > 0:
+                df = _fetch_delta(ticker_symbol, interval, period_days, history, db)
+                if df is not None:
+                    return df
         except Exception as e:
             print(f"⚠️ DB cache error, fetching from yfinance: {e}")
     else:
@@ -88,6 +102,9 @@ def fetch_price_data(
                 from src.db_helpers import save_price_data_to_db
                 print(f"🔍 DEBUG: Saving to DB...")
                 save_price_data_to_db(df, ticker_symbol, interval, db)
+                # Új sorok → a cache-elt napi 5m bucketek / periodok elavultak
+                from src.price_cache import get_price_cache
+                get_price_cache().invalidate(ticker_symbol, interval)
             except Exception as e:
                 print(f"⚠️ Could not save to DB: {e}")
 
@@ -100,6 +117,77 @@ def fetch_price_data(
         return None
 
 
+# yfinance: intraday adatok legfeljebb ennyi napra visszamenőleg kérhetők
+# (a limit széle előtt egy nap tartalékkal)
+_PROVIDER_MAX_DAYS = {
+    '1m': 6,
+    '2m': 59, '5m': 59, '15m': 59, '30m': 59, '90m': 59,
+    '60m': 729, '1h': 729,
+}
+
+
+def _fetch_delta(
+    ticker_symbol: str,
+    interval: str,
+    period_days: int,
+    history: pd.DataFrame,
+    db: Session
+) -> Optional[pd.DataFrame]:
+    """
+    Candles since the last stored one (inclusive — the last candle may have
+    been stored while still forming), merged into the stored history and
+    trimmed to the period window. Only the delta is saved to the DB.
+
+    Returns None → the caller falls back to a full-period fetch (gap beyond
+    the provider limit / the period, empty or failed response).
+    """
+    last_ts = pd.Timestamp(history.index[-1])
+    now = pd.Timestamp(datetime.now(timezone.utc)).tz_localize(None)
+    gap_days = (now - last_ts) / pd.Timedelta(days=1)
+    max_days = min(_PROVIDER_MAX_DAYS.get(interval, period_days), period_days)
+    if gap_days >= max_days:
+        print(f"🔍 DEBUG: Gap {gap_days:.1f}d ≥ {max_days}d for {ticker_symbol} ({interval}) → full fetch")
+        return None
+
+    try:
+        print(f"🔍 DEBUG: Delta fetch {ticker_symbol} ({interval}) since {last_ts}...")
+        delta = yf.Ticker(ticker_symbol).history(
+            interval=interval, start=last_ts.tz_localize('UTC').to_pydatetime()
+        )
+    except Exception as e:
+        print(f"⚠️ Delta fetch failed for {ticker_symbol} ({interval}): {e}")
+        return None
+
+    required_cols = ['Open', 'High', 'Low', 'Close', 'Volume']
+    if delta.empty or not all(col in delta.columns for col in required_cols):
+        print(f"🔍 DEBUG: Delta fetch returned no usable data for {ticker_symbol} ({interval})")
+        return None
+
+    if hasattr(delta.index, 'tz') and delta.index.tz is not None:
+        delta.index = delta.index.tz_convert('UTC').tz_localize(None)
+    delta = delta[delta.index >= last_ts]
+    if delta.empty:
+        return None
+
+    if db:
+        try:
+            from src.db_helpers import save_price_data_to_db
+            save_price_data_to_db(delta, ticker_symbol, interval, db)
+            from src.price_cache import get_price_cache
+            get_price_cache().invalidate(ticker_symbol, interval)
+        except Exception as e:
+            print(f"⚠️ Could not save delta to DB: {e}")
+
+    delta = delta.reindex(columns=history.columns, fill_value=0.0)
+    merged = pd.concat([history[history.index < delta.index[0]], delta])
+    merged = merged[~merged.index.duplicated(keep='last')].sort_index()
+    merged = merged[merged.index >= now - pd.Timedelta(days=period_days)]
+    merged.index.name = history.index.name
+
+    print(f"✅ Delta: {len(delta)} new/updated candles merged → {len(merged)} candles for {ticker_symbol} ({interval})")
+    return merged
+
+
 def _period_to_days(period: str) -> int:
     """Convert period string to days"""
     period_map = {
@@ -119,17 +207,13 @@ def _period_to_days(period: str) -> int:
 
 
 # ==========================================
-# SESSION-SCOPED CACHE FOR BATCH RUNS
+# SHARED PRICE CACHE (src.price_cache)
 # ==========================================
 
-# Global cache for fetch_dual_timeframe - cleared between runs
-_PRICE_CACHE = {}
-
-
 def clear_price_cache():
-    """Clear the session-scoped price cache (call between batch runs)"""
-    global _PRICE_CACHE
-    _PRICE_CACHE.clear()
+    """Drop every cached price entry (entries otherwise expire at the next candle close)"""
+    from src.price_cache import get_price_cache
+    get_price_cache().clear()
     print("🗑️ Price cache cleared")
 
 
@@ -144,10 +228,11 @@ def fetch_dual_timeframe(
     Each interval fetches 2× the maximum indicator period calculated from that timeframe.
     
     CACHE STRATEGY:
-    - Session-scoped in-memory cache to avoid redundant API calls within same batch run
+    - Process-wide read-through cache (src.price_cache), shared with PriceService / signals API
     - Cache key: (ticker_symbol, interval, period)
-    - Cache persists across multiple ticker processing in same run
-    - Call clear_price_cache() between runs to refresh data
+    - Entries expire at the next candle close of their interval → back-to-back
+      refreshes reuse unchanged history; LRU-bounded; concurrent fetches of the
+      same key wait for a single load
     
     TIMEFRAME-SPECIFIC CALCULATIONS:
     - 5m timeframe indicators: SMA_20, RSI_14, MACD_26 → Max: 26 × 2 = 52 candles → 2d period
@@ -166,19 +251,18 @@ def fetch_dual_timeframe(
     print(f"\n🔍 DEBUG: ===== fetch_dual_timeframe START for {ticker_symbol} =====")
     print(f"   📊 Fetching optimized 2× buffer multi-timeframe data...")
     
+    from src.price_cache import get_price_cache
+    price_cache = get_price_cache()
+
     # Helper function with caching
     def get_cached_price_data(ticker: str, interval: str, period: str):
-        cache_key = (ticker, interval, period)
-        
-        if cache_key in _PRICE_CACHE:
-            print(f"   ⚡ CACHE HIT: {ticker} {interval} {period} ({len(_PRICE_CACHE[cache_key])} candles)")
-            return _PRICE_CACHE[cache_key]
-        
-        print(f"   📊 CACHE MISS: Fetching {ticker} {interval} {period}")
-        df = fetch_price_data(ticker, interval=interval, period=period, db=db)
-        _PRICE_CACHE[cache_key] = df
+        def load():
+            print(f"   📊 CACHE MISS: Fetching {ticker} {interval} {period}")
+            return fetch_price_data(ticker, interval=interval, period=period, db=db)
+
+        df = price_cache.get_or_load(ticker, interval, period, load)
         if df is not None:
-            print(f"   ✅ Cached: {ticker} {interval} {period} ({len(df)} candles)")
+            print(f"   ⚡ {ticker} {interval} {period}: {len(df)} candles")
         return df
     
     # Intraday momentum (5m, 5 days = ensures enough candles even after weekends/holidays)
@@ -269,7 +353,7 @@ def fetch_dual_timeframe(
     if df_daily is not None: candle_summary.append(f"1d: {len(df_daily)}")
     
     print(f"   ✅ Multi-timeframe: {' | '.join(candle_summary)}")
-    print(f"   📊 Cache stats: {len(_PRICE_CACHE)} entries cached")
+    print(f"   📊 Cache stats: {price_cache.summary()}")
     
     result = {
         'intraday': df_5m,
@@ -0,0 +1,32 @@
+"""
+pytest setup: src/ on sys.path, shared in-memory database fixture
+Several src modules import their siblings top-level (from config import ...), as main.py does
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+
+@pytest.fixture
+def db_session():
+    """Session on a fresh in-memory SQLite database with the models schema
+
+    StaticPool: sessionmaker(bind=db_session.get_bind()) sessions see the same database
+    """
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+
+    from src.database import Base
+
+    engine = create_engine("sqlite://", poolclass=StaticPool,
+                           connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    yield db
+    db.close()
+    engine.dispose()
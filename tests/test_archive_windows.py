@@ -0,0 +1,65 @@
+"""
+Test gen_archive_signals incremental windows
+NewsWindow.at() and DailySR.for_date() against sentiment_at() / sr_for_date() per bar
+"""
+
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from gen_archive_signals import DailySR, NewsWindow, sentiment_at, sr_for_date
+
+FIXTURES = sorted((Path(__file__).resolve().parent / 'fixtures').glob('sr_daily_*.csv'))
+T0 = pd.Timestamp("2026-03-18 14:00", tz="UTC")
+
+
+def make_news(n=80, seed=3):
+    rng = np.random.default_rng(seed)
+    published = T0 + pd.to_timedelta(rng.integers(0, 4 * 24 * 60, n), unit="min")
+    # Items exactly on the 2h / 6h / 12h / 24h bucket edges of a bar
+    edges = [T0 + pd.Timedelta(days=2) - pd.Timedelta(hours=h) for h in (2, 6, 12, 24)]
+    return pd.DataFrame({
+        'published_at': list(published) + edges,
+        'active_score': rng.uniform(-1, 1, n + len(edges)),
+        'av_relevance_score': rng.choice([0.2, 0.5, 0.9, None], n + len(edges)),
+        'sentiment_confidence': rng.choice([0.3, 0.7, None], n + len(edges)),
+        'llm_impact_duration': rng.choice(['hours', 'days', 'weeks', None], n + len(edges)),
+    })
+
+
+def test_news_window_matches_sentiment_at():
+    """Every 5m bar of a run over four days, including bucket edges"""
+    news = make_news()
+    window = NewsWindow(news)
+    for ts in pd.date_range(T0 - pd.Timedelta(hours=1), periods=5 * 24 * 12, freq="5min", tz="UTC"):
+        assert window.at(ts) == pytest.approx(sentiment_at(news, ts)), ts
+
+
+def test_news_window_steps_back_and_naive_ts():
+    """A bar earlier than the last one rebuilds the window; naive ts is UTC"""
+    news = make_news(seed=7)
+    window = NewsWindow(news)
+    for ts in ("2026-03-20 12:00", "2026-03-19 09:30", "2026-03-21 18:05"):
+        ts = pd.Timestamp(ts)
+        assert window.at(ts) == pytest.approx(sentiment_at(news, ts))
+    assert NewsWindow(news.iloc[:0]).at(T0) == sentiment_at(news.iloc[:0], T0)
+
+
+@pytest.mark.parametrize("path", FIXTURES, ids=lambda p: p.stem)
+@pytest.mark.parametrize("lookback, eps, order, min_samples", [
+    (180, 4.0, 7, 3),
+    (60, 3.0, 10, 2),
+    (90, 4.0, 1, 3),
+])
+def test_daily_sr_matches_sr_for_date(path, lookback, eps, order, min_samples):
+    """Every date of the fixture, plus one past its end"""
+    df = pd.read_csv(path, index_col='Date', parse_dates=True).rename(columns=str.lower)
+    config = SimpleNamespace(sr_dbscan_lookback=lookback, sr_dbscan_eps=eps,
+                             sr_dbscan_order=order, sr_dbscan_min_samples=min_samples)
+    daily_sr = DailySR(df, config)
+    dates = list(df.index.date) + [df.index[-1].date() + pd.Timedelta(days=1)]
+    for d in dates:
+        assert daily_sr.for_date(d) == sr_for_date(df, d, config), d
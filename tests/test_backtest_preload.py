@@ -0,0 +1,60 @@
+"""
+Test BacktestService per-symbol preload
+One 5m candle / signal load per symbol per run, however many open trades it has
+"""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+import src.price_service as price_service
+from src.backtest_service import BacktestService
+
+NOW = datetime(2026, 3, 18, 18, 0)
+
+
+def make_service(db, monkeypatch):
+    engine = db.get_bind()
+    factory = sessionmaker(bind=engine)
+    monkeypatch.setattr(price_service, "SessionLocal", factory)
+
+    queries = []
+    event.listen(engine, "before_cursor_execute",
+                 lambda conn, cur, stmt, *args: queries.append(stmt))
+    return BacktestService(db), queries
+
+
+def count(queries, table):
+    return sum(1 for q in queries if f"FROM {table}" in q)
+
+
+def test_trades_of_one_symbol_share_one_preload(db_session, monkeypatch):
+    """Later trades of the same symbol reuse the run's preload"""
+    service, queries = make_service(db_session, monkeypatch)
+    service._run_now = NOW
+    for hours in (30, 20, 2):
+        service._preload_symbol('AAPL', NOW - timedelta(hours=hours))
+
+    assert count(queries, "price_data") == 1
+    assert count(queries, "signals") == 1
+
+
+def test_earlier_entry_extends_preload(db_session, monkeypatch):
+    """A trade entered before the preloaded range reloads once"""
+    service, queries = make_service(db_session, monkeypatch)
+    service._run_now = NOW
+    service._preload_symbol('AAPL', NOW - timedelta(hours=2))
+    service._preload_symbol('AAPL', NOW - timedelta(days=3))
+    service._preload_symbol('AAPL', NOW - timedelta(days=2))
+
+    assert count(queries, "price_data") == 2
+    assert service._signal_cache['AAPL'][0] == (NOW - timedelta(days=3)).replace(hour=0)
+
+
+def test_run_clears_fixed_now(db_session, monkeypatch):
+    """run_backtest pins now for the run only"""
+    service, _ = make_service(db_session, monkeypatch)
+    service.run_backtest(symbols=['AAPL'])
+    assert service._run_now is None
+    assert service._signal_cache == {}
@@ -0,0 +1,102 @@
+"""
+Test delta price fetching (utils._fetch_delta / fetch_price_data)
+yfinance.Ticker is replaced by a fake returning a prepared frame
+"""
+
+from datetime import datetime, timezone
+
+import pandas as pd
+
+import src.db_helpers as db_helpers
+import src.utils as utils
+
+NOW = pd.Timestamp(datetime.now(timezone.utc)).tz_localize(None).floor("h")
+
+
+class FakeTicker:
+    calls = []
+    delta = None
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+
+    def history(self, **kwargs):
+        FakeTicker.calls.append(kwargs)
+        return FakeTicker.delta.copy()
+
+
+def candles(start, periods, close, tz=None, freq="1h"):
+    idx = pd.date_range(start, periods=periods, freq=freq, tz=tz)
+    return pd.DataFrame({
+        'Open': close, 'High': close, 'Low': close, 'Close': close, 'Volume': 100,
+    }, index=idx)
+
+
+def stored_history(start, end):
+    """get_price_data_from_db() shape: naive UTC index, Dividends / Stock Splits columns"""
+    df = candles(start, int((end - start) / pd.Timedelta(hours=1)) + 1, 1.0)
+    df['Dividends'] = 0.0
+    df['Stock Splits'] = 0.0
+    df.index.name = 'Datetime'
+    return df
+
+
+def fake_yfinance(monkeypatch, delta):
+    FakeTicker.calls = []
+    FakeTicker.delta = delta
+    monkeypatch.setattr(utils.yf, "Ticker", FakeTicker)
+
+
+def test_delta_is_merged_and_trimmed(monkeypatch):
+    """The revised last candle and new ones replace the tail, rows beyond the period drop"""
+    history = stored_history(NOW - pd.Timedelta(days=6), NOW - pd.Timedelta(hours=3))
+    # Exchange-local delta starting one candle before the last stored one
+    delta = candles((NOW - pd.Timedelta(hours=4)).tz_localize("UTC").tz_convert("America/New_York"),
+                    5, [5.0, 6.0, 7.0, 8.0, 9.0])
+    fake_yfinance(monkeypatch, delta)
+
+    merged = utils._fetch_delta('AAPL', '1h', 5, history, None)
+
+    assert FakeTicker.calls[0]['start'] == (NOW - pd.Timedelta(hours=3)).tz_localize("UTC").to_pydatetime()
+    assert list(merged.columns) == list(history.columns)
+    assert merged.index.is_unique and merged.index.is_monotonic_increasing
+    assert merged.index[0] >= NOW - pd.Timedelta(days=5)
+    assert merged.index[-1] == NOW
+    assert merged['Close'].iloc[-5:].tolist() == [1.0, 6.0, 7.0, 8.0, 9.0]
+    assert merged.loc[NOW - pd.Timedelta(hours=3), 'Dividends'] == 0.0
+
+
+def test_gap_beyond_provider_limit_falls_back(monkeypatch):
+    """A 5m history older than the provider's limit is not delta-fetched"""
+    fake_yfinance(monkeypatch, candles(NOW, 1, 1.0, freq="5min"))
+    history = stored_history(NOW - pd.Timedelta(days=70), NOW - pd.Timedelta(days=65))
+
+    assert utils._fetch_delta('AAPL', '5m', 90, history, None) is None
+    assert FakeTicker.calls == []
+
+
+def test_unusable_delta_falls_back(monkeypatch):
+    """Empty responses and responses without Volume return None"""
+    history = stored_history(NOW - pd.Timedelta(days=2), NOW - pd.Timedelta(hours=3))
+    fake_yfinance(monkeypatch, candles(NOW, 0, 1.0))
+    assert utils._fetch_delta('AAPL', '1h', 5, history, None) is None
+
+    fake_yfinance(monkeypatch, candles(NOW, 2, 1.0).drop(columns='Volume'))
+    assert utils._fetch_delta('AAPL', '1h', 5, history, None) is None
+
+
+def test_stale_cache_is_read_once(monkeypatch):
+    """fetch_price_data builds the delta on the stale frame of its single DB read"""
+    history = stored_history(NOW - pd.Timedelta(days=2), NOW - pd.Timedelta(hours=3))
+    reads, deltas = [], []
+
+    def read(*args):
+        reads.append(args)
+        return history, False
+
+    monkeypatch.setattr(db_helpers, "get_price_data_with_freshness", read)
+    monkeypatch.setattr(utils, "_fetch_delta", lambda *args: deltas.append(args[3]) or args[3])
+
+    assert utils.fetch_price_data('AAPL', '1h', '5d', db=object()) is history
+    assert len(reads) == 1
+    assert deltas == [history]
@@ -0,0 +1,84 @@
+"""
+Test FinBERT micro-batcher
+Fake analyzer records every analyze_batch() call, no model needed
+"""
+
+import threading
+
+import pytest
+
+from src.finbert_batcher import FinBERTBatcher
+
+
+class FakeAnalyzer:
+    def __init__(self, fail=False):
+        self.calls = []
+        self.fail = fail
+        self.lock = threading.Lock()
+
+    def analyze_batch(self, texts, max_length=512):
+        with self.lock:
+            self.calls.append(list(texts))
+        if self.fail:
+            raise RuntimeError("model error")
+        return [{'score': float(len(t)), 'text': t} for t in texts]
+
+
+def test_results_routed_back_to_each_caller():
+    """Every thread gets the result of its own text"""
+    analyzer = FakeAnalyzer()
+    batcher = FinBERTBatcher(analyzer, max_batch_size=8, max_wait_ms=50)
+    texts = [f"news {'x' * i}" for i in range(20)]
+    results = {}
+
+    def worker(text):
+        results[text] = batcher.analyze(text)
+
+    threads = [threading.Thread(target=worker, args=(t,)) for t in texts]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+
+    assert all(results[t]['text'] == t for t in texts)
+    assert sum(len(c) for c in analyzer.calls) == len(texts)
+
+
+def test_concurrent_requests_share_batches():
+    """Requests arriving within max_wait run in few forward passes, capped at max_batch_size"""
+    analyzer = FakeAnalyzer()
+    batcher = FinBERTBatcher(analyzer, max_batch_size=4, max_wait_ms=200)
+    futures = [batcher.submit(f"t{i}") for i in range(10)]
+    for f in futures:
+        f.result(5)
+
+    assert len(analyzer.calls) == 3
+    assert max(len(c) for c in analyzer.calls) <= 4
+    assert batcher.texts_run == 10
+
+
+def test_batches_sorted_by_length():
+    """Texts collected together are grouped by length to limit padding"""
+    analyzer = FakeAnalyzer()
+    batcher = FinBERTBatcher(analyzer, max_batch_size=2, max_wait_ms=200)
+    batcher.analyze_batch(["aaaa", "a", "aaa", "aa"])
+
+    assert analyzer.calls == [["a", "aa"], ["aaa", "aaaa"]]
+
+
+def test_analyze_batch_keeps_input_order():
+    """analyze_batch returns results in the caller's order despite sorting"""
+    batcher = FinBERTBatcher(FakeAnalyzer(), max_batch_size=2, max_wait_ms=50)
+    texts = ["ccc", "a", "bb"]
+    assert [r['text'] for r in batcher.analyze_batch(texts)] == texts
+
+
+def test_model_error_reaches_every_caller():
+    """An exception in the forward pass fails the batch's futures, the worker keeps running"""
+    analyzer = FakeAnalyzer(fail=True)
+    batcher = FinBERTBatcher(analyzer, max_batch_size=4, max_wait_ms=20)
+    with pytest.raises(RuntimeError):
+        batcher.analyze("first")
+
+    analyzer.fail = False
+    assert batcher.analyze("second")['text'] == "second"
@@ -0,0 +1,195 @@
+"""
+Test optimizer fitness cache and a one-generation GA smoke run
+Synthetic signals + 15m candles, no trendsignal.db needed
+"""
+
+import random
+import sqlite3
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from optimizer import genetic
+from optimizer.fitness_cache import CachedFitness, FitnessCache, config_key, dataset_fingerprint
+from optimizer.signal_data import CANDLE_DTYPE, CandleStore, ScoreTimeline, SignalSimRow, build_signal_index
+
+
+def make_dataset(n_signals=60, seed=7):
+    """Synthetic rows for two tickers with CandleView future_candles."""
+    rng = random.Random(seed)
+    start = datetime(2026, 3, 2, 14, 30)
+    rows, timeline = [], ScoreTimeline()
+
+    for ticker in ("AAA", "BBB"):
+        n_bars = 26 * 40
+        ts = [start + timedelta(minutes=15 * i) for i in range(n_bars)]
+        close = 100 + np.cumsum(np.random.default_rng(seed).normal(0, 0.4, n_bars))
+        data = np.empty(n_bars, dtype=CANDLE_DTYPE)
+        data["timestamp"] = np.array(ts, dtype="datetime64[us]")
+        data["open"] = close
+        data["high"] = close + 0.5
+        data["low"] = close - 0.5
+        data["close"] = close
+        data["volume"] = 1000.0
+        store = CandleStore(ticker, data)
+        timeline[ticker] = []
+
+        for k in range(n_signals // 2):
+            sig_ts = ts[k * 20]
+            price = float(close[k * 20])
+            score = rng.uniform(-60, 60)
+            row = SignalSimRow(
+                signal_id=len(rows) + 1, ticker=ticker,
+                calculated_at=sig_ts.strftime("%Y-%m-%d %H:%M:%S"),
+                original_decision="BUY" if score > 0 else "SELL",
+                rsi=rng.uniform(20, 80), macd=0.1, macd_signal_val=0.05,
+                macd_histogram=rng.uniform(-1, 1), sma_20=price * 0.99,
+                sma_50=price * 0.98, sma_200=price * 0.95, adx=rng.uniform(10, 45),
+                bb_upper=price * 1.03, bb_lower=price * 0.97, bb_middle=price,
+                stoch_k=rng.uniform(0, 100), stoch_d=rng.uniform(0, 100),
+                current_price=price, volatility=1.2,
+                stored_sentiment_score=score, stored_technical_score=score,
+                stored_risk_score=10.0, stored_combined_score=score,
+                atr=1.0, atr_pct=1.0, nearest_support=price * 0.97,
+                nearest_resistance=price * 1.03,
+            )
+            row.future_candles = store.window(sig_ts, sig_ts + timedelta(days=14))
+            rows.append(row)
+            timeline[ticker].append((sig_ts, score, price * 0.97, price * 1.03))
+
+    timeline.index = build_signal_index(timeline)
+    return rows, timeline
+
+
+def test_cache_dedups_batch_and_counts_hits():
+    """Identical configs in one batch are evaluated once, repeats are hits"""
+    cache = FitnessCache("fp", persist=False)
+    calls = []
+
+    def map_fn(tasks):
+        calls.append(list(tasks))
+        return [(t, t / 2, {"train": {}, "val": {}}) for t in tasks]
+
+    cfgs = [{"a": 1.0}, {"a": 1.0000000001}, {"a": 2.0}]
+    first = cache.evaluate(cfgs, [1.0, 1.0, 2.0], map_fn)
+    second = cache.evaluate([{"a": 2.0}], [2.0], map_fn)
+
+    assert calls == [[1.0, 2.0]]
+    assert first[0] is first[1]
+    assert second[0].fitness == 1.0
+    assert (cache.hits, cache.misses) == (2, 2)
+
+
+def test_cache_lru_bound():
+    """In-memory entries never exceed max_entries"""
+    cache = FitnessCache("fp", max_entries=2, persist=False)
+    for i in range(5):
+        cache.put(str(i), CachedFitness(i, i, {}))
+    assert cache.get("0") is None
+    assert cache.get("4") is not None
+    assert len(cache._mem) == 2
+
+
+def test_cache_persists_per_fingerprint(tmp_path):
+    """A reopened cache serves stored results only for the same fingerprint"""
+    db = tmp_path / "cache.db"
+    cfg = {"a": 1.5}
+    cache = FitnessCache("fp1", db_path=db)
+    cache.evaluate_one(cfg, lambda: (0.4, 0.3, {"train": {}, "val": {}}))
+    cache.close()
+
+    reopened = FitnessCache("fp1", db_path=db)
+    assert reopened.get(config_key(cfg)) == CachedFitness(0.4, 0.3, {"train": {}, "val": {}})
+    reopened.close()
+
+    other = FitnessCache("fp2", db_path=db)
+    assert other.get(config_key(cfg)) is None
+    other.close()
+
+
+def test_fingerprint_tracks_row_and_candle_contents():
+    """Re-scored signals, updated prices and timeline changes change the key"""
+    rows, timeline = make_dataset()
+    train, val = rows[:40], rows[40:]
+    base = dataset_fingerprint(train, val, timeline)
+    assert dataset_fingerprint(train, val, timeline) == base
+
+    train[3].stored_sentiment_score += 1.0
+    rescored = dataset_fingerprint(train, val, timeline)
+    assert rescored != base
+
+    train[3].future_candles.store.data["close"][5] += 0.01
+    repriced = dataset_fingerprint(train, val, timeline)
+    assert repriced != rescored
+
+    ticker_tl = timeline["AAA"]
+    ticker_tl[0] = (ticker_tl[0][0], ticker_tl[0][1] + 1, *ticker_tl[0][2:])
+    assert dataset_fingerprint(train, val, timeline) != repriced
+
+
+def make_run_db(tmp_path):
+    db = tmp_path / "trendsignal.db"
+    conn = sqlite3.connect(db)
+    conn.executescript("""
+        CREATE TABLE optimization_runs (
+            id INTEGER PRIMARY KEY, train_signal_count INT, val_signal_count INT,
+            test_signal_count INT, total_signal_count INT, train_trade_count INT,
+            val_trade_count INT, test_trade_count INT, best_train_fitness REAL,
+            best_val_fitness REAL, generations_run INT);
+        CREATE TABLE optimization_generations (
+            run_id INT, generation INT, best_train_fitness REAL,
+            avg_train_fitness REAL, worst_train_fitness REAL,
+            best_val_fitness REAL, train_val_gap REAL);
+        INSERT INTO optimization_runs (id) VALUES (1);
+    """)
+    conn.commit()
+    conn.close()
+    return db
+
+
+def test_run_optimizer_one_generation(tmp_path, monkeypatch):
+    """GA smoke run: initial population + one generation end to end"""
+    db = make_run_db(tmp_path)
+    dataset = make_dataset()
+    monkeypatch.setattr(genetic, "load_all_sim_data", lambda *a, **k: dataset)
+    monkeypatch.setenv("OPTIMIZER_FITNESS_CACHE", "off")
+
+    result = genetic.run_optimizer(
+        run_id=1, population_size=6, max_generations=1,
+        db_path=db, n_workers=1, random_seed=3,
+    )
+
+    assert result["generations_run"] == 1
+    assert len(result["best_vector"]) == genetic.N_DIMS
+    conn = sqlite3.connect(db)
+    assert conn.execute("SELECT COUNT(*) FROM optimization_generations").fetchone()[0] == 1
+    conn.close()
+
+
+def test_failed_run_closes_cache(tmp_path, monkeypatch):
+    """The fitness cache connection is closed when the GA loop raises"""
+    db = make_run_db(tmp_path)
+    dataset = make_dataset()
+    monkeypatch.setattr(genetic, "load_all_sim_data", lambda *a, **k: dataset)
+    monkeypatch.setenv("OPTIMIZER_FITNESS_CACHE", str(tmp_path / "cache.db"))
+
+    def fail(**kwargs):
+        raise RuntimeError("disk full")
+
+    caches = []
+    real_init = FitnessCache.__init__
+
+    def spy_init(self, *args, **kwargs):
+        real_init(self, *args, **kwargs)
+        caches.append(self)
+
+    monkeypatch.setattr(genetic, "_write_generation", fail)
+    monkeypatch.setattr(FitnessCache, "__init__", spy_init)
+
+    with pytest.raises(RuntimeError, match="disk full"):
+        genetic.run_optimizer(
+            run_id=1, population_size=6, max_generations=1,
+            db_path=db, n_workers=1, random_seed=3,
+        )
+    assert len(caches) == 1 and caches[0]._conn is None
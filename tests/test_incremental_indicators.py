@@ -0,0 +1,190 @@
+"""
+Test incremental indicator engine
+Resume, rebuild on gaps / revisions and JSON state persistence against a fresh full rebuild
+"""
+
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.incremental_indicators import IndicatorEngine, IndicatorState
+from src.index_migration import migrate
+from src.models import IndicatorState as IndicatorStateModel
+
+COLS = ('close', 'high', 'low')
+
+
+def candles(n, start="2026-03-18 14:00", seed=1):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 0.5, n))
+    return pd.DataFrame({
+        'close': close,
+        'high': close + rng.uniform(0, 0.5, n),
+        'low': close - rng.uniform(0, 0.5, n),
+        'volume': rng.integers(1_000, 5_000, n).astype(float),
+    }, index=pd.date_range(start, periods=n, freq="5min"))
+
+
+def rebuilt(df):
+    """Values of a fresh engine, i.e. a full recomputation from the df"""
+    return IndicatorEngine().snapshot('AAPL', '5m', df, *COLS)
+
+
+def make_session(db):
+    return sessionmaker(bind=db.get_bind())
+
+
+def test_resume_matches_full_rebuild():
+    """New bars are pushed onto the stored state, same values as recomputing"""
+    df = candles(200)
+    engine = IndicatorEngine()
+    engine.snapshot('AAPL', '5m', df.iloc[:150], *COLS)
+    got = engine.snapshot('AAPL', '5m', df, *COLS)
+
+    assert (engine.rebuilds, engine.incremental) == (1, 1)
+    assert got == pytest.approx(rebuilt(df), nan_ok=True)
+
+
+def test_forming_candle_revision_keeps_state():
+    """A revised last (forming) candle is applied to a copy only"""
+    df = candles(120)
+    engine = IndicatorEngine()
+    engine.snapshot('AAPL', '5m', df, *COLS)
+    revised = df.copy()
+    revised.iloc[-1, 0] += 3.0
+    got = engine.snapshot('AAPL', '5m', revised, *COLS)
+
+    assert engine.incremental == 1
+    assert got == pytest.approx(rebuilt(revised), nan_ok=True)
+
+
+def test_gap_triggers_rebuild():
+    """A df that no longer contains the state's last bar is recomputed"""
+    df = candles(200)
+    engine = IndicatorEngine()
+    engine.snapshot('AAPL', '5m', df.iloc[:100], *COLS)
+    later = df.iloc[120:]
+    got = engine.snapshot('AAPL', '5m', later, *COLS)
+
+    assert (engine.rebuilds, engine.incremental) == (2, 0)
+    assert got == pytest.approx(rebuilt(later), nan_ok=True)
+
+
+def test_backfilled_history_triggers_rebuild():
+    """A changed closed bar or a missing bar inside the window forces a rebuild"""
+    df = candles(150)
+    engine = IndicatorEngine()
+    engine.snapshot('AAPL', '5m', df.iloc[:100], *COLS)
+
+    revised = df.copy()
+    revised.iloc[98, 0] += 1.0
+    engine.snapshot('AAPL', '5m', revised, *COLS)
+    assert engine.rebuilds == 2
+
+    holed = df.drop(df.index[140])
+    got = engine.snapshot('AAPL', '5m', holed, *COLS)
+    assert engine.rebuilds == 3
+    assert got == pytest.approx(rebuilt(holed), nan_ok=True)
+
+
+def test_nan_in_new_bars_falls_back():
+    """NaN in the bars to push returns None and drops the state"""
+    df = candles(80)
+    df.iloc[40, 0] = np.nan
+    engine = IndicatorEngine()
+    assert engine.snapshot('AAPL', '5m', df, *COLS) is None
+    assert engine._states == {}
+
+
+def test_json_round_trip():
+    """to_json / from_json restore an equivalent state"""
+    df = candles(90)
+    engine = IndicatorEngine()
+    engine.snapshot('AAPL', '5m', df, *COLS)
+    state = engine._states[('AAPL', '5m')]
+    restored = IndicatorState.from_json(state.to_json())
+
+    assert restored.last_bar == state.last_bar and restored.bars == state.bars
+    assert list(restored.ts_tail) == list(state.ts_tail)
+    assert restored.values() == pytest.approx(state.values(), nan_ok=True)
+
+
+def test_json_version_mismatch_is_rejected():
+    """A state stored by another version is ignored, not misread"""
+    raw = IndicatorState().to_json().replace('"version": ', '"version": 999', 1)
+    assert IndicatorState.from_json(raw) is None
+    assert IndicatorState.from_json("not json") is None
+
+
+def test_save_stays_inside_callers_transaction(db_session):
+    """The state row is a savepoint of the caller's open transaction, rolled back with it"""
+    factory = make_session(db_session)
+    db = factory()
+    db.add(IndicatorStateModel(ticker_symbol='MSFT', interval='5m', bars=0, state_json='{}'))
+    db.flush()
+    IndicatorEngine().snapshot('AAPL', '5m', candles(60), *COLS, db=db)
+    db.rollback()
+
+    assert factory().query(IndicatorStateModel).count() == 0
+
+
+def test_failed_save_keeps_callers_session_usable(db_session, monkeypatch):
+    """A failing state write rolls back to the savepoint, the caller's work still commits"""
+    factory = make_session(db_session)
+    db = factory()
+    db.add(IndicatorStateModel(ticker_symbol='MSFT', interval='5m', bars=0, state_json='{}'))
+    db.flush()
+    monkeypatch.setattr(IndicatorState, "to_json", lambda self: None)   # NOT NULL violation
+
+    assert IndicatorEngine().snapshot('AAPL', '5m', candles(60), *COLS, db=db) is not None
+    db.commit()
+    assert [r.ticker_symbol for r in factory().query(IndicatorStateModel)] == ['MSFT']
+
+
+def test_state_persists_through_callers_commit(db_session):
+    """After the caller commits, a new process resumes from the stored row"""
+    factory = make_session(db_session)
+    df = candles(200)
+    db = factory()
+
+    IndicatorEngine().snapshot('AAPL', '5m', df.iloc[:150], *COLS, db=db)
+    db.commit()
+    db.close()
+
+    row = factory().get(IndicatorStateModel, ('AAPL', '5m'))
+    assert row.bars == 149
+    assert row.last_timestamp == df.index[148].to_pydatetime()
+
+    restarted = IndicatorEngine()
+    db = factory()
+    got = restarted.snapshot('AAPL', '5m', df, *COLS, db=db)
+    assert (restarted.rebuilds, restarted.incremental) == (0, 1)
+    assert got == pytest.approx(rebuilt(df), nan_ok=True)
+
+
+def test_missing_table_is_not_created(db_session):
+    """Without the indicator_state table the engine computes but does no DDL"""
+    engine = db_session.get_bind()
+    IndicatorStateModel.__table__.drop(engine)
+    ind = IndicatorEngine()
+
+    assert ind.snapshot('AAPL', '5m', candles(60), *COLS, db=db_session) is not None
+    assert not engine.dialect.has_table(engine.connect(), 'indicator_state')
+
+
+def test_index_migration_creates_state_table():
+    """index_migration adds indicator_state to an existing database, usable by the ORM"""
+    conn = sqlite3.connect(":memory:")
+    assert migrate(conn)["tables"] == ["indicator_state"]
+    assert migrate(conn)["tables"] == []
+
+    engine = create_engine("sqlite://", creator=lambda: conn, poolclass=StaticPool)
+    db = sessionmaker(bind=engine)()
+    IndicatorEngine().snapshot('AAPL', '5m', candles(60), *COLS, db=db)
+    db.commit()
+    assert db.get(IndicatorStateModel, ('AAPL', '5m')).bars == 59
@@ -0,0 +1,46 @@
+"""
+Test index migration
+price_data ends up with one unique (ticker_symbol, interval, timestamp) index used by every hot query
+"""
+
+import sqlite3
+
+from src.index_migration import check_hot_queries, migrate
+
+OLD_SCHEMA = """
+CREATE TABLE price_data (id INTEGER PRIMARY KEY, ticker_id INTEGER, ticker_symbol VARCHAR(10),
+    timestamp DATETIME, interval VARCHAR(5), open FLOAT, high FLOAT, low FLOAT, close FLOAT, volume INTEGER);
+CREATE INDEX ix_price_data_ticker_symbol ON price_data (ticker_symbol);
+CREATE UNIQUE INDEX uq_price_data_symbol_ts_interval ON price_data (ticker_symbol, timestamp, interval);
+CREATE INDEX ix_price_data_symbol_interval_ts ON price_data (ticker_symbol, interval, timestamp);
+"""
+
+
+def price_indexes(conn):
+    return {r[0] for r in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'price_data' AND sql IS NOT NULL")}
+
+
+def test_unique_index_replaces_both_old_indexes():
+    """The old uq_ and ix_ indexes are dropped once the single unique index exists"""
+    conn = sqlite3.connect(":memory:")
+    conn.executescript(OLD_SCHEMA)
+    result = migrate(conn)
+
+    assert "uq_price_data_symbol_interval_ts" in result["created"]
+    assert price_indexes(conn) == {"uq_price_data_symbol_interval_ts"}
+    assert check_hot_queries(conn, verbose=False) == []
+    assert migrate(conn) == {"tables": [], "created": [], "dropped": []}
+
+
+def test_duplicates_keep_the_old_indexes():
+    """If duplicate rows block the unique index, nothing the upsert relies on is dropped"""
+    conn = sqlite3.connect(":memory:")
+    conn.executescript(OLD_SCHEMA.replace(
+        "CREATE UNIQUE INDEX uq_price_data_symbol_ts_interval ON price_data (ticker_symbol, timestamp, interval);\n", ""))
+    row = ("AAPL", "2026-03-18 14:00:00.000000", "5m", 1, 1, 1, 1, 1)
+    conn.executemany("INSERT INTO price_data (ticker_symbol, timestamp, interval, open, high, low, close, volume) "
+                     "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", [row, row])
+    migrate(conn)
+
+    assert price_indexes(conn) == {"ix_price_data_symbol_interval_ts"}
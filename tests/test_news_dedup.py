@@ -0,0 +1,163 @@
+"""
+Test news near-duplicate dedup
+deduplicate() against the original pairwise Jaccard loop, plus the per-ticker NewsDedupStore
+"""
+
+import random
+from datetime import datetime, timedelta, timezone
+
+from src.news_dedup import NewsDedupStore, deduplicate
+from src.sentiment_analyzer import NewsItem
+
+WORDS = ("apple shares rise after earnings beat guidance raised iphone sales "
+         "record quarter stock falls on weak outlook analysts cut target the a").split()
+BASE = datetime(2026, 10, 16, 14, 0, tzinfo=timezone.utc)
+
+
+def _item(title, published_at, credibility=0.8, url=None):
+    return NewsItem(
+        title=title, description='', url=url or f"https://x/{random.random()}",
+        published_at=published_at, source='test', sentiment_score=0.0,
+        sentiment_confidence=0.5, sentiment_label='neutral', credibility=credibility,
+    )
+
+
+def _reference_is_dup(item1, item2, threshold=0.80, time_window_sec=1800):
+    words1 = set(item1.title.lower().split())
+    words2 = set(item2.title.lower().split())
+    union = words1 | words2
+    if not union:
+        return False
+    if len(words1 & words2) / len(union) < threshold:
+        return False
+    try:
+        return abs((item1.published_at - item2.published_at).total_seconds()) <= time_window_sec
+    except Exception:
+        return False
+
+
+def _reference(items):
+    """The original pairwise NewsCollector loop"""
+    final = []
+    for candidate in items:
+        is_dup = False
+        for existing in final:
+            if _reference_is_dup(candidate, existing):
+                if candidate.credibility > existing.credibility:
+                    final.remove(existing)
+                else:
+                    is_dup = True
+                break
+        if not is_dup:
+            final.append(candidate)
+    return final
+
+
+def _random_batch(rnd: random.Random, n: int):
+    stories = [rnd.sample(WORDS, rnd.randint(1, 12)) for _ in range(max(1, n // 6))]
+    items = []
+    for i in range(n):
+        words = list(rnd.choice(stories))
+        if rnd.random() < 0.5 and words:        # small edit, Jaccard near the threshold
+            words[rnd.randrange(len(words))] = rnd.choice(WORDS)
+        if rnd.random() < 0.3:
+            words.append(rnd.choice(WORDS))
+        r = rnd.random()
+        if r < 0.04:
+            published = None
+        elif r < 0.10:
+            published = BASE.replace(tzinfo=None) + timedelta(seconds=rnd.choice([0, 1800, 1801]))
+        else:
+            published = BASE + timedelta(seconds=rnd.choice(
+                [0, 1799, 1800, 1801, 3599, 3600, rnd.randint(-7200, 7200)]))
+        title = ' '.join(w.upper() if rnd.random() < 0.1 else w for w in words)
+        if rnd.random() < 0.02:
+            title = ''
+        items.append(_item(title, published, rnd.choice([0.80, 0.82, 0.90, 0.95]), url=f"u{i}"))
+    return items
+
+
+def test_matches_reference():
+    """Same survivors as the pairwise loop on overlapping titles, window edges and tz mixes"""
+    rnd = random.Random(22)
+    for _ in range(300):
+        items = _random_batch(rnd, rnd.randint(0, 120))
+        expected = [it.url for it in _reference(items)]
+        got = [it.url for it in deduplicate(items)]
+        assert got == expected
+
+
+def test_higher_credibility_replaces():
+    """A more credible near-duplicate inside the window takes the slot"""
+    a = _item("Apple shares rise after earnings beat", BASE, 0.80, url="a")
+    b = _item("apple shares rise after earnings beat", BASE + timedelta(minutes=10), 0.95, url="b")
+    c = _item("apple shares rise after earnings beat", BASE + timedelta(minutes=45), 0.95, url="c")
+    assert [it.url for it in deduplicate([a, b, c])] == ["b", "c"]
+
+
+def test_store_replaces_resyndicated_article():
+    """A repost in a later cycle is replaced by the stored canonical article"""
+    store = NewsDedupStore()
+    first = _item("Apple shares rise after earnings beat", BASE, 0.95, url="reuters")
+    assert store.resolve([first], 'AAPL') == [first]
+
+    # next cycle: the original left the feed, a repost arrives
+    repost = _item("apple shares rise after earnings beat", BASE + timedelta(minutes=5), 0.82, url="blog")
+    got = store.resolve([repost], 'AAPL')
+    assert [it.url for it in got] == ["reuters"] and got[0] is not first
+
+    # same URL again: kept
+    assert store.resolve([first], 'AAPL') == [first]
+
+    # higher credibility: the new article becomes canonical
+    better = _item("apple shares rise after earnings beat", BASE, 0.99, url="sec")
+    assert store.resolve([better], 'AAPL') == [better]
+    assert [it.url for it in store.resolve([repost], 'AAPL')] == ["sec"]
+
+
+def test_store_keeps_batch_decisions_and_expires():
+    """Batch-level decisions stand, entries expire after the TTL"""
+    now = [0.0]
+    store = NewsDedupStore(ttl_seconds=60, clock=lambda: now[0])
+    a = _item("apple shares rise after earnings beat", BASE, 0.95, url="a")
+    b = _item("stock falls on weak outlook", BASE, 0.80, url="b")
+    store.resolve([a, b])
+
+    # a and its weaker repost in one batch: the batch decides, the store does not swap
+    repost = _item("apple shares rise after earnings beat", BASE, 0.80, url="r")
+    assert [it.url for it in store.resolve([a, repost])] == ["a", "r"]
+
+    now[0] = 1000.0
+    assert [it.url for it in store.resolve([repost])] == ["r"]
+    assert len(store) == 1
+
+
+def test_store_does_not_cross_tickers():
+    """An article kept for one ticker never replaces another ticker's article"""
+    store = NewsDedupStore()
+    msft = _item("Microsoft and Apple shares rise after earnings beat", BASE, 0.95, url="msft-story")
+    aapl = _item("microsoft and apple shares rise after earnings beat", BASE, 0.82, url="aapl-story")
+
+    assert store.resolve([msft], 'MSFT') == [msft]
+    assert store.resolve([aapl], 'AAPL') == [aapl]
+    assert store.replaced == 0
+
+    # within each ticker the canonical article still wins
+    repost = _item("microsoft and apple shares rise after earnings beat", BASE, 0.80, url="blog")
+    assert [it.url for it in store.resolve([repost], 'MSFT')] == ["msft-story"]
+    assert [it.url for it in store.resolve([repost], 'AAPL')] == ["aapl-story"]
+
+
+def test_same_url_is_tracked_per_ticker():
+    """Dropping an article from one ticker's store leaves the other ticker's entry"""
+    now = [0.0]
+    store = NewsDedupStore(clock=lambda: now[0])
+    story = _item("apple shares rise after earnings beat", BASE, 0.95, url="shared")
+    store.resolve([story], 'AAPL')
+    store.resolve([story], 'MSFT')
+    assert len(store) == 2
+
+    better = _item("apple shares rise after earnings beat", BASE, 0.99, url="sec")
+    assert store.resolve([better], 'AAPL') == [better]
+    repost = _item("apple shares rise after earnings beat", BASE, 0.80, url="blog")
+    assert [it.url for it in store.resolve([repost], 'MSFT')] == ["shared"]
@@ -0,0 +1,148 @@
+"""
+Test SignalRecalculator news window and worker setup
+_NewsWindow.sentiment() against the original per-signal filter of the full news list
+"""
+
+import copy
+import math
+import random
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+import src.signal_recalculator as signal_recalculator
+from src.config import get_config
+from src.signal_recalculator import _clamp, _compute_ticker_worker, _NewsWindow, _resolve_workers
+
+T0 = datetime(2025, 3, 3, 14, 30)
+DURATIONS = [None, 'hours', 'days', 'weeks', 'permanent', 'unknown']
+
+
+def _reference(all_news, sig_ts, cfg):
+    """_get_news_for_signal() + _calc_sentiment_score() as before"""
+    window_start = sig_ts - timedelta(hours=24)
+    news_items = [n for n in all_news if window_start <= n["ts"] <= sig_ts]
+    if not news_items:
+        return None
+
+    weighted_scores, weights_sum, confidences, raw = [], 0.0, [], []
+    for item in news_items:
+        age_hours = (sig_ts - item["ts"]).total_seconds() / 3600.0
+        if age_hours < 2:
+            decay = cfg.decay_weights.get("0-2h", 1.0)
+        elif age_hours < 6:
+            decay = cfg.decay_weights.get("2-6h", 0.85)
+        elif age_hours < 12:
+            decay = cfg.decay_weights.get("6-12h", 0.60)
+        elif age_hours < 24:
+            decay = cfg.decay_weights.get("12-24h", 0.35)
+        else:
+            decay = 0.0
+        if decay <= 0:
+            continue
+        duration = cfg.duration_weight.get(item.get("llm_impact_duration") or "days", 1.0)
+        weight = decay * 1.0 * duration
+        weighted_scores.append(item["active_score"] * weight)
+        weights_sum += weight
+        confidences.append(item["sentiment_confidence"])
+        raw.append(item["active_score"])
+
+    if weights_sum <= 0.0 or not weighted_scores:
+        return 0.0, 0.5
+    score = float(_clamp(sum(weighted_scores) / weights_sum * 100.0, -100.0, 100.0))
+    n = len(news_items)
+    finbert = min(sum(confidences) / len(confidences) * 0.85, 0.90)
+    if n >= cfg.sentiment_conf_full_news_count:
+        volume = 1.0
+    elif n >= cfg.sentiment_conf_high_news_count:
+        volume = 0.85
+    elif n >= cfg.sentiment_conf_med_news_count:
+        volume = 0.70
+    elif n >= cfg.sentiment_conf_low_news_count:
+        volume = 0.55
+    else:
+        volume = 0.40
+    pos = sum(1 for s in raw if s > cfg.sentiment_positive_threshold)
+    neg = sum(1 for s in raw if s < cfg.sentiment_negative_threshold)
+    return score, float(finbert * 0.40 + volume * 0.35 + max(pos, neg) / n * 0.25)
+
+
+def _random_news(rnd: random.Random, n: int, signal_times):
+    news = []
+    for _ in range(n):
+        if rnd.random() < 0.3:
+            ts = rnd.choice(signal_times) - timedelta(hours=rnd.choice([0, 2, 6, 12, 24]))
+        else:
+            ts = T0 + timedelta(seconds=rnd.randint(-86400, 10 * 86400))
+        news.append({
+            "ts": ts,
+            "active_score": rnd.choice([rnd.uniform(-1, 1), 0.0, 0.5, -0.5]),
+            "sentiment_confidence": rnd.uniform(0, 1),
+            "llm_impact_duration": rnd.choice(DURATIONS),
+        })
+    rnd.shuffle(news)
+    return news
+
+
+def _assert_close(got, expected, context):
+    if expected is None:
+        assert got is None, context
+        return
+    assert got is not None, context
+    for g, e in zip(got, expected):
+        assert math.isclose(g, e, rel_tol=1e-9, abs_tol=1e-9), f"{context}: {got} != {expected}"
+
+
+def test_matches_reference():
+    """Random news, exact 0/2/6/12/24h bucket edges and empty windows"""
+    cfg = get_config()
+    rnd = random.Random(23)
+    signal_times = [T0 + timedelta(minutes=15 * i) for i in range(900)]
+    for n in (0, 1, 40, 2000):
+        news = _random_news(rnd, n, signal_times)
+        window = _NewsWindow(news, cfg)
+        for sig_ts in signal_times:
+            _assert_close(window.sentiment(sig_ts), _reference(news, sig_ts, cfg), f"n={n} {sig_ts}")
+
+
+def test_zero_decay_bucket():
+    """Buckets with zero decay weight are skipped like in the loop"""
+    cfg = copy.copy(get_config())
+    cfg.decay_weights = dict(cfg.decay_weights, **{"2-6h": 0.0, "12-24h": 0.0})
+    rnd = random.Random(5)
+    signal_times = [T0 + timedelta(minutes=15 * i) for i in range(300)]
+    news = _random_news(rnd, 500, signal_times)
+    window = _NewsWindow(news, cfg)
+    for sig_ts in signal_times:
+        _assert_close(window.sentiment(sig_ts), _reference(news, sig_ts, cfg), str(sig_ts))
+
+
+def test_only_24h_old_news_has_no_weight():
+    """News exactly 24h old is in the window with no weight, older is outside"""
+    news = [{"ts": T0 - timedelta(hours=24), "active_score": 0.9,
+             "sentiment_confidence": 0.8, "llm_impact_duration": None}]
+    assert _NewsWindow(news, get_config()).sentiment(T0) == (0.0, 0.5)
+    assert _NewsWindow(news, get_config()).sentiment(T0 + timedelta(seconds=1)) is None
+
+
+def test_parallel_mode_is_opt_in(monkeypatch):
+    """Without workers / SIGNAL_RECALC_WORKERS the recalculation stays sequential"""
+    monkeypatch.delenv("SIGNAL_RECALC_WORKERS", raising=False)
+    assert _resolve_workers(None) == 1
+    monkeypatch.setenv("SIGNAL_RECALC_WORKERS", "4")
+    assert _resolve_workers(None) == 4
+    assert _resolve_workers(2) == 2
+
+
+def test_worker_connection_is_read_only(tmp_path, monkeypatch):
+    """The pool worker cannot write to the database"""
+    db_path = tmp_path / "recalc.db"
+    sqlite3.connect(db_path).execute("CREATE TABLE archive_signals (id INTEGER)")
+
+    def write(self, conn, symbol, cfg):
+        conn.execute("INSERT INTO archive_signals VALUES (1)")
+
+    monkeypatch.setattr(signal_recalculator.SignalRecalculator, "_compute_ticker", write)
+    with pytest.raises(sqlite3.OperationalError, match="readonly"):
+        _compute_ticker_worker(str(db_path), 'AAPL', None)
@@ -0,0 +1,140 @@
+"""
+Test PriceCache TTL, LRU bound, in-flight dedup and invalidation
+Injected clock and loaders, no database needed
+"""
+
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+from src.price_cache import NEGATIVE_TTL, Candle, PriceCache, _DayBucket, next_candle_close
+
+
+class Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def bucket(day, n):
+    candles = [Candle(datetime.combine(day, datetime.min.time()) + timedelta(hours=14, minutes=5 * i),
+                      1.0, 1.0, 1.0, 1.0, 100) for i in range(n)]
+    return _DayBucket([c.timestamp for c in candles], candles)
+
+
+def test_next_candle_close_aligns_to_session():
+    """5m boundaries inside the session, next session open after the close"""
+    assert next_candle_close('AAPL', '5m', datetime(2026, 3, 18, 14, 2)) == datetime(2026, 3, 18, 14, 5)
+    assert next_candle_close('AAPL', '5m', datetime(2026, 3, 18, 21, 0)) == datetime(2026, 3, 19, 13, 35)
+    assert next_candle_close('AAPL', '1d', datetime(2026, 3, 20, 22, 0)) == datetime(2026, 3, 23, 20, 0)
+
+
+def test_entry_expires_at_candle_close():
+    """Hit until the next candle closes, reload afterwards"""
+    clock = Clock(datetime(2026, 3, 18, 14, 2))
+    cache = PriceCache(clock=clock)
+    loads = []
+
+    def loader():
+        loads.append(clock.now)
+        return [1, 2, 3]
+
+    cache.get_or_load('AAPL', '5m', '5d', loader)
+    clock.now = datetime(2026, 3, 18, 14, 4, 59)
+    cache.get_or_load('AAPL', '5m', '5d', loader)
+    clock.now = datetime(2026, 3, 18, 14, 5)
+    cache.get_or_load('AAPL', '5m', '5d', loader)
+    assert len(loads) == 2
+
+
+def test_failed_load_uses_negative_ttl():
+    """None results are retried after NEGATIVE_TTL, not at the candle close"""
+    clock = Clock(datetime(2026, 3, 18, 21, 0))
+    cache = PriceCache(clock=clock)
+    loads = []
+    cache.get_or_load('AAPL', '1d', '3mo', lambda: loads.append(1))
+    clock.now += NEGATIVE_TTL
+    cache.get_or_load('AAPL', '1d', '3mo', lambda: loads.append(1))
+    assert len(loads) == 2
+
+
+def test_empty_closed_day_bucket_is_not_pinned():
+    """An empty 5m bucket of a closed day expires after NEGATIVE_TTL, a full one never"""
+    day = date(2026, 3, 18)
+    clock = Clock(datetime(2026, 3, 20, 12, 0))
+    cache = PriceCache(clock=clock)
+    stored = {('AAPL', day): bucket(day, 0), ('MSFT', day): bucket(day, 3)}
+    calls = []
+
+    def load_days(keys):
+        calls.append(list(keys))
+        return {key: stored[key] for key in keys}
+
+    cache._load_5m_days = load_days
+    window = (datetime(2026, 3, 18, 13, 0), datetime(2026, 3, 18, 20, 0))
+    assert cache.get_5m_candles('AAPL', *window) == []
+    assert len(cache.get_5m_candles('MSFT', *window)) == 3
+
+    stored[('AAPL', day)] = bucket(day, 2)
+    clock.now += NEGATIVE_TTL
+    assert len(cache.get_5m_candles('AAPL', *window)) == 2
+    assert len(cache.get_5m_candles('MSFT', *window)) == 3
+    assert calls == [[('AAPL', day)], [('MSFT', day)], [('AAPL', day)]]
+
+
+def test_lru_bounded_by_rows():
+    """Least recently used entries are evicted once max_rows is exceeded"""
+    cache = PriceCache(max_rows=5, clock=Clock(datetime(2026, 3, 18, 14, 2)))
+    cache.get_or_load('A', '5m', '5d', lambda: [0, 1])
+    cache.get_or_load('B', '5m', '5d', lambda: [0, 1])
+    cache.get_or_load('A', '5m', '5d', lambda: [])
+    cache.get_or_load('C', '5m', '5d', lambda: [0, 1])
+    assert ('B', '5m', '5d') not in cache._mem
+    assert ('A', '5m', '5d') in cache._mem
+    assert cache._rows <= 5
+
+
+def test_concurrent_requests_share_one_load():
+    """Threads asking for the same key while it loads wait for that load"""
+    cache = PriceCache(clock=Clock(datetime(2026, 3, 18, 14, 2)))
+    started, release = threading.Event(), threading.Event()
+    loads = []
+
+    def loader():
+        loads.append(1)
+        started.set()
+        release.wait(5)
+        return [42]
+
+    results = []
+    owner = threading.Thread(target=lambda: results.append(cache.get_or_load('A', '5m', '5d', loader)))
+    owner.start()
+    started.wait(5)
+    waiters = [threading.Thread(target=lambda: results.append(cache.get_or_load('A', '5m', '5d', loader)))
+               for _ in range(3)]
+    for t in waiters:
+        t.start()
+    deadline = time.monotonic() + 5
+    while cache.waits < 3 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    release.set()
+    for t in [owner] + waiters:
+        t.join(5)
+
+    assert loads == [1]
+    assert results == [[42]] * 4
+
+
+def test_invalidate_during_load_drops_stale_result():
+    """A load that raced invalidate() is returned but not stored"""
+    cache = PriceCache(clock=Clock(datetime(2026, 3, 18, 14, 2)))
+
+    def stale_loader():
+        cache.invalidate('A', '5m')
+        return ['stale']
+
+    assert cache.get_or_load('A', '5m', '5d', stale_loader) == ['stale']
+    assert cache.get_or_load('A', '5m', '5d', lambda: ['fresh']) == ['fresh']
+    assert cache.get_or_load('A', '5m', '5d', lambda: ['unused']) == ['fresh']
@@ -0,0 +1,104 @@
+"""
+Test bulk price upsert (save_price_data_to_db)
+In-memory SQLite with the models schema
+"""
+
+import math
+
+import pandas as pd
+import pytest
+from sqlalchemy import text
+
+import src.db_helpers as db_helpers
+from src.db_helpers import save_price_data_to_db
+from src.models import PriceData
+
+
+def make_session(db, monkeypatch, with_unique_index=True):
+    if not with_unique_index:
+        db.execute(text("DROP INDEX uq_price_data_symbol_interval_ts"))
+        db.commit()
+    monkeypatch.setattr(db_helpers, "_price_index_ready", False)
+    return db
+
+
+def frame(start, closes, volumes=None, tz=None):
+    idx = pd.date_range(start, periods=len(closes), freq="5min", tz=tz)
+    return pd.DataFrame({
+        'Open': closes, 'High': closes, 'Low': closes, 'Close': closes,
+        'Volume': volumes if volumes is not None else [100] * len(closes),
+    }, index=idx)
+
+
+def stored(db, interval='5m'):
+    return [(r.timestamp, r.close, r.volume) for r in db.query(PriceData).filter(
+        PriceData.ticker_symbol == 'AAPL', PriceData.interval == interval,
+    ).order_by(PriceData.timestamp)]
+
+
+def test_upsert_inserts_and_updates(db_session, monkeypatch):
+    """Overlapping candles are updated in place, new ones inserted"""
+    db = make_session(db_session, monkeypatch)
+    assert save_price_data_to_db(frame("2026-03-18 14:00", [1.0, 2.0, 3.0]), 'AAPL', '5m', db)
+    assert save_price_data_to_db(frame("2026-03-18 14:10", [30.0, 40.0]), 'AAPL', '5m', db)
+
+    rows = stored(db)
+    assert [r[1] for r in rows] == [1.0, 2.0, 30.0, 40.0]
+    assert db.query(PriceData).count() == 4
+
+
+def test_intervals_are_separate_keys(db_session, monkeypatch):
+    """The same timestamp in another interval is a new row"""
+    db = make_session(db_session, monkeypatch)
+    save_price_data_to_db(frame("2026-03-18 14:00", [1.0]), 'AAPL', '5m', db)
+    save_price_data_to_db(frame("2026-03-18 14:00", [9.0]), 'AAPL', '15m', db)
+    assert stored(db, '5m')[0][1] == 1.0
+    assert stored(db, '15m')[0][1] == 9.0
+
+
+def test_aware_index_stored_as_naive_utc(db_session, monkeypatch):
+    """Exchange-local timestamps are converted to naive UTC"""
+    db = make_session(db_session, monkeypatch)
+    save_price_data_to_db(frame("2026-03-18 10:00", [1.0], tz="America/New_York"), 'AAPL', '5m', db)
+    assert stored(db)[0][0] == pd.Timestamp("2026-03-18 14:00").to_pydatetime()
+
+
+def test_missing_volume_and_ohlc(db_session, monkeypatch):
+    """NaN volume is stored as 0, rows with NaN prices are skipped"""
+    db = make_session(db_session, monkeypatch)
+    df = frame("2026-03-18 14:00", [1.0, 2.0, 3.0], volumes=[100, math.nan, 300])
+    df.loc[df.index[2], 'Close'] = math.nan
+
+    assert save_price_data_to_db(df, 'AAPL', '5m', db)
+    assert [(r[1], r[2]) for r in stored(db)] == [(1.0, 100), (2.0, 0)]
+
+
+def test_rowwise_fallback_without_unique_index(db_session, monkeypatch):
+    """Without the unique index the row-by-row path saves the same data"""
+    db = make_session(db_session, monkeypatch, with_unique_index=False)
+    save_price_data_to_db(frame("2026-03-18 14:00", [1.0, 2.0]), 'AAPL', '5m', db)
+    save_price_data_to_db(frame("2026-03-18 14:05", [20.0, 30.0]), 'AAPL', '5m', db)
+    assert [r[1] for r in stored(db)] == [1.0, 20.0, 30.0]
+    assert db_helpers._price_index_ready is False
+
+
+def test_index_check_does_not_commit(db_session, monkeypatch):
+    """Checking for the unique index leaves the caller's pending work alone"""
+    db = make_session(db_session, monkeypatch)
+    db.add(PriceData(ticker_symbol='MSFT', interval='5m', open=1, high=1, low=1, close=1,
+                     volume=1, timestamp=pd.Timestamp("2026-03-18 14:00").to_pydatetime()))
+    db.flush()
+    assert db_helpers._price_data_unique_index_exists(db)
+    db.rollback()
+    assert db.query(PriceData).count() == 0
+
+
+@pytest.mark.parametrize("with_unique_index", [True, False])
+def test_missing_columns_return_false(db_session, monkeypatch, with_unique_index):
+    """A frame without Volume or an OHLC column is rejected, an empty one is a no-op"""
+    db = make_session(db_session, monkeypatch, with_unique_index)
+    df = frame("2026-03-18 14:00", [1.0, 2.0])
+    assert save_price_data_to_db(df.drop(columns='Volume'), 'AAPL', '5m', db) is False
+    assert save_price_data_to_db(df.drop(columns='Low'), 'AAPL', '5m', db) is False
+    assert save_price_data_to_db(pd.DataFrame(), 'AAPL', '5m', db) is True
+    assert stored(db) == []
@@ -0,0 +1,127 @@
+"""
+Test columnar score recalculation
+compute_combined_scores_columnar() against the scalar compute_combined_score_from_indicators()
+"""
+
+import random
+
+import pytest
+
+from src.config import get_config
+from src.recalculate_signals import (
+    SCORE_INPUTS,
+    _float_column,
+    _score_archive_row,
+    _score_rows_scalar,
+    compute_combined_score_from_indicators,
+    compute_combined_scores_columnar,
+)
+
+DECISIONS = ['BUY', 'SELL', 'STRONG BUY', 'WEAK SELL', 'HOLD', '', None]
+
+
+def _maybe(rnd: random.Random, value):
+    """~10% None, ~5% 0, the `x or default` branches of the scalar path"""
+    r = rnd.random()
+    if r < 0.10:
+        return None
+    if r < 0.15:
+        return 0.0
+    return value
+
+
+def _random_rows(n: int, seed: int) -> list:
+    rnd = random.Random(seed)
+    config = get_config()
+    rows = []
+    for _ in range(n):
+        price = rnd.uniform(5, 500)
+        rows.append({
+            'current_price':        _maybe(rnd, price),
+            'sma_20':               _maybe(rnd, price * rnd.uniform(0.95, 1.05)),
+            'sma_50':               _maybe(rnd, price * rnd.uniform(0.90, 1.10)),
+            'rsi':                  _maybe(rnd, rnd.choice([
+                rnd.uniform(0, 100), config.rsi_oversold, config.rsi_neutral_low,
+                config.rsi_neutral_high, config.rsi_overbought])),
+            'macd_histogram':       _maybe(rnd, rnd.uniform(-8, 8)),
+            'bb_upper':             _maybe(rnd, price * 1.03),
+            'bb_middle':            _maybe(rnd, price),
+            'bb_lower':             _maybe(rnd, price * rnd.choice([0.97, 0.99, 1.03])),
+            'stoch_k':              _maybe(rnd, rnd.choice([
+                rnd.uniform(0, 100), config.stoch_oversold, config.stoch_overbought])),
+            'stoch_d':              _maybe(rnd, 50.0),
+            'atr_pct':              _maybe(rnd, rnd.choice([
+                rnd.uniform(0, 8), config.atr_vol_very_low, config.atr_vol_low,
+                config.atr_vol_moderate, config.atr_vol_high])),
+            'nearest_support':      _maybe(rnd, price * rnd.uniform(0.85, 1.0)),
+            'nearest_resistance':   _maybe(rnd, price * rnd.uniform(1.0, 1.15)),
+            'adx':                  _maybe(rnd, rnd.choice([
+                rnd.uniform(0, 70), config.adx_very_weak, config.adx_weak,
+                config.adx_moderate, config.adx_strong, config.adx_very_strong])),
+            'sentiment_score':      _maybe(rnd, rnd.uniform(-1, 1)),
+            'sentiment_confidence': _maybe(rnd, rnd.uniform(0, 1)),
+            'decision':             rnd.choice(DECISIONS),
+            'risk_reward_ratio':    _maybe(rnd, rnd.choice([rnd.uniform(0.5, 4), 2.0, 2.5, 3.0])),
+        })
+    return rows
+
+
+def _columnar(rows: list, config) -> dict:
+    ind = {name: _float_column([r[name] for r in rows]) for name in SCORE_INPUTS}
+    return compute_combined_scores_columnar(ind, [r['decision'] for r in rows], config)
+
+
+def test_columnar_matches_scalar():
+    """Random rows, thresholds and missing values score bit-identically"""
+    config = get_config()
+    rows = _random_rows(3000, seed=21)
+    got = _columnar(rows, config)
+    for i, row in enumerate(rows):
+        expected = compute_combined_score_from_indicators(row, config)
+        for key, value in expected.items():
+            assert got[key][i] == value, f"row {i} {key}: {got[key][i]} != {value} ({row})"
+
+
+def test_missing_optional_columns():
+    """archive_signals has no bb_middle / adx column, so Bollinger and ADX score 0"""
+    config = get_config()
+    rows = _random_rows(500, seed=5)
+    for row in rows:
+        row['bb_middle'] = None
+        row['adx'] = None
+    ind = {name: _float_column([r[name] for r in rows])
+           for name in SCORE_INPUTS if name not in ('bb_middle', 'adx')}
+    got = compute_combined_scores_columnar(ind, [r['decision'] for r in rows], config)
+    for i, row in enumerate(rows):
+        expected = compute_combined_score_from_indicators(row, config)
+        assert got['combined_score'][i] == expected['combined_score'], f"row {i}"
+        assert got['bb_position_score'][i] == 0 and got['trend_strength_score'][i] == 0
+
+
+def test_empty_input():
+    """No rows gives empty arrays"""
+    got = compute_combined_scores_columnar({}, [], get_config())
+    assert all(len(v) == 0 for v in got.values())
+
+
+def test_scalar_fallback_isolates_bad_rows():
+    """A non-numeric value fails the columnar path; the row-by-row fallback skips only that row"""
+    config = get_config()
+    optional = ('adx', 'sentiment_confidence')
+    rows = []
+    for i, r in enumerate(_random_rows(50, seed=7)):
+        rows.append({**r, 'id': i, 'close_price': r['current_price'], 'entry_price': 100.0,
+                     'macd_hist': r['macd_histogram'], 'decision': r['decision'] or 'BUY',
+                     'rsi': r['rsi'] if r['rsi'] is not None else 50.0})
+    rows[3]['rsi'] = 'n/a'
+
+    with pytest.raises(ValueError):
+        _float_column([r['rsi'] for r in rows])
+
+    stats = {"errors": 0}
+    kept, result = _score_rows_scalar(rows, lambda r: _score_archive_row(r, optional, config),
+                                      lambda r: f"#{r['id']}", ("combined_score",), stats)
+    assert stats["errors"] == 1
+    assert [r['id'] for r in kept] == [i for i in range(50) if i != 3]
+    for row, score in zip(kept, result['combined_score']):
+        assert score == _score_archive_row(row, optional, config)['combined_score']
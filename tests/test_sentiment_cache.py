@@ -0,0 +1,116 @@
+"""
+Test url_hash sentiment cache
+In-memory SQLite news_items table, fake FinBERT for the analyzer path
+"""
+
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+from src.models import NewsItem
+from src.multilingual_sentiment import MultilingualSentimentAnalyzer
+from src.sentiment_cache import SentimentCache, url_hash
+
+URLS = [f"https://example.com/news/{i}" for i in range(5)]
+
+
+def make_factory(db):
+    """news_items with scored articles 0-2, unscored article 3, article 4 missing"""
+    engine = db.get_bind()
+    factory = sessionmaker(bind=engine)
+    for i, url in enumerate(URLS[:4]):
+        db.add(NewsItem(
+            url=url, url_hash=url_hash(url), title=f"news {i}",
+            sentiment_score=None if i == 3 else 0.1 * i,
+            sentiment_confidence=0.8, sentiment_label='positive',
+            active_score_source='llm' if i == 2 else 'finbert',
+            llm_score=0.7 if i == 2 else None,
+        ))
+    db.commit()
+    db.close()
+
+    queries = []
+    event.listen(engine, "before_cursor_execute", lambda *args: queries.append(args[2]))
+    return factory, queries
+
+
+def test_get_many_loads_misses_in_one_query(db_session):
+    """Known hashes come from one IN query, then from memory"""
+    factory, queries = make_factory(db_session)
+    cache = SentimentCache(session_factory=factory)
+    keys = [url_hash(u) for u in URLS]
+
+    found = cache.get_many(keys + keys[:1])
+    assert sorted(found) == sorted(keys[:3])
+    assert found[keys[1]].sentiment_result() == {'score': 0.1, 'confidence': 0.8, 'label': 'positive'}
+    assert found[keys[2]].has_llm and not found[keys[1]].has_llm
+    assert len(queries) == 1
+
+    assert sorted(cache.get_many(keys[:3])) == sorted(keys[:3])
+    assert len(queries) == 1
+    assert (cache.hits, cache.misses) == (6, 2)
+
+
+def test_put_keeps_llm_fields(db_session):
+    """A fresh FinBERT result replaces the sentiment but not the stored LLM score"""
+    factory, _ = make_factory(db_session)
+    cache = SentimentCache(session_factory=factory)
+    key = url_hash(URLS[2])
+    cache.get_many([key])
+
+    cache.put(key, {'score': -0.5, 'confidence': 0.9, 'label': 'negative'})
+    hit = cache.get(key)
+    assert hit.sentiment_score == -0.5
+    assert hit.llm_score == 0.7 and hit.has_llm
+
+
+def test_lru_bound():
+    """Oldest entries are evicted past max_entries"""
+    cache = SentimentCache(max_entries=2, session_factory=lambda: None)
+    for i in range(3):
+        cache.put(str(i), {'score': 0.0})
+    assert cache.get("0") is None
+    assert cache.get("2") is not None
+
+
+def test_db_error_is_a_miss():
+    """A failing lookup returns no hits instead of raising into the collector"""
+    def broken():
+        raise RuntimeError("db down")
+
+    cache = SentimentCache(session_factory=broken)
+    assert cache.get_many(["abc"]) == {}
+
+
+class FakeFinBERT:
+    def __init__(self):
+        self.texts = []
+
+    def analyze(self, text):
+        self.texts.append(text)
+        return {'score': 0.3, 'confidence': 0.7, 'label': 'positive'}
+
+
+def make_analyzer(cache):
+    analyzer = MultilingualSentimentAnalyzer.__new__(MultilingualSentimentAnalyzer)
+    analyzer.ticker_symbol = 'AAPL'
+    analyzer.finbert = FakeFinBERT()
+    analyzer.finbert_available = True
+    analyzer.sentiment_cache = cache
+    return analyzer
+
+
+def test_analyzer_skips_finbert_for_known_urls(db_session):
+    """Prefetched URLs return the stored score, new URLs run FinBERT once"""
+    factory, _ = make_factory(db_session)
+    analyzer = make_analyzer(SentimentCache(session_factory=factory))
+    text = "Apple shares rise after strong quarterly earnings report"
+
+    assert analyzer.prefetch(URLS) == 3
+    known = analyzer.analyze_text(text, url=URLS[1])
+    assert known['cached'] and known['score'] == 0.1
+    assert analyzer.finbert.texts == []
+
+    fresh = analyzer.analyze_text(text, url=URLS[4])
+    again = analyzer.analyze_text(text, url=URLS[4])
+    assert fresh['score'] == again['score'] == 0.3
+    assert again['cached'] and len(analyzer.finbert.texts) == 1
@@ -0,0 +1,157 @@
+"""
+Test signals API /history
+Set-based P&L summary, keyset paging and batched direction results on in-memory SQLite
+"""
+
+import asyncio
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+import src.price_cache as price_cache
+from src.models import PriceData, Signal, SimulatedTrade
+from src.signals_api import _compute_direction_result, get_signal_history
+
+SYMBOLS = ['AAPL', 'MSFT', 'OTP.BD']
+T0 = datetime(2026, 3, 2, 13, 0)    # Monday, inside the US / BÉT sessions
+
+
+def _session_factory(db, seed: int = 25, n_signals: int = 240):
+    engine = db.get_bind()
+    factory = sessionmaker(bind=engine)
+    rnd = random.Random(seed)
+
+    for symbol in SYMBOLS:
+        for day in range(10):
+            start = T0.replace(hour=7) + timedelta(days=day)
+            price = rnd.uniform(50, 300)
+            for k in range(170):
+                if rnd.random() < 0.05:
+                    continue        # missing candles, tolerance branch
+                price *= 1 + rnd.uniform(-0.004, 0.004)
+                db.add(PriceData(ticker_symbol=symbol, interval='5m',
+                                 timestamp=start + timedelta(minutes=5 * k),
+                                 open=price, high=price, low=price, close=price, volume=100))
+
+    for i in range(n_signals):
+        created = T0 + timedelta(minutes=rnd.choice([0, 15]) + 30 * (i // 3) % (10 * 24 * 60))
+        decision = rnd.choice(['BUY', 'SELL', 'HOLD'])
+        status = rnd.choice(['active', 'active', 'archived', 'expired'])
+        db.add(Signal(id=i + 1, ticker_symbol=rnd.choice(SYMBOLS), decision=decision,
+                      strength='MODERATE', combined_score=rnd.uniform(-60, 60),
+                      overall_confidence=0.6, sentiment_score=0.0, technical_score=0.0,
+                      risk_score=0.0, status=status, created_at=created))
+    db.flush()
+
+    trade_id = 1
+    for signal in db.query(Signal).all():
+        for _ in range(rnd.choice([0, 0, 1, 1, 2])):
+            closed = rnd.random() < 0.7
+            db.add(SimulatedTrade(
+                id=trade_id, symbol=signal.ticker_symbol, direction='LONG',
+                status='CLOSED' if closed else 'OPEN', entry_signal_id=signal.id,
+                entry_signal_generated_at=signal.created_at,
+                entry_execution_time=signal.created_at, entry_price=100.0,
+                entry_score=1.0, entry_confidence=0.5, stop_loss_price=95.0,
+                take_profit_price=110.0, position_size_shares=10, position_value_huf=1000.0,
+                pnl_percent=rnd.choice([None, rnd.uniform(-3, 3)]) if closed else None,
+                pnl_amount_huf=rnd.choice([None, 0.0, rnd.uniform(-9000, 9000)]) if closed else None,
+            ))
+            trade_id += 1
+    db.commit()
+    db.close()
+    return engine, factory
+
+
+def _history(db, **kwargs):
+    params = dict(from_date=None, to_date=None, ticker_symbols=None, decisions=None,
+                  strengths=None, min_score=None, max_score=None, exit_reasons=None,
+                  limit=100, offset=0, cursor=None)
+    params.update(kwargs)
+    return asyncio.run(get_signal_history(db=db, **params))
+
+
+def _use_cache(monkeypatch, factory):
+    """Fresh signals API singleton cache on the test database"""
+    monkeypatch.setattr(price_cache, "_global_cache", price_cache.PriceCache(session_factory=factory))
+
+
+def test_summary_matches_python_loop(db_session, monkeypatch):
+    """pnl_summary and total equal a Python loop over the filtered signals' trades"""
+    engine, factory = _session_factory(db_session)
+    _use_cache(monkeypatch, factory)
+    db = factory()
+    for kwargs in ({}, {"decisions": ['BUY']}, {"ticker_symbols": ['aapl']}, {"min_score": 1000}):
+        got = _history(db, limit=5, **kwargs)
+        ids = [s["id"] for s in _history(db, limit=10_000, **kwargs)["signals"]]
+        trades = db.query(SimulatedTrade).filter(SimulatedTrade.entry_signal_id.in_(ids)).all()
+        closed = [t for t in trades if t.status == 'CLOSED']
+        huf = [t.pnl_amount_huf for t in closed if t.pnl_amount_huf is not None]
+        pct = [t.pnl_percent for t in closed if t.pnl_percent is not None]
+        summary = got["pnl_summary"]
+        assert got["total"] == len(ids)
+        assert summary["closed_count"] == len(closed)
+        assert summary["open_trade_ids"] == sorted(t.id for t in trades if t.status == 'OPEN')
+        assert summary["open_count"] == len(summary["open_trade_ids"])
+        if huf:
+            assert abs(summary["total_pnl_huf"] - sum(huf)) < 1e-6
+            expected = sum(huf) / len(closed) / 700_000 * 100
+            assert abs(summary["total_net_pnl_percent"] - expected) < 1e-9
+        else:
+            assert summary["total_pnl_huf"] is None and summary["total_net_pnl_percent"] is None
+        if pct:
+            assert abs(summary["total_pnl_percent"] - sum(pct)) < 1e-9
+        else:
+            assert summary["total_pnl_percent"] is None
+        wins = sum(1 for t in closed if (t.pnl_amount_huf or 0) >= 0)
+        assert summary["win_rate"] == (wins / len(closed) * 100 if closed else None)
+    db.close()
+
+
+def test_cursor_pages_match_full_order(db_session, monkeypatch):
+    """next_cursor pages concatenate to the full (created_at, id) DESC order, ties included"""
+    engine, factory = _session_factory(db_session)
+    _use_cache(monkeypatch, factory)
+    db = factory()
+    full = _history(db, limit=10_000)["signals"]
+    keys = [(s["created_at"], s["id"]) for s in full]
+    assert keys == sorted(keys, reverse=True)
+    assert len(set(s["created_at"] for s in full)) < len(full)     # some created_at ties
+
+    pages, cursor = [], None
+    while True:
+        page = _history(db, limit=7, cursor=cursor)
+        pages.extend(s["id"] for s in page["signals"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert pages == [s["id"] for s in full]
+    assert [s["id"] for s in _history(db, limit=7, offset=14)["signals"]] == pages[14:21]
+    db.close()
+
+
+def test_direction_results_batched(db_session, monkeypatch):
+    """direction_result equals the per-signal function, query count independent of page size"""
+    engine, factory = _session_factory(db_session)
+    statements = []
+    event.listen(engine, "before_cursor_execute",
+                 lambda conn, cur, stmt, *args: statements.append(stmt))
+    db = factory()
+
+    counts = {}
+    for limit in (60, 200):
+        _use_cache(monkeypatch, factory)
+        statements.clear()
+        page = _history(db, limit=limit)
+        counts[limit] = len(statements)
+
+        _use_cache(monkeypatch, factory)
+        for signal in page["signals"]:
+            created = datetime.fromisoformat(signal["created_at"].rstrip("Z"))
+            expected = _compute_direction_result(created, signal["ticker_symbol"], signal["decision"], db)
+            assert signal["direction_result"] == expected, signal["id"]
+        assert any(s["direction_result"] for s in page["signals"])
+    assert counts[200] == counts[60], counts
+    db.close()
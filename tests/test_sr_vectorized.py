@@ -0,0 +1,114 @@
+"""
+Test vectorized support/resistance detection
+Compares detect_support_resistance() against the previous bar-by-bar loop on tests/fixtures/sr_daily_*.csv
+"""
+
+from pathlib import Path
+
+import pandas as pd
+
+from src.technical_analyzer import build_sr_levels, detect_pivots, detect_support_resistance
+
+FIXTURES = sorted((Path(__file__).resolve().parent / 'fixtures').glob('sr_daily_*.csv'))
+
+# (lookback_days, proximity_pct, order, min_samples)
+PARAM_GRID = [
+    (180, 0.04, 7, 3),      # config default
+    (120, 0.02, 5, 2),
+    (250, 0.06, 3, 3),
+    (60,  0.03, 10, 2),
+    (90,  0.04, 1, 3),
+]
+
+
+def _load(path: Path) -> pd.DataFrame:
+    return pd.read_csv(path, index_col='Date', parse_dates=True)
+
+
+def _reference_pivots(recent_df: pd.DataFrame, order: int):
+    """The original iloc-slicing pivot loop."""
+    supports, resistances = [], []
+
+    def _scalar(val):
+        if isinstance(val, pd.Series):
+            return float(val.iloc[0])
+        return float(val)
+
+    for i in range(order, len(recent_df) - order):
+        left_window  = recent_df['Low'].iloc[i-order:i]
+        right_window = recent_df['Low'].iloc[i+1:i+order+1]
+        try:
+            current_float = _scalar(recent_df['Low'].iloc[i])
+            left_min      = _scalar(left_window.min())
+            right_min     = _scalar(right_window.min())
+        except Exception:
+            continue
+        if current_float < left_min and current_float < right_min:
+            supports.append(current_float)
+
+    for i in range(order, len(recent_df) - order):
+        left_window  = recent_df['High'].iloc[i-order:i]
+        right_window = recent_df['High'].iloc[i+1:i+order+1]
+        try:
+            current_float = _scalar(recent_df['High'].iloc[i])
+            left_max      = _scalar(left_window.max())
+            right_max     = _scalar(right_window.max())
+        except Exception:
+            continue
+        if current_float > left_max and current_float > right_max:
+            resistances.append(current_float)
+
+    return supports, resistances
+
+
+def _reference_sr(df: pd.DataFrame, lookback_days: int, proximity_pct: float,
+                  order: int, min_samples: int) -> dict:
+    recent_df = df.tail(lookback_days) if len(df) > lookback_days else df
+    current_price = float(recent_df['Close'].iloc[-1])
+    supports, resistances = _reference_pivots(recent_df, order)
+    return build_sr_levels(supports, resistances, current_price, proximity_pct, min_samples)
+
+
+def test_fixtures_present():
+    """Trend, tick-tie and NaN-gap fixtures are all there"""
+    assert len(FIXTURES) == 3, f"missing S/R fixtures: {FIXTURES}"
+
+
+def test_pivots_match_reference():
+    """Same pivots as the loop for every fixture and order"""
+    for path in FIXTURES:
+        df = _load(path)
+        for order in (1, 2, 3, 5, 7, 10):
+            expected = _reference_pivots(df, order)
+            got = detect_pivots(df['Low'], df['High'], order)
+            assert got == expected, f"{path.name} order={order}"
+
+
+def test_levels_match_reference():
+    """Same clustered levels across the parameter grid"""
+    for path in FIXTURES:
+        df = _load(path)
+        for lookback, proximity, order, min_samples in PARAM_GRID:
+            expected = _reference_sr(df, lookback, proximity, order, min_samples)
+            got = detect_support_resistance(df, lookback, proximity, order, min_samples)
+            assert got == expected, f"{path.name} {lookback}/{proximity}/{order}/{min_samples}"
+
+
+def test_levels_match_reference_every_day():
+    """Growing daily windows every 3 days, as the archive generator calls it"""
+    df = _load(FIXTURES[0])
+    params = PARAM_GRID[2]
+    for end in range(30, len(df) + 1, 3):
+        sub = df.iloc[:end]
+        assert detect_support_resistance(sub, *params) == _reference_sr(sub, *params), f"end={end}"
+
+
+def test_multiindex_columns_use_first_ticker():
+    """yfinance multi-ticker columns resolve to the first ticker"""
+    df = _load(FIXTURES[0])
+    other = df * 1.5
+    multi = pd.concat({'AAPL': df, 'MSFT': other}, axis=1).swaplevel(axis=1).sort_index(axis=1)
+    multi = multi[['Open', 'High', 'Low', 'Close', 'Volume']]
+    params = PARAM_GRID[2]
+    assert detect_support_resistance(multi, *params) == detect_support_resistance(df, *params)
+
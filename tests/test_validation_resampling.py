@@ -0,0 +1,107 @@
+"""
+Test optimizer.resampling kernels
+NumPy profit factor, window sum and bootstrap helpers against the old per-iteration loops in optimizer.validation
+"""
+
+import math
+import random
+
+import numpy as np
+import pytest
+
+from optimizer.resampling import (
+    as_pnl_array,
+    bootstrap_indices,
+    bootstrap_pf_diffs,
+    profit_factors,
+    sample_profit_factors,
+    window_sums,
+)
+from optimizer.validation import bootstrap_test
+
+
+def _reference_pf(pnls):
+    """The original validation._profit_factor()"""
+    gross_profit = sum(p for p in pnls if p > 0)
+    gross_loss = abs(sum(p for p in pnls if p < 0))
+    if gross_loss > 0:
+        return gross_profit / gross_loss
+    return 3.0 if gross_profit > 0 else 0.0
+
+
+def _random_pnls(rnd: random.Random, n: int, p_none: float = 0.0):
+    out = []
+    for _ in range(n):
+        r = rnd.random()
+        if r < p_none:
+            out.append(None)
+        elif r < p_none + 0.05:
+            out.append(0.0)
+        else:
+            out.append(round(rnd.uniform(-6, 8), 3))
+    return out
+
+
+def test_sample_profit_factors_match_reference():
+    """PF of index-matrix samples, including all-win, all-loss and empty samples"""
+    rnd = random.Random(24)
+    cases = [[], [1.5, 2.0], [-1.0, -0.5], [0.0, 0.0], _random_pnls(rnd, 300, p_none=0.3)]
+    for pnls in cases:
+        arr = as_pnl_array(pnls)
+        n = max(1, len(arr))
+        idx = np.random.default_rng(1).integers(0, n, size=(50, n)) if len(arr) else np.zeros((50, 0), int)
+        got = sample_profit_factors(arr, idx)
+        for row, value in zip(idx, got):
+            sample = [pnls[i] for i in row if pnls[i] is not None]
+            assert math.isclose(value, _reference_pf(sample), rel_tol=1e-12), pnls[:5]
+
+
+def test_profit_factors_fallbacks():
+    """No losses gives 3.0, no trades gives 0.0"""
+    got = profit_factors(np.array([4.0, 2.0, 0.0]), np.array([2.0, 0.0, 0.0]))
+    assert got.tolist() == [2.0, 3.0, 0.0]
+
+
+def test_block_indices_are_contiguous():
+    """Block bootstrap rows are runs of consecutive (wrapping) indices"""
+    rng = np.random.default_rng(7)
+    idx = bootstrap_indices(rng, 23, 40, block_size=5)
+    assert idx.shape == (40, 23)
+    assert idx.min() >= 0 and idx.max() < 23
+    for row in idx:
+        for b in range(0, 23, 5):
+            block = row[b:b + 5]
+            assert all((block[j + 1] - block[j]) % 23 == 1 for j in range(len(block) - 1))
+
+
+def test_window_sums_match_loop():
+    """[start, end) window sums equal the slicing loop"""
+    rnd = random.Random(3)
+    pnls = _random_pnls(rnd, 500, p_none=0.4)
+    starts, ends = [0, 17, 250, 499, 100], [17, 250, 500, 500, 100]
+    got = window_sums(as_pnl_array(pnls), starts, ends)
+    for i, (s, e) in enumerate(zip(starts, ends)):
+        active = [p for p in pnls[s:e] if p is not None]
+        assert math.isclose(got["gross_profit"][i], sum(p for p in active if p > 0), abs_tol=1e-9)
+        assert math.isclose(got["gross_loss"][i], sum(abs(p) for p in active if p <= 0), abs_tol=1e-9)
+        assert got["wins"][i] == sum(1 for p in active if p > 0)
+        assert got["total"][i] == len(active)
+
+
+def test_bootstrap_seeded_and_paired():
+    """Seeded runs repeat, paired sampling of identical series gives zero diffs"""
+    rnd = random.Random(11)
+    base = as_pnl_array(_random_pnls(rnd, 400, p_none=0.3))
+    prop = as_pnl_array(_random_pnls(rnd, 400, p_none=0.3))
+
+    a = bootstrap_pf_diffs(base, prop, 3000, rng_seed=5, block_size=4)
+    b = bootstrap_pf_diffs(base, prop, 3000, rng_seed=5, block_size=4)
+    assert np.array_equal(a, b) and len(a) == 3000
+
+    # paired sampling of identical series: every difference is exactly 0
+    assert not bootstrap_pf_diffs(base, base, 500, paired=True).any()
+    result = bootstrap_test(base, base, n_iterations=500, paired=True)
+    assert result["p_value"] == 1.0 and not result["significant"]
+
+    with pytest.raises(ValueError):
+        bootstrap_pf_diffs(base, prop[:-1], 10, paired=True)